@@ -0,0 +1 @@
+"""性能基准脚本，逐个以 `python -m benchmarks.<name>` 运行"""
@@ -0,0 +1,239 @@
+"""可复现的合成数据集：按规模生成与桌面端 schema 一致的 tasks.db
+
+表结构由 DatabaseManager.init_database 创建，数据按固定随机种子批量写入，同一规格与种子
+每次生成的内容相同。生成结果按规格缓存在数据目录里，重复运行基准时直接复用。
+
+运行：python -m benchmarks.dataset --preset 10k --data-dir benchmarks/.data
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+# 生成规则变化时递增，旧的缓存文件自然失效
+GENERATOR_VERSION = 1
+DEFAULT_SEED = 20260101
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+
+# 合成数据的"现在"：创建时间都在它之前，到期日分布在它前后，定时任务约一半已到触发时间
+REFERENCE_NOW = datetime(2026, 1, 1, 9, 0, 0)
+SEARCH_KEYWORD = "报告"
+
+_WORDS = ["整理", "季度", "客户", "需求", "评审", "周会", "预算", "合同", "设计", "测试", "部署", "文档", "采购", "培训", "复盘"]
+_FIELDS = ["text", "notes", "due_date", "urgency", "importance", "directory"]
+_LEVELS = ["低", "中", "高"]
+_COLORS = ["#4ECDC4", "#FF6B6B", "#FFD93D", "#6BCB77", "#4D96FF"]
+_FREQUENCIES = ["daily", "weekly", "monthly", "quarterly", "yearly"]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """
+    一个数据集的规模
+
+    任务按 60% 已完成、10% 已删除、30% 未完成分布；除 unsynced_tasks 个未完成任务外都已同步。
+    历史行的 1/50 集中在第一个任务上（深分页），其余平均分给其它任务。
+    """
+
+    tasks: int
+    history_rows: int
+    scheduled_tasks: int
+    unsynced_tasks: int = 0
+
+
+PRESETS = {
+    "1k": DatasetSpec(tasks=1_000, history_rows=20_000, scheduled_tasks=100, unsynced_tasks=50),
+    "10k": DatasetSpec(tasks=10_000, history_rows=200_000, scheduled_tasks=1_000, unsynced_tasks=200),
+    "100k": DatasetSpec(tasks=100_000, history_rows=2_000_000, scheduled_tasks=10_000, unsynced_tasks=500),
+}
+
+
+def task_id(index: int) -> str:
+    return f"task-{index:07d}"
+
+
+HOT_HISTORY_TASK_ID = task_id(0)
+
+
+def _task_rows(spec: DatasetSpec, rng: random.Random):
+    unsynced = 0
+    for index in range(spec.tasks):
+        created = REFERENCE_NOW - timedelta(minutes=rng.randrange(3 * 365 * 24 * 60))
+        bucket = index % 10
+        completed = bucket < 6
+        deleted = bucket == 6
+        is_open = not completed and not deleted
+        due = created + timedelta(days=rng.randrange(1, 60)) if rng.random() < 0.7 else None
+        words = rng.sample(_WORDS, 3)
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(4), SEARCH_KEYWORD)
+        updated = min(created + timedelta(days=rng.randrange(0, 30)), REFERENCE_NOW)
+        sync_status = "synced"
+        if is_open and unsynced < spec.unsynced_tasks:
+            sync_status = "modified"
+            unsynced += 1
+        yield (
+            task_id(index),
+            rng.choice(_COLORS),
+            rng.randrange(20, 900),
+            rng.randrange(20, 600),
+            completed,
+            updated.strftime("%Y-%m-%d") if completed else "",
+            deleted,
+            created.isoformat(),
+            updated.isoformat(),
+            "".join(words),
+            "备注 " * rng.randrange(0, 8),
+            due.strftime("%Y-%m-%d") if due else "",
+            "",
+            rng.choice(_LEVELS),
+            rng.choice(_LEVELS),
+            "",
+            created.strftime("%Y-%m-%d"),
+            sync_status,
+            due.strftime("%Y-%m-%d") if due else None,
+            created.strftime("%Y-%m-%d"),
+        )
+
+
+def _history_rows(spec: DatasetSpec, rng: random.Random):
+    if not spec.tasks or not spec.history_rows:
+        return
+    hot_rows = spec.history_rows // 50 if spec.tasks > 1 else spec.history_rows
+    start = REFERENCE_NOW - timedelta(days=3 * 365)
+    # 主键是 (task_id, field_name, timestamp)，时间戳按行号递增保证唯一
+    for offset in range(hot_rows):
+        yield (HOT_HISTORY_TASK_ID, rng.choice(_FIELDS), f"值 {offset}", "update",
+               (start + timedelta(seconds=offset * 7)).isoformat())
+    remaining = spec.history_rows - hot_rows
+    for offset in range(remaining):
+        index = 1 + offset % (spec.tasks - 1)
+        yield (task_id(index), rng.choice(_FIELDS), f"值 {offset}", "create" if offset < spec.tasks else "update",
+               (start + timedelta(seconds=offset * 13)).isoformat())
+
+
+def _scheduled_rows(spec: DatasetSpec, rng: random.Random):
+    for index in range(spec.scheduled_tasks):
+        created = REFERENCE_NOW - timedelta(days=rng.randrange(30, 400))
+        next_run = REFERENCE_NOW + timedelta(hours=rng.randrange(-72, 72))
+        yield (
+            f"schedule-{index:06d}",
+            f"定时{rng.choice(_WORDS)}{index}",
+            "中",
+            rng.choice(_LEVELS),
+            rng.choice(_LEVELS),
+            "",
+            "",
+            rng.randrange(0, 7),
+            _FREQUENCIES[index % len(_FREQUENCIES)],
+            None, None, None, None, None,
+            next_run.isoformat(),
+            index % 10 != 0,
+            False,
+            created.isoformat(),
+            created.isoformat(),
+        )
+
+
+def _insert_batches(conn: sqlite3.Connection, sql: str, rows, batch_size: int = 50_000) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def create_schema(db_path: str) -> None:
+    """用 DatabaseManager 建表建索引，保证与桌面端当前 schema 完全一致"""
+    from database.database_manager import DatabaseManager
+
+    manager = DatabaseManager(db_path=db_path, flush_interval=0)
+    manager.close_connection()
+
+
+def generate_dataset(db_path: str, spec: DatasetSpec, seed: int = DEFAULT_SEED) -> None:
+    """在 db_path 生成数据集；文件已存在时覆盖"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    create_schema(os.path.abspath(db_path))
+    rng = random.Random(seed)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        # 先删二级索引、批量写入后再按原定义重建，比逐行维护索引快得多
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _sql in indexes:
+            conn.execute(f"DROP INDEX {name}")
+
+        _insert_batches(conn, """
+            INSERT INTO tasks (id, color, position_x, position_y, completed, completed_date, deleted,
+                               created_at, updated_at, text, notes, due_date, priority, urgency, importance,
+                               directory, create_date, sync_status, due_date_iso, create_date_iso)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, _task_rows(spec, rng))
+        _insert_batches(conn, """
+            INSERT INTO task_history (task_id, field_name, field_value, action, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, _history_rows(spec, rng))
+        _insert_batches(conn, """
+            INSERT INTO scheduled_tasks (id, title, priority, urgency, importance, notes, due_date, due_offset_days,
+                                         frequency, week_day, month_day, quarter_day, year_month, year_day,
+                                         next_run_at, active, deleted, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, _scheduled_rows(spec, rng))
+
+        for _name, sql in indexes:
+            conn.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def dataset_path(data_dir: str, name: str, spec: DatasetSpec, seed: int = DEFAULT_SEED) -> str:
+    digest = "-".join(str(value) for value in asdict(spec).values())
+    return os.path.join(data_dir, f"tasks-{name}-{digest}-s{seed}-v{GENERATOR_VERSION}.db")
+
+
+def ensure_dataset(data_dir: str, name: str, spec: DatasetSpec, seed: int = DEFAULT_SEED) -> str:
+    """返回数据集文件路径，缓存中没有时先生成（先写临时文件，完成后再改名）"""
+    path = dataset_path(data_dir, name, spec, seed)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        partial = f"{path}.partial"
+        generate_dataset(partial, spec, seed)
+        os.replace(partial, path)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="1k", help="数据集规模")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="数据集缓存目录")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="随机种子")
+    args = parser.parse_args()
+
+    spec = PRESETS[args.preset]
+    started = time.perf_counter()
+    path = ensure_dataset(args.data_dir, args.preset, spec, args.seed)
+    print(json.dumps({
+        "path": path,
+        "spec": asdict(spec),
+        "seconds": round(time.perf_counter() - started, 2),
+        "bytes": os.path.getsize(path),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""甘特图 /tasks 吞吐基准：用 Flask 测试客户端对比缓存未命中、命中与 304 三种路径
+
+运行：python -m benchmarks.gantt_tasks --tasks 2000 --requests 200
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from gantt import app as gantt_module
+
+
+def create_tasks_db(db_path: str, task_count: int, iso_columns: bool = False, span_days: int = 365) -> None:
+    """
+    生成甘特图读取的最小 tasks 表：约 1/4 已完成、1/20 已删除、1/3 没有到期日
+
+    iso_columns=True 时同桌面端 schema 一样带 due_date_iso / create_date_iso 及其索引，
+    创建日期均匀分布在 2026-01-01 起的 span_days 天内。
+    """
+    conn = sqlite3.connect(db_path)
+    iso_sql = ", due_date_iso TEXT, create_date_iso TEXT" if iso_columns else ""
+    conn.execute(
+        f"""
+        CREATE TABLE tasks (
+            id TEXT PRIMARY KEY, text TEXT, notes TEXT, create_date TEXT,
+            due_date TEXT, completed INTEGER, deleted INTEGER, color TEXT{iso_sql}
+        )
+        """
+    )
+    base = date(2026, 1, 1)
+    rows = []
+    for index in range(task_count):
+        created = base + timedelta(days=index * span_days // max(task_count, 1))
+        due = created + timedelta(days=index % 21 + 1) if index % 3 else None
+        row = (
+            f"task-{index}",
+            f"任务 {index}",
+            "备注内容" * (index % 5),
+            created.strftime("%Y/%m/%d 09:00:00"),
+            due.isoformat() if due else None,
+            1 if index % 4 == 0 else 0,
+            1 if index % 20 == 0 else 0,
+            "#FF6B6B",
+        )
+        if iso_columns:
+            row += (due.isoformat() if due else None, created.isoformat())
+        rows.append(row)
+    conn.executemany(f"INSERT INTO tasks VALUES ({', '.join('?' * len(rows[0]))})", rows)
+    if iso_columns:
+        conn.execute("CREATE INDEX idx_tasks_due_create_iso ON tasks(due_date_iso, create_date_iso)")
+        conn.execute("CREATE INDEX idx_tasks_create_date_iso ON tasks(create_date_iso)")
+        conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def _measure(client, requests: int, headers=None, before_request=None):
+    started = time.perf_counter()
+    size = 0
+    for _ in range(requests):
+        if before_request:
+            before_request()
+        response = client.get("/tasks", headers=headers or {})
+        size = len(response.data)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, elapsed / requests * 1000, size
+
+
+def run(task_count: int, requests: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "tasks.db")
+        create_tasks_db(db_path, task_count)
+        with patch.object(gantt_module, "DB_PATH", db_path):
+            client = gantt_module.gantt_app.test_client()
+            try:
+                warm = client.get("/tasks", headers={"Accept-Encoding": "gzip"})
+                etag = warm.headers["ETag"]
+                results = {
+                    # 每次都重新查询、映射与序列化（相当于数据每次都有变化）
+                    "miss": _measure(client, requests, before_request=gantt_module._read_pool.invalidate),
+                    "hit": _measure(client, requests),
+                    "hit_gzip": _measure(client, requests, headers={"Accept-Encoding": "gzip"}),
+                    "not_modified": _measure(
+                        client, requests, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+                    ),
+                }
+            finally:
+                gantt_module.close_read_connection()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000, help="生成的任务数")
+    parser.add_argument("--requests", type=int, default=200, help="每种路径的请求数")
+    args = parser.parse_args()
+
+    results = run(args.tasks, args.requests)
+    print(f"/tasks 基准：{args.tasks} 个任务，每种路径 {args.requests} 次请求")
+    for name, (throughput, latency_ms, size) in results.items():
+        print(f"  {name:<13} {throughput:9.1f} req/s  {latency_ms:7.2f} ms/req  {size:8d} bytes")
+
+
+if __name__ == "__main__":
+    main()
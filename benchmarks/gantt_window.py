@@ -0,0 +1,72 @@
+"""甘特图 /tasks 窗口查询基准：不同窗口跨度下首页的响应时间与响应体大小，对比全量 /tasks
+
+运行：python -m benchmarks.gantt_window --tasks 20000 --requests 50
+"""
+
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from benchmarks.gantt_tasks import create_tasks_db
+from gantt import app as gantt_module
+
+WINDOW_DAYS = (7, 30, 90, 365)
+
+
+def _measure(client, url: str, requests: int, cold: bool):
+    """返回 (平均耗时 ms, 响应体字节数, gzip 后字节数, 本页任务数, 是否还有下一页)"""
+    started = time.perf_counter()
+    for _ in range(requests):
+        if cold:
+            # 每次都重新查询与序列化
+            gantt_module._read_pool.invalidate()
+        response = client.get(url)
+    elapsed_ms = (time.perf_counter() - started) / requests * 1000
+    body = response.data
+    data = json.loads(body)
+    tasks = data if isinstance(data, list) else data["tasks"]
+    has_more = not isinstance(data, list) and data["next_cursor"] is not None
+    return elapsed_ms, len(body), len(gzip.compress(body, 6)), len(tasks), has_more
+
+
+def run(task_count: int, requests: int, limit: int, span_days: int) -> dict:
+    center = date(2026, 1, 1) + timedelta(days=span_days // 2)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "tasks.db")
+        create_tasks_db(db_path, task_count, iso_columns=True, span_days=span_days)
+        with patch.object(gantt_module, "DB_PATH", db_path):
+            client = gantt_module.gantt_app.test_client()
+            try:
+                results = {}
+                for days in WINDOW_DAYS:
+                    start = center - timedelta(days=days // 2)
+                    url = f"/tasks?from={start.isoformat()}&to={(start + timedelta(days=days - 1)).isoformat()}&limit={limit}"
+                    results[f"{days}d"] = (_measure(client, url, requests, cold=True), _measure(client, url, requests, cold=False))
+                results["all"] = (_measure(client, "/tasks", requests, cold=True), _measure(client, "/tasks", requests, cold=False))
+            finally:
+                gantt_module.close_read_connection()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000, help="生成的任务数")
+    parser.add_argument("--requests", type=int, default=50, help="每个窗口的请求数")
+    parser.add_argument("--limit", type=int, default=gantt_module.WINDOW_PAGE_SIZE, help="每页条数")
+    parser.add_argument("--span-days", type=int, default=3 * 365, help="任务创建日期分布的天数")
+    args = parser.parse_args()
+
+    results = run(args.tasks, args.requests, args.limit, args.span_days)
+    print(f"/tasks 窗口基准：{args.tasks} 个任务分布在 {args.span_days} 天内，limit={args.limit}，每个窗口 {args.requests} 次请求")
+    print(f"  {'窗口':<6} {'未命中 ms':>10} {'命中 ms':>9} {'bytes':>9} {'gzip':>8} {'任务数':>6}  还有下一页")
+    for name, ((miss_ms, size, gzip_size, count, has_more), (hit_ms, *_rest)) in results.items():
+        print(f"  {name:<6} {miss_ms:10.2f} {hit_ms:9.2f} {size:9d} {gzip_size:8d} {count:6d}  {'是' if has_more else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""启动导入耗时基准：在全新子进程中用 python -X importtime 导入 main，统计关键模块的累计导入耗时
+
+每轮启动一个新的解释器（QT_QPA_PLATFORM=offscreen），解析 -X importtime 输出中各模块的累计耗时（含其依赖），
+取多轮中位数；同时检查首次使用才导入的模块（对话框、远程配置、导出、requests、flask）没有被启动路径加载，
+一旦被加载进程以状态码 1 退出。
+
+运行：python -m benchmarks.startup_imports --runs 5 --output benchmarks/results/startup_imports.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 报告累计耗时的模块；main 即冷启动的全部导入开销
+TRACKED_MODULES = (
+    "main",
+    "qfluentwidgets",
+    "config.config_manager",
+    "database.database_manager",
+    "core.quadrant_widget",
+    "core.scheduler",
+)
+
+# 启动路径不应加载的模块
+DEFERRED_MODULES = (
+    "requests",
+    "flask",
+    "config.remote_config",
+    "core.add_task_dialog",
+    "core.settings_dialog",
+    "core.scheduled_task_dialog",
+    "core.task_exporter",
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """解析 -X importtime 输出，返回 模块名 -> 累计耗时（ms）；同一模块只会出现一次"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # 表头行
+        cumulative[parts[2].strip()] = cumulative_us / 1000
+    return cumulative
+
+
+def measure_once(module: str = "main") -> dict:
+    """在新进程中导入 module 一次，返回各模块累计耗时与被加载的延迟模块"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    probe = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([name for name in {DEFERRED_MODULES!r} if name in sys.modules]))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return {
+        "cumulative_ms": parse_importtime(completed.stderr),
+        "loaded_deferred": json.loads(completed.stdout.strip().splitlines()[-1]),
+    }
+
+
+def run_benchmark(runs: int = 5, module: str = "main") -> dict:
+    samples = [measure_once(module) for _ in range(runs)]
+    modules = {}
+    for name in TRACKED_MODULES:
+        values = sorted(sample["cumulative_ms"][name] for sample in samples if name in sample["cumulative_ms"])
+        if not values:
+            continue
+        modules[name] = {
+            "runs": len(values),
+            "min_ms": round(values[0], 3),
+            "median_ms": round(statistics.median(values), 3),
+            "max_ms": round(values[-1], 3),
+        }
+    loaded = sorted({name for sample in samples for name in sample["loaded_deferred"]})
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {"runs": runs, "module": module},
+        "modules": modules,
+        "loaded_deferred": loaded,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="启动子进程的轮数")
+    parser.add_argument("--output", help="结果 JSON 路径，不指定则只打印")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.runs)
+    print(f"  {'模块':<28} {'中位 ms':>10} {'最小 ms':>10} {'最大 ms':>10}")
+    for name, stats in results["modules"].items():
+        print(f"  {name:<28} {stats['median_ms']:10.2f} {stats['min_ms']:10.2f} {stats['max_ms']:10.2f}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    if results["loaded_deferred"]:
+        print(f"启动路径加载了应延迟导入的模块: {', '.join(results['loaded_deferred'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
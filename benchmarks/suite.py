@@ -0,0 +1,336 @@
+"""DatabaseManager 性能基准套件：在合成数据集上计时启动加载、查询、flush、定时任务生成与同步，结果写成 JSON
+
+每个数据集复制到临时目录后运行，不改动缓存的数据集文件。结果可用 --compare 与上一次的 JSON 对比，
+中位数超过基线 (1 + tolerance) 倍且绝对差不小于 min_delta_ms 的项视为回归，进程以状态码 1 退出。
+
+运行：python -m benchmarks.suite --datasets 1k,10k --repeat 5 --output benchmarks/results/latest.json
+      python -m benchmarks.suite --datasets 1k --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, fields
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from benchmarks.dataset import (
+    DEFAULT_DATA_DIR,
+    DEFAULT_SEED,
+    HOT_HISTORY_TASK_ID,
+    PRESETS,
+    REFERENCE_NOW,
+    SEARCH_KEYWORD,
+    DatasetSpec,
+    ensure_dataset,
+)
+from benchmarks.sync_stub import SyncStubServer
+from database.database_manager import DatabaseManager, history_row_cursor
+
+RESULTS_SCHEMA_VERSION = 1
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "latest.json")
+DIRTY_SET_SIZES = (1, 100, 1000, 10000)
+PAGE_SIZE = 100
+
+
+def _stats(samples_ms, **extra) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "max_ms": round(ordered[-1], 3),
+        **extra,
+    }
+
+
+def _time_calls(func, repeat: int, before=None):
+    """调用 func repeat 次，返回 (每次耗时 ms 列表, 最后一次的返回值)；before 在计时之外执行"""
+    samples, result = [], None
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+def _open_manager(db_path: str, remote_config=None) -> DatabaseManager:
+    return DatabaseManager(db_path=db_path, remote_config=remote_config or {}, flush_interval=0)
+
+
+def _bench_cache_load(db_path: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        manager = _open_manager(db_path)
+        samples.append((time.perf_counter() - started) * 1000)
+        tasks = manager.count_all_tasks()
+        manager.close_connection()
+    return {"cache_load": _stats(samples, tasks=tasks)}
+
+
+def _bench_queries(manager: DatabaseManager, repeat: int) -> dict:
+    results = {}
+
+    def cold():
+        # 丢弃查询结果缓存，每次都走 SQL
+        manager._bump_write_generation()
+
+    samples, tasks = _time_calls(manager.load_tasks, repeat)
+    results["load_tasks"] = _stats(samples, rows=len(tasks))
+
+    completed_total = manager.count_completed_tasks()
+    samples, (page, total) = _time_calls(lambda: manager.load_completed_tasks_page_with_total(PAGE_SIZE, 0), repeat, cold)
+    results["archive_page"] = _stats(samples, rows=len(page), total=total)
+    deep_offset = max(completed_total // 2 // PAGE_SIZE * PAGE_SIZE, 0)
+    samples, page = _time_calls(lambda: manager.load_completed_tasks_page(PAGE_SIZE, deep_offset), repeat, cold)
+    results["archive_page_deep"] = _stats(samples, rows=len(page), offset=deep_offset)
+    samples, _count = _time_calls(manager.count_completed_tasks, repeat, cold)
+    results["archive_count"] = _stats(samples, total=completed_total)
+    samples, page = _time_calls(lambda: manager.load_completed_tasks_page(PAGE_SIZE, 0, SEARCH_KEYWORD), repeat, cold)
+    results["archive_search"] = _stats(samples, rows=len(page))
+    samples, count = _time_calls(lambda: manager.count_completed_tasks(SEARCH_KEYWORD), repeat, cold)
+    results["archive_search_count"] = _stats(samples, total=count)
+
+    def forget_history_count():
+        with manager._query_cache_lock:
+            manager._history_counts.pop(HOT_HISTORY_TASK_ID, None)
+
+    samples, history_total = _time_calls(lambda: manager.count_task_history(HOT_HISTORY_TASK_ID), repeat, forget_history_count)
+    results["history_count"] = _stats(samples, total=history_total)
+    samples, rows = _time_calls(lambda: manager.get_task_history_rows(HOT_HISTORY_TASK_ID, PAGE_SIZE), repeat, cold)
+    results["history_first_page"] = _stats(samples, rows=len(rows))
+    middle = history_total // 2
+    if middle:
+        # 键集游标定位到中间一页；对照旧的 OFFSET 分页
+        before_middle = manager.get_task_history_rows(HOT_HISTORY_TASK_ID, middle, use_cache=False)
+        cursor = history_row_cursor(before_middle[-1])
+        samples, rows = _time_calls(
+            lambda: manager.get_task_history_rows(HOT_HISTORY_TASK_ID, PAGE_SIZE, after=cursor), repeat, cold
+        )
+        results["history_deep_page"] = _stats(samples, rows=len(rows), position=middle)
+        samples, _page = _time_calls(lambda: manager.get_task_history_page(HOT_HISTORY_TASK_ID, PAGE_SIZE, middle), repeat)
+        results["history_deep_offset"] = _stats(samples, position=middle)
+    return results
+
+
+def _bench_flush(manager: DatabaseManager, repeat: int) -> dict:
+    results = {}
+    open_tasks = manager.load_tasks(include_completed_today=False)
+    edits = iter(range(10 ** 9))
+    for size in DIRTY_SET_SIZES:
+        if size > len(open_tasks):
+            break
+        targets = open_tasks[:size]
+
+        def dirty():
+            edit = next(edits)
+            for task in targets:
+                manager.save_task(dict(task, text=f"{task['text']} #{edit}"))
+
+        samples, _result = _time_calls(manager.flush_cache_to_db, repeat, dirty)
+        results[f"flush_dirty_{size}"] = _stats(samples, dirty_tasks=size)
+    return results
+
+
+def _bench_scheduler_spawn(manager: DatabaseManager) -> dict:
+    from core import scheduler as scheduler_module
+
+    with patch.object(scheduler_module, "get_db_manager", return_value=manager):
+        scheduler = scheduler_module.TaskScheduler()
+    # 生成会推进 next_run_at，同一时刻再次检查不会重复生成，因此只计时一次
+    samples, spawned = _time_calls(lambda: scheduler.check_and_spawn_scheduled_tasks(REFERENCE_NOW), 1)
+    return {"scheduler_spawn": _stats(samples, spawned=spawned)}
+
+
+def _bench_sync(db_path: str, repeat: int) -> dict:
+    results = {}
+    with SyncStubServer() as stub:
+        manager = _open_manager(db_path, stub.remote_config())
+        try:
+            local_tasks = manager.load_tasks(all_tasks=True)
+            stub.tasks.update(
+                (task["id"], task) for task in local_tasks if task.get("sync_status") == "synced"
+            )
+            unsynced = len(local_tasks) - len(stub.tasks)
+
+            requests_before = stub.request_count
+            samples, ok = _time_calls(manager.sync_to_server, 1)
+            results["sync_upload"] = _stats(samples, tasks=unsynced, requests=stub.request_count - requests_before, ok=ok)
+
+            # 远端改动若干任务（更新时间晚于本地），首次下行同步会逐个合并
+            remote_updated_at = (REFERENCE_NOW + timedelta(days=1)).isoformat()
+            changed = sorted(stub.tasks)[:max(unsynced, 1)]
+            for task_id in changed:
+                stub.tasks[task_id] = dict(stub.tasks[task_id], text=f"{stub.tasks[task_id]['text']}（远程）",
+                                           updated_at=remote_updated_at)
+            samples, ok = _time_calls(manager.sync_from_server, 1)
+            results["sync_download_changes"] = _stats(samples, tasks=len(stub.tasks), changed=len(changed), ok=ok)
+            samples, ok = _time_calls(manager.sync_from_server, repeat)
+            results["sync_download_unchanged"] = _stats(samples, tasks=len(stub.tasks), ok=ok)
+        finally:
+            manager.close_connection()
+    return results
+
+
+def run_dataset(name: str, spec: DatasetSpec, data_dir: str, repeat: int, seed: int = DEFAULT_SEED) -> dict:
+    """在一个数据集的副本上运行全部基准，返回 {dataset, benchmarks}"""
+    started = time.perf_counter()
+    source = ensure_dataset(data_dir, name, spec, seed)
+    generate_seconds = time.perf_counter() - started
+    benchmarks = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "tasks.db")
+        shutil.copyfile(source, db_path)
+
+        benchmarks.update(_bench_cache_load(db_path, repeat))
+        manager = _open_manager(db_path)
+        try:
+            benchmarks.update(_bench_queries(manager, repeat))
+            benchmarks.update(_bench_flush(manager, repeat))
+            benchmarks.update(_bench_scheduler_spawn(manager))
+        finally:
+            manager.close_connection()
+        # 同步在一份新副本上运行，上传量只取决于数据集，不受前面 flush 与定时任务生成的影响
+        sync_path = os.path.join(workdir, "tasks-sync.db")
+        shutil.copyfile(source, sync_path)
+        benchmarks.update(_bench_sync(sync_path, repeat))
+    return {
+        "dataset": {**asdict(spec), "seed": seed, "bytes": os.path.getsize(source),
+                    "prepare_seconds": round(generate_seconds, 2)},
+        "benchmarks": benchmarks,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+    }
+
+
+def run_suite(datasets: dict, data_dir: str = DEFAULT_DATA_DIR, repeat: int = 5, seed: int = DEFAULT_SEED) -> dict:
+    """
+    运行基准套件，datasets 为 名称 -> DatasetSpec
+
+    运行期间屏蔽 INFO 及以下日志：DatabaseManager 每条历史都会写 INFO 日志，输出到终端的开销会掩盖被测代码。
+    """
+    logging.disable(logging.INFO)
+    try:
+        results = {name: run_dataset(name, spec, data_dir, repeat, seed) for name, spec in datasets.items()}
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": {"repeat": repeat, "seed": seed},
+        "datasets": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.25, min_delta_ms: float = 1.0) -> list:
+    """
+    找出相对基线变慢的基准项
+
+    只比较两边都有、且数据集规格相同的项；中位数超过基线 (1 + tolerance) 倍并且绝对差不小于
+    min_delta_ms 才算回归，避免亚毫秒级的抖动误报。
+    """
+    regressions = []
+    for name, entry in current.get("datasets", {}).items():
+        base_entry = baseline.get("datasets", {}).get(name)
+        if not base_entry:
+            continue
+        spec_keys = [field.name for field in fields(DatasetSpec)] + ["seed"]
+        if any(base_entry["dataset"].get(key) != entry["dataset"].get(key) for key in spec_keys):
+            continue
+        for bench, stats in entry["benchmarks"].items():
+            base = base_entry["benchmarks"].get(bench)
+            if not base:
+                continue
+            delta = stats["median_ms"] - base["median_ms"]
+            if stats["median_ms"] > base["median_ms"] * (1 + tolerance) and delta >= min_delta_ms:
+                regressions.append({
+                    "dataset": name,
+                    "benchmark": bench,
+                    "baseline_ms": base["median_ms"],
+                    "current_ms": stats["median_ms"],
+                    "ratio": round(stats["median_ms"] / base["median_ms"], 2) if base["median_ms"] else None,
+                })
+    return regressions
+
+
+def _print_summary(results: dict) -> None:
+    for name, entry in results["datasets"].items():
+        spec = entry["dataset"]
+        print(f"[{name}] {spec['tasks']} 个任务，{spec['history_rows']} 条历史，{spec['scheduled_tasks']} 个定时任务")
+        print(f"  {'基准':<26} {'中位 ms':>10} {'最小 ms':>10} {'最大 ms':>10}")
+        for bench, stats in entry["benchmarks"].items():
+            print(f"  {bench:<26} {stats['median_ms']:10.2f} {stats['min_ms']:10.2f} {stats['max_ms']:10.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", default="1k,10k", help=f"逗号分隔的数据集规模，可选 {', '.join(PRESETS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="数据集随机种子")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="数据集缓存目录")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果 JSON 路径")
+    parser.add_argument("--compare", help="作为基线对比的结果 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的中位数相对增幅")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="计为回归的最小绝对增幅（毫秒）")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PRESETS]
+    if unknown:
+        parser.error(f"未知的数据集规模: {', '.join(unknown)}")
+
+    results = run_suite({name: PRESETS[name] for name in names}, args.data_dir, args.repeat, args.seed)
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    _print_summary(results)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.tolerance, args.min_delta_ms)
+        for item in regressions:
+            print(f"回归 [{item['dataset']}] {item['benchmark']}: {item['baseline_ms']} ms -> {item['current_ms']} ms")
+        if regressions:
+            return 1
+        print("没有超过阈值的回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
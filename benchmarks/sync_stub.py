@@ -0,0 +1,92 @@
+"""基准用的本地同步服务桩：在 127.0.0.1 临时端口上实现桌面端同步用到的 /api 接口，数据只存在内存里"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_API_TOKEN = "benchmark-token"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+        pass
+
+    def _send(self, status: int, payload=None) -> None:
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _route(self, method: str) -> None:
+        stub = self.server.stub
+        stub.request_count += 1
+        parts = [part for part in self.path.split("?", 1)[0].split("/") if part]
+        if parts == ["api", "health"]:
+            return self._send(200, {"status": "ok"})
+        if parts[:1] != ["api"] or self.headers.get("Authorization") != f"Bearer {STUB_API_TOKEN}":
+            return self._send(401, {"error": "Unauthorized"})
+
+        collection = {"tasks": stub.tasks, "scheduled_tasks": stub.scheduled_tasks}.get(parts[1] if len(parts) > 1 else "")
+        if collection is None:
+            return self._send(404, {"error": "Not Found"})
+        with stub.lock:
+            if len(parts) == 2 and method == "GET":
+                return self._send(200, {parts[1]: list(collection.values()), "count": len(collection)})
+            if len(parts) == 2 and method == "POST":
+                record = self._read_json()
+                collection[record["id"]] = record
+                return self._send(201, {"id": record["id"]})
+            if len(parts) == 3 and method == "DELETE":
+                collection.pop(parts[2], None)
+                return self._send(204)
+            if len(parts) == 4 and parts[3] == "history" and method == "GET":
+                return self._send(200, {"history": collection.get(parts[2], {}).get("history", {})})
+        return self._send(404, {"error": "Not Found"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class SyncStubServer:
+    """在后台线程运行的同步服务桩；tasks / scheduled_tasks 为 ID 到记录的字典，可直接预置"""
+
+    def __init__(self):
+        self.tasks = {}
+        self.scheduled_tasks = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="SyncStubServer", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def remote_config(self) -> dict:
+        """指向本服务桩的 DatabaseManager remote_config"""
+        return {"enabled": True, "api_base_url": self.url, "api_token": STUB_API_TOKEN, "username": "benchmark"}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(5)
@@ -6,6 +6,7 @@ logger = logging.getLogger(__name__)
 
 # 导入数据库管理器
 from database.database_manager import get_db_manager
+from config.config_service import get_config_service
 from ui.notifications import show_error
 
 # 配置和数据文件（统一定位到项目根目录）
@@ -93,35 +94,38 @@ def _merge_field_list(default_fields, user_fields):
 
 
 def load_config():
-    """从文件加载配置"""
-    if not os.path.exists(CONFIG_FILE):
-        save_config(DEFAULT_CONFIG)  # 创建默认配置
+    """加载配置：读取配置服务中的内存副本并补齐默认值"""
+    service = get_config_service(CONFIG_FILE)
+    try:
+        config = service.get_config()
+    except FileNotFoundError:
+        # 创建默认配置，需立即落盘
+        service.update(DEFAULT_CONFIG, write_now=True)
+        return DEFAULT_CONFIG
+    except Exception as e:
+        logger.error(f"加载配置失败: {str(e)}")
         return DEFAULT_CONFIG
 
     try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            # 合并默认配置确保完整性（含嵌套键）
-            merged = _merge_defaults(DEFAULT_CONFIG, config)
-            # 仅对定时任务字段列表按字段名合并，补齐升级新增的字段（如 due_offset_days）
-            # 注意：不要合并 task_fields——它是用户可自定义的表单，
-            # 合并会把用户已删除的默认字段（如已废弃的 priority）重新插回。
-            merged['schedule_task_fields'] = _merge_field_list(
-                DEFAULT_CONFIG['schedule_task_fields'],
-                merged.get('schedule_task_fields'),
-            )
-            return merged
+        # 合并默认配置确保完整性（含嵌套键）
+        merged = _merge_defaults(DEFAULT_CONFIG, config)
+        # 仅对定时任务字段列表按字段名合并，补齐升级新增的字段（如 due_offset_days）
+        # 注意：不要合并 task_fields——它是用户可自定义的表单，
+        # 合并会把用户已删除的默认字段（如已废弃的 priority）重新插回。
+        merged['schedule_task_fields'] = _merge_field_list(
+            DEFAULT_CONFIG['schedule_task_fields'],
+            merged.get('schedule_task_fields'),
+        )
+        return merged
     except Exception as e:
         logger.error(f"加载配置失败: {str(e)}")
         return DEFAULT_CONFIG
 
 def save_config(config, parent=None):
-    """保存配置到文件"""
+    """保存配置：立即更新内存副本，由配置服务在后台去抖后原子写盘"""
     logger.debug("正在保存配置到文件...")
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-        logger.info("配置保存成功")
+        get_config_service(CONFIG_FILE).update(config)
         return True
     except Exception as e:
         logger.error(f"保存配置失败: {str(e)}")
@@ -130,8 +134,38 @@ def save_config(config, parent=None):
         return False
 
 
+def flush_config():
+    """立即写出尚未落盘的配置修改（退出前调用）"""
+    return get_config_service(CONFIG_FILE).flush()
+
+
+def watch_config_file():
+    """启用配置文件监听，外部修改会以 ConfigChangeEvent 通知订阅者"""
+    return get_config_service(CONFIG_FILE).start_watching()
+
+
+def _classify_position(position_x, position_y, center_x, center_y):
+    """根据坐标判断紧急/重要程度：x 轴右侧=高紧急，y 轴上方=高重要"""
+    urgency = "高" if position_x > center_x else "低"
+    importance = "高" if position_y < center_y else "低"
+    return urgency, importance
+
+
+def _task_needs_save(task, center_x, center_y):
+    """标签未标脏且所在象限未变化时无需保存；不支持脏标记的对象一律保存"""
+    is_dirty = getattr(task, 'is_dirty', None)
+    if not callable(is_dirty) or is_dirty():
+        return True
+    pos = task.pos()
+    urgency, importance = _classify_position(pos.x(), pos.y(), center_x, center_y)
+    return urgency != getattr(task, 'urgency', None) or importance != getattr(task, 'importance', None)
+
+
 def save_tasks(tasks, parent=None):
-    """保存任务到数据库，支持历史记录和逻辑删除"""
+    """保存有变化的任务到数据库，支持历史记录和逻辑删除
+
+    未修改的标签直接跳过；真正有变化的任务通过 save_tasks_changed 一次性批量写入缓存。
+    """
     logger.debug("正在保存任务到数据库...")
     try:
         db_manager = get_db_manager()
@@ -140,23 +174,15 @@ def save_tasks(tasks, parent=None):
         center_x = parent.width() // 2 if parent else 500
         center_y = parent.height() // 2 if parent else 400
         
-        # 处理当前任务列表
-        current_task_ids = set()
+        pending = []
         for task in tasks:
+            if not _task_needs_save(task, center_x, center_y):
+                continue
             task_data = task.get_data()
-            task_id = task_data.get('id')
-            current_task_ids.add(task_id)
             
             # 根据坐标自动判断并更新紧急程度和重要程度
             position = task_data.get('position', {'x': 100, 'y': 100})
-            position_x = position['x']
-            position_y = position['y']
-            
-            # x轴判断紧急程度：右侧=高，左侧=低
-            urgency = "高" if position_x > center_x else "低"
-            
-            # y轴判断重要程度：上方=高，下方=低
-            importance = "高" if position_y < center_y else "低"
+            urgency, importance = _classify_position(position['x'], position['y'], center_x, center_y)
             
             task_data['urgency'] = urgency
             task_data['importance'] = importance
@@ -168,12 +194,28 @@ def save_tasks(tasks, parent=None):
             # 移除旧的priority字段（向后兼容）
             task_data.pop('priority', None)
             
-            # 保存任务到数据库
-            success = db_manager.save_task(task_data)
-            if not success:
-                logger.error(f"保存任务 {task_id} 失败")
+            # 与上次写入的数据完全一致（如仅点击未拖动）时不再提交
+            if task_data == getattr(task, '_last_saved_data', None):
+                task.mark_clean(task_data)
+                continue
+            pending.append((task, task_data))
+        
+        if not pending:
+            logger.debug("没有需要保存的任务变更")
+            return True
+        
+        # 整批提交，数据库层只获取一次锁
+        success = db_manager.save_tasks_changed([task_data for _, task_data in pending])
+        if not success:
+            logger.error(f"批量保存 {len(pending)} 个任务失败")
+            return False
+        
+        for task, task_data in pending:
+            mark_clean = getattr(task, 'mark_clean', None)
+            if callable(mark_clean):
+                mark_clean(task_data)
         
-        logger.info(f"成功保存了 {len(current_task_ids)} 个任务")
+        logger.info(f"成功保存了 {len(pending)} 个任务")
         return True
     except Exception as e:
         logger.error(f"保存任务失败: {str(e)}")
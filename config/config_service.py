@@ -0,0 +1,338 @@
+"""配置服务：在内存中持有 config.json，供 UI 与数据库层共享
+
+- 读取：首次访问时从磁盘加载，之后直接返回内存副本；
+  启用文件监听后由 QFileSystemWatcher 通知外部修改，不再逐次 stat 文件。
+- 写入：合并短时间内的多次保存，在后台线程以“临时文件 + 原子重命名”方式落盘。
+- 通知：配置变化时向订阅者派发 ConfigChangeEvent。
+"""
+
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+DEFAULT_CONFIG_PATH = os.path.join(APP_ROOT, 'config', 'config.json')
+DEFAULT_WRITE_DELAY = 1.0
+
+SOURCE_LOCAL = 'local'
+SOURCE_FILE = 'file'
+
+
+@dataclass(frozen=True)
+class ConfigChangeEvent:
+    """配置变更事件
+
+    changed_keys: 发生变化的顶层配置键
+    source: SOURCE_LOCAL 表示本进程保存，SOURCE_FILE 表示配置文件被外部修改
+    config: 变更后的配置副本
+    """
+    changed_keys: FrozenSet[str]
+    source: str
+    config: Dict[str, Any]
+
+    def affects(self, *keys: str) -> bool:
+        """判断本次变更是否涉及任一给定顶层键"""
+        return any(key in self.changed_keys for key in keys)
+
+
+def _diff_top_level_keys(old: Dict[str, Any], new: Dict[str, Any]) -> FrozenSet[str]:
+    """比较两份配置，返回值不同的顶层键"""
+    keys = set(old) | set(new)
+    return frozenset(key for key in keys if old.get(key) != new.get(key))
+
+
+class ConfigService:
+    """持有单个配置文件的内存副本，负责去抖写盘与变更通知"""
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, write_delay: float = DEFAULT_WRITE_DELAY):
+        self.config_path = os.path.abspath(config_path)
+        self.write_delay = write_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._config: Optional[Dict[str, Any]] = None
+        self._disk_signature = None
+        self._last_written_text = None
+        self._task_field_names: Optional[List[str]] = None
+        self._write_pending = False
+        self._write_in_progress = False
+        self._write_timer: Optional[threading.Timer] = None
+        self._listeners: List[Callable[[ConfigChangeEvent], None]] = []
+        self._listener_lock = threading.Lock()
+        self._watcher = None
+
+    # ---- 读取 ----
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_from_disk(self) -> Dict[str, Any]:
+        """从磁盘读取原始配置；文件不存在或损坏时抛出异常"""
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        config = json.loads(text)
+        if not isinstance(config, dict):
+            raise ValueError("配置文件顶层必须是对象")
+        return config
+
+    def _ensure_loaded_locked(self) -> None:
+        if self._write_pending:
+            # 尚未落盘的本地修改优先于磁盘内容
+            return
+        if self._config is not None and self.is_watching():
+            return
+        signature = self._file_signature()
+        if self._config is not None and signature == self._disk_signature:
+            return
+        self._config = self._read_from_disk()
+        self._disk_signature = signature
+        self._task_field_names = None
+
+    def get_config(self) -> Dict[str, Any]:
+        """返回当前配置的深拷贝；文件缺失或损坏时抛出异常，由调用方决定回退策略"""
+        with self._lock:
+            self._ensure_loaded_locked()
+            return copy.deepcopy(self._config)
+
+    def get_task_field_names(self) -> List[str]:
+        """返回 task_fields 中声明的字段名，配置变化前一直复用缓存"""
+        with self._lock:
+            if self._task_field_names is None or not self.is_watching():
+                try:
+                    self._ensure_loaded_locked()
+                except Exception:
+                    return []
+                if self._task_field_names is None:
+                    field_defs = self._config.get('task_fields', []) or []
+                    self._task_field_names = [
+                        str(field.get('name', '')).strip()
+                        for field in field_defs
+                        if isinstance(field, dict) and str(field.get('name', '')).strip()
+                    ]
+            return list(self._task_field_names)
+
+    # ---- 写入 ----
+
+    def update(self, config: Dict[str, Any], write_now: bool = False) -> FrozenSet[str]:
+        """替换内存配置并安排写盘，返回发生变化的顶层键
+
+        内容未变化时不写盘也不通知；write_now=True 时在当前线程立即写盘。
+        """
+        new_config = copy.deepcopy(config)
+        with self._lock:
+            try:
+                self._ensure_loaded_locked()
+                old_config = self._config or {}
+            except Exception:
+                old_config = {}
+            changed_keys = _diff_top_level_keys(old_config, new_config)
+            if not changed_keys and os.path.exists(self.config_path):
+                return changed_keys
+            self._config = new_config
+            self._task_field_names = None
+            self._write_pending = True
+            if not write_now:
+                self._schedule_write_locked()
+
+        if write_now:
+            self.flush()
+        if changed_keys:
+            self._notify_listeners(ConfigChangeEvent(changed_keys, SOURCE_LOCAL, copy.deepcopy(new_config)))
+        return changed_keys
+
+    def _schedule_write_locked(self) -> None:
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+        timer = threading.Timer(self.write_delay, self._write_pending_config)
+        timer.daemon = True
+        self._write_timer = timer
+        timer.start()
+
+    def _write_pending_config(self) -> bool:
+        """把内存配置写入临时文件后原子替换正式文件"""
+        with self._write_lock:
+            with self._lock:
+                if not self._write_pending:
+                    return True
+                text = json.dumps(self._config, indent=4, ensure_ascii=False)
+                self._write_pending = False
+                self._write_in_progress = True
+                self._write_timer = None
+
+            temp_path = None
+            try:
+                directory = os.path.dirname(self.config_path)
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.config_path)
+                temp_path = None
+                with self._lock:
+                    self._last_written_text = text
+                    if not self._write_pending:
+                        self._disk_signature = self._file_signature()
+                logger.info("配置保存成功")
+                return True
+            except Exception as e:
+                logger.error(f"保存配置失败: {str(e)}")
+                with self._lock:
+                    # 保留待写标记，下次保存或 flush 时重试
+                    self._write_pending = True
+                return False
+            finally:
+                with self._lock:
+                    self._write_in_progress = False
+                if temp_path and os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+
+    def flush(self) -> bool:
+        """取消去抖计时，立即写出尚未落盘的修改"""
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._write_pending:
+                return True
+        return self._write_pending_config()
+
+    def has_pending_write(self) -> bool:
+        """是否还有尚未完成落盘的修改（含正在写入中的）"""
+        with self._lock:
+            return self._write_pending or self._write_in_progress
+
+    # ---- 外部修改 ----
+
+    def reload_from_disk(self) -> FrozenSet[str]:
+        """重新读取配置文件；内容确有变化时派发 SOURCE_FILE 事件"""
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            return frozenset()
+
+        with self._lock:
+            if self._write_pending or text == self._last_written_text:
+                # 自己刚写出的内容，或仍有本地修改待写，不视为外部变更
+                self._disk_signature = self._file_signature()
+                return frozenset()
+            try:
+                new_config = json.loads(text)
+            except ValueError as e:
+                logger.warning(f"配置文件解析失败，保留内存配置: {str(e)}")
+                return frozenset()
+            if not isinstance(new_config, dict):
+                return frozenset()
+            changed_keys = _diff_top_level_keys(self._config or {}, new_config)
+            self._config = new_config
+            self._disk_signature = self._file_signature()
+            self._task_field_names = None
+
+        if changed_keys:
+            logger.info(f"检测到配置文件外部修改: {sorted(changed_keys)}")
+            self._notify_listeners(ConfigChangeEvent(changed_keys, SOURCE_FILE, copy.deepcopy(new_config)))
+        return changed_keys
+
+    def start_watching(self) -> bool:
+        """使用 QFileSystemWatcher 监听配置文件，需在 Qt 主线程且 QApplication 已创建后调用"""
+        if self._watcher is not None:
+            return True
+        try:
+            from PyQt6.QtCore import QCoreApplication, QFileSystemWatcher
+        except ImportError:
+            logger.warning("PyQt6 不可用，配置文件监听未启用")
+            return False
+        if QCoreApplication.instance() is None:
+            logger.warning("QApplication 尚未创建，配置文件监听未启用")
+            return False
+
+        watcher = QFileSystemWatcher()
+        if os.path.exists(self.config_path):
+            watcher.addPath(self.config_path)
+        # 原子重命名会使文件监听失效，同时监听目录以便重新挂载
+        watcher.addPath(os.path.dirname(self.config_path))
+        watcher.fileChanged.connect(self._on_watched_path_changed)
+        watcher.directoryChanged.connect(self._on_watched_path_changed)
+        self._watcher = watcher
+        with self._lock:
+            try:
+                self._config = self._read_from_disk()
+                self._disk_signature = self._file_signature()
+                self._task_field_names = None
+            except Exception:
+                pass
+        logger.info("已启用配置文件监听")
+        return True
+
+    def stop_watching(self) -> None:
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            try:
+                watcher.deleteLater()
+            except RuntimeError:
+                # QApplication 销毁时监听器可能已被一并释放
+                pass
+
+    def is_watching(self) -> bool:
+        return self._watcher is not None
+
+    def _on_watched_path_changed(self, _path: str) -> None:
+        watcher = self._watcher
+        if watcher is None:
+            return
+        if os.path.exists(self.config_path) and self.config_path not in watcher.files():
+            watcher.addPath(self.config_path)
+        if self._file_signature() == self._disk_signature:
+            return
+        self.reload_from_disk()
+
+    # ---- 订阅 ----
+
+    def add_listener(self, listener: Callable[[ConfigChangeEvent], None]) -> None:
+        with self._listener_lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ConfigChangeEvent], None]) -> None:
+        with self._listener_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify_listeners(self, event: ConfigChangeEvent) -> None:
+        with self._listener_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"配置变更回调执行失败: {str(e)}")
+
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(config_path: Optional[str] = None) -> ConfigService:
+    """按配置文件路径获取共享的配置服务实例"""
+    path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
+    with _services_lock:
+        service = _services.get(path)
+        if service is None:
+            service = ConfigService(path)
+            _services[path] = service
+        return service
@@ -1,9 +1,12 @@
 """LLM服务 - 通用的LLM消息收发和解析服务"""
 
 import asyncio
+import concurrent.futures
 import json
 import logging
-from typing import List, Dict, Any, Optional, Union
+import random
+import threading
+from typing import Callable, List, Dict, Any, Optional, Union
 from config.config_manager import load_config
 
 try:
@@ -13,6 +16,37 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 5
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_RETRY_BASE_DELAY = 1.0
+
+
+class _TokenBucket:
+    """异步令牌桶：平均每秒放行 rate 个请求，最多积攒 capacity 个用于突发"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity or rate or 1))
+        self._tokens = self.capacity
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # 持锁等待，排队的请求按先来后到依次取得令牌
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
 
 class LLMService:
     """通用LLM服务类 - 只负责消息收发和响应解析"""
@@ -26,6 +60,17 @@ class LLMService:
         self.api_key = llm_config.get("api_key", "")
         self.model = llm_config.get("model", "ep-20250103125953-fwvmj")  # 默认模型
         self.base_url = llm_config.get("base_url", "https://ark.cn-beijing.volces.com/api/v3")
+        self.max_concurrency = max(1, int(llm_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)))
+        self.retry_base_delay = float(llm_config.get("retry_base_delay", DEFAULT_RETRY_BASE_DELAY))
+        self._rate_limiter = _TokenBucket(
+            llm_config.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND),
+            llm_config.get("burst"),
+        )
+
+        # 所有请求都在同一个常驻事件循环上执行，异步客户端只绑定这一个循环
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
         
         # 初始化客户端
         self.client = None
@@ -84,11 +129,12 @@ class LLMService:
         for attempt in range(max_retries + 1):
             try:
                 if attempt > 0:
-                    # 重试前等待一小段时间
-                    await asyncio.sleep(1 * attempt)
+                    await asyncio.sleep(self._retry_delay(attempt))
                     logger.info(f"第 {attempt + 1} 次尝试调用LLM API")
                 else:
                     logger.debug(f"发送消息到LLM，消息数量: {len(messages)}")
+
+                await self._rate_limiter.acquire()
                 
                 # 调用API
                 response = await self.client.chat.completions.create(
@@ -114,7 +160,8 @@ class LLMService:
                 is_retryable = (
                     "Connection error" in error_str or
                     "timeout" in error_str.lower() or
-                    "Timeout" in error_str
+                    "429" in error_str or
+                    "rate limit" in error_str.lower()
                 )
                 
                 if is_retryable and attempt < max_retries:
@@ -126,6 +173,110 @@ class LLMService:
         
         return None
     
+    def _retry_delay(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待秒数：指数退避并在后半段随机抖动，错开并发请求的重试时刻"""
+        delay = self.retry_base_delay * (2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def generate_many_async(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        schema: Union[dict, List[dict]],
+        on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+        max_concurrency: Optional[int] = None,
+        ordered: bool = False,
+    ) -> List[Optional[str]]:
+        """
+        批量发送多组消息（异步），并发数受信号量限制，请求速率受令牌桶限制
+
+        Args:
+            messages_list: 每个元素是一次请求的消息列表
+            schema: JSON Schema配置；传列表时与 messages_list 一一对应
+            on_result: 结果回调 (序号, 响应文本)，默认每个请求完成即回调
+            max_concurrency: 最大并发请求数，默认取 LLM_CONFIG.max_concurrency
+            ordered: 为 True 时先完成的后序结果暂存，按输入顺序回调；
+                慢请求会推迟其后所有结果，取消时暂存的结果不再回调
+
+        Returns:
+            与输入顺序一致的响应文本列表，失败项为None
+        """
+        total = len(messages_list)
+        results: List[Optional[str]] = [None] * total
+        if not total:
+            return results
+
+        schemas = schema if isinstance(schema, list) else [schema] * total
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+        finished = [False] * total
+        next_index = 0
+
+        async def run_one(index: int, messages: List[Dict[str, str]]):
+            async with semaphore:
+                return index, await self.generate_response(messages, schemas[index])
+
+        def deliver(index: int):
+            if on_result:
+                try:
+                    on_result(index, results[index])
+                except Exception as e:
+                    logger.error(f"处理LLM批量结果回调失败: {str(e)}", exc_info=True)
+
+        pending = [asyncio.ensure_future(run_one(index, messages)) for index, messages in enumerate(messages_list)]
+        try:
+            for future in asyncio.as_completed(pending):
+                index, content = await future
+                results[index] = content
+                if not ordered:
+                    deliver(index)
+                    continue
+                finished[index] = True
+                while next_index < total and finished[next_index]:
+                    deliver(next_index)
+                    next_index += 1
+        finally:
+            for future in pending:
+                if not future.done():
+                    future.cancel()
+        return results
+
+    def submit_many(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        schema: Union[dict, List[dict]],
+        on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+        max_concurrency: Optional[int] = None,
+        ordered: bool = False,
+    ) -> concurrent.futures.Future:
+        """
+        在常驻事件循环上启动批量请求并立即返回 Future
+
+        调用 future.cancel() 会取消整批请求，正在进行的 API 调用随即中止；
+        on_result 在事件循环线程中调用
+        """
+        return self._submit_to_loop(
+            self.generate_many_async(messages_list, schema, on_result, max_concurrency, ordered)
+        )
+
+    def generate_many(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        schema: Union[dict, List[dict]],
+        on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        ordered: bool = False,
+    ) -> List[Optional[str]]:
+        """
+        批量发送多组消息（同步版本），在常驻事件循环上执行并阻塞到全部完成
+
+        on_result 在事件循环线程中调用；失败或超时时对应项为None
+        """
+        try:
+            return self._wait_for(self.submit_many(messages_list, schema, on_result, max_concurrency, ordered), timeout)
+        except Exception as e:
+            logger.error(f"批量调用LLM失败: {str(e)}", exc_info=True)
+            return [None] * len(messages_list)
+
     def generate_response_sync(
         self,
         messages: List[Dict[str, str]],
@@ -136,38 +287,63 @@ class LLMService:
         
         Args:
             messages: 消息列表
-            temperature: 温度参数
-            max_tokens: 最大生成token数
+            schema: JSON Schema配置
             
         Returns:
             LLM的响应文本，失败返回None
         """
         try:
-            # 创建新的事件循环
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            try:
-                result = loop.run_until_complete(
-                    self.generate_response(messages, schema)
-                )
-                
-                # 等待当前事件循环中所有待处理的任务完成
-                pending = asyncio.all_tasks(loop)
-                if pending:
-                    for task in pending:
-                        task.cancel()
-                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-                
-                return result
-            finally:
-                # 只关闭事件循环,不关闭共享的httpx客户端
-                # 因为LLMService是单例,多个线程共享同一个客户端
-                loop.close()
-                
+            return self._run_on_loop(self.generate_response(messages, schema))
         except Exception as e:
             logger.error(f"同步调用LLM失败: {str(e)}", exc_info=True)
             return None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """启动（或复用）后台常驻事件循环线程"""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._run_loop, args=(loop,), name="LLMServiceLoop", daemon=True)
+                thread.start()
+                self._loop = loop
+                self._loop_thread = thread
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def _submit_to_loop(self, coro) -> concurrent.futures.Future:
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("不能在LLM事件循环线程内同步等待，请直接 await 异步接口")
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    @staticmethod
+    def _wait_for(future: concurrent.futures.Future, timeout: Optional[float] = None):
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def _run_on_loop(self, coro, timeout: Optional[float] = None):
+        return self._wait_for(self._submit_to_loop(coro), timeout)
+
+    def close(self) -> None:
+        """停止常驻事件循环"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = None
+            self._loop_thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+            loop.close()
     
     @staticmethod
     def parse_json_response(content: str) -> Optional[Union[Dict, List]]:
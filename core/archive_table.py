@@ -2,9 +2,7 @@ import logging
 
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
-    QCheckBox,
     QDialog,
-    QHeaderView,
     QHBoxLayout,
     QLabel,
     QLineEdit,
@@ -13,8 +11,9 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from core.data_executor import DataAccessExecutor
 from database.database_manager import get_db_manager
-from ui.adaptive_table import AdaptiveTextTableWidget
+from ui.paged_table import PagedTableModel, PagedTableView
 from ui.notifications import show_error, show_success
 from ui.styles import StyleManager, apply_button_role
 
@@ -109,9 +108,10 @@ class ArchiveTableDialog(QDialog):
     date_field = ""
     restore_button_text = "还原选中事项"
     page_loader_name = ""
+    page_with_total_loader_name = ""
     count_loader_name = ""
-    id_loader_name = ""
     restore_method_name = ""
+    restore_matching_method_name = ""
     confirm_message_template = "确定要还原 {count} 个事项吗？"
     success_message_template = "成功还原 {count} 个事项"
     load_error_label = "归档事项"
@@ -121,12 +121,9 @@ class ArchiveTableDialog(QDialog):
         super().__init__(parent)
         self.parent_widget = parent
         self.db_manager = db_manager or get_db_manager()
-        self.selected_tasks = set()
-        self.archive_tasks = []
+        # 查询在后台线程执行；筛选条件变化时旧查询按代次作废并被中断
+        self.data_executor = DataAccessExecutor(self.db_manager, parent=self)
         self.page_size = 50
-        self.loaded_count = 0
-        self.total_count = 0
-        self.selection_total_count_override = None
         self.current_search_query = ""
         self.search_debounce_timer = QTimer(self)
         self.search_debounce_timer.setSingleShot(True)
@@ -176,7 +173,7 @@ class ArchiveTableDialog(QDialog):
         self.search_input.textChanged.connect(self._schedule_archive_task_filter)
         panel_layout.addWidget(self.search_input)
 
-        self.table = self._create_table([])
+        self.table = self._create_table()
         panel_layout.addWidget(self.table)
 
         button_layout = QHBoxLayout()
@@ -218,25 +215,87 @@ class ArchiveTableDialog(QDialog):
             return self.no_results_message
         return self.empty_message
 
-    def _load_archive_tasks(self):
-        try:
-            self.current_search_query = (
-                self.search_input.text() if hasattr(self, "search_input") else ""
-            )
-            count_loader = getattr(self.db_manager, self.count_loader_name)
-            page_loader = getattr(self.db_manager, self.page_loader_name)
-            self.total_count = count_loader(self.current_search_query)
-            self.archive_tasks = page_loader(
-                limit=self.page_size,
+    @property
+    def archive_tasks(self):
+        return self.table_model.records()
+
+    @archive_tasks.setter
+    def archive_tasks(self, tasks):
+        self.table_model.reset(records=tasks, empty_message=self._empty_state_message())
+
+    @property
+    def loaded_count(self):
+        return self.table_model.loaded_count()
+
+    @property
+    def total_count(self):
+        return self.table_model.total_count()
+
+    @property
+    def selection(self):
+        return self.table_model.selection()
+
+    @property
+    def selected_tasks(self):
+        """显式勾选的任务 ID；全选形态不物化匹配 ID，需要通过 selection 按筛选条件处理"""
+        selection = self.table_model.selection()
+        if selection.all_matching:
+            raise ValueError("全选形态没有显式 ID 集合，请使用 selection")
+        return set(selection.ids)
+
+    @selected_tasks.setter
+    def selected_tasks(self, task_ids):
+        self.table_model.set_checked_ids(task_ids)
+
+    def _fetch_archive_page(self, offset, limit, search_query=None):
+        """在工作线程中执行；筛选条件由提交方捕获后传入，不读取控件状态"""
+        page_loader = getattr(self.db_manager, self.page_loader_name)
+        return page_loader(
+            limit=limit,
+            offset=offset,
+            search_query=self.current_search_query if search_query is None else search_query,
+        )
+
+    def _fetch_first_archive_page(self, search_query, limit):
+        # 首页与筛选后的总数由同一查询返回；数据源不支持时退回单独计数
+        page_with_total_loader = getattr(self.db_manager, self.page_with_total_loader_name, None)
+        if page_with_total_loader:
+            tasks, total_count = page_with_total_loader(
+                limit=limit,
                 offset=0,
-                search_query=self.current_search_query,
+                search_query=search_query,
             )
-            self.loaded_count = len(self.archive_tasks)
-            self._render_archive_tasks(
-                self.archive_tasks,
-                self._empty_state_message(),
-                clear_selection=True,
+            return total_count, tasks
+        count_loader = getattr(self.db_manager, self.count_loader_name)
+        total_count = count_loader(search_query)
+        return total_count, self._fetch_archive_page(0, limit, search_query)
+
+    def _load_archive_tasks(self):
+        """按当前搜索词重新查询；同一时刻只保留最新一次查询的结果"""
+        self.current_search_query = (
+            self.search_input.text() if hasattr(self, "search_input") else ""
+        )
+        self.data_executor.submit(
+            "archive",
+            self._fetch_first_archive_page,
+            self.current_search_query,
+            self.page_size,
+            on_result=self._on_archive_tasks_loaded,
+            on_error=self._on_archive_tasks_failed,
+        )
+
+    def _on_archive_tasks_loaded(self, result):
+        try:
+            total_count, first_page = result
+            # 按旧筛选条件做的全选在这里作废；显式勾选的 ID 保留
+            self.table_model.set_filter_key(self.current_search_query)
+            self.table_model.reset(
+                page_requester=self._request_archive_page,
+                total_count=total_count,
+                page_size=self.page_size,
+                empty_message=self._empty_state_message(),
             )
+            self.table_model.finish_page(first_page)
             self._update_load_more_button()
             logger.info(
                 "加载了 %s/%s 个%s",
@@ -245,40 +304,44 @@ class ArchiveTableDialog(QDialog):
                 self.load_error_label,
             )
         except Exception as e:
-            logger.error("加载%s失败: %s", self.load_error_label, str(e))
-            show_error(self, "错误", f"加载{self.load_error_label}失败: {str(e)}")
+            self._on_archive_tasks_failed(str(e))
+
+    def _on_archive_tasks_failed(self, message):
+        logger.error("加载%s失败: %s", self.load_error_label, message)
+        show_error(self, "错误", f"加载{self.load_error_label}失败: {message}")
+
+    def _request_archive_page(self, offset, limit):
+        # 与首页共用同一个 key：搜索词变化后，尚未返回的后续页随之作废
+        self.data_executor.submit(
+            "archive",
+            self._fetch_archive_page,
+            offset,
+            limit,
+            self.current_search_query,
+            on_result=self.table_model.finish_page,
+            on_error=self.table_model.fail_page,
+        )
 
     def _load_more_archive_tasks(self):
-        if self.loaded_count >= self.total_count:
+        if not self.table_model.has_more():
             self._update_load_more_button()
             return
 
         try:
-            page_loader = getattr(self.db_manager, self.page_loader_name)
-            next_page = page_loader(
-                limit=self.page_size,
-                offset=self.loaded_count,
-                search_query=self.current_search_query,
-            )
-            if not next_page:
-                self.loaded_count = len(self.archive_tasks)
-                self.total_count = self.loaded_count
-                self._update_load_more_button()
-                return
-
-            self.archive_tasks.extend(next_page)
-            self.loaded_count = len(self.archive_tasks)
-            self._render_archive_tasks(
-                self.archive_tasks,
-                self._empty_state_message(),
-                clear_selection=False,
-            )
+            self.table_model.load_next_page()
             self._update_load_more_button()
         except Exception as e:
             logger.error("加载更多%s失败: %s", self.load_error_label, str(e))
             show_error(self, "错误", f"加载更多{self.load_error_label}失败: {str(e)}")
 
+    def _on_archive_page_failed(self, message):
+        self._update_load_more_button()
+        show_error(self, "错误", f"加载更多{self.load_error_label}失败: {message}")
+
     def _schedule_archive_task_filter(self):
+        # 搜索词一变，按旧条件做的全选就不再对应用户将看到的结果，立即作废
+        if self.search_input.text() != self.table_model.filter_key():
+            self.table_model.clear_matching_selection()
         self.search_debounce_timer.start()
 
     def _apply_archive_task_filter(self):
@@ -287,72 +350,11 @@ class ArchiveTableDialog(QDialog):
     def _normalize_task_id(self, task_id):
         return str(task_id) if task_id else None
 
-    def _load_archive_task_ids_for_selection(self):
-        id_loader = getattr(self.db_manager, self.id_loader_name, None)
-        if id_loader:
-            return {
-                task_id
-                for task_id in (
-                    self._normalize_task_id(task_id)
-                    for task_id in id_loader(self.current_search_query)
-                )
-                if task_id
-            }
-        return {
-            task_id
-            for task_id in (
-                self._normalize_task_id(task.get("id"))
-                for task in self.archive_tasks
-            )
-            if task_id
-        }
-
-    def _selection_total_count(self, visible_checkbox_count=0):
-        if self.selection_total_count_override is not None:
-            return max(
-                self.selection_total_count_override,
-                visible_checkbox_count,
-                len(self.selected_tasks),
-            )
-        return max(self.total_count, visible_checkbox_count, len(self.selected_tasks))
-
-    def _render_archive_tasks(self, tasks, empty_message, clear_selection=True):
-        previous_selected = set() if clear_selection else set(self.selected_tasks)
-        self.selected_tasks = set(previous_selected)
-        if clear_selection:
-            self.selection_total_count_override = None
-
-        rows = [
-            [
-                "",
-                task.get("text", ""),
-                task.get(self.date_field, ""),
-                task.get("notes", ""),
-            ]
-            for task in tasks
-        ]
-        if not tasks:
-            rows = [["", empty_message, "", ""]]
-
-        self.table.set_rows(rows)
-        for row, task in enumerate(tasks):
-            checkbox = QCheckBox()
-            checkbox.stateChanged.connect(self.on_selection_changed)
-            task_id = self._normalize_task_id(task.get("id"))
-            checkbox.setProperty("task_id", task_id)
-            if task_id in previous_selected:
-                checkbox.setChecked(True)
-            self.table.setCellWidget(row, 0, checkbox)
-
-        self.restore_button.setEnabled(bool(self.selected_tasks))
-        self.on_selection_changed()
-
-        if not tasks:
-            self.table.item(0, 1).setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setSpan(0, 1, 1, 3)
-
-    def _update_load_more_button(self):
-        if self.loaded_count < self.total_count:
+    def _update_load_more_button(self, *_args):
+        if self.table_model.is_page_pending():
+            self.load_more_button.setEnabled(False)
+            self.load_more_button.setText("加载中...")
+        elif self.table_model.has_more():
             self.load_more_button.setEnabled(True)
             self.load_more_button.setText(
                 f"加载更多 ({self.loaded_count}/{self.total_count})"
@@ -361,117 +363,135 @@ class ArchiveTableDialog(QDialog):
             self.load_more_button.setEnabled(False)
             self.load_more_button.setText("已全部加载")
 
-    def _create_table(self, rows):
-        table = AdaptiveTextTableWidget(
+    def _format_archive_row(self, task):
+        return [
+            "",
+            task.get("text", ""),
+            task.get(self.date_field, ""),
+            task.get("notes", ""),
+        ]
+
+    def _archive_task_id(self, task):
+        return self._normalize_task_id(task.get("id"))
+
+    def _create_table(self):
+        self.table_model = PagedTableModel(
             headers=["", "任务内容", self.date_column_title, "备注"],
-            rows=rows,
+            row_formatter=self._format_archive_row,
+            page_size=self.page_size,
+            id_getter=self._archive_task_id,
+            checkable_column=0,
+            empty_message=self.empty_message,
+            empty_message_column=1,
+            parent=self,
+        )
+        self.table_model.checkedChanged.connect(self.on_selection_changed)
+        self.table_model.pageLoaded.connect(self._update_load_more_button)
+        self.table_model.loadFailed.connect(self._on_archive_page_failed)
+        return PagedTableView(
+            self.table_model,
             fixed_width_columns={0: 30, 3: 300},
             multiline_columns={3},
+            stretch_columns={1},
         )
-        table.horizontalHeader().setSectionResizeMode(
-            1,
-            QHeaderView.ResizeMode.Stretch,
-        )
-        table.setSortingEnabled(False)
-        return table
+
+    def _is_everything_selected(self):
+        selection = self.table_model.selection()
+        if selection.all_matching:
+            return not selection.ids
+        return bool(selection.ids) and len(selection.ids) >= self.total_count
 
     def on_selection_changed(self):
-        visible_task_ids = set()
-        checked_visible_task_ids = set()
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 0)
-            if not checkbox:
-                continue
-            task_id = self._normalize_task_id(checkbox.property("task_id"))
-            if not task_id:
-                continue
-            visible_task_ids.add(task_id)
-            if checkbox.isChecked():
-                checked_visible_task_ids.add(task_id)
-
-        self.selected_tasks.difference_update(visible_task_ids)
-        self.selected_tasks.update(checked_visible_task_ids)
-        self.restore_button.setEnabled(bool(self.selected_tasks))
-
-        total_checkboxes = sum(
-            1
-            for row in range(self.table.rowCount())
-            if self.table.cellWidget(row, 0)
-        )
-        selection_total_count = self._selection_total_count(total_checkboxes)
-        checked_count = len(self.selected_tasks)
+        selection = self.table_model.selection()
+        checked_count = selection.count()
+        self.restore_button.setEnabled(bool(checked_count))
+
         if checked_count == 0:
-            self.selection_total_count_override = None
             self.select_all_button.setText("全选")
-        elif selection_total_count and checked_count >= selection_total_count:
+        elif self._is_everything_selected():
             self.select_all_button.setText("取消全选")
         else:
+            selection_total_count = max(self.total_count, checked_count)
             self.select_all_button.setText(
                 f"全选 ({checked_count}/{selection_total_count})"
             )
 
-    def _set_visible_checkboxes_from_selection(self):
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 0)
-            if checkbox:
-                task_id = self._normalize_task_id(checkbox.property("task_id"))
-                checkbox.blockSignals(True)
-                checkbox.setChecked(bool(task_id and task_id in self.selected_tasks))
-                checkbox.blockSignals(False)
-
     def toggle_select_all(self):
-        matching_task_ids = self._load_archive_task_ids_for_selection()
-        all_selected = (
-            bool(matching_task_ids)
-            and matching_task_ids.issubset(self.selected_tasks)
-        )
-        if all_selected:
-            self.selected_tasks.clear()
-            self.selection_total_count_override = None
+        if self._is_everything_selected():
+            self.table_model.clear_selection()
         else:
-            self.selected_tasks = set(matching_task_ids)
-            self.selection_total_count_override = len(matching_task_ids)
+            self.table_model.select_all_matching(self.total_count)
 
-        self._set_visible_checkboxes_from_selection()
-        self.on_selection_changed()
+    def _restore_selection(self, all_matching, task_ids, search_query):
+        """还原勾选项：全选形态按全选时的筛选条件一次性还原，否则逐个还原显式勾选的 ID。
+
+        在工作线程中执行，参数是提交时的选择快照；完成后统一落盘一次。
+        """
+        if all_matching:
+            restore_matching = getattr(self.db_manager, self.restore_matching_method_name)
+            restored_count = restore_matching(search_query, excluded_ids=task_ids)
+        else:
+            restore_task = getattr(self.db_manager, self.restore_method_name)
+            restored_count = sum(1 for task_id in task_ids if restore_task(task_id))
+        if restored_count:
+            self.db_manager.flush_cache_to_db()
+        return restored_count
 
     def restore_selected_tasks(self):
-        if not self.selected_tasks:
+        selection = self.table_model.selection()
+        if selection.is_empty():
             return
 
-        selected_task_ids = set(self.selected_tasks)
         confirm_dialog = ArchiveRestoreConfirmDialog(
             self,
-            self.confirm_message_template.format(count=len(selected_task_ids)),
+            self.confirm_message_template.format(count=selection.count()),
         )
         if confirm_dialog.exec() != QDialog.DialogCode.Accepted:
             return
 
-        try:
-            restore_task = getattr(self.db_manager, self.restore_method_name)
-            restored_count = sum(
-                1 for task_id in selected_task_ids if restore_task(task_id)
-            )
-            if restored_count == 0:
-                show_error(self, "还原失败", f"没有找到要还原的{self.restore_error_label}")
-                return
+        self.restore_button.setEnabled(False)
+        # 还原是写操作，不能被新的搜索打断，单独使用一个 key 且不走只读连接
+        self.data_executor.submit(
+            "restore",
+            self._restore_selection,
+            selection.all_matching,
+            set(selection.ids),
+            selection.filter_key,
+            on_result=self._on_restore_finished,
+            on_error=self._on_restore_failed,
+            read_only=False,
+        )
 
-            self.db_manager.flush_cache_to_db()
-            self._load_archive_tasks()
-            if hasattr(self.parent_widget, "load_tasks"):
-                self.parent_widget.load_tasks()
-            show_success(
-                self,
-                "还原成功",
-                self.success_message_template.format(count=restored_count),
-            )
-        except Exception as e:
-            logger.error("还原%s失败: %s", self.restore_error_label, str(e))
-            show_error(
-                self,
-                "还原失败",
-                f"还原{self.restore_error_label}时发生错误: {str(e)}",
-            )
+    def _on_restore_finished(self, restored_count):
+        if restored_count == 0:
+            self.on_selection_changed()
+            show_error(self, "还原失败", f"没有找到要还原的{self.restore_error_label}")
+            return
+
+        # 已还原的项不再属于该列表
+        self.table_model.clear_selection()
+        self._load_archive_tasks()
+        if hasattr(self.parent_widget, "load_tasks"):
+            self.parent_widget.load_tasks()
+        show_success(
+            self,
+            "还原成功",
+            self.success_message_template.format(count=restored_count),
+        )
+
+    def _on_restore_failed(self, message):
+        logger.error("还原%s失败: %s", self.restore_error_label, message)
+        self.on_selection_changed()
+        show_error(
+            self,
+            "还原失败",
+            f"还原{self.restore_error_label}时发生错误: {message}",
+        )
+
+    def done(self, result):
+        # 关闭时作废尚未返回的查询，避免结果回调到已关闭的对话框
+        self.data_executor.cancel("archive")
+        super().done(result)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
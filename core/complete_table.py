@@ -15,9 +15,10 @@ class CompleteTableDialog(ArchiveTableDialog):
     date_field = "completed_date"
     restore_button_text = "还原选中任务"
     page_loader_name = "load_completed_tasks_page"
+    page_with_total_loader_name = "load_completed_tasks_page_with_total"
     count_loader_name = "count_completed_tasks"
-    id_loader_name = "load_completed_task_ids"
     restore_method_name = "restore_completed_task"
+    restore_matching_method_name = "restore_completed_tasks_matching"
     confirm_message_template = "确定要将 {count} 个任务还原为未完成状态吗？"
     success_message_template = "成功还原 {count} 个任务为未完成状态"
     load_error_label = "已完成任务"
@@ -45,9 +46,3 @@ class CompleteTableDialog(ArchiveTableDialog):
 
     def _apply_completed_task_filter(self):
         self._apply_archive_task_filter()
-
-    def _load_completed_task_ids_for_selection(self):
-        return self._load_archive_task_ids_for_selection()
-
-    def _render_completed_tasks(self, tasks, empty_message, clear_selection=True):
-        self._render_archive_tasks(tasks, empty_message, clear_selection)
@@ -0,0 +1,208 @@
+"""后台数据访问执行器
+
+把数据库查询放到 QThreadPool 的工作线程执行，结果通过信号回到 GUI 线程。
+每个请求按 key 归组并带有代次（generation）：同一 key 提交新请求时旧请求自动作废，
+正在执行的查询通过 sqlite3 的 interrupt() 尽快中止，迟到的结果在 GUI 线程被丢弃。
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PyQt6.QtCore import QCoreApplication, QElapsedTimer, QEvent, QObject, QRunnable, QThreadPool, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class _DataRequest(QRunnable):
+    """在工作线程中执行一次查询；只读请求使用独立连接以便被中断"""
+
+    def __init__(self, executor, key: str, generation: int, fn: Callable, args, kwargs, read_only: bool):
+        super().__init__()
+        self.setAutoDelete(True)
+        self._executor = executor
+        self._key = key
+        self._generation = generation
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._read_only = read_only
+
+    def run(self):
+        executor = self._executor
+        try:
+            if not executor.is_current(self._key, self._generation):
+                return
+            result = self._execute()
+        except Exception as e:
+            executor._emit_failed(self._key, self._generation, e)
+        else:
+            executor._emit_finished(self._key, self._generation, result)
+        finally:
+            executor._request_done()
+
+    def _progress_check(self) -> int:
+        return 0 if self._executor.is_current(self._key, self._generation) else 1
+
+    def _execute(self):
+        db_manager = self._executor.db_manager
+        open_read_connection = getattr(db_manager, 'open_read_connection', None)
+        if not self._read_only or open_read_connection is None:
+            return self._fn(*self._args, **self._kwargs)
+
+        conn = open_read_connection()
+        if conn is None:
+            return self._fn(*self._args, **self._kwargs)
+        try:
+            if not self._executor._register_connection(self._key, self._generation, conn):
+                return None
+            # interrupt() 只对正在执行的语句生效；进度回调兜住“取消早于语句开始”的情况
+            conn.set_progress_handler(self._progress_check, 1000)
+            with db_manager.use_read_connection(conn):
+                return self._fn(*self._args, **self._kwargs)
+        finally:
+            self._executor._unregister_connection(self._key, conn)
+            conn.close()
+
+
+class DataAccessExecutor(QObject):
+    """按 key 管理后台查询，同一 key 只保留最新一次请求的结果"""
+
+    _request_finished = pyqtSignal(str, int, object)
+    _request_failed = pyqtSignal(str, int, str)
+
+    def __init__(self, db_manager=None, thread_pool: Optional[QThreadPool] = None, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._callbacks: Dict[str, Tuple[int, Optional[Callable], Optional[Callable]]] = {}
+        self._connections: Dict[str, Any] = {}
+        self._running = 0
+        # 跨线程发射，按队列连接投递到执行器所在的 GUI 线程
+        self._request_finished.connect(self._on_request_finished)
+        self._request_failed.connect(self._on_request_failed)
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable,
+        *args,
+        on_result: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[str], None]] = None,
+        read_only: bool = True,
+        **kwargs,
+    ) -> int:
+        """提交请求并返回其代次；同一 key 上尚未完成的请求会被取消"""
+        self.cancel(key)
+        with self._lock:
+            generation = self._generations.get(key, 0)
+            self._callbacks[key] = (generation, on_result, on_error)
+            self._running += 1
+        self.thread_pool.start(_DataRequest(self, key, generation, fn, args, kwargs, read_only))
+        return generation
+
+    def cancel(self, key: str) -> None:
+        """作废 key 上的请求：递增代次、中断正在执行的查询并丢弃回调"""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._callbacks.pop(key, None)
+            conn = self._connections.get(key)
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except Exception as e:
+                logger.debug(f"中断查询失败: {str(e)}")
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            keys = set(self._generations) | set(self._callbacks)
+        for key in keys:
+            self.cancel(key)
+
+    def is_current(self, key: str, generation: int) -> bool:
+        with self._lock:
+            return self._generations.get(key, 0) == generation
+
+    def pending_count(self) -> int:
+        """已提交但结果尚未在 GUI 线程处理完的请求数"""
+        with self._lock:
+            return self._running + len(self._callbacks)
+
+    def wait_for_idle(self, timeout_ms: int = 5000) -> bool:
+        """在 GUI 线程等待全部请求完成并分发结果（主要用于测试和关闭前收尾）。
+
+        只投递排队的信号调用（结果回调即由此送达），不运行定时器，
+        避免视图的自动 fetchMore 等界面逻辑在等待期间插入新请求。
+        """
+        timer = QElapsedTimer()
+        timer.start()
+        while True:
+            QCoreApplication.sendPostedEvents(None, QEvent.Type.MetaCall)
+            with self._lock:
+                running = self._running
+                waiting = len(self._callbacks)
+            if not running and not waiting:
+                return True
+            if timer.elapsed() >= timeout_ms:
+                return False
+            if running:
+                self.thread_pool.waitForDone(10)
+
+    # ---- 工作线程回调 ----
+
+    def _register_connection(self, key: str, generation: int, conn) -> bool:
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return False
+            self._connections[key] = conn
+            return True
+
+    def _unregister_connection(self, key: str, conn) -> None:
+        with self._lock:
+            if self._connections.get(key) is conn:
+                del self._connections[key]
+
+    def _request_done(self) -> None:
+        with self._lock:
+            self._running = max(0, self._running - 1)
+
+    def _emit_finished(self, key: str, generation: int, result: Any) -> None:
+        if not self.is_current(key, generation):
+            return
+        try:
+            self._request_finished.emit(key, generation, result)
+        except RuntimeError:
+            # 执行器已随对话框销毁
+            pass
+
+    def _emit_failed(self, key: str, generation: int, error: Exception) -> None:
+        if not self.is_current(key, generation):
+            logger.debug(f"已取消的请求 {key} 结束: {str(error)}")
+            return
+        logger.error(f"后台数据请求 {key} 失败: {str(error)}")
+        try:
+            self._request_failed.emit(key, generation, str(error))
+        except RuntimeError:
+            pass
+
+    # ---- GUI 线程 ----
+
+    def _take_callbacks(self, key: str, generation: int):
+        with self._lock:
+            entry = self._callbacks.get(key)
+            if entry is None or entry[0] != generation or self._generations.get(key, 0) != generation:
+                return None
+            del self._callbacks[key]
+            return entry
+
+    def _on_request_finished(self, key: str, generation: int, result: Any) -> None:
+        entry = self._take_callbacks(key, generation)
+        if entry is not None and entry[1] is not None:
+            entry[1](result)
+
+    def _on_request_failed(self, key: str, generation: int, message: str) -> None:
+        entry = self._take_callbacks(key, generation)
+        if entry is not None and entry[2] is not None:
+            entry[2](message)
@@ -15,9 +15,10 @@ class DeletedTableDialog(ArchiveTableDialog):
     date_field = "updated_at"
     restore_button_text = "还原选中事项"
     page_loader_name = "load_deleted_tasks_page"
+    page_with_total_loader_name = "load_deleted_tasks_page_with_total"
     count_loader_name = "count_deleted_tasks"
-    id_loader_name = "load_deleted_task_ids"
     restore_method_name = "restore_deleted_task"
+    restore_matching_method_name = "restore_deleted_tasks_matching"
     confirm_message_template = "确定要还原 {count} 个已删除事项吗？"
     success_message_template = "成功还原 {count} 个已删除事项"
     load_error_label = "已删除事项"
@@ -1,10 +1,11 @@
 """导出概要对话框 - 选择时间区间并生成任务概要报告"""
 
+import concurrent.futures
 import os
+import time
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
 
 from PyQt6.QtCore import Qt, QDate, QThread, pyqtSignal
 from PyQt6.QtWidgets import (
@@ -16,9 +17,18 @@ from PyQt6.QtGui import QMouseEvent
 
 from ui.fluent import create_calendar_picker, get_date_from_picker, get_date_string_from_picker, set_date_on_picker
 from ui.notifications import _show_info_bar, show_error, show_success,show_warning
+from ui.paged_table import PagedTableModel, PagedTableView
 from ui.styles import BUTTON_THEME_TOKENS, StyleManager, apply_button_role
 from database.database_manager import get_db_manager
 from core.LLMService import get_llm_service
+from core.summary_cache import get_summary_cache, summary_cache_key
+from core.summary_prompt import (
+    SummaryRequest,
+    build_single_task_messages,
+    build_summary_plan,
+    build_task_block,
+    parse_batch_summaries,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,75 +36,49 @@ logger = logging.getLogger(__name__)
 class SummaryWorker(QThread):
     """后台线程：查询任务历史并生成概要"""
     progress = pyqtSignal(str)  # 进度信息
+    tasks_loaded = pyqtSignal(object)  # 待生成的任务列表（副本），供界面先行展示
+    summary_ready = pyqtSignal(int, str, bool)  # (任务序号, 概要, 是否成功)，每完成一个任务发射一次
     finished = pyqtSignal(bool, str, object)  # (成功, 消息, 数据)
     
     def __init__(self, start_date: str, end_date: str):
         super().__init__()
         self.start_date = start_date
         self.end_date = end_date
+        # 本次生成的概要缓存命中统计，供对话框展示命中率
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.prompt_stats = None
+        self._cancelled = False
+        self._llm_future = None
+
+    def cancel(self):
+        """请求停止：正在进行的 LLM 请求随整批 Future 一起取消，已完成的结果保留"""
+        self._cancelled = True
+        future = self._llm_future
+        if future is not None:
+            future.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def _emit_summary(self, tasks_data: List[Dict[str, Any]], index: int, summary: str, success: bool) -> None:
+        tasks_data[index]['summary'] = summary
+        self.summary_ready.emit(index, summary, success)
         
     def run(self):
         """执行查询和生成概要"""
         try:
             self.progress.emit("正在查询任务历史...")
-            db_manager = get_db_manager()
-            
-            # 确保缓存已刷新到数据库
-            db_manager.flush_cache_to_db()
-            
-            # 查询时间区间内有更新的任务
-            conn = db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            # 查询该时间段内有历史记录的任务ID
-            cursor.execute('''
-                SELECT DISTINCT task_id 
-                FROM task_history 
-                WHERE timestamp BETWEEN ? AND ?
-            ''', (self.start_date, self.end_date + ' 23:59:59'))
-            
-            task_ids = [row[0] for row in cursor.fetchall()]
-            
-            if not task_ids:
+            tasks_data = self._load_tasks_data(get_db_manager())
+
+            if not tasks_data:
                 self.finished.emit(False, "所选时间区间内没有任务更新记录", None)
                 return
-            
-            self.progress.emit(f"找到 {len(task_ids)} 个任务，正在获取详细信息...")
-            
-            # 获取这些任务的详细信息
-            tasks_data = []
-            for task_id in task_ids:
-                cursor.execute('''
-                    SELECT id, text, priority, notes, due_date, completed, 
-                           completed_date, created_at, updated_at, directory
-                    FROM tasks 
-                    WHERE id = ?
-                ''', (task_id,))
-                
-                row = cursor.fetchone()
-                if row:
-                    task_dict = dict(row)
-                    
-                    # 获取该任务的历史记录
-                    cursor.execute('''
-                        SELECT field_name, field_value, action, timestamp
-                        FROM task_history
-                        WHERE task_id = ? AND timestamp BETWEEN ? AND ?
-                        ORDER BY timestamp ASC
-                    ''', (task_id, self.start_date, self.end_date + ' 23:59:59'))
-                    
-                    history = []
-                    for hist_row in cursor.fetchall():
-                        history.append({
-                            '任务名称': hist_row[0],
-                            '任务详情': hist_row[1],
-                            '修改动作': hist_row[2],
-                            '时间': hist_row[3]
-                        })
-                    
-                    task_dict['history'] = history
-                    tasks_data.append(task_dict)
-            
+            if self._cancelled:
+                self.finished.emit(False, "已停止生成", None)
+                return
+
+            self.tasks_loaded.emit([dict(task, summary='生成中...') for task in tasks_data])
             self.progress.emit(f"数据获取完成，准备生成概要...")
             
             # 调用 LLM 生成概要
@@ -104,59 +88,79 @@ class SummaryWorker(QThread):
                 if not llm_service.is_available():
                     logger.warning("LLM服务不可用")
                     # 即使LLM不可用，也返回基础数据
-                    for task in tasks_data:
-                        task['summary'] = '（LLM服务不可用，无法生成总结）'
+                    for index in range(len(tasks_data)):
+                        self._emit_summary(tasks_data, index, '（LLM服务不可用，无法生成总结）', False)
                     self.finished.emit(True, "数据获取成功（未使用AI总结）", tasks_data)
                     return
                 
-                schema = {
-                            "type": "object",
-                            "title":"summary",
-                            "properties": {
-                                    "task_id": {"type": "string"},
-                                    "summary": {"type": "string"}
-                            },
-                            "required": ["task_id", "summary"],
-                        }
-
-                # 并行生成任务总结
                 total_tasks = len(tasks_data)
                 success_count = 0
                 completed_count = 0
-                
-                # 使用线程池并行处理
-                max_workers = min(10, total_tasks)  # 最多10个并发线程
-                
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    # 提交所有任务到线程池
-                    future_to_task = {
-                        executor.submit(self._generate_single_task_summary, task, llm_service, schema): task 
-                        for task in tasks_data
-                    }
-                    
-                    # 处理完成的任务
-                    for future in as_completed(future_to_task):
-                        task = future_to_task[future]
-                        completed_count += 1
-                        
-                        try:
-                            # 获取结果
-                            summary, is_success = future.result()
-                            task['summary'] = summary
-                            
-                            if is_success:
-                                success_count += 1
-                                logger.info(f"任务 {task['id']} 总结生成成功")
-                            else:
-                                logger.warning(f"任务 {task['id']} 总结生成失败")
-                            
-                            # 更新进度
-                            self.progress.emit(f"正在使用AI生成任务总结... ({completed_count}/{total_tasks})")
-                            
-                        except Exception as e:
-                            logger.error(f"任务 {task['id']} 处理结果时出错: {str(e)}", exc_info=True)
-                            task['summary'] = '（生成总结时出错）'
-                
+                for task in tasks_data:
+                    task['summary'] = '（总结生成失败）'
+
+                # 合并连续编辑、按预算截断历史，并把小任务打包进同一请求
+                plan = build_summary_plan(tasks_data)
+                self.prompt_stats = plan.stats
+                requests = plan.requests
+
+                # 相同模型、Schema 和提示词的响应直接取自持久化缓存
+                cache_keys = [
+                    summary_cache_key(llm_service.model, request.schema, request.messages)
+                    for request in requests
+                ]
+                summary_cache = get_summary_cache()
+                cached = summary_cache.get_many(cache_keys) if summary_cache is not None else {}
+                self.cache_lookups = len(requests) if summary_cache is not None else 0
+
+                def apply_result(request_index: int, response_text: Optional[str], from_cache: bool) -> bool:
+                    nonlocal success_count, completed_count
+                    if self._cancelled:
+                        return True
+                    request = requests[request_index]
+                    outcomes = self._parse_request_response(request, tasks_data, response_text, llm_service)
+                    all_success = all(is_success for _summary, is_success in outcomes)
+                    if from_cache and not all_success:
+                        return False
+                    for task_index, (summary, is_success) in zip(request.task_indices, outcomes):
+                        task = tasks_data[task_index]
+                        self._emit_summary(tasks_data, task_index, summary, is_success)
+                        if is_success:
+                            success_count += 1
+                            logger.info(f"任务 {task['id']} 总结{'命中缓存' if from_cache else '生成成功'}")
+                        else:
+                            logger.warning(f"任务 {task['id']} 总结生成失败")
+                    if summary_cache is not None and not from_cache and all_success:
+                        summary_cache.put(cache_keys[request_index], response_text, llm_service.model)
+                    completed_count += len(request.task_indices)
+                    self.progress.emit(f"正在使用AI生成任务总结... ({completed_count}/{total_tasks})")
+                    return True
+
+                pending_indices = []
+                for request_index, key in enumerate(cache_keys):
+                    if key in cached and apply_result(request_index, cached[key], from_cache=True):
+                        self.cache_hits += 1
+                    else:
+                        pending_indices.append(request_index)
+
+                # 未命中的请求在 LLM 服务的常驻事件循环上批量生成，哪个请求先完成就先回传，不等前面的慢请求
+                if pending_indices and not self._cancelled:
+                    self._llm_future = llm_service.submit_many(
+                        [requests[index].messages for index in pending_indices],
+                        [requests[index].schema for index in pending_indices],
+                        on_result=lambda position, text: apply_result(pending_indices[position], text, from_cache=False),
+                    )
+                    if self._cancelled:
+                        self._llm_future.cancel()
+                    try:
+                        self._llm_future.result()
+                    except concurrent.futures.CancelledError:
+                        logger.info(f"用户停止生成概要，已完成 {completed_count}/{total_tasks}")
+
+                if self._cancelled:
+                    self.finished.emit(True, f"已停止生成（完成 {completed_count}/{total_tasks}）", tasks_data)
+                    return
+
                 # 所有任务处理完成
                 if success_count == total_tasks:
                     self.finished.emit(True, f"概要生成成功（{success_count}/{total_tasks}）", tasks_data)
@@ -168,54 +172,66 @@ class SummaryWorker(QThread):
             except Exception as e:
                 logger.error(f"调用LLM服务失败: {str(e)}", exc_info=True)
                 # 出错时也返回基础数据
-                for task in tasks_data:
-                    task['summary'] = '（生成总结时出错）'
+                for index in range(len(tasks_data)):
+                    self._emit_summary(tasks_data, index, '（生成总结时出错）', False)
                 self.finished.emit(True, "数据获取成功（生成总结时出错）", tasks_data)
             
         except Exception as e:
             logger.error(f"生成概要失败: {str(e)}", exc_info=True)
             self.finished.emit(False, f"生成概要失败: {str(e)}", None)
     
-    def _generate_single_task_summary(self, task: Dict[str, Any], llm_service, schema: Dict[str, Any]) -> tuple:
+    def _load_tasks_data(self, db_manager) -> List[Dict[str, Any]]:
+        """在独立只读连接上一次性读取区间内的任务和历史，不占用界面线程的共享连接"""
+        started = time.perf_counter()
+        read_conn = db_manager.open_read_connection()
+        try:
+            # 数据库文件不可用时 read_conn 为 None，回退到主连接
+            with db_manager.use_read_connection(read_conn):
+                tasks_data = db_manager.load_tasks_with_history_between(self.start_date, self.end_date + ' 23:59:59')
+        finally:
+            if read_conn is not None:
+                read_conn.close()
+        logger.info(f"概要数据读取完成：{len(tasks_data)} 个任务，耗时 {time.perf_counter() - started:.3f}s")
+        return tasks_data
+
+    def _parse_request_response(
+        self,
+        request: SummaryRequest,
+        tasks_data: List[Dict[str, Any]],
+        response_text: Optional[str],
+        llm_service,
+    ) -> List[tuple]:
         """
-        生成单个任务的总结（用于并行执行）
-        
-        Args:
-            task: 任务数据
-            llm_service: LLM服务实例
-            schema: JSON schema
-            
+        解析一次请求的LLM响应，打包请求按 task_id 对应回各个任务
+
         Returns:
-            tuple: (summary_text, is_success)
+            list: 与 request.task_indices 一一对应的 (summary_text, is_success)
         """
-        try:
-            # 构建提示词
-            messages = self._build_single_task_summary_prompt(task)
-            
-            # 调用LLM服务
-            response_text = llm_service.generate_response_sync(messages, schema)
-            
-            if response_text:
-                # 解析响应
-                summary_result = llm_service.parse_json_response(response_text)
-                if summary_result and 'summary' in summary_result:
-                    return (summary_result['summary'], True)
-                else:
-                    # 解析失败
-                    logger.error(f"任务 {task['id']} LLM响应格式错误")
-                    return ('（总结生成失败）', False)
+        failed = ('（总结生成失败）', False)
+        task_ids = [tasks_data[index]['id'] for index in request.task_indices]
+        if not response_text:
+            logger.error(f"任务 {', '.join(task_ids)} LLM调用返回空")
+            return [failed] * len(task_ids)
+        summary_result = llm_service.parse_json_response(response_text)
+        if not request.batched:
+            if summary_result and 'summary' in summary_result:
+                return [(summary_result['summary'], True)]
+            logger.error(f"任务 {task_ids[0]} LLM响应格式错误")
+            return [failed]
+
+        summaries = parse_batch_summaries(summary_result)
+        outcomes = []
+        for task_id in task_ids:
+            if task_id in summaries:
+                outcomes.append((summaries[task_id], True))
             else:
-                # LLM调用失败
-                logger.error(f"任务 {task['id']} LLM调用返回空")
-                return ('（总结生成失败）', False)
-        
-        except Exception as e:
-            logger.error(f"任务 {task['id']} 生成总结时出错: {str(e)}", exc_info=True)
-            return ('（生成总结时出错）', False)
-    
+                logger.error(f"任务 {task_id} 未出现在批量响应中")
+                outcomes.append(failed)
+        return outcomes
+
     def _build_single_task_summary_prompt(self, task: Dict[str, Any]) -> List[Dict[str, str]]:
         """
-        构建单个任务总结的提示词
+        构建单个任务总结的提示词（已合并连续编辑并按 token 预算截断历史）
         
         Args:
             task: 单个任务数据
@@ -223,67 +239,7 @@ class SummaryWorker(QThread):
         Returns:
             消息列表 [{"role": "system", "content": "..."}, {"role": "user", "content": "..."}]
         """
-        system_content = """你是一名【工作总结撰写助手】，擅长将零散的任务记录和变更历史整理为可直接用于工作总结中的正式表述。
-
-你将收到：
-- 一个任务的基本信息
-- 该任务的多条历史变更记录（包括状态、内容调整、推进过程）
-
-你的任务是：
-
-一、分析任务执行过程  
-- 重点关注任务在推进过程中体现出的工作内容、协调情况、处理事项和结果  
-- 不要关注或复述：创建时间、完成时间、优先级、任务ID、负责人姓名等元信息  
-- 即使变更记录较少，也要从“实际完成了什么工作”角度进行概括，不得简单写“无显著变更”
-- 不得编造没有在原文中体现的事项
-
-二、生成一段可直接使用的工作完成情况表述
-- 字数控制在 100–400 个汉字内
-- 采用正式、公文风格
-- 表述应体现：  
-  1. 做了哪些具体工作  
-  2. 推进或协调了哪些事项  
-  3. 最终形成了什么成果或状态  
-
-三、语言与格式要求  
-- 必须全程使用中文
-- 不得以“任务X于某日完成”这类流水账方式开头
-
-请直接输出最终总结内容，不要解释你的分析过程。
-            """
-        
-        # 构建用户内容
-        user_content = "以下是需要总结的任务信息：\n\n"
-        user_content += f"- ID: {task.get('id')}\n"
-        user_content += f"- 内容: {task.get('text', '无')}\n"
-        user_content += f"- 优先级: {task.get('priority', '无')}\n"
-        user_content += f"- 状态: {'已完成' if task.get('completed') else '进行中'}\n"
-        user_content += f"- 创建时间: {task.get('created_at', '无')}\n"
-        user_content += f"- 完成时间: {task.get('completed_date', '未完成')}\n"
-        
-        # 添加历史记录
-        history = task.get('history', [])
-        if history:
-            user_content += f"- 变更历史（{len(history)}条）:\n"
-            for h in history:
-                action_text = {
-                    'created': '创建',
-                    'updated': '更新',
-                    'completed': '完成',
-                    'deleted': '删除'
-                }.get(h.get('action'), h.get('action'))
-                
-                user_content += f"  [{h.get('timestamp')}] {action_text} - "
-                user_content += f"{h.get('field')}: {h.get('value')}\n"
-        else:
-            user_content += "- 变更历史: 无\n"
-        
-        user_content += "\n请为这个任务生成工作概要。"
-        
-        return [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": user_content}
-        ]
+        return build_single_task_messages(build_task_block(task))
     
 
 class ExportSummaryDialog(QDialog):
@@ -294,6 +250,8 @@ class ExportSummaryDialog(QDialog):
         
         self.worker = None
         self.summary_data = None
+        # 已完成概要的任务序号；停止生成后只导出这些行
+        self._finished_rows = set()
         
         # 创建UI
         self.setup_ui()
@@ -390,6 +348,25 @@ class ExportSummaryDialog(QDialog):
         self.status_label.setVisible(False)
         panel_layout.addWidget(self.status_label)
         
+        # 实时结果表格：每完成一个任务就更新对应行
+        self.summary_model = PagedTableModel(
+            headers=["任务内容", "工作概要"],
+            row_formatter=lambda task: [task.get('text', ''), task.get('summary', '')],
+            empty_message="所选时间区间内没有任务更新记录",
+            empty_message_column=1,
+            parent=self,
+        )
+        self.summary_table = PagedTableView(
+            self.summary_model,
+            fixed_width_columns={0: 160},
+            multiline_columns={1},
+            stretch_columns={1},
+            parent=panel,
+            min_height=220,
+        )
+        self.summary_table.setVisible(False)
+        panel_layout.addWidget(self.summary_table)
+        
         # 按钮区域
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -399,6 +376,12 @@ class ExportSummaryDialog(QDialog):
         self.generate_button.clicked.connect(self._generate_summary)
         button_layout.addWidget(self.generate_button)
         
+        self.stop_button = QPushButton("停止")
+        apply_button_role(self.stop_button, "secondary")
+        self.stop_button.clicked.connect(self._cancel_generation)
+        self.stop_button.setVisible(False)
+        button_layout.addWidget(self.stop_button)
+        
         self.export_button = QPushButton("导出Excel")
         apply_button_role(self.export_button, "secondary")
         self.export_button.clicked.connect(self._export_to_excel)
@@ -452,15 +435,45 @@ class ExportSummaryDialog(QDialog):
         # 禁用按钮
         self.generate_button.setEnabled(False)
         self.export_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.stop_button.setVisible(True)
         self.progress_bar.setVisible(True)
         self.status_label.setVisible(True)
         self.status_label.setText("正在生成概要...")
+        self.summary_data = None
+        self._finished_rows = set()
+        self.summary_model.reset()
         
         # 启动后台线程
         self.worker = SummaryWorker(start_date, end_date)
         self.worker.progress.connect(self._on_progress)
+        self.worker.tasks_loaded.connect(self._on_tasks_loaded)
+        self.worker.summary_ready.connect(self._on_summary_ready)
         self.worker.finished.connect(self._on_finished)
         self.worker.start()
+
+    def _cancel_generation(self):
+        """停止生成：已完成的概要保留，可直接导出"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.stop_button.setEnabled(False)
+            self.status_label.setText("正在停止...")
+
+    def _on_tasks_loaded(self, tasks):
+        """任务列表就绪：先展示全部任务，概要列随生成进度逐行更新"""
+        self.summary_data = tasks
+        self.summary_model.reset(records=tasks)
+        self.summary_table.setVisible(True)
+        self.adjustSize()
+
+    def _on_summary_ready(self, index: int, summary: str, success: bool):
+        """单个任务的概要完成：更新对应行，并允许导出已完成部分"""
+        if not self.summary_data or not 0 <= index < len(self.summary_data):
+            return
+        self.summary_data[index]['summary'] = summary
+        self.summary_model.update_record(index)
+        self._finished_rows.add(index)
+        self.export_button.setEnabled(True)
     
     def _on_progress(self, message: str):
         """更新进度"""
@@ -469,20 +482,47 @@ class ExportSummaryDialog(QDialog):
     def _on_finished(self, success: bool, message: str, data):
         """生成完成"""
         self.progress_bar.setVisible(False)
+        self.stop_button.setVisible(False)
         self.generate_button.setEnabled(True)
         
         if success:
-            self.summary_data = data
-            self.export_button.setEnabled(True)
-            self.status_label.setText(f"✓ {message}，共 {len(data)} 个任务")
+            # 表格已持有逐行更新的任务列表，只有未发射 tasks_loaded 时才采用最终数据
+            if self.summary_data is None:
+                self.summary_data = data
+                self._finished_rows = set(range(len(data)))
+                self.summary_model.reset(records=data)
+                self.summary_table.setVisible(True)
+            if self.worker is not None and self.worker.is_cancelled():
+                for index, task in enumerate(self.summary_data):
+                    if index not in self._finished_rows:
+                        task['summary'] = '（已停止，未生成）'
+                        self.summary_model.update_record(index)
+            self.export_button.setEnabled(bool(self._export_rows()))
+            status = f"✓ {message}，共 {len(data)} 个任务"
+            worker = self.worker
+            cache_lookups = getattr(worker, 'cache_lookups', 0)
+            if cache_lookups:
+                cache_hits = getattr(worker, 'cache_hits', 0)
+                status += f"，缓存命中 {cache_hits}/{cache_lookups}（{cache_hits / cache_lookups:.0%}）"
+            prompt_stats = getattr(worker, 'prompt_stats', None)
+            if prompt_stats is not None:
+                status += f"，{prompt_stats.describe()}"
+            self.status_label.setText(status)
             self.status_label.setStyleSheet(f'font-size: 12px; color: {BUTTON_THEME_TOKENS["accent_fill_rest"]};')
         else:
             self.status_label.setText(f"✗ {message}")
             self.status_label.setStyleSheet(f'font-size: 12px; color: {BUTTON_THEME_TOKENS["danger_fill_rest"]};')
     
+    def _export_rows(self) -> List[Dict[str, Any]]:
+        """可导出的任务：已生成概要的行（停止生成时为已完成的部分）"""
+        if not self.summary_data:
+            return []
+        return [task for index, task in enumerate(self.summary_data) if index in self._finished_rows]
+
     def _export_to_excel(self):
         """导出到Excel"""
-        if not self.summary_data:
+        export_rows = self._export_rows()
+        if not export_rows:
             _show_info_bar(parent=self, title="提示", content="没有可导出的数据")
             return
         
@@ -517,7 +557,7 @@ class ExportSummaryDialog(QDialog):
         
         try:
             # 转换为DataFrame
-            df = pd.DataFrame(self.summary_data)
+            df = pd.DataFrame(export_rows)
             
             # 重新排列列的顺序
             column_order = [
@@ -570,6 +610,13 @@ class ExportSummaryDialog(QDialog):
             show_error(self, "导出失败", f"导出任务概要时发生错误:\n{str(e)}")
             logger.error(f"导出任务概要失败: {str(e)}", exc_info=True)
     
+    def done(self, result):
+        """关闭对话框前停止后台生成，避免线程在对话框销毁后仍在运行"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait(3000)
+        super().done(result)
+    
     # 拖动实现
     def mousePressEvent(self, e: QMouseEvent):
         if e.button() == Qt.MouseButton.LeftButton:
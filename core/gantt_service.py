@@ -0,0 +1,96 @@
+"""甘特图服务的桌面端生命周期
+
+在后台线程里导入 Flask、绑定临时端口并运行多线程 WSGI 服务（gantt/server.py），
+就绪后通过 ready 信号把 URL 交回 GUI 线程；界面线程不轮询端口、不 sleep。
+程序退出时 stop() 关闭监听、结束变更流并等待服务线程退出。
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class GanttService(QObject):
+    """托管的甘特图服务：start() 立即返回，结果经 ready / failed 信号通知"""
+
+    ready = pyqtSignal(str)  # 服务地址
+    failed = pyqtSignal(str)  # 启动失败原因
+
+    def __init__(self, db_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 0, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[threading.Event] = None
+        self._server = None
+        self._url: Optional[str] = None
+
+    @property
+    def url(self) -> Optional[str]:
+        """服务就绪后的地址；未启动或已停止时为 None"""
+        with self._lock:
+            return self._url
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """在后台启动服务；已在启动或运行中时不重复启动"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name="GanttService", daemon=True)
+            self._thread.start()
+
+    def _run(self, stop: threading.Event) -> None:
+        try:
+            # Flask/Werkzeug 只在首次打开甘特图时导入，且不占用界面线程
+            from gantt.server import GanttServer
+            server = GanttServer(host=self.host, port=self.port, db_path=self.db_path)
+        except Exception as e:
+            logger.error(f"启动甘特图服务失败: {str(e)}")
+            self.failed.emit(str(e))
+            return
+
+        with self._lock:
+            if stop.is_set():
+                # 启动过程中已被要求停止
+                server.shutdown()
+                return
+            self._server = server
+            self._url = server.url
+        self.ready.emit(server.url)
+
+        try:
+            server.serve_forever()
+        except Exception as e:
+            logger.error(f"甘特图服务异常退出: {str(e)}")
+        finally:
+            with self._lock:
+                if self._server is server:
+                    self._server = None
+                    self._url = None
+
+    def stop(self, timeout: float = 3.0) -> None:
+        """停止服务并等待后台线程退出，可重复调用"""
+        with self._lock:
+            if self._stop is not None:
+                self._stop.set()
+            server, thread = self._server, self._thread
+            self._server = None
+            self._url = None
+        if server is not None:
+            try:
+                server.shutdown()
+            except Exception as e:
+                logger.error(f"停止甘特图服务失败: {str(e)}")
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
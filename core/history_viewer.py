@@ -4,25 +4,36 @@ from PyQt6.QtCore import Qt
 from datetime import datetime
 
 
-from ui.adaptive_table import AdaptiveTextTableWidget
-from ui.notifications import show_error, show_success
+from core.data_executor import DataAccessExecutor
+from ui.paged_table import PagedTableModel, PagedTableView
+from ui.notifications import show_error, show_success, show_warning
 from ui.styles import StyleManager, apply_button_role
-from database.database_manager import get_db_manager
+from database.database_manager import get_db_manager, history_row_cursor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 字段名称映射
+FIELD_NAME_MAP = {
+    'text': '任务内容',
+    'notes': '备注',
+    'due_date': '到期日期',
+    'priority': '优先级',
+    'directory': '目录',
+    'create_date': '创建日期'
+}
+
 class HistoryViewer(QDialog):
     """历史记录查看器"""
     def __init__(self, task_data, parent=None):
         super().__init__(parent)
         self.task_data = task_data
         self.db_manager = get_db_manager()
+        self.data_executor = DataAccessExecutor(self.db_manager, parent=self)
         self.page_size = 50
-        self.history_offset = 0
-        self.history_total_count = 0
-        self.merged_history_rows = []
+        self.history_model = None
         self.history_table = None
+        self._history_export_worker = None
         self.setup_ui()
         
     def setup_ui(self):
@@ -104,87 +115,107 @@ class HistoryViewer(QDialog):
         self.adjustSize()
         self.center_on_parent()
     def load_history_records(self, layout):
-        """从数据库加载历史记录并合并显示到一个表格"""
+        """在后台读取历史记录第一页，返回后合并显示到一个分页表格"""
+        self._clear_layout(layout)
+        self.history_table = None
+        self.history_model = None
+
+        task_id = self.task_data.get('id')
+        if not task_id:
+            layout.addWidget(QLabel("未找到任务ID"))
+            self._update_load_more_button()
+            return
+
+        layout.addWidget(QLabel("正在加载历史记录..."))
+        self._update_load_more_button()
+        # 不预先统计总数：按键集逐页读取，返回不足一页即视为读完
+        self.data_executor.submit(
+            "history",
+            self._fetch_history_page,
+            task_id,
+            self.page_size,
+            None,
+            on_result=lambda records: self._on_first_history_page(layout, records),
+            on_error=lambda message: self._on_first_history_page_failed(layout, message),
+        )
+
+    def _on_first_history_page(self, layout, records):
         try:
             self._clear_layout(layout)
-            self.history_table = None
-            self.history_offset = 0
-            self.history_total_count = 0
-            self.merged_history_rows = []
-
-            # 从数据库获取历史记录
-            task_id = self.task_data.get('id')
-            if not task_id:
-                layout.addWidget(QLabel("未找到任务ID"))
+            if not records:
+                layout.addWidget(QLabel("未找到该任务的历史记录"))
                 self._update_load_more_button()
                 return
 
-            self.history_total_count = self.db_manager.count_task_history(task_id)
+            model = self._create_history_model()
+            model.reset(page_requester=self._request_history_page, page_size=self.page_size)
+            model.finish_page(records)
+            self.create_merged_history_table(layout, model=model)
+            self._update_load_more_button()
+        except Exception as e:
+            self._on_first_history_page_failed(layout, str(e))
 
-            if self.history_total_count == 0:
-                layout.addWidget(QLabel("未找到该任务的历史记录"))
-                self._update_load_more_button()
-                return
+    def _on_first_history_page_failed(self, layout, message):
+        logger.error(f"加载历史记录失败: {message}")
+        self._clear_layout(layout)
+        self.history_model = None
+        layout.addWidget(QLabel(f"加载历史记录失败: {message}"))
+        self._update_load_more_button()
 
-            self._load_history_page(layout)
+    def _request_history_page(self, offset, limit):
+        # 游标在 GUI 线程取自已加载的最后一行，工作线程只执行查询
+        after = None
+        if offset and self.history_model is not None and self.history_model.loaded_count():
+            after = history_row_cursor(self.history_model.records()[-1])
+        model = self.history_model
+        self.data_executor.submit(
+            "history",
+            self._fetch_history_page,
+            self.task_data.get('id'),
+            limit,
+            after,
+            on_result=model.finish_page,
+            on_error=self._on_history_page_failed,
+        )
 
-        except Exception as e:
-            logger.error(f"加载历史记录失败: {str(e)}")
-            layout.addWidget(QLabel(f"加载历史记录失败: {str(e)}"))
-            self._update_load_more_button()
+    def _on_history_page_failed(self, message):
+        if self.history_model is not None:
+            self.history_model.fail_page(message)
+        show_error(self, "错误", f"加载更多历史记录失败: {message}")
 
     def load_more_history_records(self):
-        """加载下一页历史记录。"""
-        if self.history_offset >= self.history_total_count:
+        """加载下一页历史记录，追加到已有表格末尾。"""
+        if self.history_model is None or not self.history_model.has_more():
             self._update_load_more_button()
             return
-        self._load_history_page(self.history_container_layout)
+        try:
+            self.history_model.load_next_page()
+        except Exception as e:
+            logger.error(f"加载更多历史记录失败: {str(e)}")
+            show_error(self, "错误", f"加载更多历史记录失败: {str(e)}")
+        self._update_load_more_button()
 
-    def _load_history_page(self, layout):
-        task_id = self.task_data.get('id')
-        field_history = self.db_manager.get_task_history_page(
-            task_id,
-            limit=self.page_size,
-            offset=self.history_offset,
-        )
-        page_rows = self._merge_field_history(field_history)
-        if not page_rows:
-            self.history_offset = len(self.merged_history_rows)
-            self.history_total_count = self.history_offset
-            self._update_load_more_button()
-            return
+    def _fetch_history_page(self, task_id, limit, after):
+        """读取一页历史行（工作线程中执行），after 为上一页最后一行的键集游标"""
+        rows = self.db_manager.get_task_history_rows(task_id, limit=limit, after=after)
+        return [self._history_row_to_record(row) for row in rows]
 
-        self.merged_history_rows.extend(page_rows)
-        self.history_offset = len(self.merged_history_rows)
-        self._clear_layout(layout)
-        self.create_merged_history_table(layout, self.merged_history_rows)
-        self._update_load_more_button()
+    @property
+    def history_offset(self):
+        return self.history_model.loaded_count() if self.history_model else 0
 
-    def _merge_field_history(self, field_history):
-        # 字段名称映射
-        field_name_map = {
-            'text': '任务内容',
-            'notes': '备注',
-            'due_date': '到期日期',
-            'priority': '优先级',
-            'directory': '目录',
-            'create_date': '创建日期'
-        }
+    @property
+    def merged_history_rows(self):
+        return self.history_model.records() if self.history_model else []
 
-        # 合并所有字段的历史记录
-        merged_history = []
-        for field_name, history_list in field_history.items():
-            display_name = field_name_map.get(field_name, field_name)
-            for record in history_list:
-                merged_history.append({
-                    'field': display_name,
-                    'timestamp': record.get('timestamp', ''),
-                    'action': record.get('action', 'update'),
-                    'value': record.get('value', '')
-                })
-
-        merged_history.sort(key=lambda x: x['timestamp'], reverse=True)
-        return merged_history
+    def _history_row_to_record(self, row):
+        return {
+            'field': FIELD_NAME_MAP.get(row.get('field_name'), row.get('field_name')),
+            'timestamp': row.get('timestamp') or '',
+            'action': row.get('action') or 'update',
+            'value': row.get('value', ''),
+            'rowid': row.get('rowid'),
+        }
 
     def _clear_layout(self, layout):
         while layout.count():
@@ -193,49 +224,74 @@ class HistoryViewer(QDialog):
             if widget is not None:
                 widget.setParent(None)
 
-    def _update_load_more_button(self):
+    def _update_load_more_button(self, *_args):
         if not hasattr(self, 'load_more_button'):
             return
-        if self.history_offset < self.history_total_count:
+        if self.history_model is not None and self.history_model.is_page_pending():
+            self.load_more_button.setEnabled(False)
+            self.load_more_button.setText("加载中...")
+        elif self.history_model is not None and self.history_model.has_more():
             self.load_more_button.setEnabled(True)
-            self.load_more_button.setText(f"加载更多 ({self.history_offset}/{self.history_total_count})")
+            self.load_more_button.setText(f"加载更多 (已加载 {self.history_offset} 条)")
         else:
             self.load_more_button.setEnabled(False)
             self.load_more_button.setText("已全部加载")
 
-    def create_merged_history_table(self, layout, merged_history):
-        """创建合并后的历史记录表格"""
-        rows = []
-        for record in merged_history:
-            # 时间
-            timestamp = record['timestamp']
-            if timestamp:
-                try:
-                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    time_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    time_str = timestamp
-            else:
-                time_str = 'N/A'
-            action = record['action']
-            action_text = "创建" if action == 'create' else "更新"
-            rows.append([
-                time_str,
-                record['field'],
-                action_text,
-                str(record['value']),
-            ])
-
-        table = AdaptiveTextTableWidget(
+    def _format_history_row(self, record):
+        # 时间
+        timestamp = record['timestamp']
+        if timestamp:
+            try:
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                time_str = dt.strftime('%Y-%m-%d %H:%M:%S')
+            except:
+                time_str = timestamp
+        else:
+            time_str = 'N/A'
+        action = record['action']
+        action_text = "创建" if action == 'create' else "更新"
+        return [
+            time_str,
+            record['field'],
+            action_text,
+            str(record['value']),
+        ]
+
+    def _create_history_model(self):
+        model = PagedTableModel(
             headers=["时间", "字段", "操作", "值"],
-            rows=rows,
+            row_formatter=self._format_history_row,
+        )
+        model.pageLoaded.connect(self._update_load_more_button)
+        model.loadFailed.connect(self._update_load_more_button)
+        self.history_model = model
+        return model
+
+    def create_merged_history_table(self, layout, merged_history=None, model=None):
+        """创建合并后的历史记录表格，后续分页直接追加到同一模型"""
+        if model is None:
+            model = self._create_history_model()
+            model.reset(records=merged_history or [])
+        table = PagedTableView(
+            model,
             fixed_width_columns={3: 300},
             multiline_columns={3},
         )
 
+        # 模型随表格一起释放
+        model.setParent(table)
         self.history_table = table
         layout.addWidget(table)
     
+    def done(self, result):
+        self.data_executor.cancel_all()
+        worker = self._history_export_worker
+        if worker is not None and worker.isRunning():
+            # 关闭时取消导出并等待线程结束，.part 临时文件由写入方清理
+            worker.cancel()
+            worker.wait()
+        super().done(result)
+
     def center_on_parent(self):
         """居中显示窗口"""
         if self.parent():
@@ -253,87 +309,56 @@ class HistoryViewer(QDialog):
             self.move(x, y) 
 
     def export_history(self):
-        """导出历史记录为Excel或CSV文件"""
-        try:
-            import pandas as pd
-        except ImportError:
-            show_error(self, "导出失败", "未安装pandas库，无法导出为Excel/CSV。请先安装pandas。\n\n安装命令：pip install pandas openpyxl")
-            return
-        
+        """导出历史记录为Excel或CSV文件，在后台线程沿键集游标流式写入"""
         from PyQt6.QtWidgets import QFileDialog
+        from .task_exporter import HistoryExportWorker, is_csv_export
         import os
-        
-        # 从数据库获取历史记录
+
         task_id = self.task_data.get('id')
         if not task_id:
             show_error(self, "导出失败", "未找到任务ID")
             return
-        
+        worker = self._history_export_worker
+        if worker is not None and worker.isRunning():
+            show_warning(self, "导出历史记录", "正在导出，请稍候")
+            return
+
         try:
-            db_manager = get_db_manager()
-            field_history = db_manager.get_task_history(task_id)
-            
-            if not field_history:
-                show_error(self, "导出失败", "没有历史记录可导出")
-                return
-            
-            # 合并所有字段的历史记录
-            merged_history = []
-            
-            # 字段名称映射
-            field_name_map = {
-                'text': '任务内容',
-                'notes': '备注',
-                'due_date': '到期日期',
-                'priority': '优先级',
-                'directory': '目录',
-                'create_date': '创建日期'
-            }
-            
-            for field_name, history_list in field_history.items():
-                # 使用友好的字段名称
-                display_name = field_name_map.get(field_name, field_name)
-                for record in history_list:
-                    merged_history.append({
-                        '时间': record.get('timestamp', ''),
-                        '字段': display_name,
-                        '操作': '创建' if record.get('action', 'update') == 'create' else '更新',
-                        '值': record.get('value', '')
-                    })
-            
-            if not merged_history:
+            if not self.db_manager.get_task_history_rows(task_id, limit=1):
                 show_error(self, "导出失败", "没有历史记录可导出")
                 return
-            
-            # 按时间排序
-            merged_history.sort(key=lambda x: x['时间'])
-            
-            # 选择文件保存路径
-            desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
-            default_filename = os.path.join(desktop_path, "任务历史记录.xlsx")
-            filename, filetype = QFileDialog.getSaveFileName(
-                self,
-                "导出历史记录",
-                default_filename,
-                "Excel文件 (*.xlsx);;CSV文件 (*.csv);;所有文件 (*)"
-            )
-            
-            if not filename:
-                return
-            
-            try:
-                df = pd.DataFrame(merged_history)
-                if filetype.startswith("Excel") or filename.endswith(".xlsx"):
-                    df.to_excel(filename, index=False)
-                elif filetype.startswith("CSV") or filename.endswith(".csv"):
-                    df.to_csv(filename, index=False, encoding='utf-8-sig')
-                else:
-                    # 默认Excel
-                    df.to_excel(filename, index=False)
-                
-                show_success(self, "导出成功", f"成功导出历史记录到:\n{filename}")
-            except Exception as e:
-                show_error(self, "导出失败", f"导出历史记录时发生错误:\n{str(e)}")
-                
         except Exception as e:
             show_error(self, "导出失败", f"获取历史记录时发生错误:\n{str(e)}")
+            return
+
+        desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
+        default_filename = os.path.join(desktop_path, "任务历史记录.xlsx")
+        filename, filetype = QFileDialog.getSaveFileName(
+            self,
+            "导出历史记录",
+            default_filename,
+            "Excel文件 (*.xlsx);;CSV文件 (*.csv);;所有文件 (*)"
+        )
+        if not filename:
+            return
+        if filetype.startswith("CSV") and not filename.lower().endswith(".csv"):
+            filename += ".csv"
+
+        if not is_csv_export(filename):
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                show_error(self, "导出失败", "未安装openpyxl库，无法导出为Excel。请先安装openpyxl。\n\n安装命令：pip install openpyxl")
+                return
+
+        worker = HistoryExportWorker(task_id, filename, db_manager=self.db_manager, field_names=FIELD_NAME_MAP)
+        worker.finished.connect(self._on_history_export_finished)
+        self._history_export_worker = worker
+        worker.start()
+
+    def _on_history_export_finished(self, success, message, count):
+        self._history_export_worker = None
+        if success:
+            show_success(self, "导出成功", f"成功导出 {count} 条历史记录到:\n{message}")
+        elif message != "导出已取消":
+            show_error(self, "导出失败", message)
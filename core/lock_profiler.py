@@ -0,0 +1,147 @@
+"""锁竞争分析
+
+ProfiledLock 包装 threading.Lock，按调用点（函数名 文件:行号）记录等待与持有耗时，写入
+core/metrics.py 的注册表；持有超过阈值时记一条带调用栈的警告，等待超过阈值时记下当时的持有者。
+
+默认关闭：create_lock() 直接返回普通 threading.Lock，没有任何额外开销。启用方式（环境变量优先）：
+
+- 环境变量 TASKMANAGER_LOCK_PROFILE=1，阈值 TASKMANAGER_LOCK_PROFILE_THRESHOLD_MS；
+- 配置 metrics.lock_profiling = {"enabled": true, "threshold_ms": 50}。
+
+是否启用在创建锁时决定，修改后需重启应用。
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from core.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+LOCK_PROFILE_ENV = 'TASKMANAGER_LOCK_PROFILE'
+LOCK_PROFILE_THRESHOLD_ENV = 'TASKMANAGER_LOCK_PROFILE_THRESHOLD_MS'
+DEFAULT_THRESHOLD_MS = 50.0
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+_FALSE_VALUES = {'0', 'false', 'no', 'off', ''}
+
+
+def lock_hold_threshold(settings: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    """
+    解析锁竞争分析设置，返回持有阈值（秒）；未启用时返回 None
+
+    :param settings: 配置中的 metrics.lock_profiling，可为空
+    """
+    settings = settings if isinstance(settings, dict) else {}
+    enabled = bool(settings.get('enabled', False))
+    env_enabled = os.environ.get(LOCK_PROFILE_ENV)
+    if env_enabled is not None:
+        value = env_enabled.strip().lower()
+        if value in _TRUE_VALUES:
+            enabled = True
+        elif value in _FALSE_VALUES:
+            enabled = False
+        else:
+            logger.error(f"无法识别的 {LOCK_PROFILE_ENV} 取值: {env_enabled}")
+    if not enabled:
+        return None
+
+    threshold_ms = os.environ.get(LOCK_PROFILE_THRESHOLD_ENV) or settings.get('threshold_ms', DEFAULT_THRESHOLD_MS)
+    try:
+        threshold_ms = float(threshold_ms)
+    except (TypeError, ValueError):
+        logger.error(f"解析锁持有阈值失败: {threshold_ms}，使用默认 {DEFAULT_THRESHOLD_MS:g} ms")
+        threshold_ms = DEFAULT_THRESHOLD_MS
+    return max(0.0, threshold_ms) / 1000
+
+
+def _call_site(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class ProfiledLock:
+    """
+    记录等待/持有耗时的非重入锁，接口与 threading.Lock 相同
+
+    每次获取记一次 taskmanager_lock_wait_seconds{lock, site}，释放时按获取时的调用点记
+    taskmanager_lock_hold_seconds{lock, site}；持有超过阈值另计 taskmanager_lock_slow_holds_total。
+    """
+
+    def __init__(self, name: str, hold_threshold: float = DEFAULT_THRESHOLD_MS / 1000,
+                 registry: Optional[MetricsRegistry] = None):
+        self.name = name
+        self.hold_threshold = hold_threshold
+        self._lock = threading.Lock()
+        # 只有持有者会写这两个字段；等待者读取持有者时允许看到稍旧的值
+        self._holder_site: Optional[str] = None
+        self._holder_thread: Optional[str] = None
+        self._acquired_at = 0.0
+        registry = registry or get_metrics_registry()
+        self._wait_seconds = registry.histogram('taskmanager_lock_wait_seconds', '等待获取锁的耗时（秒）', ('lock', 'site'))
+        self._hold_seconds = registry.histogram('taskmanager_lock_hold_seconds', '持有锁的耗时（秒）', ('lock', 'site'))
+        self._slow_holds = registry.counter('taskmanager_lock_slow_holds_total', '持有锁超过阈值的次数', ('lock', 'site'))
+
+    def _acquire(self, frame, blocking: bool, timeout: float) -> bool:
+        site = _call_site(frame)
+        holder_site, holder_thread = self._holder_site, self._holder_thread
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        acquired_at = time.perf_counter()
+        waited = acquired_at - started
+        if acquired:
+            self._holder_site = site
+            self._holder_thread = threading.current_thread().name
+            self._acquired_at = acquired_at
+        self._wait_seconds.observe(waited, lock=self.name, site=site)
+        if waited >= self.hold_threshold and holder_site is not None:
+            logger.warning(
+                f"锁 {self.name} 在 {site} 等待 {waited * 1000:.1f} ms，"
+                f"等待开始时持有者: {holder_site}（线程 {holder_thread}）"
+            )
+        return acquired
+
+    def _release(self, frame) -> None:
+        site, thread_name = self._holder_site, self._holder_thread
+        held = time.perf_counter() - self._acquired_at
+        self._holder_site = None
+        self._holder_thread = None
+        self._lock.release()
+        # 释放后再记录，日志与调用栈格式化不计入持有时间
+        self._hold_seconds.observe(held, lock=self.name, site=site)
+        if held >= self.hold_threshold:
+            self._slow_holds.inc(lock=self.name, site=site)
+            stack = ''.join(traceback.format_stack(frame))
+            logger.warning(
+                f"锁 {self.name} 被 {site}（线程 {thread_name}）持有 {held * 1000:.1f} ms，"
+                f"超过阈值 {self.hold_threshold * 1000:g} ms，调用栈:\n{stack}"
+            )
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self._acquire(sys._getframe(1), blocking, timeout)
+
+    def release(self) -> None:
+        self._release(sys._getframe(1))
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self._acquire(sys._getframe(1), True, -1)
+
+    def __exit__(self, *exc_info) -> None:
+        self._release(sys._getframe(1))
+
+
+def create_lock(name: str, settings: Optional[Dict[str, Any]] = None):
+    """按设置创建锁：未启用锁竞争分析时返回普通 threading.Lock"""
+    threshold = lock_hold_threshold(settings)
+    if threshold is None:
+        return threading.Lock()
+    logger.info(f"锁 {name} 已启用竞争分析，持有阈值 {threshold * 1000:g} ms")
+    return ProfiledLock(name, threshold)
@@ -0,0 +1,351 @@
+"""进程内指标注册表
+
+提供计数器（Counter）、仪表（Gauge）和直方图（Histogram）三类指标，按标签值区分序列。
+数据库、同步和定时任务的热点路径把耗时与行数记录到全局注册表 get_metrics_registry()，
+通过 snapshot() 以字典读取、render_prometheus() 输出 Prometheus 文本格式（甘特图服务的
+/metrics），或由 MetricsLogReporter 定期把增量摘要写入日志。
+
+本模块只依赖标准库，core/database/gantt 均可直接导入。
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 直方图默认分桶（秒），覆盖亚毫秒级缓存操作到十秒级的网络请求
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + '}'
+
+
+class _Metric:
+    """指标基类：按标签值元组保存各序列的数据"""
+
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels_of(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"计数器 {self.name} 不能减少")
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._series.get(key, 0)
+
+    def _snapshot_series(self):
+        with self._lock:
+            return [{'labels': self._labels_of(key), 'value': value} for key, value in self._series.items()]
+
+    def _render_series(self):
+        with self._lock:
+            items = list(self._series.items())
+        return [f"{self.name}{_format_labels(self._labels_of(key))} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """可任意设置的当前值（如缓存条目数）"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class _HistogramSeries:
+    __slots__ = ('bucket_counts', 'count', 'sum', 'max')
+
+    def __init__(self, bucket_count: int):
+        self.bucket_counts = [0] * bucket_count
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram(_Metric):
+    """按分桶统计观测值分布，同时记录次数、总和与最大值"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series.bucket_counts[index] += 1
+                    break
+            series.count += 1
+            series.sum += value
+            if value > series.max:
+                series.max = value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """计时上下文：退出时（包括抛出异常）把耗时秒数记为一次观测"""
+        self._key(labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _cumulative(self, series: _HistogramSeries):
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets, series.bucket_counts):
+            running += count
+            cumulative.append((bound, running))
+        cumulative.append((math.inf, series.count))
+        return cumulative
+
+    def _snapshot_series(self):
+        with self._lock:
+            return [
+                {
+                    'labels': self._labels_of(key),
+                    'count': series.count,
+                    'sum': series.sum,
+                    'max': series.max,
+                    'buckets': {_format_value(bound): count for bound, count in self._cumulative(series)},
+                }
+                for key, series in self._series.items()
+            ]
+
+    def _render_series(self):
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                labels = self._labels_of(key)
+                for bound, count in self._cumulative(series):
+                    bucket_labels = dict(labels, le=_format_value(bound))
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series.sum)}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表：同名指标只创建一次，重复获取返回同一对象"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, help_text: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同的类型或标签注册")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def _sorted_metrics(self):
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        当前全部指标的快照（可直接 JSON 序列化）
+
+        {name: {'type', 'help', 'series': [...]}}；计数器/仪表的序列为 {'labels', 'value'}，
+        直方图的序列为 {'labels', 'count', 'sum', 'max', 'buckets'}，buckets 为累计计数，键为上界。
+        """
+        return {
+            metric.name: {'type': metric.kind, 'help': metric.help, 'series': metric._snapshot_series()}
+            for metric in self._sorted_metrics()
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in self._sorted_metrics():
+            help_text = metric.help.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f"# HELP {metric.name} {help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric._render_series())
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def reset(self) -> None:
+        """清空所有序列的数据，已注册的指标对象保持可用"""
+        for metric in self._sorted_metrics():
+            metric.reset()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取进程内共享的指标注册表"""
+    return _registry
+
+
+def _series_key(series: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(series['labels'].items()))
+
+
+def format_metrics_summary(current: Dict[str, Dict[str, Any]], previous: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """把两次快照之间的增量整理成多行文本；没有新数据的序列不输出"""
+    previous = previous or {}
+    lines = []
+    for name, metric in current.items():
+        previous_series = {_series_key(series): series for series in previous.get(name, {}).get('series', [])}
+        for series in metric['series']:
+            before = previous_series.get(_series_key(series))
+            label_text = _format_labels(series['labels'])
+            if metric['type'] == 'histogram':
+                count = series['count'] - (before['count'] if before else 0)
+                if count <= 0:
+                    continue
+                total = series['sum'] - (before['sum'] if before else 0.0)
+                lines.append(
+                    f"{name}{label_text}: {count} 次, 平均 {total / count * 1000:.2f} ms, "
+                    f"历史最大 {series['max'] * 1000:.2f} ms"
+                )
+            elif metric['type'] == 'counter':
+                delta = series['value'] - (before['value'] if before else 0)
+                if delta:
+                    lines.append(f"{name}{label_text}: +{_format_value(delta)}")
+            elif before is None or series['value'] != before['value']:
+                lines.append(f"{name}{label_text}: {_format_value(series['value'])}")
+    return '\n'.join(lines)
+
+
+class MetricsLogReporter:
+    """后台线程按固定间隔把指标增量摘要写入日志；间隔内没有新数据时不输出"""
+
+    def __init__(self, interval_seconds: float, registry: Optional[MetricsRegistry] = None):
+        self.interval_seconds = float(interval_seconds)
+        self.registry = registry or get_metrics_registry()
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def report(self) -> str:
+        """立即输出一次摘要并返回其文本"""
+        current = self.registry.snapshot()
+        summary = format_metrics_summary(current, self._previous)
+        self._previous = current
+        if summary:
+            logger.info(f"性能指标摘要（最近 {self.interval_seconds:g} 秒）:\n{summary}")
+        return summary
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker, name='MetricsLogReporter', daemon=True)
+        self._thread.start()
+        logger.info(f"性能指标日志摘要已启动，间隔 {self.interval_seconds:g} 秒")
+
+    def stop(self) -> None:
+        if self._thread and self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join(timeout=5)
+
+    def _worker(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.report()
+            except Exception as e:
+                logger.error(f"输出性能指标摘要失败: {str(e)}")
+
+
+def start_metrics_log_reporter(config: Dict[str, Any]) -> Optional[MetricsLogReporter]:
+    """按配置 metrics.log_summary_interval（秒）启动日志摘要；未配置或为 0 时不启动"""
+    try:
+        interval = float((config.get('metrics') or {}).get('log_summary_interval', 0) or 0)
+    except (TypeError, ValueError) as e:
+        logger.error(f"解析性能指标摘要间隔失败: {str(e)}")
+        return None
+    if interval <= 0:
+        return None
+    reporter = MetricsLogReporter(interval)
+    reporter.start()
+    return reporter
@@ -2,24 +2,20 @@ import json
 import os
 import webbrowser
 from copy import deepcopy
-import socket
-import time
 import threading
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QColorDialog, QDialog,
                              QMenu, QLabel, QCheckBox)
 from PyQt6.QtCore import Qt, QPoint,  QRect, QTimer,QUrl, pyqtSignal
-from PyQt6.QtWidgets import QApplication,QFileDialog
+from PyQt6.QtWidgets import QApplication,QFileDialog,QProgressDialog
 from PyQt6.QtGui import QColor, QPainter, QPen, QBrush, QFont,  QPainterPath,  QAction
 
 from font_families import APP_FONT_FAMILY
 
 
 from .task_label import TaskLabel
-from config.config_manager import save_config, save_tasks
-from config.remote_config import RemoteConfigManager
-from .add_task_dialog import AddTaskDialog
-from .settings_dialog import SettingsDialog
+from config.config_manager import save_config, save_tasks, flush_config
+# 对话框、远程配置与导出模块在首次使用时才导入，不计入启动时间
 from ui.scrollbar import FluentScrollArea
 from ui.styles import StyleManager
 from ui.notifications import show_error, show_success,show_warning
@@ -48,6 +44,9 @@ class QuadrantWidget(QWidget):
         self.undo_stack = []
         self.db_manager = get_db_manager()
         self._is_closing = False
+        # 甘特图服务首次打开时再创建；就绪前的打开请求挂起到 ready 信号
+        self.gantt_service = None
+        self._gantt_open_pending = False
         self._sync_refresh_pending = False
         self.remote_sync_refresh_requested.connect(self._show_remote_sync_confirmation)
         self.remote_bootstrap_finished.connect(self._on_remote_bootstrap_finished)
@@ -187,6 +186,13 @@ class QuadrantWidget(QWidget):
 
         self._position_dirty = False  # 标记位置是否有变动
 
+        # 到期状态跨日翻转：只在午夜触发一次，由到期索引给出刚到期的任务
+        self._overdue_checked_date = date.today()
+        self.overdue_rollover_timer = QTimer(self)
+        self.overdue_rollover_timer.setSingleShot(True)
+        self.overdue_rollover_timer.timeout.connect(self._on_overdue_rollover)
+        self._schedule_overdue_rollover()
+
         # 新增：记录当前显示的 detail_popup
         self.current_detail_popup = None
         
@@ -548,6 +554,7 @@ class QuadrantWidget(QWidget):
         
     def create_task_at_position(self, position):
         """在指定位置创建新任务"""
+        from .add_task_dialog import AddTaskDialog
         # 从配置中获取任务字段定义
         task_fields = self.config.get('task_fields', [])
         task_fields = [field for field in task_fields if field.get("name") != "completed_date"]
@@ -827,6 +834,7 @@ class QuadrantWidget(QWidget):
 
     def apply_settings_commit(self, result):
         """接受设置：持久化远程配置、同步 db_manager、写入本地 config 文件。"""
+        from config.remote_config import RemoteConfigManager
         result = result or {}
         remote = dict(result.get('remote_config') or {})
         remote_config_manager = RemoteConfigManager()
@@ -850,6 +858,8 @@ class QuadrantWidget(QWidget):
 
     def show_settings(self, initial_tab: str = ''):
         """显示设置对话框；预览可回滚，确定后提交。"""
+        from config.remote_config import RemoteConfigManager
+        from .settings_dialog import SettingsDialog
         snapshot = deepcopy(self.config)
         remote_config_manager = RemoteConfigManager()
         initial_remote = remote_config_manager.get_server_config()
@@ -932,154 +942,112 @@ class QuadrantWidget(QWidget):
             logger.error(error_msg)
 
     def export_all_tasks(self):
-        """导出所有任务到Excel文件（包括已完成），列名为创建日期、截止日期、修改日期，后面为事项所有属性"""
-        try:
-            import pandas as pd
-        except ImportError:
-            show_error(self, "导出失败", "未安装pandas库，无法导出为Excel。请先安装pandas。")
-            logger.error("导出失败：未安装pandas库")
-            return
-        
-        try:
-            import openpyxl
-        except ImportError:
-            show_error(self, "导出失败", "未安装openpyxl库，无法导出为Excel。请先安装openpyxl。\n\n安装命令：pip install openpyxl")
-            logger.error("导出失败：未安装openpyxl库")
+        """导出所有任务到Excel/CSV文件（包括已完成、已删除），在后台线程流式写入"""
+        from .task_exporter import TaskExportWorker, is_csv_export
+        worker = getattr(self, '_task_export_worker', None)
+        if worker is not None and worker.isRunning():
+            show_warning(self, "导出任务", "正在导出，请稍候")
             return
 
         desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
         default_filename = os.path.join(desktop_path, "所有任务.xlsx")
-        filename, _ = QFileDialog.getSaveFileName(
+        filename, filetype = QFileDialog.getSaveFileName(
             self,
             "保存所有任务",
             default_filename,
-            "Excel文件 (*.xlsx);;所有文件 (*)"
+            "Excel文件 (*.xlsx);;CSV文件 (*.csv);;所有文件 (*)"
         )
         if not filename:
             logger.info("用户取消了导出所有任务操作")
             return
+        if filetype.startswith("CSV") and not filename.lower().endswith(".csv"):
+            filename += ".csv"
 
-        # 读取数据库
-        try:
-            db_manager=get_db_manager()
-            all_tasks_data=db_manager.load_tasks(all_tasks=True)
-        except Exception as e:
-            logger.error(f"读取任务文件失败: {str(e)}")
-            show_error(self, "导出失败", f"读取任务文件失败: {str(e)}")
-            return
+        if not is_csv_export(filename):
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                show_error(self, "导出失败", "未安装openpyxl库，无法导出为Excel。请先安装openpyxl。\n\n安装命令：pip install openpyxl")
+                logger.error("导出失败：未安装openpyxl库")
+                return
 
-        if not all_tasks_data:
+        progress_dialog = QProgressDialog("正在导出任务...", "取消", 0, 0, self)
+        progress_dialog.setWindowTitle("导出任务")
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(300)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+
+        worker = TaskExportWorker(filename)
+        progress_dialog.canceled.connect(worker.cancel)
+        worker.progress.connect(lambda written, total: self._on_task_export_progress(progress_dialog, written, total))
+        worker.finished.connect(lambda success, message, count: self._on_task_export_finished(progress_dialog, success, message, count))
+        self._task_export_worker = worker
+        worker.start()
+
+    def _stop_task_export_worker(self):
+        """取消并等待进行中的导出线程；取消后写到一半的 .part 文件由导出线程删除"""
+        worker = getattr(self, '_task_export_worker', None)
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            worker.wait()
+
+    def _on_task_export_progress(self, progress_dialog, written, total):
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(written)
+        progress_dialog.setLabelText(f"正在导出任务... {written}/{total}")
+
+    def _on_task_export_finished(self, progress_dialog, success, message, count):
+        progress_dialog.close()
+        self._task_export_worker = None
+        if success:
+            show_success(self, "导出成功", f"成功导出 {count} 个任务到:\n{message}")
+        elif message == "没有任务可导出":
             logger.info("导出任务失败：没有任务可导出")
-            show_warning(self, "导出任务", "没有任务可导出")
-            return
-
-        # 获取字段配置
-        field_names = [f['name'] for f in self.config.get('task_fields', [])]
-        
-        # 准备数据行
-        rows = []
-        for task_data in all_tasks_data:
-            # 可选：如果你只想导出未被删除的任务，加上下面一行
-            # if task_data.get('deleted', False): continue
-
-            row = {
-                '任务名': task_data.get('text'),
-                '到期日期': task_data.get('due_date'),
-                '优先级': task_data.get('priority'),
-                '备注': task_data.get('notes'),
-                '目录': task_data.get('directory'),
-                '创建日期': task_data.get('created_at'),
-                '完成状态': '已完成' if task_data.get('completed', False) else '未完成',
-                '完成日期': task_data.get('completed_date', ''),
-                '删除状态': '已删除' if task_data.get('deleted', False) else ''
-            }
-            rows.append(row)
-
-        if not rows:
-            logger.info("导出任务失败：没有有效任务可导出")
-            show_warning(self, "导出任务", "没有有效任务可导出")
-            return
-
-        # 定义列的顺序
-        column_order = [
-            '任务名', '到期日期', '优先级', '备注', '目录', '创建日期',
-            '完成状态', '完成日期', '删除状态'
-        ]
-
-        try:
-            # 创建DataFrame
-            df = pd.DataFrame(rows)
-            
-            # 重新排列列的顺序
-            existing_columns = [col for col in column_order if col in df.columns]
-            df = df[existing_columns]
-            
-            # 导出到Excel
-            df.to_excel(filename, index=False)
-            logger.info(f"成功导出 {len(df)} 个任务到: {filename}")
-            show_success(self, "导出成功", f"成功导出 {len(df)} 个任务到:\n{filename}")
-        except Exception as e:
-            show_error(self, "导出失败", f"导出任务时发生错误:\n{str(e)}")
-            logger.error(f"导出任务时发生错误: {str(e)}")
+            show_warning(self, "导出任务", message)
+        elif message != "导出已取消":
+            show_error(self, "导出失败", message)
+
+    def _get_gantt_service(self):
+        """获取（必要时创建）托管的甘特图服务，读取与桌面端相同的数据库文件"""
+        if self.gantt_service is None:
+            from .gantt_service import GanttService
+            self.gantt_service = GanttService(db_path=self.db_manager.db_path, parent=self)
+            self.gantt_service.ready.connect(self._on_gantt_service_ready)
+            self.gantt_service.failed.connect(self._on_gantt_service_failed)
+        return self.gantt_service
 
-    def _is_port_open(self, host='127.0.0.1', port=5000) -> bool:
-        '''
-        检测gantt服务是否启动
-        '''
-        
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.settimeout(0.2)
-        try:
-            s.connect((host, port))
-            s.close()
-            return True
-        except OSError:
-            return False
-
-    def _start_gantt_server_if_needed(self) -> bool:
+    def show_gantt_dialog(self):
         """
-        如果 127.0.0.1:5000 没在跑，则启动 gantt/app.py 里的 Flask。
-        同时设置 DB_PATH，指向项目内的 database/tasks.db
+        打开甘特图。服务未运行时在后台启动（临时端口），就绪信号到达后再打开页面，界面不等待。
         """
-        from gantt.app import gantt_app
-        # 计算项目根目录（quadrant_widget.py 在 core/，根目录是其上一级）
-        root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        # 指定数据库路径（你的 app.py 里默认就是 ./database/tasks.db）
-        db_path = os.path.join(root_dir, 'database', 'tasks.db')
-        os.environ.setdefault('DB_PATH', db_path)
-
-        if self._is_port_open():
-            return True
-        def _run():
-            # 不用调试/不重载；放后台线程跑
-            
-            gantt_app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False)
-
-        t = threading.Thread(target=_run, daemon=True)
-        t.start()
+        service = self._get_gantt_service()
+        url = service.url
+        if url:
+            self._open_gantt_page(url)
+            return
+        self._gantt_open_pending = True
+        service.start()
 
-        # 简单等待最多 3 秒让服务起来（不强制，起不来也会回退到浏览器）
-        for _ in range(30):
-            if self._is_port_open():
-                return True
-            time.sleep(0.1)
-        return self._is_port_open()
+    def _on_gantt_service_ready(self, url):
+        if self._gantt_open_pending and not self._is_closing:
+            self._gantt_open_pending = False
+            self._open_gantt_page(url)
 
+    def _on_gantt_service_failed(self, message):
+        self._gantt_open_pending = False
+        show_error(self, "甘特图", f"甘特图服务启动失败：{message}")
 
-    def show_gantt_dialog(self):
+    def _open_gantt_page(self, url):
         """
-        打开一个弹窗，上面嵌入本地 index.html（frappe-gantt 页面），下方有“关闭”按钮。
+        打开一个弹窗，上面嵌入甘特图页面（frappe-gantt），下方有“关闭”按钮。
         - 优先使用 QWebEngineView 内嵌；如果未安装，则回退到系统浏览器打开。
-        - index.html 路径可按需修改 / 做成配置项。
         """
         try:
             from PyQt6.QtWebEngineWidgets import QWebEngineView
             HAS_WEBENGINE = True
         except Exception:
             HAS_WEBENGINE = False
-        # 启动gantt服务
-        url = "http://127.0.0.1:5000/"
-        self._start_gantt_server_if_needed()
         if not HAS_WEBENGINE:
             # 没有 WebEngine 就直接用系统浏览器打开
             webbrowser.open_new_tab(url)
@@ -1630,6 +1598,8 @@ class QuadrantWidget(QWidget):
             from config.config_manager import load_tasks_with_history
             tasks_data = load_tasks_with_history()
             field_definitions = self.config.get('task_fields', [])
+            overdue_ids = set(self.db_manager.get_overdue_task_ids())
+            self._overdue_checked_date = date.today()
 
             for task_data in tasks_data:
                 task_fields = {
@@ -1642,6 +1612,7 @@ class QuadrantWidget(QWidget):
                     parent=self,
                     completed=task_data['completed'],
                     field_definitions=field_definitions,
+                    overdue=task_data['id'] in overdue_ids,
                     **task_fields,
                 )
                 task.updated_at = task_data.get('updated_at', '')
@@ -1649,6 +1620,8 @@ class QuadrantWidget(QWidget):
 
                 if 'position' in task_data:
                     task.move(task_data['position']['x'], task_data['position']['y'])
+                # 刚从数据库加载的标签与库内一致，无需在下次批量保存时重写
+                task.mark_clean()
 
                 task.deleteRequested.connect(self.delete_task)
                 task.statusChanged.connect(self.save_tasks)
@@ -1663,6 +1636,30 @@ class QuadrantWidget(QWidget):
             self._sync_refresh_pending = False
             self.setUpdatesEnabled(True)
 
+    def _schedule_overdue_rollover(self):
+        """把跨日定时器设到下一个午夜（多留 1 秒避免落在前一天）"""
+        now = datetime.now()
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay_ms = int((next_midnight - now).total_seconds() * 1000) + 1000
+        self.overdue_rollover_timer.start(max(1000, delay_ms))
+
+    def _on_overdue_rollover(self):
+        """跨日后只翻转刚到期的任务标签，不重建看板"""
+        today = date.today()
+        try:
+            if today > self._overdue_checked_date:
+                newly_overdue = set(self.db_manager.get_task_ids_due_between(self._overdue_checked_date, today))
+                if newly_overdue:
+                    for task in self.tasks:
+                        if task.task_id in newly_overdue:
+                            task.set_overdue_status(True)
+                    logger.info(f"跨日到期状态更新：{len(newly_overdue)} 个任务到期")
+                self._overdue_checked_date = today
+        except Exception as e:
+            logger.error(f"更新到期状态失败: {str(e)}")
+        finally:
+            self._schedule_overdue_rollover()
+
     def save_tasks(self, task=None):
         """保存任务到数据库。"""
         tasks_to_save = self.tasks if task is None else [task]
@@ -1670,7 +1667,7 @@ class QuadrantWidget(QWidget):
 
     def scheduled_task(self):
         """定时任务"""
-        from .scheduler import ScheduledTaskDialog
+        from .scheduled_task_dialog import ScheduledTaskDialog
         logger.info("定时任务")
         scheduled_task_dialog = ScheduledTaskDialog(self)
         scheduled_task_dialog.exec()
@@ -1687,6 +1684,16 @@ class QuadrantWidget(QWidget):
         logger.info("正在关闭程序...")
         self._is_closing = True
         self.save_config()
+        flush_config()
+
+        # 导出线程还在读库写文件时不能关闭数据库
+        self._stop_task_export_worker()
+
+        if self.gantt_service is not None:
+            try:
+                self.gantt_service.stop()
+            except Exception as e:
+                logger.error(f"停止甘特图服务失败: {str(e)}")
 
         try:
             db_manager = self.db_manager if getattr(self, 'db_manager', None) else get_db_manager()
@@ -0,0 +1,84 @@
+"""启动时间线
+
+记录从 main.py 开始执行到主窗口首次绘制之间各阶段的时间点。main.py 第一行导入本模块，
+导入时刻即时间线起点；各阶段调用 mark_startup()，首次绘制时 finish_startup() 把时间线
+写入日志，并把各阶段耗时写入 taskmanager_startup_phase_seconds{phase}（见 core/metrics.py）。
+
+本模块只依赖标准库，必须保持导入开销可以忽略。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimeline:
+    """按阶段名记录距起点的秒数；同名阶段只记第一次，finish 之后不再记录"""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.origin = clock()
+        self._lock = threading.Lock()
+        self._marks: List[Tuple[str, float]] = []
+        self.finished = False
+
+    def mark(self, phase: str) -> Optional[float]:
+        """记录阶段时间点，返回距起点的秒数；重复或已结束时返回 None"""
+        offset = self._clock() - self.origin
+        with self._lock:
+            if self.finished or any(name == phase for name, _offset in self._marks):
+                return None
+            self._marks.append((phase, offset))
+        return offset
+
+    def marks(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return list(self._marks)
+
+    def format(self) -> str:
+        """每个阶段一行：距起点与距上一阶段的毫秒数"""
+        lines = []
+        previous = 0.0
+        for phase, offset in self.marks():
+            lines.append(f"  {phase:<24} {offset * 1000:9.1f} ms  (+{(offset - previous) * 1000:.1f} ms)")
+            previous = offset
+        return '\n'.join(lines)
+
+    def finish(self, phase: str = 'first_paint') -> Optional[float]:
+        """记录最后一个阶段并输出时间线；只生效一次"""
+        offset = self.mark(phase)
+        if offset is None:
+            return None
+        with self._lock:
+            self.finished = True
+        try:
+            from core.metrics import get_metrics_registry
+
+            gauge = get_metrics_registry().gauge(
+                'taskmanager_startup_phase_seconds', '启动各阶段距 main.py 开始执行的秒数', ('phase',)
+            )
+            for name, value in self.marks():
+                gauge.set(value, phase=name)
+        except Exception as e:
+            logger.error(f"记录启动指标失败: {str(e)}")
+        logger.info(f"启动时间线（起点为 main.py 开始执行）:\n{self.format()}")
+        return offset
+
+
+_timeline = StartupTimeline()
+
+
+def get_startup_timeline() -> StartupTimeline:
+    """获取进程的启动时间线，起点为本模块首次导入"""
+    return _timeline
+
+
+def mark_startup(phase: str) -> Optional[float]:
+    return _timeline.mark(phase)
+
+
+def finish_startup(phase: str = 'first_paint') -> Optional[float]:
+    return _timeline.finish(phase)
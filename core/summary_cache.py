@@ -0,0 +1,172 @@
+"""LLM 任务概要的持久化缓存
+
+以 (模型, JSON Schema, 提示词消息) 的哈希为键，把 LLM 的原始响应存入与 tasks.db
+同目录的 summary_cache.db。相同提示词再次导出时直接命中，不再调用 LLM。
+条目超过有效期即视为失效；条目数超过上限时按最近使用时间淘汰最旧的条目。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_FILENAME = 'summary_cache.db'
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def summary_cache_key(model: str, schema: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+    """内容寻址键：对规范化 JSON（键排序）取 SHA-256"""
+    payload = json.dumps([model, schema, messages], ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """SQLite 持久化的概要缓存；同一实例可在多个线程中使用"""
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_summary_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_llm_summary_cache_last_used ON llm_summary_cache(last_used_at)'
+        )
+        self.conn.commit()
+        self.purge_expired()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """批量查询未过期的缓存响应，命中的条目刷新最近使用时间"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, str] = {}
+        try:
+            with self._lock:
+                # 分块避免超过 SQLite 的绑定参数上限
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self.conn.execute(
+                        f'SELECT key, response FROM llm_summary_cache WHERE key IN ({placeholders}) AND created_at > ?',
+                        [*chunk, now - self.ttl_seconds],
+                    ).fetchall()
+                    found.update(rows)
+                if found:
+                    self.conn.executemany(
+                        'UPDATE llm_summary_cache SET last_used_at = ? WHERE key = ?',
+                        [(now, key) for key in found],
+                    )
+                    self.conn.commit()
+                self.hits += len(found)
+                self.misses += len(keys) - len(found)
+        except Exception as e:
+            logger.error(f"读取概要缓存失败: {str(e)}")
+            return {}
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, response: str, model: str = '') -> bool:
+        """写入一条响应，超过条目上限时淘汰最久未使用的条目"""
+        now = time.time()
+        try:
+            with self._lock:
+                self.conn.execute(
+                    '''
+                    INSERT OR REPLACE INTO llm_summary_cache (key, model, response, created_at, last_used_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ''',
+                    (key, model, response, now, now),
+                )
+                count = self.conn.execute('SELECT COUNT(*) FROM llm_summary_cache').fetchone()[0]
+                if count > self.max_entries:
+                    self.conn.execute(
+                        '''
+                        DELETE FROM llm_summary_cache WHERE key IN (
+                            SELECT key FROM llm_summary_cache ORDER BY last_used_at ASC LIMIT ?
+                        )
+                        ''',
+                        (count - self.max_entries,),
+                    )
+                self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"写入概要缓存失败: {str(e)}")
+            return False
+
+    def purge_expired(self) -> int:
+        """删除已过期的条目，返回删除数量"""
+        try:
+            with self._lock:
+                cursor = self.conn.execute(
+                    'DELETE FROM llm_summary_cache WHERE created_at <= ?',
+                    (time.time() - self.ttl_seconds,),
+                )
+                self.conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"清理过期概要缓存失败: {str(e)}")
+            return 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM llm_summary_cache').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+# 全局单例
+_summary_cache_instance = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> Optional[SummaryCache]:
+    """获取概要缓存单例，位于任务数据库同目录；无法创建时返回None（不影响概要生成）"""
+    global _summary_cache_instance
+    with _summary_cache_lock:
+        if _summary_cache_instance is None:
+            try:
+                from config.config_manager import load_config
+                from database.database_manager import get_db_manager
+
+                db_path = get_db_manager().db_path
+                if db_path == ':memory:':
+                    return None
+                llm_config = load_config().get('LLM_CONFIG', {})
+                _summary_cache_instance = SummaryCache(
+                    os.path.join(os.path.dirname(os.path.abspath(db_path)), SUMMARY_CACHE_FILENAME),
+                    ttl_seconds=float(llm_config.get('summary_cache_ttl_days', DEFAULT_TTL_SECONDS / 86400)) * 86400,
+                    max_entries=int(llm_config.get('summary_cache_max_entries', DEFAULT_MAX_ENTRIES)),
+                )
+            except Exception as e:
+                logger.error(f"初始化概要缓存失败: {str(e)}")
+                return None
+        return _summary_cache_instance
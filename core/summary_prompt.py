@@ -0,0 +1,269 @@
+"""导出概要的提示词构建
+
+把区间内的任务和历史整理成 LLM 请求，分三步压缩：
+1. 合并同一字段的连续编辑，只保留最终值；
+2. 按估算的 token 数给每个任务设预算，超出时优先保留最近的变更；
+3. 把多个小任务打包进一次请求，响应为 {task_id, summary} 数组。
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+TASK_TOKEN_BUDGET = 1200
+SMALL_TASK_TOKENS = 300
+BATCH_TOKEN_BUDGET = 2400
+MAX_TASKS_PER_BATCH = 8
+
+SUMMARY_SYSTEM_PROMPT = """你是一名【工作总结撰写助手】，擅长将零散的任务记录和变更历史整理为可直接用于工作总结中的正式表述。
+
+你将收到：
+- 一个任务的基本信息
+- 该任务的多条历史变更记录（包括状态、内容调整、推进过程）
+
+你的任务是：
+
+一、分析任务执行过程
+- 重点关注任务在推进过程中体现出的工作内容、协调情况、处理事项和结果
+- 不要关注或复述：创建时间、完成时间、优先级、任务ID、负责人姓名等元信息
+- 即使变更记录较少，也要从“实际完成了什么工作”角度进行概括，不得简单写“无显著变更”
+- 不得编造没有在原文中体现的事项
+
+二、生成一段可直接使用的工作完成情况表述
+- 字数控制在 100–400 个汉字内
+- 采用正式、公文风格
+- 表述应体现：
+  1. 做了哪些具体工作
+  2. 推进或协调了哪些事项
+  3. 最终形成了什么成果或状态
+
+三、语言与格式要求
+- 必须全程使用中文
+- 不得以“任务X于某日完成”这类流水账方式开头
+
+请直接输出最终总结内容，不要解释你的分析过程。
+            """
+
+BATCH_SYSTEM_SUFFIX = """
+本次会收到多个任务，以“### 任务”分隔。请对每个任务分别按上述要求独立撰写总结，
+不得把不同任务的内容混在一起，并在 summaries 数组中为每个任务返回一项 {task_id, summary}，task_id 与输入中的 ID 完全一致。
+"""
+
+SINGLE_SUMMARY_SCHEMA = {
+    "type": "object",
+    "title": "summary",
+    "properties": {
+        "task_id": {"type": "string"},
+        "summary": {"type": "string"},
+    },
+    "required": ["task_id", "summary"],
+}
+
+BATCH_SUMMARY_SCHEMA = {
+    "type": "object",
+    "title": "summaries",
+    "properties": {
+        "summaries": {
+            "type": "array",
+            "items": SINGLE_SUMMARY_SCHEMA,
+        }
+    },
+    "required": ["summaries"],
+}
+
+ACTION_TEXT = {
+    'create': '创建',
+    'update': '更新',
+    'created': '创建',
+    'updated': '更新',
+    'completed': '完成',
+    'deleted': '删除',
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符约 1 字 1 token，其余字符约 4 个 1 token"""
+    if not text:
+        return 0
+    cjk = sum(1 for char in text if '\u2e80' <= char <= '\u9fff' or '\uf900' <= char <= '\ufaff' or '\uff00' <= char <= '\uffef')
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def compact_history(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """合并同一字段的连续编辑，只保留该段编辑的最终值（时间取最后一次）"""
+    compacted: List[Dict[str, Any]] = []
+    for record in history:
+        if compacted and compacted[-1].get('field') == record.get('field'):
+            merged = dict(record)
+            # 一段连续编辑以创建开始时仍视为创建
+            if compacted[-1].get('action') in ('create', 'created'):
+                merged['action'] = compacted[-1]['action']
+            compacted[-1] = merged
+        else:
+            compacted.append(dict(record))
+    return compacted
+
+
+def _format_history_line(record: Dict[str, Any]) -> str:
+    action_text = ACTION_TEXT.get(record.get('action'), record.get('action'))
+    return f"  [{record.get('timestamp')}] {action_text} - {record.get('field')}: {record.get('value')}\n"
+
+
+def format_task_block(task: Dict[str, Any], history: List[Dict[str, Any]], omitted: int = 0) -> str:
+    """单个任务的基本信息与变更历史文本"""
+    block = f"- ID: {task.get('id')}\n"
+    block += f"- 内容: {task.get('text', '无')}\n"
+    block += f"- 优先级: {task.get('priority', '无')}\n"
+    block += f"- 状态: {'已完成' if task.get('completed') else '进行中'}\n"
+    block += f"- 创建时间: {task.get('created_at', '无')}\n"
+    block += f"- 完成时间: {task.get('completed_date', '未完成')}\n"
+    if history:
+        block += f"- 变更历史（{len(history)}条）:\n"
+        if omitted:
+            block += f"  （更早的 {omitted} 条变更已省略）\n"
+        for record in history:
+            block += _format_history_line(record)
+    else:
+        block += "- 变更历史: 无\n"
+    return block
+
+
+def build_task_block(task: Dict[str, Any], token_budget: int = TASK_TOKEN_BUDGET) -> str:
+    """合并连续编辑后按预算截断：超出时从最早的变更开始省略，至少保留最近一条"""
+    history = compact_history(task.get('history', []))
+    block = format_task_block(task, history)
+    if estimate_tokens(block) <= token_budget or len(history) <= 1:
+        return block
+
+    base_tokens = estimate_tokens(format_task_block(task, history[-1:], omitted=len(history) - 1))
+    kept = 1
+    used = base_tokens
+    for record in reversed(history[:-1]):
+        line_tokens = estimate_tokens(_format_history_line(record))
+        if used + line_tokens > token_budget:
+            break
+        used += line_tokens
+        kept += 1
+    return format_task_block(task, history[-kept:], omitted=len(history) - kept)
+
+
+def build_single_task_messages(task_block: str) -> List[Dict[str, str]]:
+    user_content = "以下是需要总结的任务信息：\n\n" + task_block + "\n请为这个任务生成工作概要。"
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def build_batch_messages(task_blocks: List[str]) -> List[Dict[str, str]]:
+    user_content = f"以下是需要总结的 {len(task_blocks)} 个任务：\n\n"
+    user_content += "\n".join(f"### 任务 {index}\n{block}" for index, block in enumerate(task_blocks, 1))
+    user_content += "\n请分别为每个任务生成工作概要。"
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT + BATCH_SYSTEM_SUFFIX},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def messages_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(message.get('content', '')) for message in messages)
+
+
+@dataclass
+class SummaryRequest:
+    """一次 LLM 请求：覆盖 task_indices 指向的任务；batched 为真时响应为 summaries 数组"""
+    task_indices: List[int]
+    messages: List[Dict[str, str]]
+    schema: Dict[str, Any]
+    batched: bool = False
+
+
+@dataclass
+class PromptStats:
+    """提示词压缩效果：逐任务未压缩时的请求数/估算 token 与实际值"""
+    tasks: int = 0
+    naive_requests: int = 0
+    requests: int = 0
+    naive_tokens: int = 0
+    tokens: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"请求 {self.naive_requests}→{self.requests}，"
+            f"提示词约 {self.naive_tokens}→{self.tokens} tokens"
+        )
+
+
+@dataclass
+class SummaryPlan:
+    requests: List[SummaryRequest] = field(default_factory=list)
+    stats: PromptStats = field(default_factory=PromptStats)
+
+
+def build_summary_plan(
+    tasks: List[Dict[str, Any]],
+    task_token_budget: int = TASK_TOKEN_BUDGET,
+    small_task_tokens: int = SMALL_TASK_TOKENS,
+    batch_token_budget: int = BATCH_TOKEN_BUDGET,
+    max_tasks_per_batch: int = MAX_TASKS_PER_BATCH,
+) -> SummaryPlan:
+    """把任务列表整理为请求列表：大任务单独请求，小任务按 token 预算打包"""
+    plan = SummaryPlan()
+    plan.stats.tasks = len(tasks)
+    plan.stats.naive_requests = len(tasks)
+
+    small: List[tuple] = []
+    for index, task in enumerate(tasks):
+        plan.stats.naive_tokens += messages_tokens(
+            build_single_task_messages(format_task_block(task, task.get('history', [])))
+        )
+        block = build_task_block(task, task_token_budget)
+        block_tokens = estimate_tokens(block)
+        if block_tokens <= small_task_tokens and max_tasks_per_batch > 1:
+            small.append((index, block, block_tokens))
+        else:
+            plan.requests.append(SummaryRequest([index], build_single_task_messages(block), SINGLE_SUMMARY_SCHEMA))
+
+    batch: List[tuple] = []
+    batch_tokens = 0
+
+    def flush_batch():
+        if len(batch) == 1:
+            index, block, _tokens = batch[0]
+            plan.requests.append(SummaryRequest([index], build_single_task_messages(block), SINGLE_SUMMARY_SCHEMA))
+        elif batch:
+            plan.requests.append(SummaryRequest(
+                [index for index, _block, _tokens in batch],
+                build_batch_messages([block for _index, block, _tokens in batch]),
+                BATCH_SUMMARY_SCHEMA,
+                batched=True,
+            ))
+
+    for item in small:
+        if batch and (len(batch) >= max_tasks_per_batch or batch_tokens + item[2] > batch_token_budget):
+            flush_batch()
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += item[2]
+    flush_batch()
+
+    # 保持请求按首个任务的原始顺序排列，结果回传顺序与任务列表一致
+    plan.requests.sort(key=lambda request: request.task_indices[0])
+    plan.stats.requests = len(plan.requests)
+    plan.stats.tokens = sum(messages_tokens(request.messages) for request in plan.requests)
+    logger.info(f"概要提示词压缩：{plan.stats.describe()}")
+    return plan
+
+
+def parse_batch_summaries(result: Any) -> Dict[str, str]:
+    """从批量响应中取出 {task_id: summary}；兼容直接返回数组的情况"""
+    items = result.get('summaries') if isinstance(result, dict) else result
+    summaries: Dict[str, str] = {}
+    if isinstance(items, list):
+        for item in items:
+            if isinstance(item, dict) and item.get('task_id') is not None and 'summary' in item:
+                summaries[str(item['task_id'])] = item['summary']
+    return summaries
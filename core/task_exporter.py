@@ -0,0 +1,256 @@
+"""全部任务的流式导出
+
+从数据库游标按批读取任务行，逐行写入 openpyxl 只写模式的工作簿或 CSV 文件，
+内存中任何时刻只保留一批数据。写入先落到同目录的 .part 临时文件，
+完成后再原子替换目标文件；取消或失败时删除临时文件，不留下半成品。
+write_rows_export 与列定义无关，单任务历史导出（core/history_viewer.py）也复用它。
+"""
+
+import csv
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from database.database_manager import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+
+TASK_EXPORT_COLUMNS = [
+    ('任务名', lambda task: task.get('text')),
+    ('到期日期', lambda task: task.get('due_date')),
+    ('优先级', lambda task: task.get('priority')),
+    ('备注', lambda task: task.get('notes')),
+    ('目录', lambda task: task.get('directory')),
+    ('创建日期', lambda task: task.get('created_at')),
+    ('完成状态', lambda task: '已完成' if task.get('completed', False) else '未完成'),
+    ('完成日期', lambda task: task.get('completed_date', '')),
+    ('删除状态', lambda task: '已删除' if task.get('deleted', False) else ''),
+]
+
+
+class TaskExportCancelled(Exception):
+    """导出被用户取消"""
+
+
+def format_task_export_row(task: Dict[str, Any]) -> List[Any]:
+    return [getter(task) for _header, getter in TASK_EXPORT_COLUMNS]
+
+
+def is_csv_export(filename: str) -> bool:
+    return filename.lower().endswith('.csv')
+
+
+class _CsvRowWriter:
+    def __init__(self, path: str):
+        # utf-8-sig 让 Excel 直接打开 CSV 时正确识别中文
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+
+    def append(self, row: List[Any]) -> None:
+        self._writer.writerow(['' if value is None else value for value in row])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _XlsxRowWriter:
+    def __init__(self, path: str):
+        import openpyxl
+
+        self._path = path
+        # 只写模式下行数据直接序列化到临时文件，内存占用与行数无关
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+
+    def append(self, row: List[Any]) -> None:
+        self._sheet.append(row)
+
+    def close(self) -> None:
+        self._workbook.save(self._path)
+
+
+def write_rows_export(
+    headers: List[str],
+    batches: Iterable[List[List[Any]]],
+    filename: str,
+    total: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+) -> int:
+    """把表头和逐批产出的行写入 filename（.csv 写 CSV，其余写 xlsx），返回写入的行数。
+
+    每写完一批调用一次 progress(written, total)；is_cancelled() 为真时抛出 TaskExportCancelled。
+    """
+    temp_path = f"{filename}.part"
+    writer = _CsvRowWriter(temp_path) if is_csv_export(filename) else _XlsxRowWriter(temp_path)
+    written = 0
+    try:
+        try:
+            writer.append(list(headers))
+            for batch in batches:
+                if is_cancelled and is_cancelled():
+                    raise TaskExportCancelled()
+                for row in batch:
+                    writer.append(row)
+                written += len(batch)
+                if progress:
+                    progress(written, max(total, written))
+        finally:
+            writer.close()
+        if is_cancelled and is_cancelled():
+            raise TaskExportCancelled()
+        os.replace(temp_path, filename)
+        return written
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_task_export(
+    batches: Iterable[List[Dict[str, Any]]],
+    filename: str,
+    total: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+) -> int:
+    """把逐批产出的任务行按 TASK_EXPORT_COLUMNS 写入 filename，返回写入的任务数"""
+    return write_rows_export(
+        [header for header, _getter in TASK_EXPORT_COLUMNS],
+        ([format_task_export_row(task) for task in batch] for batch in batches),
+        filename,
+        total=total,
+        progress=progress,
+        is_cancelled=is_cancelled,
+    )
+
+
+class TaskExportWorker(QThread):
+    """后台线程：流式导出全部任务"""
+    progress = pyqtSignal(int, int)  # (已写入, 总数)
+    finished = pyqtSignal(bool, str, int)  # (成功, 消息, 导出数量)
+
+    def __init__(self, filename: str, db_manager=None, batch_size: int = 500):
+        super().__init__()
+        self.filename = filename
+        self.db_manager = db_manager or get_db_manager()
+        self.batch_size = batch_size
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self):
+        read_conn = None
+        batches = None
+        try:
+            total = self.db_manager.count_all_tasks()
+            if not total:
+                self.finished.emit(False, "没有任务可导出", 0)
+                return
+            # 独立只读连接：导出期间不占用界面线程使用的共享连接
+            read_conn = self.db_manager.open_read_connection()
+            with self.db_manager.use_read_connection(read_conn):
+                batches = self.db_manager.iter_export_task_rows(self.batch_size)
+                written = write_task_export(
+                    batches,
+                    self.filename,
+                    total=total,
+                    progress=self.progress.emit,
+                    is_cancelled=self.is_cancelled,
+                )
+            logger.info(f"成功导出 {written} 个任务到: {self.filename}")
+            self.finished.emit(True, self.filename, written)
+        except TaskExportCancelled:
+            logger.info("用户取消了导出所有任务操作")
+            self.finished.emit(False, "导出已取消", 0)
+        except ImportError:
+            self.finished.emit(False, "未安装openpyxl库，无法导出为Excel。请先安装openpyxl。\n\n安装命令：pip install openpyxl", 0)
+        except Exception as e:
+            logger.error(f"导出任务时发生错误: {str(e)}")
+            self.finished.emit(False, f"导出任务时发生错误:\n{str(e)}", 0)
+        finally:
+            # 先结束游标所在的生成器，再关闭连接
+            if batches is not None:
+                batches.close()
+            if read_conn is not None:
+                read_conn.close()
+
+
+HISTORY_EXPORT_HEADERS = ['时间', '字段', '操作', '值']
+
+
+def format_history_export_row(row: Dict[str, Any], field_names: Optional[Dict[str, str]] = None) -> List[Any]:
+    field_name = row.get('field_name')
+    return [
+        row.get('timestamp') or '',
+        (field_names or {}).get(field_name, field_name),
+        '创建' if (row.get('action') or 'update') == 'create' else '更新',
+        row.get('value', ''),
+    ]
+
+
+class HistoryExportWorker(QThread):
+    """后台线程：沿历史分页的键集游标按时间正序流式导出单个任务的全部历史"""
+    finished = pyqtSignal(bool, str, int)  # (成功, 消息, 导出行数)
+
+    def __init__(self, task_id: str, filename: str, db_manager=None,
+                 field_names: Optional[Dict[str, str]] = None, batch_size: int = 500):
+        super().__init__()
+        self.task_id = task_id
+        self.filename = filename
+        self.db_manager = db_manager or get_db_manager()
+        self.field_names = field_names or {}
+        self.batch_size = batch_size
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def _batches(self, rows: Iterable[Dict[str, Any]]):
+        batch = []
+        for row in rows:
+            batch.append(format_history_export_row(row, self.field_names))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self):
+        read_conn = None
+        rows = None
+        try:
+            read_conn = self.db_manager.open_read_connection()
+            with self.db_manager.use_read_connection(read_conn):
+                rows = self.db_manager.iter_task_history_rows(self.task_id, batch_size=self.batch_size, ascending=True)
+                written = write_rows_export(
+                    HISTORY_EXPORT_HEADERS,
+                    self._batches(rows),
+                    self.filename,
+                    is_cancelled=self.is_cancelled,
+                )
+            logger.info(f"成功导出任务 {self.task_id} 的 {written} 条历史到: {self.filename}")
+            self.finished.emit(True, self.filename, written)
+        except TaskExportCancelled:
+            logger.info("用户取消了导出历史记录操作")
+            self.finished.emit(False, "导出已取消", 0)
+        except ImportError:
+            self.finished.emit(False, "未安装openpyxl库，无法导出为Excel。请先安装openpyxl。\n\n安装命令：pip install openpyxl", 0)
+        except Exception as e:
+            logger.error(f"导出历史记录时发生错误: {str(e)}")
+            self.finished.emit(False, f"导出历史记录时发生错误:\n{str(e)}", 0)
+        finally:
+            if rows is not None and hasattr(rows, 'close'):
+                rows.close()
+            if read_conn is not None:
+                read_conn.close()
@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import partial
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QCheckBox,
                             QLabel, QInputDialog,
                             QFrame, QSizePolicy, QDialog,
@@ -12,13 +13,14 @@ except Exception:
 import os
 from datetime import datetime
 
-from .add_task_dialog import AddTaskDialog
 from ui.scrollbar import FluentScrollArea
 from ui.notifications import show_error, resolve_notification_host,show_success,show_warning
 from ui.styles import StyleManager, apply_button_role
 from ui.degree_badges import create_degree_display_widget, build_degree_badge_stylesheet, get_status_badge_meta
 from ui.ui import MyColorDialog
 from config.config_manager import load_config
+from config.config_service import get_config_service
+from database.task_dates import normalize_task_date
 import logging
 logger = logging.getLogger(__name__)  # 自动获取模块名
 
@@ -58,7 +60,7 @@ class TaskLabel(QWidget):
         if notes is None:
             return ""
         return str(notes).replace("\n", "<br>")
-    def __init__(self, task_id, color,completed=False, parent=None, field_definitions=None, **fields):
+    def __init__(self, task_id, color,completed=False, parent=None, field_definitions=None, overdue=None, **fields):
         try:
             super().__init__(parent)
         except Exception as e:
@@ -82,6 +84,11 @@ class TaskLabel(QWidget):
         # 到期状态
         self.is_overdue = False
 
+        # 脏标记：新建标签默认需要保存；所有修改路径都会发出 statusChanged
+        self._dirty = True
+        self._last_saved_data = None
+        self.statusChanged.connect(self.mark_dirty)
+
         
         # 如果你想限制最小宽度：
         self.setMinimumWidth(80)
@@ -132,8 +139,11 @@ class TaskLabel(QWidget):
         self.setLayout(layout)
         self._ensure_subtle_shadow()
         
-        # 初始化时检查到期状态
-        self.check_overdue_status()
+        # 初始化时检查到期状态；调用方已从到期索引得到结果时无需再解析日期
+        if overdue is None:
+            self.check_overdue_status()
+        else:
+            self.is_overdue = bool(overdue)
         
         self.update_appearance()
         
@@ -274,14 +284,12 @@ class TaskLabel(QWidget):
     def check_overdue_status(self):
         """检查并更新任务的到期状态"""
         if hasattr(self, 'due_date') and self.due_date:
-            try:
-                from datetime import datetime
-                due_date = datetime.strptime(self.due_date, '%Y-%m-%d').date()
-                today = datetime.now().date()
-                is_overdue = due_date <= today
-                self.set_overdue_status(is_overdue)
-            except ValueError as e:
-                logger.warning(f"任务 {self.task_id} 的到期日期格式错误: {self.due_date}, 错误: {e}")
+            # 规范化后按 ISO 字符串比较，与数据库 due_date_iso 列口径一致
+            due_date = normalize_task_date(self.due_date)
+            if due_date is None:
+                logger.warning(f"任务 {self.task_id} 的到期日期格式错误: {self.due_date}")
+                return
+            self.set_overdue_status(due_date <= datetime.now().date().isoformat())
 
     def contextMenuEvent(self, event):
         """右键菜单事件"""
@@ -307,6 +315,7 @@ class TaskLabel(QWidget):
 
     def edit_task(self):
         """编辑任务内容"""
+        from .add_task_dialog import AddTaskDialog
         # 获取当前字段配置
         task_fields = []
         for meta in self._field_definitions:
@@ -367,6 +376,19 @@ class TaskLabel(QWidget):
                 # 触发保存信号
                 self.statusChanged.emit(self)
     
+    def mark_dirty(self, *_args):
+        """标记标签有未保存的修改"""
+        self._dirty = True
+
+    def mark_clean(self, saved_data=None):
+        """标记标签已与数据库一致，saved_data 为最近一次写入的数据快照"""
+        self._dirty = False
+        self._last_saved_data = saved_data
+
+    def is_dirty(self):
+        """标签自上次保存后是否可能有修改"""
+        return self._dirty
+
     def get_data(self):
         """获取标签数据"""
         data = {
@@ -423,8 +445,7 @@ class TaskLabel(QWidget):
         popup_generation = self._detail_popup_generation
         self.detail_popup = QFrame(parent_widget if parent_widget else self)
         self.detail_popup.destroyed.connect(
-            lambda *_args, generation=popup_generation:
-            self._on_detail_popup_destroyed(generation)
+            partial(self._on_detail_popup_destroyed, popup_generation)
         )
         self.detail_popup.setObjectName("task_detail_popup")
         self.detail_popup.setWindowFlags(Qt.WindowType.FramelessWindowHint)
@@ -517,8 +538,7 @@ class TaskLabel(QWidget):
 
         self.status_label = QLabel(meta_row)
         self.status_label.destroyed.connect(
-            lambda *_args, generation=popup_generation:
-            self._on_status_label_destroyed(generation)
+            partial(self._on_status_label_destroyed, popup_generation)
         )
         self.status_label.setObjectName("detail_status_badge")
         self.status_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
@@ -689,14 +709,14 @@ class TaskLabel(QWidget):
                 return
             raise
 
-    def _on_detail_popup_destroyed(self, generation):
+    def _on_detail_popup_destroyed(self, generation, *_args):
         """详情浮窗销毁后清理悬挂引用，避免后续访问已删除控件。"""
         if generation != self._detail_popup_generation:
             return
         self.detail_popup = None
         self.status_label = None
 
-    def _on_status_label_destroyed(self, generation):
+    def _on_status_label_destroyed(self, generation, *_args):
         """状态徽标销毁后同步清理引用。"""
         if generation == self._detail_popup_generation:
             self.status_label = None
@@ -733,3 +753,10 @@ class TaskLabel(QWidget):
                 
 
 
+def _on_config_changed(event):
+    """task_fields 变化时清空字段定义缓存，下次创建标签重新读取"""
+    if event.affects('task_fields'):
+        TaskLabel._editable_fields_cache = None
+
+
+get_config_service().add_listener(_on_config_changed)
@@ -1,14 +1,23 @@
 import sqlite3
 import json
 import os
-import requests
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any, Optional
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional
 import logging
 import threading
+import time
 import copy
+from collections import OrderedDict
 import calendar
 
+from config.config_service import get_config_service
+from core.lock_profiler import create_lock
+from core.metrics import get_metrics_registry
+from database.due_date_index import DueDateIndex
+from database.task_dates import TASK_DATE_COLUMNS, normalize_task_date, task_date_values
+
 # 获取logger并确保配置正确
 logger = logging.getLogger(__name__)
 
@@ -37,19 +46,58 @@ DEFAULT_TASK_FIELD_NAMES = [
 ]
 
 
+COMPLETED_TASKS_ORDER_SQL = 'completed_date DESC, updated_at DESC, created_at DESC'
+DELETED_TASKS_ORDER_SQL = 'updated_at DESC, created_at DESC'
+
+# 查询结果缓存最多保留的条目数（每个筛选条件/页码组合一条）
+QUERY_CACHE_MAX_ENTRIES = 256
+
+# 热点路径的性能指标，汇总在进程内注册表中（见 core/metrics.py）
+_metrics = get_metrics_registry()
+FLUSH_SECONDS = _metrics.histogram('taskmanager_db_flush_seconds', 'flush_cache_to_db 持有 _cache_lock 写盘的耗时（秒）')
+FLUSH_LOCK_WAIT_SECONDS = _metrics.histogram('taskmanager_db_flush_lock_wait_seconds', 'flush_cache_to_db 等待 _cache_lock 的耗时（秒）')
+FLUSH_ROWS = _metrics.counter('taskmanager_db_flush_rows_total', 'flush 写入数据库的行数', ('table',))
+FLUSHES = _metrics.counter('taskmanager_db_flushes_total', '有脏数据时执行的 flush 次数', ('result',))
+SAVE_SECONDS = _metrics.histogram('taskmanager_db_save_seconds', '保存任务到内存缓存的耗时（秒）', ('operation',))
+SAVED_TASKS = _metrics.counter('taskmanager_db_saved_tasks_total', '实际写入内存缓存的任务数', ('operation',))
+LOAD_SECONDS = _metrics.histogram('taskmanager_db_load_seconds', '加载任务/定时任务的耗时（秒）', ('operation',))
+CACHED_TASKS = _metrics.gauge('taskmanager_db_cached_tasks', '内存缓存中的任务数')
+QUERY_SECONDS = _metrics.histogram('taskmanager_db_query_seconds', '归档与历史查询的耗时（秒），含查询结果缓存命中', ('query',))
+QUERY_CACHE_REQUESTS = _metrics.counter('taskmanager_db_query_cache_requests_total', '查询结果缓存的命中与未命中次数', ('result',))
+API_REQUEST_SECONDS = _metrics.histogram('taskmanager_sync_request_seconds', '远程同步 API 单次 HTTP 请求的耗时（秒）', ('method', 'endpoint'))
+API_REQUESTS = _metrics.counter('taskmanager_sync_requests_total', '远程同步 API 请求次数，status 为 HTTP 状态码或 timeout/connection_error/error', ('method', 'endpoint', 'status'))
+
+
+def metric_endpoint(endpoint: str) -> str:
+    """把 API 路径中的记录 ID 归一为 {id}，避免每个任务各占一条指标序列"""
+    parts = [part for part in endpoint.split('?', 1)[0].split('/') if part]
+    if len(parts) > 2:
+        parts[2] = '{id}'
+    return '/' + '/'.join(parts)
+
+
+def history_row_cursor(row: Dict[str, Any]) -> tuple:
+    """返回历史行的键集游标 (timestamp, rowid)，作为下一页的 after 参数"""
+    return (row['timestamp'], row['rowid'])
+
+
 class DatabaseManager:
     """数据库管理器"""
     
-    def __init__(self, db_path: str = 'tasks.db', remote_config: Optional[Dict] = None, sync_interval: int = 0, flush_interval: int = 5):
+    def __init__(self, db_path: str = 'tasks.db', remote_config: Optional[Dict] = None, sync_interval: int = 0, flush_interval: int = 5,
+                 lock_profiling: Optional[Dict] = None):
         """
         :param db_path: 数据库文件路径
         :param remote_config: 远程服务器配置
         :param sync_interval: 定时同步间隔（秒），为0表示不自动同步
         :param flush_interval: 内存数据写入磁盘的间隔（秒）
+        :param lock_profiling: 锁竞争分析设置（配置 metrics.lock_profiling），见 core/lock_profiler.py
         """
         # 规范化数据库路径：相对路径基于项目根目录
         self.db_path = db_path if os.path.isabs(db_path) else os.path.join(APP_ROOT,'database', db_path)
         self.conn = None
+        # 后台查询线程可临时绑定自己的只读连接，见 use_read_connection()
+        self._thread_local = threading.local()
         self.remote_config = remote_config or {}
         configured_api_base_url = self.remote_config.get('api_base_url', '')
         self.remote_enabled = self.remote_config.get('enabled', bool(configured_api_base_url))
@@ -68,9 +116,22 @@ class DatabaseManager:
         self._scheduled_task_cache = {}  # id -> scheduled_task_data
         self._task_history_cache = []  # [(task_id, field_name, field_value, action, timestamp)]
         self._deleted_task_ids = set()
+        # 已完成且未删除的任务 ID，与 _deleted_task_ids 一起提供 O(1) 的归档总数
+        self._completed_task_ids = set()
+        # task_id -> 已落盘的历史条数；首次统计时 COUNT 一次，之后由 flush 增量维护（受 _query_cache_lock 保护）
+        self._history_counts: Dict[str, int] = {}
         self._deleted_scheduled_task_ids = set()
-        self._cache_lock = threading.Lock()
+        # 未完成任务的到期日期分桶索引，与 _task_cache 同步维护
+        self._due_date_index = DueDateIndex()
+        self._cache_lock = create_lock('_cache_lock', lock_profiling)
         self._cache_dirty = False
+        # 归档分页/计数与历史分页的查询结果 LRU 缓存；写代次一变即整体失效
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._query_cache_max_entries = QUERY_CACHE_MAX_ENTRIES
+        self._write_generation = 0
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
         self._entity_cache = {
             'task': {
                 'records': self._task_cache,
@@ -86,16 +147,13 @@ class DatabaseManager:
             },
         }
         self._task_sync_listeners = []
-        self._listener_lock = threading.Lock()
+        self._listener_lock = create_lock('_listener_lock', lock_profiling)
         self._pending_remote_task_changes = {}
 
         # 增量flush：记录有未落盘变更的记录ID，避免每次flush全量重写
         self._dirty_task_ids = set()
         self._dirty_scheduled_ids = set()
 
-        # 任务字段名缓存（按config.json的mtime失效）
-        self._task_field_names_cache = None
-        self._task_field_names_mtime = None
 
         # 定时flush相关
         self._flush_interval = flush_interval
@@ -119,6 +177,102 @@ class DatabaseManager:
             self.conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
         return self.conn
 
+    def open_read_connection(self, timeout: float = 5.0) -> Optional[sqlite3.Connection]:
+        """为后台查询打开一个独立的只读连接；内存数据库无法共享时返回 None"""
+        if self.db_path == ':memory:' or not os.path.exists(self.db_path):
+            return None
+        uri = f"{Path(os.path.abspath(self.db_path)).as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=timeout)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def use_read_connection(self, conn: Optional[sqlite3.Connection]):
+        """在当前线程内让只读查询改用给定连接，便于调用方对其 interrupt()"""
+        previous = getattr(self._thread_local, 'read_conn', None)
+        self._thread_local.read_conn = conn
+        try:
+            yield conn
+        finally:
+            self._thread_local.read_conn = previous
+
+    def _get_read_connection(self):
+        """只读查询使用的连接：当前线程绑定了只读连接时优先使用，否则使用主连接"""
+        conn = getattr(self._thread_local, 'read_conn', None)
+        return conn if conn is not None else self.get_connection()
+
+    def _log_query_error(self, message: str, error: Exception) -> None:
+        # 被 interrupt() 取消的查询属于正常流程，不记为错误
+        if isinstance(error, sqlite3.OperationalError) and 'interrupted' in str(error):
+            logger.debug(f"{message}: 查询已取消")
+        else:
+            logger.error(f"{message}: {str(error)}")
+
+    def _bump_write_generation(self) -> None:
+        """任务或历史发生写入时调用：推进写代次并丢弃全部已缓存的查询结果"""
+        with self._query_cache_lock:
+            self._write_generation += 1
+            self._query_cache.clear()
+
+    def _add_history_counts(self, inserted: Dict[str, int]) -> None:
+        """flush 提交后调用：把实际写入的历史行数累加到已统计过的任务上"""
+        if not inserted:
+            return
+        with self._query_cache_lock:
+            for task_id, count in inserted.items():
+                if task_id in self._history_counts:
+                    self._history_counts[task_id] += count
+
+    @property
+    def write_generation(self) -> int:
+        return self._write_generation
+
+    def _search_cache_key(self, search_query: str) -> tuple:
+        # 与筛选 SQL 使用同一套关键字拆分，大小写和多余空格不同的搜索命中同一条缓存
+        return tuple(self._parse_task_search_keywords(search_query))
+
+    def _cached_query(self, key: tuple, query):
+        """按 key 返回缓存的查询结果，未命中时执行 query() 并在写代次未变时写入缓存。
+
+        query() 抛出的异常（包括被 interrupt() 取消）直接向上传递，不会缓存失败结果。
+        """
+        with self._query_cache_lock:
+            generation = self._write_generation
+            if key in self._query_cache:
+                self._query_cache.move_to_end(key)
+                self.query_cache_hits += 1
+                QUERY_CACHE_REQUESTS.inc(result='hit')
+                return self._copy_query_result(self._query_cache[key])
+            self.query_cache_misses += 1
+        QUERY_CACHE_REQUESTS.inc(result='miss')
+        result = query()
+        with self._query_cache_lock:
+            if generation == self._write_generation:
+                self._query_cache[key] = result
+                self._query_cache.move_to_end(key)
+                while len(self._query_cache) > self._query_cache_max_entries:
+                    self._query_cache.popitem(last=False)
+        return self._copy_query_result(result)
+
+    @staticmethod
+    def _copy_query_result(result):
+        # 调用方可能修改返回的记录，缓存里保留的是独立副本
+        if isinstance(result, list):
+            return [dict(item) if isinstance(item, dict) else item for item in result]
+        if isinstance(result, tuple):
+            return tuple(DatabaseManager._copy_query_result(item) for item in result)
+        return result
+
+    def get_query_cache_stats(self) -> Dict[str, int]:
+        """查询结果缓存的命中/未命中次数、当前条目数和写代次"""
+        with self._query_cache_lock:
+            return {
+                'hits': self.query_cache_hits,
+                'misses': self.query_cache_misses,
+                'entries': len(self._query_cache),
+                'generation': self._write_generation,
+            }
+
     def close_connection(self):
         """关闭数据库连接"""
         # 先停止后台线程，避免它们在连接关闭后再次触发flush并重新打开连接
@@ -164,7 +318,9 @@ class DatabaseManager:
                     importance TEXT DEFAULT '低',
                     directory TEXT DEFAULT '',
                     create_date TEXT DEFAULT '',
-                    sync_status TEXT DEFAULT ''
+                    sync_status TEXT DEFAULT '',
+                    due_date_iso TEXT,
+                    create_date_iso TEXT
                 )
             ''')
             logger.debug("任务表创建/检查完成")
@@ -235,12 +391,31 @@ class DatabaseManager:
                     WHERE due_offset_days = 0 AND due_date IS NOT NULL AND due_date != ''
                 ''')
                 cursor.execute('PRAGMA user_version = 1')
+
+            # schema 版本 2：due_date/create_date 的规范化 ISO 日期列，写入时生成，旧数据一次性回填
+            task_columns = [col[1] for col in cursor.execute('PRAGMA table_info(tasks)').fetchall()]
+            for iso_column in TASK_DATE_COLUMNS.values():
+                if iso_column not in task_columns:
+                    cursor.execute(f'ALTER TABLE tasks ADD COLUMN {iso_column} TEXT')
+            if schema_version < 2:
+                rows = cursor.execute('SELECT id, due_date, create_date FROM tasks').fetchall()
+                cursor.executemany(
+                    'UPDATE tasks SET due_date_iso = ?, create_date_iso = ? WHERE id = ?',
+                    [(normalize_task_date(row[1]), normalize_task_date(row[2]), row[0]) for row in rows],
+                )
+                cursor.execute('PRAGMA user_version = 2')
+                logger.info(f"已回填 {len(rows)} 个任务的规范化日期列")
             
             # 创建索引以提高查询性能
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_deleted ON tasks(deleted)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_sync_status ON tasks(sync_status)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_history_task_id ON task_history(task_id)')
+            # 到期日期在前、创建日期在后：按到期日期取区间只用前缀，甘特图时间窗口的重叠条件在索引内过滤；
+            # 它覆盖了早期的单列 idx_tasks_due_date_iso，旧库里的那个索引一并删除
+            cursor.execute('DROP INDEX IF EXISTS idx_tasks_due_date_iso')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_due_create_iso ON tasks(due_date_iso, create_date_iso)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_create_date_iso ON tasks(create_date_iso)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_task_history_timestamp ON task_history(timestamp)')
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_tasks_completed_deleted_dates
@@ -250,6 +425,11 @@ class DatabaseManager:
                 CREATE INDEX IF NOT EXISTS idx_task_history_task_timestamp
                 ON task_history(task_id, timestamp DESC)
             ''')
+            # 按时间区间取任务 ID（导出概要）时只读索引、不回表
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_task_history_timestamp_task
+                ON task_history(timestamp, task_id)
+            ''')
             
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_active ON scheduled_tasks(active)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_next_run ON scheduled_tasks(next_run_at)')
@@ -293,6 +473,8 @@ class DatabaseManager:
             self._pause_remote_auth()
             return False
 
+        import requests
+
         try:
             response = requests.request(
                 method='POST',
@@ -323,6 +505,33 @@ class DatabaseManager:
         self._pause_remote_auth()
         return False
 
+    def _send_api_request(self, method: str, url: str, endpoint: str, headers: Dict[str, str], data: Optional[Dict]):
+        """发送一次 HTTP 请求并记录耗时与结果状态；超时、连接错误等异常原样抛出"""
+        import requests
+
+        labels = {'method': method.upper(), 'endpoint': metric_endpoint(endpoint)}
+        status = 'error'
+        started = time.perf_counter()
+        try:
+            response = requests.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=data,
+                timeout=30
+            )
+            status = str(response.status_code)
+            return response
+        except requests.exceptions.Timeout:
+            status = 'timeout'
+            raise
+        except requests.exceptions.ConnectionError:
+            status = 'connection_error'
+            raise
+        finally:
+            API_REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+            API_REQUESTS.inc(status=status, **labels)
+
     def _make_api_request(self, method: str, endpoint: str, data: Optional[Dict] = None, retry_on_auth_failure: bool = True) -> Optional[Dict]:
         if not self.api_base_url:
             logger.debug("未配置API服务器地址，跳过API请求")
@@ -330,19 +539,16 @@ class DatabaseManager:
         if self._remote_auth_paused and (not self._is_public_endpoint(endpoint)):
             logger.debug(f"远程鉴权已暂停，跳过请求: {endpoint}")
             return None
+        # 延迟导入：未配置远程服务器时启动不加载 requests
+        import requests
+
         try:
             url = f"{self.api_base_url.rstrip('/')}/{endpoint.lstrip('/')}"
             headers = self._build_api_headers(endpoint)
             logger.debug(f"发送API请求: {method} {url}")
             if data:
                 logger.debug(f"请求数据: {json.dumps(data, ensure_ascii=False)[:200]}...")
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            response = self._send_api_request(method, url, endpoint, headers, data)
             logger.debug(f"API响应状态: {response.status_code}")
             if response.status_code in (200, 201):
                 logger.debug(f"API请求成功: {endpoint}")
@@ -409,11 +615,14 @@ class DatabaseManager:
 
     def _load_all_tasks_to_cache(self):
         """启动时加载所有任务到内存缓存"""
+        started = time.perf_counter()
         try:
             with self._cache_lock:
                 self._task_cache.clear()
                 self._deleted_task_ids.clear()
+                self._completed_task_ids.clear()
                 self._dirty_task_ids.clear()
+                self._due_date_index.clear()
 
                 conn = self.get_connection()
                 cursor = conn.cursor()
@@ -424,8 +633,11 @@ class DatabaseManager:
                     self._task_cache[task['id']] = task
                     if task.get('deleted'):
                         self._deleted_task_ids.add(task['id'])
+                    self._reindex_task_state_locked(task['id'])
 
                 logger.info(f"从数据库加载了 {len(self._task_cache)} 个任务到缓存")
+                CACHED_TASKS.set(len(self._task_cache))
+                LOAD_SECONDS.observe(time.perf_counter() - started, operation='cache_tasks')
                 self._cache_dirty = False
                 self._entity_cache['task']['dirty'] = False
                 self._entity_cache['task']['loaded'] = True
@@ -434,12 +646,15 @@ class DatabaseManager:
             with self._cache_lock:
                 self._task_cache.clear()
                 self._deleted_task_ids.clear()
+                self._completed_task_ids.clear()
+                self._due_date_index.clear()
                 self._cache_dirty = False
                 self._entity_cache['task']['dirty'] = False
                 self._entity_cache['task']['loaded'] = False
 
     def _load_all_scheduled_tasks_to_cache(self):
         """启动时加载所有定时任务到内存缓存。"""
+        started = time.perf_counter()
         try:
             with self._cache_lock:
                 bucket = self._get_entity_bucket('scheduled_task')
@@ -461,6 +676,7 @@ class DatabaseManager:
 
                 bucket['dirty'] = False
                 bucket['loaded'] = True
+                LOAD_SECONDS.observe(time.perf_counter() - started, operation='cache_scheduled_tasks')
         except Exception as e:
             logger.error(f"加载定时任务到缓存失败: {str(e)}")
             with self._cache_lock:
@@ -496,10 +712,13 @@ class DatabaseManager:
         return normalized
 
     def flush_cache_to_db(self):
+        wait_started = time.perf_counter()
         with self._cache_lock:
             scheduled_bucket = self._get_entity_bucket('scheduled_task')
             if (not self._cache_dirty) and (not scheduled_bucket['dirty']) and (not self._task_history_cache):
                 return
+            locked_at = time.perf_counter()
+            FLUSH_LOCK_WAIT_SECONDS.observe(locked_at - wait_started)
             conn = self.get_connection()
             cursor = conn.cursor()
             
@@ -518,11 +737,14 @@ class DatabaseManager:
                     tasks_to_write = []
 
                 for task in tasks_to_write:
+                    # 规范化日期列始终按当前原始值重新计算，避免与 due_date/create_date 不一致
+                    date_values = task_date_values(task)
                     cursor.execute('''
                         INSERT OR REPLACE INTO tasks 
                         (id, color, position_x, position_y, completed, completed_date, deleted, 
-                         text, notes, due_date, priority, urgency, importance, directory, create_date, updated_at, sync_status, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                         text, notes, due_date, priority, urgency, importance, directory, create_date, updated_at, sync_status, created_at,
+                         due_date_iso, create_date_iso)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (
                         task['id'],
                         task.get('color', '#4ECDC4'),
@@ -541,7 +763,9 @@ class DatabaseManager:
                         task.get('create_date', ''),
                         task.get('updated_at', datetime.now().isoformat()),
                         task.get('sync_status', ''),
-                        task.get('created_at', datetime.now().isoformat())
+                        task.get('created_at', datetime.now().isoformat()),
+                        date_values['due_date_iso'],
+                        date_values['create_date_iso'],
                     ))
 
                 # 增量写入scheduled_tasks，规则同上
@@ -587,6 +811,7 @@ class DatabaseManager:
                     ))
                 
                 # 批量写入历史记录
+                inserted_history: Dict[str, int] = {}
                 if self._task_history_cache:
                     for hist in self._task_history_cache:
                         cursor.execute('''
@@ -594,18 +819,31 @@ class DatabaseManager:
                             (task_id, field_name, field_value, action, timestamp)
                             VALUES (?, ?, ?, ?, ?)
                         ''', hist)
+                        # 主键冲突被忽略时 rowcount 为 0，只累计真正写入的行
+                        if cursor.rowcount > 0:
+                            inserted_history[hist[0]] = inserted_history.get(hist[0], 0) + cursor.rowcount
                     self._task_history_cache.clear()
                 
                 conn.commit()
+                self._add_history_counts(inserted_history)
+                self._bump_write_generation()
                 self._cache_dirty = False
                 self._entity_cache['task']['dirty'] = False
                 scheduled_bucket['dirty'] = False
                 self._dirty_task_ids.clear()
                 self._dirty_scheduled_ids.clear()
+                FLUSH_ROWS.inc(len(tasks_to_write), table='tasks')
+                FLUSH_ROWS.inc(len(schedules_to_write), table='scheduled_tasks')
+                FLUSH_ROWS.inc(sum(inserted_history.values()), table='task_history')
+                FLUSHES.inc(result='ok')
+                CACHED_TASKS.set(len(self._task_cache))
             except Exception as e:
+                FLUSHES.inc(result='error')
                 logger.error(f"写入数据库失败: {str(e)}")
                 conn.rollback()
                 raise
+            finally:
+                FLUSH_SECONDS.observe(time.perf_counter() - locked_at)
 
     def start_periodic_flush(self, interval_seconds: int):
         """启动定时flush线程，将内存缓存定期写入数据库"""
@@ -666,6 +904,9 @@ class DatabaseManager:
 
             for task in unsynced_tasks:
                 task_data = dict(task)
+                # 规范化日期列是本地派生数据，不上传
+                for iso_column in TASK_DATE_COLUMNS.values():
+                    task_data.pop(iso_column, None)
                 task_data['position'] = {'x': task['position_x'], 'y': task['position_y']}
                 task_data['history'] = self._load_local_task_history(task['id'])
                 result = self._make_api_request('POST', '/api/tasks', task_data)
@@ -674,6 +915,7 @@ class DatabaseManager:
                         self._task_cache[task['id']]['sync_status'] = 'synced'
                         self._dirty_task_ids.add(task['id'])
                         self._cache_dirty = True
+                        self._bump_write_generation()
                 else:
                     logger.error(f"同步任务 {task['id']} 失败")
 
@@ -827,26 +1069,12 @@ class DatabaseManager:
         return task_data
 
     def _get_task_field_names(self) -> List[str]:
-        """直接从配置文件读取任务字段，避免数据库层依赖 UI 模块。
+        """从共享配置服务读取任务字段，避免数据库层依赖 UI 模块。
 
-        结果按 config.json 的修改时间缓存，避免每次保存任务都读盘。
+        字段列表由配置服务缓存在内存中，只有配置变化时才会重新计算。
         """
-        config_path = os.path.join(APP_ROOT, 'config', 'config.json')
-        try:
-            mtime = os.path.getmtime(config_path)
-            if self._task_field_names_cache is not None and mtime == self._task_field_names_mtime:
-                return list(self._task_field_names_cache)
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            field_defs = config.get('task_fields', [])
-            field_names = [str(field.get('name', '')).strip() for field in field_defs if str(field.get('name', '')).strip()]
-            if field_names:
-                self._task_field_names_cache = field_names
-                self._task_field_names_mtime = mtime
-                return list(field_names)
-        except Exception:
-            pass
-        return list(DEFAULT_TASK_FIELD_NAMES)
+        field_names = get_config_service().get_task_field_names()
+        return field_names or list(DEFAULT_TASK_FIELD_NAMES)
 
     def _load_local_task_history(self, task_id: str) -> Dict[str, List[Dict[str, Any]]]:
         """从本地数据库读取任务历史。"""
@@ -1166,6 +1394,7 @@ class DatabaseManager:
                 for change_key in pending_ids & (accepted_set | rejected_set):
                     self._pending_remote_task_changes.pop(change_key, None)
                 self._cache_dirty = True
+                self._bump_write_generation()
 
             for change in rejected_changes:
                 if change.get('entity_type') != 'scheduled_task' or (not self.api_base_url):
@@ -1242,7 +1471,7 @@ class DatabaseManager:
             logger.error(f"清空服务器并覆盖失败: {str(e)}")
             return False
 
-    def _save_task_to_cache(self, task_data: Dict[str, Any], sync_status: str = 'modified'):
+    def _save_task_to_cache(self, task_data: Dict[str, Any], sync_status: str = 'modified', field_names: Optional[List[str]] = None):
         """保存任务到内存缓存"""
         task_id = task_data['id']
         color = task_data.get('color', '#4ECDC4')
@@ -1251,7 +1480,8 @@ class DatabaseManager:
         completed_date = task_data.get('completed_date', '')
         deleted = task_data.get('deleted', False)
         
-        field_names = self._get_task_field_names()
+        if field_names is None:
+            field_names = self._get_task_field_names()
         field_values = {}
         for field_name in field_names:
             if field_name in task_data:
@@ -1279,48 +1509,108 @@ class DatabaseManager:
             'sync_status': sync_status,
             'created_at': task_data.get('created_at', datetime.now().isoformat())
         }
+        task.update(task_date_values(task))
         
         self._task_cache[task_id] = task
         if deleted:
             self._deleted_task_ids.add(task_id)
         else:
             self._deleted_task_ids.discard(task_id)
+        self._reindex_task_state_locked(task_id)
         self._dirty_task_ids.add(task_id)
         self._cache_dirty = True
         self._entity_cache['task']['dirty'] = True
+        self._bump_write_generation()
+
+    def _save_task_locked(self, task_data: Dict[str, Any], field_names: Optional[List[str]] = None) -> None:
+        """在已持有 _cache_lock 的前提下记录历史并写入任务缓存。"""
+        is_new = not self._task_exists_in_cache(task_data['id'])
+
+        # 先记录字段历史（排除位置字段，因为位置变化太频繁）
+        # 在保存到缓存之前记录历史，这样能正确比较新旧值
+        self._save_task_history_to_cache(task_data['id'], task_data, field_names)
+
+        # 然后保存任务到缓存
+        self._save_task_to_cache(task_data, 'modified', field_names)
+
+        # 为新任务设置创建时间
+        if is_new:
+            self._task_cache[task_data['id']]['created_at'] = datetime.now().isoformat()
+
+        self._cache_dirty = True
+
+    def _task_matches_cache(self, task_data: Dict[str, Any], field_names: List[str]) -> bool:
+        """判断任务数据与缓存记录是否一致（忽略时间戳与同步状态）。"""
+        cached = self._task_cache.get(task_data['id'])
+        if not cached:
+            return False
+        position = task_data.get('position', {'x': 100, 'y': 100})
+        if (
+            cached.get('color') != task_data.get('color', '#4ECDC4')
+            or cached.get('position_x') != position['x']
+            or cached.get('position_y') != position['y']
+            or bool(cached.get('completed')) != bool(task_data.get('completed', False))
+            or (cached.get('completed_date') or '') != (task_data.get('completed_date') or '')
+            or bool(cached.get('deleted')) != bool(task_data.get('deleted', False))
+        ):
+            return False
+        expected_values = {
+            field_name: (str(task_data[field_name]) if task_data.get(field_name) is not None else '')
+            for field_name in field_names
+        }
+        for field_name in ('urgency', 'importance'):
+            expected_values.setdefault(field_name, task_data.get(field_name, '低'))
+        for field_name, expected in expected_values.items():
+            cached_value = cached.get(field_name)
+            if (str(cached_value) if cached_value is not None else '') != expected:
+                return False
+        return True
 
     def save_task(self, task_data: Dict[str, Any]) -> bool:
         """保存任务到内存缓存，延迟写入数据库"""
         try:
-            with self._cache_lock:
-                is_new = not self._task_exists_in_cache(task_data['id'])
-                
-                # 先记录字段历史（排除位置字段，因为位置变化太频繁）
-                # 在保存到缓存之前记录历史，这样能正确比较新旧值
-                self._save_task_history_to_cache(task_data['id'], task_data)
-                
-                # 然后保存任务到缓存
-                self._save_task_to_cache(task_data, 'modified')
-                
-                # 为新任务设置创建时间
-                if is_new:
-                    self._task_cache[task_data['id']]['created_at'] = datetime.now().isoformat()
-                
-                self._cache_dirty = True
-            
+            with SAVE_SECONDS.time(operation='save_task'), self._cache_lock:
+                self._save_task_locked(task_data)
+            SAVED_TASKS.inc(operation='save_task')
+
             # logger.info(f"任务 {task_data['id']} 已写入内存缓存")
             return True
         except Exception as e:
             logger.error(f"保存任务失败: {str(e)}")
             return False
 
+    def save_tasks_changed(self, tasks_data: List[Dict[str, Any]]) -> bool:
+        """批量保存有变化的任务。
+
+        整批只读取一次字段配置、只获取一次缓存锁；与缓存记录完全一致的任务直接跳过，
+        不刷新 updated_at，也不会被标记为待同步。
+        """
+        if not tasks_data:
+            return True
+        try:
+            field_names = self._get_task_field_names()
+            saved_count = 0
+            with SAVE_SECONDS.time(operation='save_tasks_changed'), self._cache_lock:
+                for task_data in tasks_data:
+                    if self._task_matches_cache(task_data, field_names):
+                        continue
+                    self._save_task_locked(task_data, field_names)
+                    saved_count += 1
+            SAVED_TASKS.inc(saved_count, operation='save_tasks_changed')
+            logger.debug(f"批量保存任务：提交 {len(tasks_data)} 个，实际写入 {saved_count} 个")
+            return True
+        except Exception as e:
+            logger.error(f"批量保存任务失败: {str(e)}")
+            return False
+
     def _task_exists_in_cache(self, task_id: str) -> bool:
         """检查任务是否在内存缓存中存在"""
         return task_id in self._task_cache
 
-    def _save_task_history_to_cache(self, task_id: str, task_data: Dict[str, Any]):
+    def _save_task_history_to_cache(self, task_id: str, task_data: Dict[str, Any], field_names: Optional[List[str]] = None):
         """保存任务字段历史记录到内存缓存"""
-        field_names = self._get_task_field_names()
+        if field_names is None:
+            field_names = self._get_task_field_names()
         current_timestamp = datetime.now().isoformat()
         
         logger.debug(f"开始保存任务 {task_id} 的历史记录")
@@ -1365,11 +1655,12 @@ class DatabaseManager:
         
         logger.debug(f"任务 {task_id} 历史记录缓存数量: {len(self._task_history_cache)}")
         self._cache_dirty = True
+        self._bump_write_generation()
 
     def load_tasks(self, include_completed_today: bool = True,all_tasks=False) -> List[Dict[str, Any]]:
         """从内存缓存加载任务列表"""
         try:
-            with self._cache_lock:
+            with LOAD_SECONDS.time(operation='load_tasks'), self._cache_lock:
                 tasks = list(self._task_cache.values())
                 result = []
                 today = datetime.now().strftime('%Y-%m-%d')
@@ -1397,6 +1688,129 @@ class DatabaseManager:
             logger.error(f"加载任务失败: {str(e)}")
             return []
 
+    def count_all_tasks(self) -> int:
+        """全部任务数量（含已完成、已删除），直接取自内存缓存"""
+        with self._cache_lock:
+            return len(self._task_cache)
+
+    def iter_export_task_rows(
+        self,
+        batch_size: int = 500,
+        create_date_from: Any = None,
+        create_date_to: Any = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """按创建时间倒序逐批读取任务行，供导出流式写入；每批最多 batch_size 行。
+
+        给出 create_date_from/create_date_to 时只导出创建日期（create_date_iso）在该闭区间内的任务。
+        在后台线程调用时应先用 use_read_connection() 绑定独立连接。
+        """
+        where_sql = ''
+        params: List[Any] = []
+        if create_date_from is not None or create_date_to is not None:
+            conditions, params = self._date_range_conditions('create_date_iso', create_date_from, create_date_to)
+            where_sql = f'WHERE {" AND ".join(conditions)}'
+        self.flush_cache_to_db()
+        conn = self._get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f'''
+            SELECT text, due_date, priority, notes, directory, created_at,
+                   completed, completed_date, deleted
+            FROM tasks
+            {where_sql}
+            ORDER BY created_at DESC
+            ''',
+            params,
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(max(1, int(batch_size)))
+                if not rows:
+                    return
+                yield [dict(row) for row in rows]
+        finally:
+            cursor.close()
+
+    def _reindex_task_state_locked(self, task_id: str) -> None:
+        """任务完成/删除状态或到期日期变化后，同步维护已完成集合与到期索引。"""
+        task = self._task_cache.get(task_id)
+        if task and task.get('completed') and not task.get('deleted'):
+            self._completed_task_ids.add(task_id)
+        else:
+            self._completed_task_ids.discard(task_id)
+        self._reindex_task_due_date_locked(task_id)
+
+    def _reindex_task_due_date_locked(self, task_id: str) -> None:
+        """按缓存记录刷新到期索引：只有未完成、未删除的任务参与到期判断。"""
+        task = self._task_cache.get(task_id)
+        if not task or task.get('deleted') or task.get('completed'):
+            self._due_date_index.remove(task_id)
+        else:
+            self._due_date_index.update(task_id, task.get('due_date_iso') or task.get('due_date'))
+
+    def get_overdue_task_ids(self, today: Optional[date] = None) -> List[str]:
+        """返回到期日期不晚于今天的未完成任务 ID。"""
+        with self._cache_lock:
+            return self._due_date_index.overdue_ids(today or date.today())
+
+    def get_task_ids_due_within(self, days: int, today: Optional[date] = None) -> List[str]:
+        """返回今天之后 days 天内到期的未完成任务 ID（不含已到期任务）。"""
+        with self._cache_lock:
+            return self._due_date_index.due_within_ids(days, today or date.today())
+
+    def get_task_ids_due_between(self, start: Optional[date], end: date) -> List[str]:
+        """返回到期日期落在 (start, end] 内的未完成任务 ID，供跨日翻转到期状态使用。"""
+        with self._cache_lock:
+            return self._due_date_index.ids_due_between(start, end)
+
+    @staticmethod
+    def _date_range_conditions(column: str, start: Any, end: Any) -> tuple[List[str], List[Any]]:
+        """规范化日期列的闭区间条件；start/end 可为 date 或日期字符串，None 表示不设界"""
+        conditions = [f'{column} IS NOT NULL']
+        params: List[Any] = []
+        for bound, operator in ((start, '>='), (end, '<=')):
+            if bound is None:
+                continue
+            normalized = normalize_task_date(bound)
+            if normalized is None:
+                raise ValueError(f"无法解析的日期: {bound}")
+            conditions.append(f'{column} {operator} ?')
+            params.append(normalized)
+        return conditions, params
+
+    def _load_tasks_in_date_range(self, column: str, start: Any, end: Any, include_completed: bool) -> List[Dict[str, Any]]:
+        conditions, params = self._date_range_conditions(column, start, end)
+        conditions.append('COALESCE(deleted, 0) = 0')
+        if not include_completed:
+            conditions.append('COALESCE(completed, 0) = 0')
+        self.flush_cache_to_db()
+        conn = self._get_read_connection()
+        rows = conn.execute(
+            f'SELECT * FROM tasks WHERE {" AND ".join(conditions)} ORDER BY {column}, created_at',
+            params,
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_tasks_due_between(self, start: Any, end: Any, include_completed: bool = False) -> List[Dict[str, Any]]:
+        """按 due_date_iso 取到期日期在 [start, end] 内的未删除任务（走 idx_tasks_due_create_iso 的前缀）。
+
+        在后台线程调用时应先用 use_read_connection() 绑定独立连接；查询失败时抛出异常。
+        """
+        return self._load_tasks_in_date_range('due_date_iso', start, end, include_completed)
+
+    def load_tasks_created_between(self, start: Any, end: Any, include_completed: bool = True) -> List[Dict[str, Any]]:
+        """按 create_date_iso 取创建日期在 [start, end] 内的未删除任务（走 idx_tasks_create_date_iso）。"""
+        return self._load_tasks_in_date_range('create_date_iso', start, end, include_completed)
+
+    def load_overdue_tasks(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """到期日期不晚于今天的未完成任务（与 get_overdue_task_ids 口径一致）。"""
+        return self.load_tasks_due_between(None, today or date.today())
+
+    def load_tasks_due_soon(self, days: int, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """今天之后 days 天内（含第 days 天）到期的未完成任务。"""
+        today = today or date.today()
+        return self.load_tasks_due_between(today + timedelta(days=1), today + timedelta(days=max(0, int(days))))
+
     def _parse_task_search_keywords(self, search_query: str) -> List[str]:
         return [keyword.casefold() for keyword in str(search_query or '').split() if keyword]
 
@@ -1424,49 +1838,70 @@ class DatabaseManager:
             params.append(f"%{self._escape_like_keyword(keyword)}%")
         return ' AND '.join(clauses), params
 
-    def load_completed_tasks_page(
+    def _load_archive_task_page(
         self,
-        limit: int = 100,
-        offset: int = 0,
-        search_query: str = "",
-    ) -> List[Dict[str, Any]]:
-        """分页读取已完成且未删除的任务。"""
-        try:
-            self.flush_cache_to_db()
-            safe_limit = max(0, int(limit))
-            safe_offset = max(0, int(offset))
-            where_sql, params = self._build_completed_tasks_filter(search_query)
-            conn = self.get_connection()
+        kind: str,
+        build_filter,
+        order_sql: str,
+        limit: int,
+        offset: int,
+        search_query: str,
+        with_total: bool = False,
+    ):
+        """读取一页归档任务；with_total 时用窗口函数在同一查询里带回筛选后的总数。
+
+        with_total 返回 (tasks, total)；页面为空且 offset > 0 时无法从窗口函数得到总数，total 为 None。
+        """
+        safe_limit = max(0, int(limit))
+        safe_offset = max(0, int(offset))
+
+        def query():
+            where_sql, params = build_filter(search_query)
+            total_sql = ', COUNT(*) OVER () AS archive_total_count' if with_total else ''
+            conn = self._get_read_connection()
             cursor = conn.cursor()
             cursor.execute(
                 f'''
-                SELECT *
+                SELECT *{total_sql}
                 FROM tasks
                 WHERE {where_sql}
-                ORDER BY completed_date DESC, updated_at DESC, created_at DESC
+                ORDER BY {order_sql}
                 LIMIT ? OFFSET ?
                 ''',
                 (*params, safe_limit, safe_offset),
             )
             tasks = []
+            total = 0 if safe_offset == 0 else None
             for row in cursor.fetchall():
                 task = dict(row)
+                if with_total:
+                    total = int(task.pop('archive_total_count'))
                 task['position'] = {
                     'x': task.get('position_x', 100),
                     'y': task.get('position_y', 100),
                 }
                 tasks.append(task)
-            return tasks
-        except Exception as e:
-            logger.error(f"分页加载已完成任务失败: {str(e)}")
-            return []
+            return (tasks, total) if with_total else tasks
 
-    def count_completed_tasks(self, search_query: str = "") -> int:
-        """统计已完成且未删除的任务数量。"""
-        try:
-            self.flush_cache_to_db()
-            where_sql, params = self._build_completed_tasks_filter(search_query)
-            conn = self.get_connection()
+        cache_kind = f"{kind}_page_total" if with_total else f"{kind}_page"
+        with QUERY_SECONDS.time(query=cache_kind):
+            return self._cached_query(
+                (cache_kind, self._search_cache_key(search_query), safe_offset, safe_limit),
+                query,
+            )
+
+    def _count_archive_tasks(self, kind: str, build_filter, search_query: str) -> int:
+        """归档任务计数：无关键字时直接读内存计数器，有关键字时执行 COUNT(*)"""
+        if not self._parse_task_search_keywords(search_query):
+            total = self._archive_total_from_cache(kind)
+            if total is not None:
+                return total
+
+        self.flush_cache_to_db()
+
+        def query():
+            where_sql, params = build_filter(search_query)
+            conn = self._get_read_connection()
             cursor = conn.cursor()
             cursor.execute(
                 f'''
@@ -1477,29 +1912,113 @@ class DatabaseManager:
                 params,
             )
             return int(cursor.fetchone()[0])
+
+        with QUERY_SECONDS.time(query=f"{kind}_count"):
+            return self._cached_query((f"{kind}_count", self._search_cache_key(search_query)), query)
+
+    def _archive_total_from_cache(self, kind: str) -> Optional[int]:
+        """未筛选的已完成/已删除总数；任务缓存未加载成功时返回 None，由调用方回退到 SQL"""
+        with self._cache_lock:
+            if not self._entity_cache['task']['loaded']:
+                return None
+            if kind == 'completed':
+                return len(self._completed_task_ids)
+            return len(self._deleted_task_ids)
+
+    def _load_archive_task_page_with_total(
+        self,
+        kind: str,
+        build_filter,
+        order_sql: str,
+        limit: int,
+        offset: int,
+        search_query: str,
+    ) -> tuple:
+        self.flush_cache_to_db()
+        if not self._parse_task_search_keywords(search_query):
+            total = self._archive_total_from_cache(kind)
+            if total is not None:
+                tasks = self._load_archive_task_page(kind, build_filter, order_sql, limit, offset, search_query)
+                return tasks, total
+        tasks, total = self._load_archive_task_page(
+            kind, build_filter, order_sql, limit, offset, search_query, with_total=True
+        )
+        if total is None:
+            total = self._count_archive_tasks(kind, build_filter, search_query)
+        return tasks, total
+
+    def load_completed_tasks_page(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        search_query: str = "",
+    ) -> List[Dict[str, Any]]:
+        """分页读取已完成且未删除的任务。"""
+        try:
+            self.flush_cache_to_db()
+            return self._load_archive_task_page(
+                'completed',
+                self._build_completed_tasks_filter,
+                COMPLETED_TASKS_ORDER_SQL,
+                limit,
+                offset,
+                search_query,
+            )
         except Exception as e:
-            logger.error(f"统计已完成任务失败: {str(e)}")
+            self._log_query_error("分页加载已完成任务失败", e)
+            return []
+
+    def load_completed_tasks_page_with_total(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        search_query: str = "",
+    ) -> tuple:
+        """读取一页已完成任务并同时返回筛选后的总数 (tasks, total)，省去单独的 COUNT 查询。"""
+        try:
+            return self._load_archive_task_page_with_total(
+                'completed',
+                self._build_completed_tasks_filter,
+                COMPLETED_TASKS_ORDER_SQL,
+                limit,
+                offset,
+                search_query,
+            )
+        except Exception as e:
+            self._log_query_error("分页加载已完成任务失败", e)
+            return [], 0
+
+    def count_completed_tasks(self, search_query: str = "") -> int:
+        """统计已完成且未删除的任务数量。"""
+        try:
+            return self._count_archive_tasks('completed', self._build_completed_tasks_filter, search_query)
+        except Exception as e:
+            self._log_query_error("统计已完成任务失败", e)
             return 0
 
     def load_completed_task_ids(self, search_query: str = "") -> List[str]:
         """读取当前已完成任务筛选条件下的全部任务 ID。"""
         try:
             self.flush_cache_to_db()
-            where_sql, params = self._build_completed_tasks_filter(search_query)
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                f'''
-                SELECT id
-                FROM tasks
-                WHERE {where_sql}
-                ORDER BY completed_date DESC, updated_at DESC, created_at DESC
-                ''',
-                params,
-            )
-            return [str(row['id']) for row in cursor.fetchall()]
+
+            def query():
+                where_sql, params = self._build_completed_tasks_filter(search_query)
+                conn = self._get_read_connection()
+                cursor = conn.cursor()
+                cursor.execute(
+                    f'''
+                    SELECT id
+                    FROM tasks
+                    WHERE {where_sql}
+                    ORDER BY {COMPLETED_TASKS_ORDER_SQL}
+                    ''',
+                    params,
+                )
+                return [str(row['id']) for row in cursor.fetchall()]
+
+            return self._cached_query(('completed_ids', self._search_cache_key(search_query)), query)
         except Exception as e:
-            logger.error(f"加载已完成任务ID失败: {str(e)}")
+            self._log_query_error("加载已完成任务ID失败", e)
             return []
 
     def load_deleted_tasks_page(
@@ -1511,89 +2030,107 @@ class DatabaseManager:
         """分页读取逻辑删除的任务。"""
         try:
             self.flush_cache_to_db()
-            safe_limit = max(0, int(limit))
-            safe_offset = max(0, int(offset))
-            where_sql, params = self._build_deleted_tasks_filter(search_query)
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                f'''
-                SELECT *
-                FROM tasks
-                WHERE {where_sql}
-                ORDER BY updated_at DESC, created_at DESC
-                LIMIT ? OFFSET ?
-                ''',
-                (*params, safe_limit, safe_offset),
+            return self._load_archive_task_page(
+                'deleted',
+                self._build_deleted_tasks_filter,
+                DELETED_TASKS_ORDER_SQL,
+                limit,
+                offset,
+                search_query,
             )
-            tasks = []
-            for row in cursor.fetchall():
-                task = dict(row)
-                task['position'] = {
-                    'x': task.get('position_x', 100),
-                    'y': task.get('position_y', 100),
-                }
-                tasks.append(task)
-            return tasks
         except Exception as e:
-            logger.error(f"分页加载已删除任务失败: {str(e)}")
+            self._log_query_error("分页加载已删除任务失败", e)
             return []
 
+    def load_deleted_tasks_page_with_total(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        search_query: str = "",
+    ) -> tuple:
+        """读取一页已删除任务并同时返回筛选后的总数 (tasks, total)。"""
+        try:
+            return self._load_archive_task_page_with_total(
+                'deleted',
+                self._build_deleted_tasks_filter,
+                DELETED_TASKS_ORDER_SQL,
+                limit,
+                offset,
+                search_query,
+            )
+        except Exception as e:
+            self._log_query_error("分页加载已删除任务失败", e)
+            return [], 0
+
     def count_deleted_tasks(self, search_query: str = "") -> int:
         """统计逻辑删除的任务数量。"""
         try:
-            self.flush_cache_to_db()
-            where_sql, params = self._build_deleted_tasks_filter(search_query)
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                f'''
-                SELECT COUNT(*)
-                FROM tasks
-                WHERE {where_sql}
-                ''',
-                params,
-            )
-            return int(cursor.fetchone()[0])
+            return self._count_archive_tasks('deleted', self._build_deleted_tasks_filter, search_query)
         except Exception as e:
-            logger.error(f"统计已删除任务失败: {str(e)}")
+            self._log_query_error("统计已删除任务失败", e)
             return 0
 
     def load_deleted_task_ids(self, search_query: str = "") -> List[str]:
         """读取当前已删除任务筛选条件下的全部任务 ID。"""
         try:
             self.flush_cache_to_db()
-            where_sql, params = self._build_deleted_tasks_filter(search_query)
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                f'''
-                SELECT id
-                FROM tasks
-                WHERE {where_sql}
-                ORDER BY updated_at DESC, created_at DESC
-                ''',
-                params,
-            )
-            return [str(row['id']) for row in cursor.fetchall()]
+
+            def query():
+                where_sql, params = self._build_deleted_tasks_filter(search_query)
+                conn = self._get_read_connection()
+                cursor = conn.cursor()
+                cursor.execute(
+                    f'''
+                    SELECT id
+                    FROM tasks
+                    WHERE {where_sql}
+                    ORDER BY {DELETED_TASKS_ORDER_SQL}
+                    ''',
+                    params,
+                )
+                return [str(row['id']) for row in cursor.fetchall()]
+
+            return self._cached_query(('deleted_ids', self._search_cache_key(search_query)), query)
         except Exception as e:
-            logger.error(f"加载已删除任务ID失败: {str(e)}")
+            self._log_query_error("加载已删除任务ID失败", e)
             return []
 
+    def _restore_completed_task_locked(self, task_id: str, now: str) -> bool:
+        task = self._task_cache.get(task_id)
+        if not task or task.get('deleted') or not task.get('completed'):
+            return False
+        task['completed'] = False
+        task['completed_date'] = ''
+        task['updated_at'] = now
+        task['sync_status'] = 'modified'
+        self._reindex_task_state_locked(task_id)
+        self._dirty_task_ids.add(task_id)
+        return True
+
+    def _restore_deleted_task_locked(self, task_id: str, now: str) -> bool:
+        task = self._task_cache.get(task_id)
+        if not task or not task.get('deleted'):
+            return False
+        task['deleted'] = False
+        task['updated_at'] = now
+        task['sync_status'] = 'modified'
+        self._deleted_task_ids.discard(task_id)
+        self._reindex_task_state_locked(task_id)
+        self._dirty_task_ids.add(task_id)
+        return True
+
+    def _mark_task_cache_dirty_locked(self) -> None:
+        self._cache_dirty = True
+        self._entity_cache['task']['dirty'] = True
+        self._bump_write_generation()
+
     def restore_completed_task(self, task_id: str) -> bool:
         """将未删除的已完成任务还原为未完成状态。"""
         try:
             with self._cache_lock:
-                task = self._task_cache.get(task_id)
-                if not task or task.get('deleted') or not task.get('completed'):
+                if not self._restore_completed_task_locked(task_id, datetime.now().isoformat()):
                     return False
-                task['completed'] = False
-                task['completed_date'] = ''
-                task['updated_at'] = datetime.now().isoformat()
-                task['sync_status'] = 'modified'
-                self._dirty_task_ids.add(task_id)
-                self._cache_dirty = True
-                self._entity_cache['task']['dirty'] = True
+                self._mark_task_cache_dirty_locked()
             logger.info(f"已完成任务已还原: {task_id}")
             return True
         except Exception as e:
@@ -1604,22 +2141,59 @@ class DatabaseManager:
         """撤销任务的逻辑删除状态，并保留删除前的完成状态。"""
         try:
             with self._cache_lock:
-                task = self._task_cache.get(task_id)
-                if not task or not task.get('deleted'):
+                if not self._restore_deleted_task_locked(task_id, datetime.now().isoformat()):
                     return False
-                task['deleted'] = False
-                task['updated_at'] = datetime.now().isoformat()
-                task['sync_status'] = 'modified'
-                self._deleted_task_ids.discard(task_id)
-                self._dirty_task_ids.add(task_id)
-                self._cache_dirty = True
-                self._entity_cache['task']['dirty'] = True
+                self._mark_task_cache_dirty_locked()
             logger.info(f"已删除任务已还原: {task_id}")
             return True
         except Exception as e:
             logger.error(f"还原已删除任务失败: {str(e)}")
             return False
 
+    def _restore_tasks_matching(self, where_sql: str, params: List[Any], excluded_ids, restore_locked) -> int:
+        """按筛选条件一次性还原匹配的任务：一次查询、一次加锁，excluded_ids 中的任务跳过"""
+        self.flush_cache_to_db()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT id FROM tasks WHERE {where_sql}', params)
+        excluded = {str(task_id) for task_id in excluded_ids or ()}
+        now = datetime.now().isoformat()
+        restored_count = 0
+        with self._cache_lock:
+            for row in cursor.fetchall():
+                task_id = str(row['id'])
+                if task_id not in excluded and restore_locked(task_id, now):
+                    restored_count += 1
+            if restored_count:
+                self._mark_task_cache_dirty_locked()
+        return restored_count
+
+    def restore_completed_tasks_matching(self, search_query: str = "", excluded_ids=None) -> int:
+        """还原当前已完成任务筛选条件下的全部任务（排除 excluded_ids），返回还原数量。"""
+        try:
+            where_sql, params = self._build_completed_tasks_filter(search_query)
+            restored_count = self._restore_tasks_matching(
+                where_sql, params, excluded_ids, self._restore_completed_task_locked
+            )
+            logger.info(f"按筛选条件还原已完成任务: {restored_count} 个")
+            return restored_count
+        except Exception as e:
+            logger.error(f"按筛选条件还原已完成任务失败: {str(e)}")
+            return 0
+
+    def restore_deleted_tasks_matching(self, search_query: str = "", excluded_ids=None) -> int:
+        """还原当前已删除任务筛选条件下的全部任务（排除 excluded_ids），返回还原数量。"""
+        try:
+            where_sql, params = self._build_deleted_tasks_filter(search_query)
+            restored_count = self._restore_tasks_matching(
+                where_sql, params, excluded_ids, self._restore_deleted_task_locked
+            )
+            logger.info(f"按筛选条件还原已删除任务: {restored_count} 个")
+            return restored_count
+        except Exception as e:
+            logger.error(f"按筛选条件还原已删除任务失败: {str(e)}")
+            return 0
+
     def get_task_history(self, task_id: str) -> Dict[str, List[Dict[str, Any]]]:
         """只从本地数据库获取任务历史。"""
         try:
@@ -1640,49 +2214,203 @@ class DatabaseManager:
             self.flush_cache_to_db()
             safe_limit = max(0, int(limit))
             safe_offset = max(0, int(offset))
-            conn = self.get_connection()
+            with QUERY_SECONDS.time(query='history_page'):
+                conn = self._get_read_connection()
+                cursor = conn.cursor()
+                cursor.execute(
+                    '''
+                    SELECT field_name, field_value, action, timestamp
+                    FROM task_history
+                    WHERE task_id = ?
+                    ORDER BY timestamp DESC
+                    LIMIT ? OFFSET ?
+                    ''',
+                    (task_id, safe_limit, safe_offset),
+                )
+                field_history: Dict[str, List[Dict[str, Any]]] = {}
+                for record in cursor.fetchall():
+                    field_name = record['field_name']
+                    field_history.setdefault(field_name, []).append({
+                        'value': record['field_value'],
+                        'timestamp': record['timestamp'],
+                        'action': record['action'],
+                    })
+                return field_history
+        except Exception as e:
+            self._log_query_error("分页获取任务历史记录失败", e)
+            return {}
+
+    def count_task_history(self, task_id: str) -> int:
+        """统计单个任务的历史记录数量。
+
+        每个任务只在第一次统计时执行 COUNT(*)，之后由 flush 在提交后按实际写入行数累加，
+        编辑期间重复统计也是 O(1)。COUNT(*) 不持有任何锁执行；期间写代次变化（flush
+        可能已提交但未计入）时结果不记入计数器，下次重新统计。
+        """
+        try:
+            self.flush_cache_to_db()
+            with self._query_cache_lock:
+                count = self._history_counts.get(task_id)
+                if count is not None:
+                    return count
+                generation = self._write_generation
+            with QUERY_SECONDS.time(query='history_count'):
+                conn = self._get_read_connection()
+                cursor = conn.cursor()
+                cursor.execute(
+                    '''
+                    SELECT COUNT(*)
+                    FROM task_history
+                    WHERE task_id = ?
+                    ''',
+                    (task_id,),
+                )
+                count = int(cursor.fetchone()[0])
+            with self._query_cache_lock:
+                if generation == self._write_generation:
+                    self._history_counts[task_id] = count
+            return count
+        except Exception as e:
+            self._log_query_error("统计任务历史记录失败", e)
+            return 0
+
+    def get_task_history_rows(
+        self,
+        task_id: str,
+        limit: int = 100,
+        after: Optional[tuple] = None,
+        ascending: bool = False,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """按 (timestamp, rowid) 键集分页读取单个任务的扁平历史行。
+
+        after 为上一页最后一行的 (timestamp, rowid)，为空时从头读取；
+        查询沿 idx_task_history_task_timestamp 定位，不随页码增大而变慢。
+        use_cache=False 时不读写查询结果缓存（整段导出等一次性读取使用）。
+        """
+        try:
+            if after is None:
+                self.flush_cache_to_db()
+            safe_limit = max(0, int(limit))
+            order = 'ASC' if ascending else 'DESC'
+            params: List[Any] = [task_id]
+            seek_sql = ''
+            if after is not None:
+                seek_sql = f"AND (timestamp, rowid) {'>' if ascending else '<'} (?, ?)"
+                params.extend([after[0], int(after[1])])
+            params.append(safe_limit)
+
+            def query():
+                conn = self._get_read_connection()
+                cursor = conn.cursor()
+                cursor.execute(
+                    f'''
+                    SELECT rowid, field_name, field_value, action, timestamp
+                    FROM task_history
+                    WHERE task_id = ? {seek_sql}
+                    ORDER BY timestamp {order}, rowid {order}
+                    LIMIT ?
+                    ''',
+                    params,
+                )
+                return [
+                    {
+                        'rowid': record['rowid'],
+                        'field_name': record['field_name'],
+                        'value': record['field_value'],
+                        'action': record['action'],
+                        'timestamp': record['timestamp'],
+                    }
+                    for record in cursor.fetchall()
+                ]
+
+            with QUERY_SECONDS.time(query='history_rows'):
+                if not use_cache:
+                    return query()
+                cursor_key = None if after is None else (after[0], int(after[1]))
+                return self._cached_query(('history_rows', task_id, cursor_key, safe_limit, order), query)
+        except Exception as e:
+            self._log_query_error("键集分页获取任务历史记录失败", e)
+            return []
+
+    def iter_task_history_rows(
+        self,
+        task_id: str,
+        batch_size: int = 500,
+        ascending: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """沿与 get_task_history_rows 相同的键集游标逐批产出全部历史行，供导出流式读取"""
+        after = None
+        while True:
+            rows = self.get_task_history_rows(
+                task_id,
+                limit=batch_size,
+                after=after,
+                ascending=ascending,
+                use_cache=False,
+            )
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = history_row_cursor(rows[-1])
+
+    def load_tasks_with_history_between(self, start_time: str, end_time: str) -> List[Dict[str, Any]]:
+        """读取时间区间内有历史记录的任务及其区间内的历史，供导出概要使用。
+
+        固定两条区间查询（任务行 + 历史行），在 Python 中按 task_id 分组，
+        查询次数与任务数量无关；区间过滤走 idx_task_history_timestamp_task 覆盖索引。
+        任务按区间内首条历史的时间排序，history 为按时间升序的
+        {'field', 'value', 'action', 'timestamp'} 列表。查询失败时抛出异常。
+        """
+        self.flush_cache_to_db()
+        with QUERY_SECONDS.time(query='history_between'):
+            conn = self._get_read_connection()
             cursor = conn.cursor()
+            params = (start_time, end_time)
+
             cursor.execute(
                 '''
-                SELECT field_name, field_value, action, timestamp
+                SELECT task_id, field_name, field_value, action, timestamp
                 FROM task_history
-                WHERE task_id = ?
-                ORDER BY timestamp DESC
-                LIMIT ? OFFSET ?
+                WHERE timestamp BETWEEN ? AND ?
+                ORDER BY timestamp ASC, rowid ASC
                 ''',
-                (task_id, safe_limit, safe_offset),
+                params,
             )
-            field_history: Dict[str, List[Dict[str, Any]]] = {}
+            history_by_task: Dict[str, List[Dict[str, Any]]] = {}
             for record in cursor.fetchall():
-                field_name = record['field_name']
-                field_history.setdefault(field_name, []).append({
+                history_by_task.setdefault(record['task_id'], []).append({
+                    'field': record['field_name'],
                     'value': record['field_value'],
-                    'timestamp': record['timestamp'],
                     'action': record['action'],
+                    'timestamp': record['timestamp'],
                 })
-            return field_history
-        except Exception as e:
-            logger.error(f"分页获取任务历史记录失败: {str(e)}")
-            return {}
+            if not history_by_task:
+                return []
 
-    def count_task_history(self, task_id: str) -> int:
-        """统计单个任务的历史记录数量。"""
-        try:
-            self.flush_cache_to_db()
-            conn = self.get_connection()
-            cursor = conn.cursor()
             cursor.execute(
                 '''
-                SELECT COUNT(*)
-                FROM task_history
-                WHERE task_id = ?
+                SELECT id, text, priority, notes, due_date, completed,
+                       completed_date, created_at, updated_at, directory
+                FROM tasks
+                WHERE id IN (
+                    SELECT DISTINCT task_id FROM task_history
+                    WHERE timestamp BETWEEN ? AND ?
+                )
                 ''',
-                (task_id,),
+                params,
             )
-            return int(cursor.fetchone()[0])
-        except Exception as e:
-            logger.error(f"统计任务历史记录失败: {str(e)}")
-            return 0
+            tasks_by_id = {record['id']: dict(record) for record in cursor.fetchall()}
+
+            tasks: List[Dict[str, Any]] = []
+            for task_id, history in history_by_task.items():
+                task = tasks_by_id.get(task_id)
+                if task is None:
+                    # 历史里残留的任务 ID 可能已不在 tasks 表中
+                    continue
+                task['history'] = history
+                tasks.append(task)
+            return tasks
 
     def delete_task(self, task_id: str) -> bool:
         """逻辑删除任务（仅标记为deleted，延迟写入数据库）"""
@@ -1693,8 +2421,10 @@ class DatabaseManager:
                     self._task_cache[task_id]['updated_at'] = datetime.now().isoformat()
                     self._task_cache[task_id]['sync_status'] = 'modified'
                     self._deleted_task_ids.add(task_id)
+                    self._reindex_task_state_locked(task_id)
                     self._dirty_task_ids.add(task_id)
                     self._cache_dirty = True
+                    self._bump_write_generation()
                 else:
                     logger.warning(f"任务 {task_id} 不存在于缓存，无法删除")
                     return False
@@ -2098,5 +2828,15 @@ def get_db_manager(sync_interval: int = 180, flush_interval: int = 5) -> Databas
                     break
         except Exception as e:
             logger.error(f"加载远程配置失败: {str(e)}")
-        _db_manager = DatabaseManager(remote_config=remote_config, sync_interval=sync_interval, flush_interval=flush_interval)
+        lock_profiling = None
+        try:
+            lock_profiling = (get_config_service().get_config().get('metrics') or {}).get('lock_profiling')
+        except Exception as e:
+            logger.error(f"读取锁竞争分析配置失败: {str(e)}")
+        _db_manager = DatabaseManager(
+            remote_config=remote_config,
+            sync_interval=sync_interval,
+            flush_interval=flush_interval,
+            lock_profiling=lock_profiling,
+        )
     return _db_manager
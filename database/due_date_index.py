@@ -0,0 +1,86 @@
+"""按到期日期分桶的任务索引
+
+只收录未完成且未删除、到期日期可解析的任务。日期列表保持有序，
+“已到期”和“N 天内到期”查询只遍历命中的日期桶，开销与结果数量成正比。
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from database.task_dates import normalize_task_date
+
+
+def parse_due_date(value: Any) -> Optional[date]:
+    """解析到期日期，兼容 YYYY-MM-DD、YYYY/MM/DD 及带时间的字符串；无法解析时返回 None"""
+    if isinstance(value, date):
+        return value
+    normalized = normalize_task_date(value)
+    return date.fromisoformat(normalized) if normalized else None
+
+
+class DueDateIndex:
+    """到期日期 -> 任务 ID 集合的有序分桶索引（调用方负责加锁）"""
+
+    def __init__(self):
+        self._buckets: Dict[date, Set[str]] = {}
+        self._sorted_dates: List[date] = []
+        self._task_dates: Dict[str, date] = {}
+
+    def __len__(self) -> int:
+        return len(self._task_dates)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._sorted_dates.clear()
+        self._task_dates.clear()
+
+    def update(self, task_id: str, due_value: Any) -> None:
+        """设置任务的到期日期；due_value 为空或无法解析时从索引移除"""
+        due = parse_due_date(due_value)
+        if self._task_dates.get(task_id) == due:
+            return
+        self.remove(task_id)
+        if due is None:
+            return
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            bucket = set()
+            self._buckets[due] = bucket
+            insort(self._sorted_dates, due)
+        bucket.add(task_id)
+        self._task_dates[task_id] = due
+
+    def remove(self, task_id: str) -> None:
+        due = self._task_dates.pop(task_id, None)
+        if due is None:
+            return
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            return
+        bucket.discard(task_id)
+        if not bucket:
+            del self._buckets[due]
+            position = bisect_left(self._sorted_dates, due)
+            if position < len(self._sorted_dates) and self._sorted_dates[position] == due:
+                self._sorted_dates.pop(position)
+
+    def get_due_date(self, task_id: str) -> Optional[date]:
+        return self._task_dates.get(task_id)
+
+    def ids_due_between(self, start: Optional[date], end: date) -> List[str]:
+        """返回到期日期落在 (start, end] 内的任务 ID；start 为 None 表示不设下界"""
+        low = 0 if start is None else bisect_right(self._sorted_dates, start)
+        high = bisect_right(self._sorted_dates, end)
+        result: List[str] = []
+        for due in self._sorted_dates[low:high]:
+            result.extend(self._buckets[due])
+        return result
+
+    def overdue_ids(self, today: date) -> List[str]:
+        """到期日期不晚于今天的任务（与看板一致：当天到期即视为到期）"""
+        return self.ids_due_between(None, today)
+
+    def due_within_ids(self, days: int, today: date) -> List[str]:
+        """今天之后 days 天内（含第 days 天）到期、尚未到期的任务"""
+        return self.ids_due_between(today, today + timedelta(days=max(0, int(days))))
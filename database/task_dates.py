@@ -0,0 +1,56 @@
+"""任务日期规范化
+
+due_date / create_date 是自由文本（'2025-10-01'、'2025/10/01 12:00:00' 等）。写入缓存和
+flush 时额外生成 ISO 日期列 due_date_iso / create_date_iso（YYYY-MM-DD，无法解析为 NULL），
+日期区间查询直接比较字符串并可走索引，读取端不必再逐行尝试多种格式。
+"""
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# 原始列 -> 规范化列
+TASK_DATE_COLUMNS: Dict[str, str] = {
+    'due_date': 'due_date_iso',
+    'create_date': 'create_date_iso',
+}
+
+# 日期部分分隔符需一致（- 或 /），可带时间（空格或 T 分隔）、小数秒与时区后缀
+_DATE_PATTERN = re.compile(
+    r'^(\d{4})([-/])(\d{1,2})\2(\d{1,2})'
+    r'(?:[ T](\d{1,2}):(\d{1,2})(?::(\d{1,2})(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?$'
+)
+
+
+def normalize_task_date(value: Any) -> Optional[str]:
+    """把任务日期转成 YYYY-MM-DD；空值、非文本或非法日期返回 None"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if not isinstance(value, str):
+        return None
+    return _normalize_text(value.strip())
+
+
+@lru_cache(maxsize=4096)
+def _normalize_text(text: str) -> Optional[str]:
+    match = _DATE_PATTERN.match(text)
+    if not match:
+        return None
+    year, _separator, month, day, hour, minute, second = match.groups()
+    try:
+        parsed = date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+    if hour is not None and (int(hour) > 23 or int(minute) > 59 or (second is not None and int(second) > 59)):
+        return None
+    return parsed.isoformat()
+
+
+def task_date_values(task: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """根据任务的原始日期字段计算全部规范化列"""
+    return {iso_column: normalize_task_date(task.get(column)) for column, iso_column in TASK_DATE_COLUMNS.items()}
@@ -1,21 +1,50 @@
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, abort, request
 from flask_cors import CORS
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import queue
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
 import os
 
+from core.metrics import PROMETHEUS_CONTENT_TYPE, get_metrics_registry
+from gantt.assets import CDN_URLS, IMMUTABLE_CACHE_CONTROL, VENDOR_URL_PREFIX, render_index_html, vendor_assets
+
+logger = logging.getLogger(__name__)
+
 DB_PATH = os.environ.get("DB_PATH", "./database/tasks.db")  # 改成你的 SQLite 文件路径
 
 gantt_app = Flask(__name__, static_url_path="", static_folder="static")
 CORS(gantt_app)
 
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# ETag 前缀：服务重启后 data_version 会从头计数，带上启动标识避免与浏览器旧缓存误匹配
+_BOOT_ID = f"{os.getpid():x}-{int(time.time()):x}"
+# 没有截止日期的任务默认持续天数
+DEFAULT_TASK_DAYS = 3
+# 小于该字节数的响应不压缩
+GZIP_MIN_BYTES = 512
+# /tasks/stream：共享轮询间隔、保活注释间隔、可补发的历史事件数、每个订阅者的积压上限
+SSE_POLL_INTERVAL = 1.0
+SSE_KEEPALIVE_SECONDS = 15.0
+SSE_HISTORY_SIZE = 256
+SSE_SUBSCRIBER_QUEUE_SIZE = 64
+SSE_RETRY_MS = 3000
+# /tasks?from=&to=&limit=&cursor=：默认与最大每页条数、缓存的窗口响应数
+WINDOW_PAGE_SIZE = 200
+WINDOW_MAX_PAGE_SIZE = 1000
+WINDOW_CACHE_SIZE = 32
 
+@lru_cache(maxsize=4096)
 def parse_date(s):
-    """把表里的日期字符串转成 YYYY-MM-DD。允许空值。"""
+    """把表里的日期字符串转成 YYYY-MM-DD。允许空值。同一取值只解析一次。"""
     if not s:
         return None
     # 你表里像 due_date/create_date 用 TEXT，可能是 '2025-10-01' 或 '2025/10/01 12:00:00'
@@ -27,66 +56,608 @@ def parse_date(s):
             pass
     return None
 
-@gantt_app.route("/tasks")
-def tasks():
+
+@lru_cache(maxsize=4096)
+def _default_end(start):
+    """没有截止日期时默认给 3 天周期"""
+    return (datetime.strptime(start, "%Y-%m-%d") + timedelta(days=DEFAULT_TASK_DAYS)).strftime("%Y-%m-%d")
+
+
+class _TasksPayload:
+    """序列化好的 /tasks 响应；gzip 版本首次请求时才压缩"""
+
+    def __init__(self, etag, tasks, body):
+        self.etag = etag
+        self.tasks = tasks
+        self.body = body
+        self._gzip_body = None
+
+    @property
+    def gzip_body(self):
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+
+class _ReadConnectionPool:
     """
-    把你 tasks 表的数据映射为 frappe-gantt 的任务结构：
-      id: str
-      name: str
-      start: 'YYYY-MM-DD'
-      end: 'YYYY-MM-DD'
-      progress: 0-100
-      (可选) custom_class / dependencies / etc.
-    这里约定：
-      start 取 create_date（没有则用今天）
-      end   取 due_date（没有则 start+3 天）
-      progress: completed==TRUE -> 100，否则 0
-      name 用 text 字段（为空则用 id）
-      deleted==FALSE 的才返回
+    /tasks 复用的只读（mode=ro）连接
+
+    PRAGMA data_version 只在同一连接内可比较，因此全部请求共用一个连接并由锁串行化；
+    数据库文件被替换（路径或 inode 变化）时重建连接，并让旧的 ETag 全部失效。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._identity = None
+        self._generation = 0
+        self._payload_key = None
+        self._payload = None
+        self._window_key = None
+        self._windows = OrderedDict()
+
+    @staticmethod
+    def _file_identity(db_path):
+        stat = os.stat(db_path)
+        return os.path.abspath(db_path), stat.st_dev, stat.st_ino
+
+    def _connection(self):
+        identity = self._file_identity(DB_PATH)
+        if self._conn is None or identity != self._identity:
+            self._close()
+            uri = f"{Path(identity[0]).as_uri()}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._identity = identity
+            self._generation += 1
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._identity = None
+        self._payload_key = None
+        self._payload = None
+        self._window_key = None
+        self._windows.clear()
+
+    def _state(self):
+        """返回 (连接, 数据状态键)；调用方持有 self._lock"""
+        try:
+            conn = self._connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            # 连接失效（文件被锁定或损坏后恢复等）时重连一次
+            logger.warning(f"甘特图只读连接失效，正在重连: {str(e)}")
+            self._close()
+            conn = self._connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return conn, (self._generation, data_version, datetime.today().strftime("%Y-%m-%d"))
+
+    @staticmethod
+    def _etag(key):
+        generation, data_version, today = key
+        return f"{_BOOT_ID}-{generation}-{data_version}-{today}"
+
+    def tasks_payload(self):
+        """数据未变化（data_version 相同且仍是同一天）时直接返回上次序列化的结果"""
+        with self._lock:
+            conn, key = self._state()
+            if key != self._payload_key:
+                results = _map_task_rows(_query_open_tasks(conn), key[2])
+                body = gantt_app.json.dumps(results, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                self._payload = _TasksPayload(self._etag(key), results, body)
+                self._payload_key = key
+            return self._payload
+
+    def window_payload(self, window):
+        """
+        一页时间窗口内的任务；数据未变化时同一窗口直接复用序列化结果
+
+        响应体为 {tasks, next_cursor}，ETag 在数据状态之外再区分窗口参数。
+        """
+        with self._lock:
+            conn, key = self._state()
+            if key != self._window_key:
+                self._windows.clear()
+                self._window_key = key
+            payload = self._windows.get(window)
+            if payload is not None:
+                self._windows.move_to_end(window)
+                return payload
+
+            rows, next_after = _query_task_window(conn, window, key[2])
+            results = [task for task in _map_task_rows(rows, key[2]) if _overlaps_window(task, window)]
+            body = gantt_app.json.dumps(
+                {"tasks": results, "next_cursor": _encode_cursor(next_after)},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode("utf-8")
+            window_digest = hashlib.sha1(repr(tuple(window)).encode("utf-8")).hexdigest()[:10]
+            payload = _TasksPayload(f"{self._etag(key)}-w{window_digest}", results, body)
+            self._windows[window] = payload
+            if len(self._windows) > WINDOW_CACHE_SIZE:
+                self._windows.popitem(last=False)
+            return payload
+
+    def invalidate(self):
+        """丢弃已序列化的响应，下次请求重新查询"""
+        with self._lock:
+            self._payload_key = None
+            self._payload = None
+            self._window_key = None
+            self._windows.clear()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+_read_pool = _ReadConnectionPool()
+
+
+def close_read_connection():
+    """关闭 /tasks 复用的只读连接（测试清理或服务停止时调用）"""
+    _read_pool.close()
+
+
+class _Subscriber:
+    """一个 /tasks/stream 连接：事件队列满时标记为需要重新发送快照"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SSE_SUBSCRIBER_QUEUE_SIZE)
+        self.resync = False
+        self.closed = False
+
+
+class _ChangeFeed:
     """
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT id, text, notes, create_date, due_date, completed, deleted, color
+    /tasks/stream 的共享轮询器
+
+    只有一个后台线程按 SSE_POLL_INTERVAL 检查 data_version（经 _read_pool，数据未变化时不查询），
+    有变化时与上次广播的任务列表比较，得到新增/修改（upserts）与移除（deletes），
+    以递增的 seq 广播给全部订阅者；打开多少个页面都只轮询一次数据库。
+    SSE 事件 ID 为 `启动标识:seq`，服务重启后浏览器带来的旧 ID 不会被误认为可补发。
+    没有订阅者时轮询线程退出，下一个订阅者到来时再启动。
+    """
+
+    def __init__(self, pool, interval=SSE_POLL_INTERVAL):
+        self._pool = pool
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self._payload = None
+        self._tasks = {}
+        self._order = []
+        self._seq = 0
+        self._history = deque(maxlen=SSE_HISTORY_SIZE)
+
+    def _set_baseline(self, payload):
+        # 调用方持有 self._lock
+        self._payload = payload
+        self._tasks = {task["id"]: task for task in payload.tasks}
+        self._order = list(self._tasks)
+
+    def _snapshot_event(self):
+        return {"event": "snapshot", "seq": self._seq, "tasks": [self._tasks[task_id] for task_id in self._order]}
+
+    def subscribe(self, last_event_id=None):
+        """
+        注册订阅者，返回 (订阅者, 首批事件)
+
+        Last-Event-ID 仍在历史范围内时只补发其后的变更，否则先发一份完整快照
+        """
+        subscriber = _Subscriber()
+        with self._lock:
+            if self._payload is None:
+                self._set_baseline(self._pool.tasks_payload())
+            last_seq = _parse_event_id(last_event_id)
+            oldest_seq = self._history[0]["seq"] if self._history else self._seq + 1
+            if last_seq is not None and oldest_seq - 1 <= last_seq <= self._seq:
+                initial = [event for event in self._history if event["seq"] > last_seq]
+            else:
+                initial = [self._snapshot_event()]
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name="GanttChangeFeed", daemon=True)
+                self._thread.start()
+        return subscriber, initial
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def resync(self, subscriber):
+        """积压溢出后丢弃未发送的事件，改为一份当前快照"""
+        with self._lock:
+            while True:
+                try:
+                    subscriber.queue.get_nowait()
+                except queue.Empty:
+                    break
+            subscriber.resync = False
+            return self._snapshot_event()
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            with self._lock:
+                if not self._subscribers:
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"甘特图变更轮询失败: {str(e)}")
+
+    def poll(self):
+        """检查一次数据变化并广播，返回广播的事件（无变化时为 None）"""
+        payload = self._pool.tasks_payload()
+        with self._lock:
+            if self._payload is None:
+                self._set_baseline(payload)
+                return None
+            if payload is self._payload:
+                return None
+            previous_tasks, previous_order = self._tasks, self._order
+            self._set_baseline(payload)
+            upserts = [task for task_id, task in self._tasks.items() if previous_tasks.get(task_id) != task]
+            deletes = [task_id for task_id in previous_order if task_id not in self._tasks]
+            order_changed = self._order != previous_order
+            if not upserts and not deletes and not order_changed:
+                return None
+            self._seq += 1
+            event = {"event": "changes", "seq": self._seq, "upserts": upserts, "deletes": deletes}
+            if order_changed:
+                # 顺序变化（新增、移除或日期变化）时附带完整顺序
+                event["order"] = self._order
+            self._history.append(event)
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.queue.put_nowait(event)
+                except queue.Full:
+                    subscriber.resync = True
+            return event
+
+    def close(self):
+        """停止轮询线程并结束所有订阅（测试清理或服务停止时调用）"""
+        with self._lock:
+            self._stop.set()
+            thread = self._thread
+            self._thread = None
+            for subscriber in self._subscribers:
+                subscriber.closed = True
+                try:
+                    subscriber.queue.put_nowait(None)
+                except queue.Full:
+                    pass
+            self._subscribers.clear()
+            self._payload = None
+            self._tasks = {}
+            self._order = []
+            self._history.clear()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+
+_change_feed = _ChangeFeed(_read_pool)
+
+
+def close_change_feed():
+    """停止 /tasks/stream 的共享轮询"""
+    _change_feed.close()
+
+
+def _parse_event_id(event_id):
+    """`启动标识:seq` -> seq；不是本次启动发出的 ID 返回 None"""
+    boot_id, _, seq = (event_id or "").rpartition(":")
+    if boot_id != _BOOT_ID:
+        return None
+    try:
+        return int(seq)
+    except ValueError:
+        return None
+
+
+def _format_sse(event, include_snapshot_tasks=True):
+    omitted = ("event",) if include_snapshot_tasks else ("event", "tasks")
+    data = json.dumps({key: value for key, value in event.items() if key not in omitted}, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {_BOOT_ID}:{event['seq']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+# 已删除、已完成的任务都在 SQL 中过滤
+_OPEN_TASK_CONDITION = "COALESCE(deleted, 0) = 0 AND COALESCE(completed, 0) NOT IN (1, '1', 'true', 'TRUE')"
+
+# 一次 /tasks 窗口请求：起止日期（含边界，可为 None）、上一页最后一行的 (排序键, id)、每页条数
+_TaskWindow = namedtuple("_TaskWindow", "start end after limit")
+
+
+def _task_date_sql(conn):
+    """返回 (日期列 SQL, 排序键 SQL, 是否有规范化 ISO 日期列)"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if "due_date_iso" in columns and "create_date_iso" in columns:
+        # 桌面端 schema 版本 2 起有规范化 ISO 日期列，解析与排序都不再依赖原始文本格式
+        date_sql = "COALESCE(create_date_iso, create_date) AS create_date, COALESCE(due_date_iso, due_date) AS due_date"
+        return date_sql, "COALESCE(due_date_iso, create_date_iso)", True
+    # 旧表可能混有非文本值，转成 TEXT 保证键集分页的比较与游标编码一致
+    return "create_date, due_date", "CAST(COALESCE(due_date, create_date) AS TEXT)", False
+
+
+def _query_open_tasks(conn):
+    date_sql, sort_sql, _has_iso = _task_date_sql(conn)
+    return conn.execute(f"""
+        SELECT id, text, notes, {date_sql}, color
         FROM tasks
-        WHERE COALESCE(deleted, 0) = 0
-        ORDER BY COALESCE(due_date, create_date)
-    """)
-    rows = cur.fetchall()
-    conn.close()
+        WHERE {_OPEN_TASK_CONDITION}
+        ORDER BY {sort_sql}, id
+    """).fetchall()
+
+
+def _query_task_window(conn, window, today):
+    """
+    按 (排序键, id) 键集分页查询与窗口相交的未完成任务，返回 (行, 下一页的 after)
+
+    有 ISO 日期列时按映射规则在 SQL 中判断相交并走日期索引：结束日取 due_date_iso，为空时
+    是开始日 + DEFAULT_TASK_DAYS；开始日取 create_date_iso，为空时是今天。没有 ISO 列的旧表
+    只能在映射后由 _overlaps_window 过滤，一页可能少于 limit 条。
+    """
+    date_sql, sort_sql, has_iso = _task_date_sql(conn)
+    conditions, params = [_OPEN_TASK_CONDITION], []
+    if has_iso and window.start:
+        # 无到期日的任务结束于开始日 + N 天，因此开始日不早于 from - N 天即相交
+        earliest_start = (date.fromisoformat(window.start) - timedelta(days=DEFAULT_TASK_DAYS)).isoformat()
+        undated_start = "create_date_iso >= ?" if today < earliest_start else "(create_date_iso IS NULL OR create_date_iso >= ?)"
+        conditions.append(f"(due_date_iso >= ? OR (due_date_iso IS NULL AND {undated_start}))")
+        params.extend([window.start, earliest_start])
+    if has_iso and window.end:
+        conditions.append("create_date_iso <= ?" if today > window.end else "(create_date_iso IS NULL OR create_date_iso <= ?)")
+        params.append(window.end)
+    if window.after is not None:
+        sort_key, task_id = window.after
+        if sort_key is None:
+            # NULL 排在最前：同为 NULL 时比较 id，非 NULL 的都在其后
+            conditions.append(f"({sort_sql} IS NOT NULL OR id > ?)")
+            params.append(task_id)
+        else:
+            conditions.append(f"({sort_sql} > ? OR ({sort_sql} = ? AND id > ?))")
+            params.extend([sort_key, sort_key, task_id])
+    rows = conn.execute(
+        f"""
+        SELECT id, text, notes, {date_sql}, color, {sort_sql} AS sort_key
+        FROM tasks
+        WHERE {" AND ".join(conditions)}
+        ORDER BY sort_key, id
+        LIMIT ?
+        """,
+        (*params, window.limit + 1),
+    ).fetchall()
+    if len(rows) <= window.limit:
+        return rows, None
+    rows = rows[:window.limit]
+    return rows, (rows[-1]["sort_key"], rows[-1]["id"])
+
+
+def _overlaps_window(task, window):
+    return (window.start is None or task["end"] >= window.start) and (window.end is None or task["start"] <= window.end)
 
-    today = datetime.today().strftime("%Y-%m-%d")
+
+def _encode_cursor(after):
+    if after is None:
+        return None
+    raw = json.dumps(list(after), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key, task_id = json.loads(raw.decode("utf-8"))
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(f"无效的 cursor: {cursor}") from e
+    if not isinstance(task_id, str) or not (sort_key is None or isinstance(sort_key, str)):
+        raise ValueError(f"无效的 cursor: {cursor}")
+    return sort_key, task_id
+
+
+def _parse_task_window(args):
+    """解析 from/to/limit/cursor 查询参数；都没有时返回 None（返回全部任务），非法时抛 ValueError"""
+    if not any(name in args for name in ("from", "to", "limit", "cursor")):
+        return None
+    bounds = []
+    for name in ("from", "to"):
+        raw = args.get(name) or None
+        value = parse_date(raw) if raw else None
+        if raw and value is None:
+            raise ValueError(f"无法解析的日期 {name}={raw}")
+        bounds.append(value)
+    start, end = bounds
+    if start and end and start > end:
+        raise ValueError("from 不能晚于 to")
+    try:
+        limit = int(args.get("limit") or WINDOW_PAGE_SIZE)
+    except ValueError:
+        raise ValueError(f"无效的 limit: {args.get('limit')}") from None
+    if not 1 <= limit <= WINDOW_MAX_PAGE_SIZE:
+        raise ValueError(f"limit 需在 1 到 {WINDOW_MAX_PAGE_SIZE} 之间")
+    cursor = args.get("cursor")
+    return _TaskWindow(start, end, _decode_cursor(cursor) if cursor else None, limit)
+
+
+def _map_task_rows(rows, today):
     results = []
     for r in rows:
-        if r["completed"] in (1, True, "1", "true", "TRUE") :
-            continue
         start = parse_date(r["create_date"]) or today
-        end = parse_date(r["due_date"])
-        if not end:
-            # 默认给 3 天周期
-            end = (datetime.strptime(start, "%Y-%m-%d") + timedelta(days=3)).strftime("%Y-%m-%d")
+        end = parse_date(r["due_date"]) or _default_end(start)
         name = r["text"] if r["text"] else r["id"]
-        progress = 100 if (r["completed"] in (1, True, "1", "true", "TRUE")) else 0
 
         task = {
             "id": r["id"],
             "name": name,
             "start": start,
             "end": end,
-            "progress": progress,
+            # 已完成任务已在 SQL 中排除
+            "progress": 0,
             "custom_class": "",
             "notes": r["notes"] or "",
             "color": r["color"] or "#4ECDC4",
         }
         results.append(task)
+    return results
+
+
+@gantt_app.route("/tasks")
+def tasks():
+    """
+    把你 tasks 表的数据映射为 frappe-gantt 的任务结构：
+      id: str
+      name: str
+      start: 'YYYY-MM-DD'
+      end: 'YYYY-MM-DD'
+      progress: 0-100
+      (可选) custom_class / dependencies / etc.
+    这里约定：
+      start 取 create_date（没有则用今天）
+      end   取 due_date（没有则 start+3 天）
+      progress: 只返回未完成任务，恒为 0
+      name 用 text 字段（为空则用 id）
+      deleted==FALSE 且 completed==FALSE 的才返回
+    响应带 ETag（基于 PRAGMA data_version），If-None-Match 命中时返回 304；
+    客户端接受 gzip 时返回压缩后的内容。
+
+    带 from / to（YYYY-MM-DD，含边界）、limit、cursor 任一参数时只返回与窗口相交的一页：
+    {"tasks": [...], "next_cursor": "..." | null}，next_cursor 原样带回即可取下一页。
+    """
+    try:
+        window = _parse_task_window(request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    payload = _read_pool.tasks_payload() if window is None else _read_pool.window_payload(window)
+    use_gzip = len(payload.body) >= GZIP_MIN_BYTES and request.accept_encodings["gzip"] > 0
+    # 压缩与未压缩是不同的表示，使用不同的 ETag
+    etag = f"{payload.etag}-gz" if use_gzip else payload.etag
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload.gzip_body if use_gzip else payload.body, mimetype="application/json")
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(etag)
+    # 允许浏览器缓存，但每次都要带 If-None-Match 重新验证
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+@gantt_app.route("/tasks/stream")
+def tasks_stream():
+    """
+    Server-Sent Events 变更流
+
+    连接后先发 snapshot（或按 Last-Event-ID 补发错过的 changes），之后每次数据变化推送
+    changes 事件：{seq, upserts: [任务], deletes: [任务ID], order?: [任务ID]}。
+    upserts 的任务结构与 /tasks 相同；已完成或删除的任务出现在 deletes 中。
+    带 ?window=1 时 snapshot 只含 seq：按时间窗口分页加载的页面收到后自行重新请求已加载的窗口。
+    """
+    subscriber, initial = _change_feed.subscribe(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
+
+    snapshot_tasks = request.args.get("window") != "1"
+
+    def generate():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            for event in initial:
+                yield _format_sse(event, snapshot_tasks)
+            while not subscriber.closed:
+                if subscriber.resync:
+                    yield _format_sse(_change_feed.resync(subscriber), snapshot_tasks)
+                try:
+                    event = subscriber.queue.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield _format_sse(event, snapshot_tasks)
+        finally:
+            _change_feed.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # 反向代理（如 nginx）不缓冲事件流
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _asset_response(asset, cache_control):
+    """按 Accept-Encoding 返回预压缩或原始内容，If-None-Match 命中时返回 304"""
+    use_gzip = len(asset.body) >= GZIP_MIN_BYTES and request.accept_encodings["gzip"] > 0
+    etag = f"{asset.digest}-gz" if use_gzip else asset.digest
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(asset.gzip_body if use_gzip else asset.body, mimetype=asset.mimetype)
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@lru_cache(maxsize=1)
+def _index_page():
+    """渲染一次 index.html：frappe-gantt 指向本地带哈希的地址，本地文件缺失时回退 CDN"""
+    try:
+        asset_urls = {name: f"{VENDOR_URL_PREFIX}{asset.name}" for name, asset in vendor_assets().items()}
+    except Exception as e:
+        logger.error(f"读取 frappe-gantt 静态资源失败，回退到 CDN: {str(e)}")
+        asset_urls = CDN_URLS
+    return render_index_html(asset_urls)
+
+
+@gantt_app.route("/vendor/<name>")
+def vendor_asset(name):
+    """
+    随仓库提交的 frappe-gantt 脚本/样式
+
+    带内容哈希的文件名内容永不变化，返回一年的 immutable 缓存；不带哈希的逻辑名
+    （如 frappe-gantt.js）每次都要重新验证。
+    """
+    try:
+        assets = vendor_assets()
+    except Exception as e:
+        logger.error(f"读取 frappe-gantt 静态资源失败: {str(e)}")
+        abort(404)
+    if name in assets:
+        return _asset_response(assets[name], "no-cache")
+    for asset in assets.values():
+        if asset.name == name:
+            return _asset_response(asset, IMMUTABLE_CACHE_CONTROL)
+    abort(404)
+
+
+@gantt_app.route("/metrics")
+def metrics():
+    """进程内性能指标（数据库 flush/查询、同步请求、定时任务生成等），Prometheus 文本格式"""
+    response = Response(get_metrics_registry().render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
-    return jsonify(results)
 
 @gantt_app.route("/")
 def index():
-    return send_from_directory("static", "index.html")
+    # 页面本身需要重新验证，资源哈希变化后才能拿到新地址
+    return _asset_response(_index_page(), "no-cache")
 
 if __name__ == "__main__":
-    # 运行：  DB_PATH=/path/to/your.db  python app.py
+    # 运行（仓库根目录）：  DB_PATH=/path/to/your.db  python -m gantt.app
     # debug 模式会暴露 Werkzeug 调试器（可执行任意代码），默认关闭
     gantt_app.run(host="127.0.0.1", port=5000, debug=False)
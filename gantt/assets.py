@@ -0,0 +1,75 @@
+"""甘特图前端静态资源
+
+frappe-gantt 的预构建脚本与样式随仓库提交在 gantt/static/vendor/（版本见 package.json，
+更新方式见 `npm run vendor:gantt`）。这里只负责读取这两个固定文件，按内容哈希命名并预先
+gzip，供 /vendor/<name> 以 immutable 长缓存返回；index.html 中的逻辑地址渲染时替换为带哈希的地址。
+"""
+
+import gzip
+import hashlib
+import posixpath
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+VENDOR_DIR = STATIC_DIR / "vendor"
+INDEX_HTML_PATH = STATIC_DIR / "index.html"
+
+# index.html 中引用的逻辑地址 -> 资源名
+VENDOR_URL_PREFIX = "/vendor/"
+FRAPPE_GANTT_JS = "frappe-gantt.js"
+FRAPPE_GANTT_CSS = "frappe-gantt.css"
+# 逻辑名 -> (vendor 目录下的文件, MIME 类型)
+VENDOR_FILES = {
+    FRAPPE_GANTT_JS: ("frappe-gantt.umd.js", "application/javascript"),
+    FRAPPE_GANTT_CSS: ("frappe-gantt.css", "text/css"),
+}
+# 本地文件缺失时回退的 CDN 地址（与改造前一致）
+CDN_URLS = {
+    FRAPPE_GANTT_JS: "https://cdn.jsdelivr.net/npm/frappe-gantt/dist/frappe-gantt.umd.js",
+    FRAPPE_GANTT_CSS: "https://cdn.jsdelivr.net/npm/frappe-gantt/dist/frappe-gantt.css",
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+HASH_LENGTH = 12
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    """静态资源：带内容哈希的文件名、原文与预压缩内容"""
+
+    name: str
+    mimetype: str
+    body: bytes
+    digest: str
+    gzip_body: bytes = field(repr=False)
+
+    @classmethod
+    def build(cls, logical_name: str, mimetype: str, body: bytes) -> "StaticAsset":
+        digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+        stem, suffix = posixpath.splitext(logical_name)
+        # mtime=0 保证同样的内容得到同样的压缩结果
+        return cls(f"{stem}.{digest}{suffix}", mimetype, body, digest, gzip.compress(body, 9, mtime=0))
+
+
+def load_vendor_assets(vendor_dir: Path = VENDOR_DIR) -> Dict[str, StaticAsset]:
+    """读取预构建的 frappe-gantt 文件，返回 逻辑名 -> StaticAsset"""
+    return {
+        logical_name: StaticAsset.build(logical_name, mimetype, (vendor_dir / filename).read_bytes())
+        for logical_name, (filename, mimetype) in VENDOR_FILES.items()
+    }
+
+
+@lru_cache(maxsize=1)
+def vendor_assets() -> Dict[str, StaticAsset]:
+    """首次请求时读取并压缩一次，之后复用（逻辑名 -> StaticAsset）"""
+    return load_vendor_assets()
+
+
+def render_index_html(asset_urls: Dict[str, str], html_path: Path = INDEX_HTML_PATH) -> StaticAsset:
+    """把 index.html 中的 /vendor/<逻辑名> 替换为实际地址"""
+    html = html_path.read_text(encoding="utf-8")
+    for logical_name, url in asset_urls.items():
+        html = html.replace(f'"{VENDOR_URL_PREFIX}{logical_name}"', f'"{url}"')
+    return StaticAsset.build("index.html", "text/html", html.encode("utf-8"))
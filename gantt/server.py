@@ -0,0 +1,71 @@
+"""甘特图服务的进程内托管
+
+用 Werkzeug 的多线程 WSGI 服务器运行 gantt_app：默认绑定 127.0.0.1 的临时端口（端口 0，
+由系统分配），绑定完成即可拿到 URL；serve_forever 在调用方提供的线程里运行，shutdown
+停止接收请求并结束 SSE 变更流、关闭复用的只读连接。桌面端的 Qt 封装见 core/gantt_service.py。
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from werkzeug.serving import make_server
+
+from gantt import app as gantt_module
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+
+
+class GanttServer:
+    """
+    托管的甘特图 HTTP 服务
+
+    构造时立即绑定端口（port=0 表示临时端口），之后在后台线程里调用 serve_forever()；
+    shutdown() 可在任意线程调用，未开始服务时只关闭监听 socket。
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = 0, db_path: Optional[str] = None):
+        if db_path:
+            # DB_PATH 在 gantt.app 导入时读取环境变量，这里直接改模块属性，读连接按新路径重建
+            gantt_module.DB_PATH = db_path
+        self._server = make_server(host, port, gantt_module.gantt_app, threaded=True)
+        self._lock = threading.Lock()
+        self._serving = False
+        self._closed = False
+        self.host = host
+        self.port = self._server.server_port
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def serve_forever(self) -> None:
+        """阻塞处理请求直到 shutdown()；应在独立线程中调用"""
+        with self._lock:
+            if self._closed:
+                return
+            self._serving = True
+        logger.info(f"甘特图服务已启动: {self.url}")
+        try:
+            self._server.serve_forever(poll_interval=0.2)
+        finally:
+            self._server.server_close()
+            logger.info("甘特图服务已停止")
+
+    def shutdown(self) -> None:
+        """停止服务并释放资源，可重复调用"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            serving = self._serving
+        if serving:
+            # 等待 serve_forever 的循环退出（最多一个 poll_interval）
+            self._server.shutdown()
+        else:
+            self._server.server_close()
+        # 结束仍连着的 /tasks/stream，再关闭共享的只读连接
+        gantt_module.close_change_feed()
+        gantt_module.close_read_connection()
@@ -1,18 +1,33 @@
+# 启动时间线的起点，必须最先导入
+from core.startup_timeline import finish_startup, mark_startup
 import sys
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QEvent, QObject, QTimer
 import os
 from datetime import datetime, time
 
-from config.config_manager import load_config
+from config.config_manager import load_config, watch_config_file
 from core.quadrant_widget import QuadrantWidget
 from ui.scrollbar import install_global_fluent_scrollbars
 from ui.ui import UIManager
 from core.utils import init_logging
 from core.scheduler import TaskScheduler
+from core.metrics import start_metrics_log_reporter
 from ui.notifications import show_error
 import logging
 logger = logging.getLogger(__name__)  # 自动获取模块名
+mark_startup('imports')
+
+
+class FirstPaintWatcher(QObject):
+    """监听主窗口的第一次绘制，结束启动时间线后自行移除"""
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            finish_startup('first_paint')
+        return False
+
 
 class TaskManagerApp:
     """任务管理应用主类"""
@@ -23,6 +38,8 @@ class TaskManagerApp:
         self.config = None
         self.refresh_timer = None
         self.task_scheduler = None
+        self.metrics_reporter = None
+        self.first_paint_watcher = None
         # 最近一次已满足的刷新时间点（datetime）；用时间点而非日期，
         # 这样当天把刷新时间改晚后，新时间点仍会触发
         self.last_refresh_target = None
@@ -33,15 +50,22 @@ class TaskManagerApp:
             logger.info("程序启动中...")
             self.app = QApplication(sys.argv)
             logger.info("QApplication初始化完成")
+            mark_startup('qapplication')
             install_global_fluent_scrollbars(self.app)
 
-            # 加载配置
+            # 加载配置，并监听配置文件的外部修改
+            watch_config_file()
             self.config = load_config()
             logger.info("配置加载完毕")
+            mark_startup('config_loaded')
+
+            # 可选：按 metrics.log_summary_interval 定期把性能指标摘要写入日志
+            self.metrics_reporter = start_metrics_log_reporter(self.config)
 
             # 创建主窗口
             self.main_window = QuadrantWidget(self.config, ui_manager=self.ui_manager)
             logger.info("四象限窗口创建完毕")
+            mark_startup('main_window_created')
             
             # 注册主窗口到UI管理器
             self.ui_manager.register_widget("main_window", self.main_window, "visible")
@@ -66,10 +90,12 @@ class TaskManagerApp:
             # 加载任务
             self.main_window.load_tasks()
             logger.info("任务加载完毕")
+            mark_startup('tasks_loaded')
             
             # 初始化任务调度器
             self.task_scheduler = TaskScheduler()
             logger.info("任务调度器初始化完成")
+            mark_startup('scheduler_ready')
             
             # 启动定时刷新定时器
             self.setup_auto_refresh()
@@ -87,6 +113,8 @@ class TaskManagerApp:
     def show_main_window(self):
         """显示主窗口"""
         if self.main_window:
+            self.first_paint_watcher = FirstPaintWatcher(self.main_window)
+            self.main_window.installEventFilter(self.first_paint_watcher)
             # 使用UI管理器的淡入效果
             self.ui_manager.fade_in_widget("main_window", duration=300)
     
@@ -185,6 +213,7 @@ class TaskManagerApp:
             # 显示主窗口
             self.show_main_window()
             logger.info("窗口显示完成，进入事件循环")
+            mark_startup('event_loop')
             
             # 运行应用
             return self.app.exec()
@@ -197,6 +226,8 @@ class TaskManagerApp:
             # 清理资源
             if self.refresh_timer:
                 self.refresh_timer.stop()
+            if self.metrics_reporter:
+                self.metrics_reporter.stop()
             if self.ui_manager:
                 self.ui_manager.cleanup()
 
@@ -28,15 +28,15 @@ from core.archive_table import ArchiveTableDialog
 from core.complete_table import CompleteTableDialog
 from core.deleted_table import DeletedTableDialog
 from core.quadrant_widget import QuadrantWidget
-from ui.adaptive_table import AdaptiveTextTableWidget
+from ui.paged_table import PagedTableView
 
 
 class FakeArchiveDbManager:
     def __init__(self, tasks):
         self.tasks = list(tasks)
         self.page_calls = []
-        self.id_calls = []
         self.restore_calls = []
+        self.restore_matching_calls = []
         self.flush_calls = 0
 
     def _filtered(self, search_query=""):
@@ -56,16 +56,22 @@ class FakeArchiveDbManager:
     def count_deleted_tasks(self, search_query=""):
         return len(self._filtered(search_query))
 
-    def load_deleted_task_ids(self, search_query=""):
-        self.id_calls.append(search_query)
-        return [task["id"] for task in self._filtered(search_query)]
-
     def restore_deleted_task(self, task_id):
         self.restore_calls.append(task_id)
         before = len(self.tasks)
         self.tasks = [task for task in self.tasks if task["id"] != task_id]
         return len(self.tasks) < before
 
+    def restore_deleted_tasks_matching(self, search_query="", excluded_ids=None):
+        self.restore_matching_calls.append((search_query, set(excluded_ids or ())))
+        matching = {
+            task["id"]
+            for task in self._filtered(search_query)
+            if task["id"] not in (excluded_ids or ())
+        }
+        self.tasks = [task for task in self.tasks if task["id"] not in matching]
+        return len(matching)
+
     def flush_cache_to_db(self):
         self.flush_calls += 1
 
@@ -109,14 +115,15 @@ class ArchiveTaskPanelTests(unittest.TestCase):
 
         with patch("core.deleted_table.get_db_manager", return_value=fake_db):
             dialog = DeletedTableDialog()
+            dialog.data_executor.wait_for_idle()
 
         self.assertEqual(dialog.windowTitle(), "已删除事项")
         self.assertEqual(
             dialog.search_input.placeholderText(),
             "搜索已删除事项标题，多个关键字用空格分隔",
         )
-        self.assertEqual(dialog.table.horizontalHeaderItem(2).text(), "删除日期")
-        self.assertEqual(dialog.table.item(0, 1).text(), "暂无已删除事项")
+        self.assertEqual(dialog.table.model().headerData(2, Qt.Orientation.Horizontal), "删除日期")
+        self.assertEqual(dialog.table.cell_text(0, 1), "暂无已删除事项")
         self.assertEqual(dialog.restore_button.text(), "还原选中事项")
 
     def test_deleted_dialog_load_more_reuses_table_and_selects_unloaded_matches(self):
@@ -130,22 +137,29 @@ class ArchiveTaskPanelTests(unittest.TestCase):
 
         with patch("core.deleted_table.get_db_manager", return_value=fake_db):
             dialog = DeletedTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 2
             dialog._load_archive_tasks()
+            dialog.data_executor.wait_for_idle()
             first_table = dialog.table
 
             dialog.select_all_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
             dialog.load_more_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
+        self.assertTrue(dialog.selection.all_matching)
         self.assertIs(dialog.table, first_table)
         self.assertEqual(
-            len(dialog.panel.findChildren(AdaptiveTextTableWidget)),
+            len(dialog.panel.findChildren(PagedTableView)),
             1,
         )
-        self.assertEqual(dialog.selected_tasks, {"task-1", "task-2", "task-3"})
-        self.assertTrue(dialog.table.cellWidget(2, 0).isChecked())
+        self.assertEqual(dialog.selection.count(), 3)
+        with self.assertRaises(ValueError, msg="全选只记录筛选条件，不应物化全部匹配 ID"):
+            dialog.selected_tasks
+        self.assertTrue(dialog.table.model().is_row_checked(2))
 
     def test_deleted_dialog_restores_each_selected_task_flushes_once_and_refreshes_parent(self):
         fake_db = FakeArchiveDbManager(
@@ -165,8 +179,10 @@ class ArchiveTaskPanelTests(unittest.TestCase):
              ), \
              patch("core.archive_table.show_success") as success_mock:
             dialog = DeletedTableDialog(parent)
+            dialog.data_executor.wait_for_idle()
             dialog.selected_tasks = {"task-1", "task-2", "missing"}
             dialog.restore_selected_tasks()
+            dialog.data_executor.wait_for_idle()
 
         self.assertCountEqual(
             fake_db.restore_calls,
@@ -180,7 +196,108 @@ class ArchiveTaskPanelTests(unittest.TestCase):
             "成功还原 2 个已删除事项",
         )
         self.assertEqual(dialog.selected_tasks, set())
-        self.assertEqual(dialog.table.item(0, 1).text(), "暂无已删除事项")
+        self.assertEqual(dialog.table.cell_text(0, 1), "暂无已删除事项")
+
+    def test_deleted_dialog_restores_all_matching_in_one_predicate_call(self):
+        fake_db = FakeArchiveDbManager(
+            [
+                {"id": "task-1", "text": "报告一", "updated_at": "2026-06-09", "notes": ""},
+                {"id": "task-2", "text": "报告二", "updated_at": "2026-06-08", "notes": ""},
+                {"id": "task-3", "text": "报告三", "updated_at": "2026-06-07", "notes": ""},
+                {"id": "task-4", "text": "会议", "updated_at": "2026-06-06", "notes": ""},
+            ]
+        )
+
+        with patch("core.deleted_table.get_db_manager", return_value=fake_db), \
+             patch(
+                 "core.archive_table.ArchiveRestoreConfirmDialog.exec",
+                 return_value=QDialog.DialogCode.Accepted,
+             ), \
+             patch("core.archive_table.show_success") as success_mock:
+            dialog = DeletedTableDialog()
+            dialog.data_executor.wait_for_idle()
+            dialog.page_size = 1
+            dialog.search_input.setText("报告")
+            dialog._load_archive_tasks()
+            dialog.data_executor.wait_for_idle()
+            dialog.toggle_select_all()
+            dialog.data_executor.wait_for_idle()
+            dialog.table_model.setData(
+                dialog.table_model.index(0, 0),
+                Qt.CheckState.Unchecked,
+                Qt.ItemDataRole.CheckStateRole,
+            )
+            self.assertEqual(dialog.select_all_button.text(), "全选 (2/3)")
+            dialog.restore_selected_tasks()
+            dialog.data_executor.wait_for_idle()
+
+        self.assertEqual(fake_db.restore_matching_calls, [("报告", {"task-1"})])
+        self.assertEqual(fake_db.restore_calls, [], "全选还原不应逐个 ID 调用")
+        self.assertEqual([task["id"] for task in fake_db.tasks], ["task-1", "task-4"])
+        success_mock.assert_called_once_with(dialog, "还原成功", "成功还原 2 个已删除事项")
+
+    def test_deleted_dialog_search_edit_invalidates_all_matching_selection(self):
+        fake_db = FakeArchiveDbManager(
+            [
+                {"id": "task-1", "text": "报告一", "updated_at": "2026-06-09", "notes": ""},
+                {"id": "task-2", "text": "报告二", "updated_at": "2026-06-08", "notes": ""},
+                {"id": "task-3", "text": "会议", "updated_at": "2026-06-07", "notes": ""},
+            ]
+        )
+
+        with patch("core.deleted_table.get_db_manager", return_value=fake_db), \
+             patch(
+                 "core.archive_table.ArchiveRestoreConfirmDialog.exec",
+                 return_value=QDialog.DialogCode.Accepted,
+             ), \
+             patch("core.archive_table.show_success"):
+            dialog = DeletedTableDialog()
+            dialog.data_executor.wait_for_idle()
+            dialog.search_input.setText("报告")
+            dialog._load_archive_tasks()
+            dialog.data_executor.wait_for_idle()
+            dialog.toggle_select_all()
+
+            dialog.search_input.setText("会议")
+            dialog.search_debounce_timer.stop()
+            self.assertTrue(dialog.selection.is_empty(), "搜索词变化后立即作废旧的全选")
+            self.assertFalse(dialog.restore_button.isEnabled())
+
+            # 新结果返回前再次全选，仍作用于界面上显示的“报告”结果，而不是尚未查询的新搜索词
+            dialog.toggle_select_all()
+            self.assertEqual(dialog.selection.filter_key, "报告")
+            dialog.restore_selected_tasks()
+            dialog.data_executor.wait_for_idle()
+
+        self.assertEqual(fake_db.restore_matching_calls, [("报告", set())])
+        self.assertEqual([task["id"] for task in fake_db.tasks], ["task-3"])
+
+    def test_deleted_dialog_reload_keeps_explicit_ids_and_drops_stale_all_matching(self):
+        fake_db = FakeArchiveDbManager(
+            [
+                {"id": "task-1", "text": "报告一", "updated_at": "2026-06-09", "notes": ""},
+                {"id": "task-2", "text": "会议", "updated_at": "2026-06-08", "notes": ""},
+            ]
+        )
+
+        with patch("core.deleted_table.get_db_manager", return_value=fake_db):
+            dialog = DeletedTableDialog()
+            dialog.data_executor.wait_for_idle()
+            dialog.selected_tasks = {"task-1"}
+            dialog._load_archive_tasks()
+            dialog.data_executor.wait_for_idle()
+            self.assertEqual(dialog.selected_tasks, {"task-1"}, "同条件重新加载不应清掉显式勾选")
+
+            dialog.toggle_select_all()
+            # 绕过输入框直接换条件重新加载，由 set_filter_key 作废旧条件下的全选
+            dialog.search_input.blockSignals(True)
+            dialog.search_input.setText("会议")
+            dialog.search_input.blockSignals(False)
+            dialog._load_archive_tasks()
+            dialog.data_executor.wait_for_idle()
+
+        self.assertTrue(dialog.selection.is_empty())
+        self.assertFalse(dialog.restore_button.isEnabled())
 
     def test_archive_menu_contains_completed_and_deleted_actions_and_routes_each_one(self):
         host = QWidget()
@@ -0,0 +1,108 @@
+"""性能基准套件：合成数据集可复现、套件输出完整的 JSON 结果、回归对比阈值"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.dataset import HOT_HISTORY_TASK_ID, DatasetSpec, ensure_dataset, generate_dataset
+from benchmarks.suite import compare_results, run_suite
+from database.database_manager import DatabaseManager
+
+TINY = DatasetSpec(tasks=40, history_rows=400, scheduled_tasks=10, unsynced_tasks=3)
+
+
+class DatasetGeneratorTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _dump(self, db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            return {
+                table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+                for table in ("tasks", "task_history", "scheduled_tasks")
+            }
+        finally:
+            conn.close()
+
+    def test_same_seed_generates_identical_data_loadable_by_manager(self):
+        first = os.path.join(self.tmpdir.name, "a.db")
+        second = os.path.join(self.tmpdir.name, "b.db")
+        generate_dataset(first, TINY, seed=7)
+        generate_dataset(second, TINY, seed=7)
+
+        self.assertEqual(self._dump(first), self._dump(second))
+        manager = DatabaseManager(db_path=first, flush_interval=0)
+        self.addCleanup(manager.close_connection)
+        self.assertEqual(manager.count_all_tasks(), 40)
+        self.assertEqual(manager.count_completed_tasks(), 24)
+        self.assertEqual(manager.count_deleted_tasks(), 4)
+        self.assertEqual(len(manager.list_scheduled_tasks()), 10)
+        self.assertEqual(manager.count_task_history(HOT_HISTORY_TASK_ID), 8)
+        unsynced = [task for task in manager.load_tasks(all_tasks=True) if task["sync_status"] != "synced"]
+        self.assertEqual(len(unsynced), 3)
+        conn = sqlite3.connect(first)
+        self.addCleanup(conn.close)
+        index_names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("idx_task_history_task_timestamp", index_names, "批量写入后应按原定义重建索引")
+
+    def test_generated_dataset_is_cached_by_spec_and_seed(self):
+        path = ensure_dataset(self.tmpdir.name, "tiny", TINY, seed=7)
+        mtime = os.path.getmtime(path)
+
+        self.assertEqual(ensure_dataset(self.tmpdir.name, "tiny", TINY, seed=7), path)
+        self.assertEqual(os.path.getmtime(path), mtime)
+        self.assertNotEqual(ensure_dataset(self.tmpdir.name, "tiny", TINY, seed=8), path)
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    def test_suite_reports_every_benchmark_as_json(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            results = run_suite({"tiny": TINY}, data_dir, repeat=2, seed=7)
+
+        json.dumps(results)
+        self.assertIn("sqlite", results["environment"])
+        benchmarks = results["datasets"]["tiny"]["benchmarks"]
+        for name in ("cache_load", "load_tasks", "archive_page", "archive_page_deep", "archive_count",
+                     "archive_search", "archive_search_count", "history_count", "history_first_page",
+                     "history_deep_page", "flush_dirty_1", "scheduler_spawn", "sync_upload",
+                     "sync_download_changes", "sync_download_unchanged"):
+            with self.subTest(name=name):
+                self.assertIn(name, benchmarks)
+                self.assertLessEqual(benchmarks[name]["min_ms"], benchmarks[name]["median_ms"])
+        self.assertNotIn("flush_dirty_100", benchmarks, "脏集合大于未完成任务数时跳过")
+        self.assertEqual((benchmarks["sync_upload"]["tasks"], benchmarks["sync_upload"]["requests"]), (3, 3))
+        self.assertTrue(benchmarks["sync_download_changes"]["ok"])
+        self.assertGreater(benchmarks["scheduler_spawn"]["spawned"], 0)
+
+
+class CompareResultsTests(unittest.TestCase):
+    def _results(self, median_ms, tasks=40):
+        return {"datasets": {"tiny": {
+            "dataset": {"tasks": tasks, "history_rows": 400, "scheduled_tasks": 10, "unsynced_tasks": 3, "seed": 7},
+            "benchmarks": {"load_tasks": {"median_ms": median_ms}, "archive_count": {"median_ms": 0.01}},
+        }}}
+
+    def test_only_slowdowns_beyond_tolerance_and_min_delta_are_regressions(self):
+        baseline = self._results(10.0)
+        current = self._results(14.0)
+        current["datasets"]["tiny"]["benchmarks"]["archive_count"]["median_ms"] = 0.5
+
+        regressions = compare_results(baseline, current, tolerance=0.25, min_delta_ms=1.0)
+
+        self.assertEqual([(item["benchmark"], item["ratio"]) for item in regressions], [("load_tasks", 1.4)])
+        self.assertEqual(compare_results(baseline, self._results(12.0), tolerance=0.25), [])
+
+    def test_results_for_a_different_dataset_spec_are_not_compared(self):
+        baseline = self._results(10.0)
+        current = self._results(50.0, tasks=80)
+        self.assertEqual(compare_results(baseline, current), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
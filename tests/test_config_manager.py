@@ -126,9 +126,89 @@ class QuadrantPositionContractTests(unittest.TestCase):
     def test_legacy_priority_field_is_stripped_before_save(self):
         task, data = _fake_task("t-legacy", 600, 300)
         db = self._run_save([task])
-        saved = db.save_task.call_args[0][0]
+        saved = db.save_tasks_changed.call_args[0][0][0]
         self.assertNotIn("priority", saved, "旧 priority 字段不得继续写入数据库")
 
 
+class _DirtyTrackedTask:
+    """带脏标记接口的最小任务标签替身"""
+
+    def __init__(self, task_id, x, y, urgency="低", importance="低", dirty=False):
+        self._x, self._y = x, y
+        self.urgency = urgency
+        self.importance = importance
+        self._dirty = dirty
+        self._last_saved_data = None
+        self.get_data_calls = 0
+        self.task_id = task_id
+
+    def pos(self):
+        return SimpleNamespace(x=lambda: self._x, y=lambda: self._y)
+
+    def is_dirty(self):
+        return self._dirty
+
+    def mark_clean(self, saved_data=None):
+        self._dirty = False
+        self._last_saved_data = saved_data
+
+    def get_data(self):
+        self.get_data_calls += 1
+        return {"id": self.task_id, "position": {"x": self._x, "y": self._y}}
+
+
+class DirtyTrackedSaveTests(unittest.TestCase):
+    """脏标记增量保存：未修改标签零开销，有变化的任务整批提交"""
+
+    def _run_save(self, tasks):
+        db = Mock()
+        db.save_tasks_changed.return_value = True
+        parent = Mock()
+        parent.width.return_value = 1000
+        parent.height.return_value = 800
+        with patch.object(config_manager, "get_db_manager", return_value=db):
+            self.assertTrue(save_tasks(tasks, parent=parent))
+        return db
+
+    def test_clean_labels_in_same_quadrant_are_skipped(self):
+        clean = _DirtyTrackedTask("clean", 400, 500, urgency="低", importance="低")
+        db = self._run_save([clean])
+        self.assertEqual(clean.get_data_calls, 0, "未修改标签不应再调用 get_data")
+        db.save_tasks_changed.assert_not_called()
+
+    def test_only_dirty_labels_are_submitted_in_one_batch(self):
+        clean = _DirtyTrackedTask("clean", 400, 500)
+        dirty_a = _DirtyTrackedTask("dirty-a", 600, 300, dirty=True)
+        dirty_b = _DirtyTrackedTask("dirty-b", 400, 300, dirty=True)
+        db = self._run_save([clean, dirty_a, dirty_b])
+        db.save_tasks_changed.assert_called_once()
+        saved_ids = [item["id"] for item in db.save_tasks_changed.call_args[0][0]]
+        self.assertEqual(saved_ids, ["dirty-a", "dirty-b"])
+        self.assertFalse(dirty_a.is_dirty(), "保存成功后应清除脏标记")
+        self.assertEqual(dirty_a._last_saved_data["urgency"], "高")
+
+    def test_clean_label_whose_quadrant_changed_is_saved(self):
+        moved = _DirtyTrackedTask("moved", 600, 300, urgency="低", importance="低")
+        db = self._run_save([moved])
+        saved = db.save_tasks_changed.call_args[0][0][0]
+        self.assertEqual((saved["urgency"], saved["importance"]), ("高", "高"))
+
+    def test_dirty_label_identical_to_last_save_is_not_resubmitted(self):
+        task = _DirtyTrackedTask("same", 600, 300, dirty=True)
+        self._run_save([task])
+        task._dirty = True
+        db = self._run_save([task])
+        db.save_tasks_changed.assert_not_called()
+        self.assertFalse(task.is_dirty())
+
+    def test_failed_batch_keeps_labels_dirty(self):
+        task = _DirtyTrackedTask("fail", 600, 300, dirty=True)
+        db = Mock()
+        db.save_tasks_changed.return_value = False
+        with patch.object(config_manager, "get_db_manager", return_value=db):
+            self.assertFalse(save_tasks([task]))
+        self.assertTrue(task.is_dirty(), "写入失败时需保留脏标记以便下次重试")
+
+
 if __name__ == "__main__":
     unittest.main()
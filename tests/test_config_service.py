@@ -0,0 +1,148 @@
+"""配置服务：内存共享、去抖原子写盘、外部修改监听与变更事件"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from config import config_service
+from config.config_service import (
+    SOURCE_FILE,
+    SOURCE_LOCAL,
+    ConfigChangeEvent,
+    ConfigService,
+    get_config_service,
+)
+
+
+WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
+os.makedirs(WORKSPACE_TMP_ROOT, exist_ok=True)
+
+
+class ConfigServiceTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from PyQt6.QtWidgets import QApplication
+
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=WORKSPACE_TMP_ROOT)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.config_path = os.path.join(self.tmp_dir, "config.json")
+        self._write_file({"size": {"width": 800}, "task_fields": [{"name": "text"}]})
+
+    def _write_file(self, config):
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+
+    def _read_file(self):
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _build_service(self, write_delay=0.05):
+        service = ConfigService(self.config_path, write_delay=write_delay)
+        self.addCleanup(service.flush)
+        return service
+
+    def test_get_config_returns_isolated_copy(self):
+        service = self._build_service()
+        config = service.get_config()
+        config["size"]["width"] = 1
+        self.assertEqual(service.get_config()["size"]["width"], 800, "调用方修改副本不得污染内存配置")
+
+    def test_rapid_updates_coalesce_into_one_atomic_write(self):
+        service = self._build_service(write_delay=0.2)
+        with patch.object(config_service.os, "replace", wraps=os.replace) as replace_mock:
+            for width in (900, 1000, 1100):
+                service.update({"size": {"width": width}, "task_fields": [{"name": "text"}]})
+            self.assertEqual(self._read_file()["size"]["width"], 800, "去抖期间不应同步写盘")
+            self.assertTrue(service.flush())
+        self.assertEqual(replace_mock.call_count, 1, "多次保存应合并为一次临时文件替换")
+        self.assertEqual(self._read_file()["size"]["width"], 1100)
+        leftovers = [name for name in os.listdir(self.tmp_dir) if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [], "原子写完成后不应残留临时文件")
+
+    def test_background_timer_writes_after_delay(self):
+        service = self._build_service(write_delay=0.05)
+        service.update({"size": {"width": 1234}, "task_fields": [{"name": "text"}]})
+        deadline = time.time() + 2
+        while service.has_pending_write() and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(service.has_pending_write())
+        self.assertEqual(self._read_file()["size"]["width"], 1234)
+
+    def test_unchanged_update_neither_writes_nor_notifies(self):
+        service = self._build_service()
+        events = []
+        service.add_listener(events.append)
+        changed = service.update(service.get_config())
+        self.assertEqual(changed, frozenset())
+        self.assertFalse(service.has_pending_write())
+        self.assertEqual(events, [])
+
+    def test_local_update_emits_typed_event_with_changed_keys(self):
+        service = self._build_service()
+        events = []
+        service.add_listener(events.append)
+        service.update({"size": {"width": 900}, "task_fields": [{"name": "text"}], "edit_mode": True})
+        self.assertEqual(len(events), 1)
+        event = events[0]
+        self.assertIsInstance(event, ConfigChangeEvent)
+        self.assertEqual(event.source, SOURCE_LOCAL)
+        self.assertEqual(event.changed_keys, frozenset({"size", "edit_mode"}))
+        self.assertTrue(event.affects("edit_mode"))
+        self.assertFalse(event.affects("task_fields"))
+
+    def test_task_field_names_are_cached_until_config_changes(self):
+        service = self._build_service()
+        self.assertEqual(service.get_task_field_names(), ["text"])
+        service.update({"task_fields": [{"name": "text"}, {"name": "notes"}]})
+        self.assertEqual(service.get_task_field_names(), ["text", "notes"])
+
+    def test_reload_reports_external_edit_but_ignores_own_write(self):
+        service = self._build_service()
+        events = []
+        service.add_listener(events.append)
+        service.update({"size": {"width": 900}, "task_fields": [{"name": "text"}]}, write_now=True)
+        events.clear()
+
+        self.assertEqual(service.reload_from_disk(), frozenset(), "自己写出的内容不应被当作外部修改")
+
+        self._write_file({"size": {"width": 900}, "task_fields": [{"name": "notes"}]})
+        changed = service.reload_from_disk()
+
+        self.assertEqual(changed, frozenset({"task_fields"}))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].source, SOURCE_FILE)
+        self.assertEqual(service.get_task_field_names(), ["notes"])
+
+    def test_file_watcher_picks_up_external_edit(self):
+        service = self._build_service()
+        self.assertTrue(service.start_watching())
+        self.addCleanup(service.stop_watching)
+        events = []
+        service.add_listener(events.append)
+
+        time.sleep(0.05)
+        self._write_file({"size": {"width": 640}, "task_fields": [{"name": "text"}]})
+        deadline = time.time() + 3
+        while not events and time.time() < deadline:
+            self.app.processEvents()
+            time.sleep(0.02)
+
+        self.assertTrue(events, "QFileSystemWatcher 应通知外部修改")
+        self.assertEqual(events[0].changed_keys, frozenset({"size"}))
+        self.assertEqual(service.get_config()["size"]["width"], 640)
+
+    def test_registry_shares_one_service_per_path(self):
+        self.assertIs(get_config_service(self.config_path), get_config_service(self.config_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
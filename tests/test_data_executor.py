@@ -0,0 +1,109 @@
+"""后台数据访问执行器：信号回传、代次作废与 sqlite3 中断"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from core.data_executor import DataAccessExecutor
+from database.database_manager import DatabaseManager
+
+
+WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
+os.makedirs(WORKSPACE_TMP_ROOT, exist_ok=True)
+
+SLOW_QUERY = """
+WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter)
+SELECT count(*) FROM counter
+"""
+
+
+class DataAccessExecutorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(dir=WORKSPACE_TMP_ROOT, suffix=".db")
+        os.close(fd)
+        os.remove(self.db_path)
+        self.addCleanup(self._cleanup_db_file)
+        self.db_manager = DatabaseManager(
+            db_path=self.db_path,
+            remote_config={},
+            sync_interval=0,
+            flush_interval=0,
+        )
+        self.addCleanup(self.db_manager.close_connection)
+        self.executor = DataAccessExecutor(self.db_manager)
+        self.addCleanup(self.executor.cancel_all)
+
+    def _cleanup_db_file(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def test_result_is_delivered_on_gui_thread_through_read_only_connection(self):
+        results = []
+        gui_thread = threading.get_ident()
+
+        def query():
+            conn = self.db_manager._get_read_connection()
+            self.assertIsNot(conn, self.db_manager.get_connection(), "后台查询应使用独立的只读连接")
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("CREATE TABLE should_fail (id INTEGER)")
+            return threading.get_ident(), conn.execute("SELECT count(*) FROM tasks").fetchone()[0]
+
+        self.executor.submit("tasks", query, on_result=lambda result: results.append((threading.get_ident(), result)))
+        self.assertTrue(self.executor.wait_for_idle())
+
+        self.assertEqual(len(results), 1)
+        callback_thread, (worker_thread, count) = results[0]
+        self.assertEqual(callback_thread, gui_thread)
+        self.assertNotEqual(worker_thread, gui_thread)
+        self.assertEqual(count, 0)
+
+    def test_newer_request_on_same_key_drops_stale_result(self):
+        release = threading.Event()
+        results = []
+
+        def slow_value():
+            release.wait(2)
+            return "旧结果"
+
+        self.executor.submit("search", slow_value, on_result=results.append)
+        self.executor.submit("search", lambda: "新结果", on_result=results.append)
+        release.set()
+        self.assertTrue(self.executor.wait_for_idle())
+
+        self.assertEqual(results, ["新结果"])
+        self.assertEqual(self.executor.pending_count(), 0)
+
+    def test_cancel_interrupts_running_sqlite_query(self):
+        started = threading.Event()
+        results, errors, outcome = [], [], []
+
+        def endless_query():
+            started.set()
+            try:
+                return self.db_manager._get_read_connection().execute(SLOW_QUERY).fetchone()
+            except sqlite3.OperationalError as e:
+                outcome.append(str(e))
+                raise
+
+        self.executor.submit("search", endless_query, on_result=results.append, on_error=errors.append)
+        self.assertTrue(started.wait(2))
+        self.executor.cancel("search")
+        self.assertTrue(self.executor.wait_for_idle(3000), "中断后工作线程应尽快结束")
+
+        self.assertEqual(outcome, ["interrupted"])
+        self.assertEqual(results, [], "已取消请求的结果不应回调")
+        self.assertEqual(errors, [], "已取消请求的错误也不应回调")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,11 @@
 import os
+import sqlite3
 import tempfile
 import unittest
 import types
 from unittest.mock import patch
 
-from database.database_manager import DatabaseManager
+from database.database_manager import DatabaseManager, history_row_cursor
 
 
 WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
@@ -367,6 +368,28 @@ class DatabaseManagerHistorySyncTests(unittest.TestCase):
         self.assertTrue(manager._cache_dirty)
         self.assertTrue(manager._entity_cache['task']['dirty'])
 
+    def test_restore_completed_tasks_matching_uses_filter_and_skips_excluded_ids(self):
+        manager = self._build_manager(remote_config={})
+        for task_id, text in (('report-1', '季度报告'), ('report-2', '年度报告'), ('meeting', '会议纪要')):
+            self._insert_task(
+                manager,
+                task_id,
+                text,
+                '2026-06-07T08:00:00',
+                '2026-06-09T10:00:00',
+                '2026-06-01T09:00:00',
+            )
+        manager._load_all_tasks_to_cache()
+
+        restored = manager.restore_completed_tasks_matching('报告', excluded_ids={'report-2'})
+        manager.flush_cache_to_db()
+
+        self.assertEqual(restored, 1)
+        self.assertFalse(manager._task_cache['report-1']['completed'])
+        self.assertTrue(manager._task_cache['report-2']['completed'])
+        self.assertTrue(manager._task_cache['meeting']['completed'])
+        self.assertEqual(manager.load_completed_task_ids(), ['report-2', 'meeting'])
+
     def test_restored_deleted_tasks_return_to_their_previous_completed_visibility(self):
         manager = self._build_manager(remote_config={})
         self._insert_task(
@@ -431,6 +454,214 @@ class DatabaseManagerHistorySyncTests(unittest.TestCase):
         )
         self.assertEqual(page['text'][0]['value'], '新标题')
 
+    def test_task_history_rows_keyset_pages_through_equal_timestamps_without_gaps(self):
+        manager = self._build_manager(remote_config={})
+        conn = manager.get_connection()
+        conn.executemany(
+            'INSERT INTO task_history (task_id, field_name, field_value, action, timestamp) VALUES (?, ?, ?, ?, ?)',
+            [
+                ('task-1', 'text', '标题', 'create', '2026-04-01T09:00:00'),
+                ('task-1', 'notes', '备注', 'create', '2026-04-01T09:00:00'),
+                ('task-1', 'due_date', '2026-04-09', 'create', '2026-04-01T09:00:00'),
+                ('task-1', 'text', '新标题', 'update', '2026-04-02T09:00:00'),
+                ('task-2', 'text', '其他任务', 'update', '2026-04-03T09:00:00'),
+            ],
+        )
+        conn.commit()
+
+        pages = []
+        after = None
+        while True:
+            rows = manager.get_task_history_rows('task-1', limit=2, after=after)
+            if not rows:
+                break
+            pages.append(rows)
+            after = history_row_cursor(rows[-1])
+
+        flat = [row for page in pages for row in page]
+        self.assertEqual([len(page) for page in pages], [2, 2])
+        self.assertEqual(flat[0]['value'], '新标题')
+        self.assertEqual(len({row['rowid'] for row in flat}), 4, "相同时间戳的行跨页时不应重复或遗漏")
+
+        exported = list(manager.iter_task_history_rows('task-1', batch_size=3))
+        self.assertEqual([row['value'] for row in exported][-1], '新标题')
+        self.assertEqual(len(exported), 4)
+
+    def test_archive_queries_are_served_from_cache_until_a_write_bumps_generation(self):
+        manager = self._build_manager(remote_config={})
+        for task_id, text in (('report-1', '季度报告'), ('report-2', '年度报告'), ('meeting', '会议纪要')):
+            self._insert_task(
+                manager,
+                task_id,
+                text,
+                '2026-06-07T08:00:00',
+                '2026-06-09T10:00:00',
+                '2026-06-01T09:00:00',
+            )
+        manager._load_all_tasks_to_cache()
+
+        statements = []
+        manager.get_connection().set_trace_callback(statements.append)
+        first_count = manager.count_completed_tasks('报告')
+        first_page = manager.load_completed_tasks_page(limit=1, offset=0, search_query='报告')
+        sql_after_first_open = len(statements)
+
+        # 再次打开对话框、清空后重新输入（大小写和空格不同）、翻回第一页
+        self.assertEqual(manager.count_completed_tasks('  报告 '), first_count)
+        first_page[0]['text'] = '调用方修改了返回值'
+        self.assertEqual(manager.load_completed_tasks_page(limit=1, offset=0, search_query='报告')[0]['id'], 'report-1')
+        self.assertEqual(manager.load_completed_tasks_page(limit=1, offset=0, search_query='报告')[0]['text'], '季度报告')
+        self.assertEqual(len(statements), sql_after_first_open, '两次写入之间重复的归档查询不应再执行 SQL')
+        stats = manager.get_query_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 2))
+
+        generation = manager.write_generation
+        manager.restore_completed_task('report-1')
+        self.assertGreater(manager.write_generation, generation)
+        self.assertEqual(manager.count_completed_tasks('报告'), 1, '写入后缓存应失效并读取最新结果')
+        self.assertEqual(manager.get_query_cache_stats()['misses'], 3)
+
+    def test_unfiltered_archive_totals_come_from_counters_and_filtered_total_rides_with_first_page(self):
+        manager = self._build_manager(remote_config={})
+        for task_id, text, completed, deleted in (
+            ('report-1', '季度报告', True, False),
+            ('report-2', '年度报告', True, False),
+            ('meeting', '会议纪要', True, False),
+            ('gone', '废弃报告', False, True),
+        ):
+            self._insert_task(
+                manager,
+                task_id,
+                text,
+                '2026-06-07T08:00:00',
+                '2026-06-09T10:00:00',
+                '2026-06-01T09:00:00',
+                completed=completed,
+                deleted=deleted,
+            )
+        manager._load_all_tasks_to_cache()
+
+        statements = []
+        manager.get_connection().set_trace_callback(statements.append)
+        self.assertEqual(manager.count_completed_tasks(), 3)
+        self.assertEqual(manager.count_deleted_tasks(''), 1)
+        self.assertEqual(statements, [], '未筛选的总数应直接读取内存计数器')
+
+        manager.delete_task('meeting')
+        manager.restore_deleted_task('gone')
+        self.assertEqual(manager.count_completed_tasks(), 2, '计数器随缓存写入即时更新，无需先 flush')
+        self.assertEqual(manager.count_deleted_tasks(), 1)
+
+        manager.flush_cache_to_db()
+        statements.clear()
+        tasks, total = manager.load_completed_tasks_page_with_total(limit=1, search_query='报告')
+        selects = [sql for sql in statements if 'SELECT' in sql]
+        self.assertEqual(len(selects), 1, '筛选后的总数应与首页同一查询返回')
+        self.assertIn('OVER ()', selects[0])
+        self.assertEqual(([task['id'] for task in tasks], total), (['report-1'], 2))
+        self.assertEqual(manager.count_completed_tasks('报告'), total)
+
+        tasks, total = manager.load_deleted_tasks_page_with_total(limit=5, offset=5, search_query='会议')
+        self.assertEqual((tasks, total), ([], 1), '越过末页时退回单独计数')
+
+    def test_history_count_is_counted_once_then_maintained_by_flush(self):
+        manager = self._build_manager(remote_config={})
+        conn = manager.get_connection()
+        conn.execute(
+            'INSERT INTO task_history (task_id, field_name, field_value, action, timestamp) VALUES (?, ?, ?, ?, ?)',
+            ('task-1', 'text', '标题', 'create', '2026-04-01T09:00:00'),
+        )
+        conn.commit()
+        lock_held_during_count = []
+
+        def trace(sql):
+            if 'COUNT' in sql:
+                lock_held_during_count.append(manager._cache_lock.locked())
+
+        conn.set_trace_callback(trace)
+        self.assertEqual(manager.count_task_history('task-1'), 1)
+
+        with manager._cache_lock:
+            manager._task_history_cache.extend([
+                ('task-1', 'text', '新标题', 'update', '2026-04-02T09:00:00'),
+                ('task-1', 'text', '标题', 'create', '2026-04-01T09:00:00'),
+            ])
+            manager._cache_dirty = True
+
+        self.assertEqual(manager.count_task_history('task-1'), 2, '主键冲突被忽略的行不应计入')
+        self.assertEqual(manager.count_task_history('task-1'), 2)
+        self.assertEqual(lock_held_during_count, [False], '只在首次统计时执行 COUNT(*)，且不持有缓存锁')
+
+    def test_history_count_is_not_stored_when_a_flush_overlaps_the_count(self):
+        manager = self._build_manager(remote_config={})
+        conn = manager.get_connection()
+
+        def trace(sql):
+            if 'COUNT' in sql:
+                # 模拟 COUNT 执行期间另一线程的 flush 已提交
+                manager._bump_write_generation()
+
+        conn.set_trace_callback(trace)
+        self.assertEqual(manager.count_task_history('task-1'), 0)
+        self.assertNotIn('task-1', manager._history_counts, '写代次变化时结果可能已过期，不应记入计数器')
+
+        conn.set_trace_callback(None)
+        self.assertEqual(manager.count_task_history('task-1'), 0)
+        self.assertEqual(manager._history_counts['task-1'], 0)
+
+    def test_summary_loader_reads_range_with_fixed_queries_grouped_by_task(self):
+        manager = self._build_manager(remote_config={})
+        conn = manager.get_connection()
+        for index in range(20):
+            self._insert_task(manager, f'task-{index}', f'任务{index}', '', '2026-04-01', '2026-03-01', completed=False)
+        conn.executemany(
+            'INSERT INTO task_history (task_id, field_name, field_value, action, timestamp) VALUES (?, ?, ?, ?, ?)',
+            [(f'task-{index}', 'text', f'任务{index}', 'update', f'2026-04-{index % 5 + 1:02d} 09:00:00') for index in range(20)]
+            + [
+                ('task-3', 'notes', '区间外', 'update', '2026-05-01 09:00:00'),
+                ('task-missing', 'text', '已清理', 'update', '2026-04-02 09:00:00'),
+            ],
+        )
+        conn.commit()
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        tasks = manager.load_tasks_with_history_between('2026-04-01', '2026-04-30 23:59:59')
+
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+        self.assertEqual(len(selects), 2, '查询次数不应随任务数增长')
+        self.assertEqual(len(tasks), 20, '历史中已不存在的任务应被跳过')
+        self.assertEqual(tasks[0]['id'], 'task-0', '按区间内首条历史时间排序')
+        task_3 = next(task for task in tasks if task['id'] == 'task-3')
+        self.assertEqual(
+            task_3['history'],
+            [{'field': 'text', 'value': '任务3', 'action': 'update', 'timestamp': '2026-04-04 09:00:00'}],
+        )
+        plan = ' '.join(
+            str(row[-1]) for row in conn.execute(
+                'EXPLAIN QUERY PLAN SELECT DISTINCT task_id FROM task_history WHERE timestamp BETWEEN ? AND ?',
+                ('2026-04-01', '2026-04-30'),
+            )
+        )
+        self.assertIn('COVERING INDEX idx_task_history_timestamp_task', plan)
+
+    def test_failed_query_is_not_cached_and_lru_evicts_oldest_entry(self):
+        manager = self._build_manager(remote_config={})
+        manager._query_cache_max_entries = 2
+
+        def interrupted():
+            raise sqlite3.OperationalError('interrupted')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            manager._cached_query(('kind', 'a'), interrupted)
+        self.assertEqual(manager._cached_query(('kind', 'a'), lambda: 1), 1, '失败的查询不应写入缓存')
+        manager._cached_query(('kind', 'b'), lambda: 2)
+        manager._cached_query(('kind', 'a'), lambda: -1)
+        manager._cached_query(('kind', 'c'), lambda: 3)
+
+        self.assertEqual(list(manager._query_cache), [('kind', 'a'), ('kind', 'c')])
+        self.assertEqual(manager._cached_query(('kind', 'b'), lambda: 22), 22)
+
     def test_get_task_history_uses_local_history_even_when_remote_history_exists(self):
         remote_config = {
             "api_base_url": "http://example.com",
@@ -586,3 +817,56 @@ class DatabaseManagerHistorySyncTests(unittest.TestCase):
             request_mock.call_args.args[2]['history']['text'][0]['timestamp'],
             '2026-03-30T09:00:00',
         )
+
+    def test_save_tasks_changed_takes_lock_once_and_skips_unchanged_tasks(self):
+        manager = self._build_manager(remote_config={})
+        field_names = ['text', 'notes', 'due_date', 'urgency', 'importance']
+
+        def task_payload(task_id, text, x=100):
+            return {
+                'id': task_id,
+                'color': '#4ECDC4',
+                'position': {'x': x, 'y': 100},
+                'completed': False,
+                'text': text,
+                'notes': '',
+                'due_date': '',
+                'urgency': '低',
+                'importance': '低',
+            }
+
+        with patch.object(manager, '_get_task_field_names', return_value=field_names):
+            self.assertTrue(manager.save_tasks_changed([
+                task_payload('task-1', '任务一'),
+                task_payload('task-2', '任务二'),
+            ]))
+            manager.flush_cache_to_db()
+            before = dict(manager._task_cache['task-1'])
+            history_count = manager.count_task_history('task-1')
+
+            real_lock = manager._cache_lock
+            acquire_count = []
+
+            class CountingLock:
+                def __enter__(self_inner):
+                    acquire_count.append(1)
+                    return real_lock.__enter__()
+
+                def __exit__(self_inner, *exc):
+                    return real_lock.__exit__(*exc)
+
+            manager._cache_lock = CountingLock()
+            try:
+                self.assertTrue(manager.save_tasks_changed([
+                    task_payload('task-1', '任务一'),
+                    task_payload('task-2', '任务二改', x=300),
+                ]))
+            finally:
+                manager._cache_lock = real_lock
+
+        self.assertEqual(len(acquire_count), 1, '整批保存只应获取一次缓存锁')
+        self.assertEqual(manager._task_cache['task-1'], before, '未变化的任务不应刷新时间戳或同步状态')
+        self.assertNotIn('task-1', manager._dirty_task_ids)
+        self.assertEqual(manager._task_cache['task-2']['text'], '任务二改')
+        self.assertEqual(manager._task_cache['task-2']['position_x'], 300)
+        self.assertEqual(manager.count_task_history('task-1'), history_count)
@@ -79,7 +79,7 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
                 return FakeResponse(200, {'tasks': [], 'count': 0})
             raise AssertionError(f'unexpected request: {method} {url}')
 
-        with patch('database.database_manager.requests.request', side_effect=fake_request):
+        with patch('requests.request', side_effect=fake_request):
             result = manager._make_api_request('GET', '/api/tasks')
 
         self.assertEqual(result, {'tasks': [], 'count': 0})
@@ -567,7 +567,7 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
                 return FakeResponse(500, {'error': 'boom'}, 'boom')
             raise AssertionError(f'unexpected request: {method} {url}')
 
-        with patch('database.database_manager.requests.request', side_effect=fake_request):
+        with patch('requests.request', side_effect=fake_request):
             first_result = manager._make_api_request('GET', '/api/tasks')
             second_result = manager._make_api_request('GET', '/api/tasks')
 
@@ -1100,7 +1100,7 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
             'remote_config': remote,
         }
 
-        with patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.save_config.return_value = True
             ok = QuadrantWidget.apply_settings_commit(widget, result)
 
@@ -1156,7 +1156,7 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
             'remote_config': remote,
         }
 
-        with patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.save_config.return_value = True
             ok = QuadrantWidget.apply_settings_commit(widget, result)
 
@@ -1184,7 +1184,7 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
         remote = {'enabled': False, 'api_base_url': '', 'api_token': '', 'username': ''}
         result = {'config': {'size': {'width': 900, 'height': 600}}, 'remote_config': remote}
 
-        with patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock, \
+        with patch('config.remote_config.RemoteConfigManager') as rcm_mock, \
                 patch('core.quadrant_widget.show_error'):
             rcm_mock.return_value.save_config.return_value = False
             ok = QuadrantWidget.apply_settings_commit(widget, result)
@@ -1224,7 +1224,7 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
             'remote_config': remote,
         }
 
-        with patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.save_config.return_value = True
             ok = QuadrantWidget.apply_settings_commit(widget, result)
 
@@ -1271,8 +1271,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
         dlg = MagicMock()
         dlg.exec.return_value = QDialog.DialogCode.Rejected
 
-        with patch('core.quadrant_widget.SettingsDialog', return_value=dlg) as sd_mock, \
-                patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('core.settings_dialog.SettingsDialog', return_value=dlg) as sd_mock, \
+                patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.get_server_config.return_value = remote_cfg
             QuadrantWidget.show_settings(widget, '')
 
@@ -1323,8 +1323,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
         dlg = MagicMock()
         dlg.exec.return_value = QDialog.DialogCode.Rejected
 
-        with patch('core.quadrant_widget.SettingsDialog', return_value=dlg), \
-                patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('core.settings_dialog.SettingsDialog', return_value=dlg), \
+                patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.get_server_config.return_value = remote_cfg
             QuadrantWidget.show_settings(widget, '')
 
@@ -1382,8 +1382,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
             'api_token': '',
             'username': '',
         }
-        with patch('core.quadrant_widget.SettingsDialog', return_value=dlg), \
-                patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('core.settings_dialog.SettingsDialog', return_value=dlg), \
+                patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.get_server_config.return_value = remote_cfg
             QuadrantWidget.show_settings(widget, '')
 
@@ -1427,8 +1427,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
             'api_token': '',
             'username': '',
         }
-        with patch('core.quadrant_widget.SettingsDialog', return_value=dlg), \
-                patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('core.settings_dialog.SettingsDialog', return_value=dlg), \
+                patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.get_server_config.return_value = remote_cfg
             QuadrantWidget.show_settings(widget, '')
 
@@ -1483,8 +1483,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
             'api_token': '',
             'username': '',
         }
-        with patch('core.quadrant_widget.SettingsDialog', return_value=dlg), \
-                patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('core.settings_dialog.SettingsDialog', return_value=dlg), \
+                patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.get_server_config.return_value = remote_cfg
             rcm_mock.return_value.save_config.return_value = True
             QuadrantWidget.show_settings(widget, '')
@@ -1527,8 +1527,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
         dlg = MagicMock()
         dlg.exec.return_value = QDialog.DialogCode.Rejected
 
-        with patch('core.quadrant_widget.SettingsDialog', return_value=dlg) as sd_mock, \
-                patch('core.quadrant_widget.RemoteConfigManager') as rcm_mock:
+        with patch('core.settings_dialog.SettingsDialog', return_value=dlg) as sd_mock, \
+                patch('config.remote_config.RemoteConfigManager') as rcm_mock:
             rcm_mock.return_value.get_server_config.return_value = remote_cfg
             QuadrantWidget.show_settings(widget, 'remote')
 
@@ -1613,6 +1613,8 @@ class DatabaseManagerRemoteTests(unittest.TestCase):
         widget.config = {'task_fields': [{'name': 'text', 'required': True}]}
         widget._sync_refresh_pending = False
         widget.setUpdatesEnabled = Mock()
+        widget.db_manager = Mock()
+        widget.db_manager.get_overdue_task_ids.return_value = []
 
         fake_task = Mock()
         with patch('config.config_manager.load_tasks_with_history', return_value=[{
@@ -0,0 +1,239 @@
+"""到期日期：分桶索引的区间查询、缓存同步维护与跨日翻转，规范化 ISO 日期列的写入、迁移与区间查询"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from database.database_manager import DatabaseManager
+from database.due_date_index import DueDateIndex, parse_due_date
+from database.task_dates import normalize_task_date
+
+
+WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
+os.makedirs(WORKSPACE_TMP_ROOT, exist_ok=True)
+
+TODAY = date(2026, 5, 10)
+
+
+class DueDateIndexTests(unittest.TestCase):
+    def _build_index(self):
+        index = DueDateIndex()
+        index.update("past", "2026-05-01")
+        index.update("today", "2026-05-10")
+        index.update("tomorrow", "2026-05-11T09:00:00")
+        index.update("next-week", "2026-05-17")
+        index.update("no-date", "")
+        index.update("bad-date", "明天")
+        return index
+
+    def test_parse_due_date_accepts_date_and_iso_datetime(self):
+        self.assertEqual(parse_due_date("2026-05-11"), date(2026, 5, 11))
+        self.assertEqual(parse_due_date("2026-05-11T09:00:00"), date(2026, 5, 11))
+        self.assertEqual(parse_due_date("2026/5/11 09:00:00"), date(2026, 5, 11))
+        self.assertIsNone(parse_due_date(""))
+        self.assertIsNone(parse_due_date("not-a-date"))
+
+    def test_normalize_task_date_accepts_stored_formats_only(self):
+        for raw in ("2026-05-11", "2026/05/11", "2026-5-11", "2026-05-11 09:30:00", "2026/05/11 09:30:00",
+                    "2026-05-11T09:30:00.123+08:00", date(2026, 5, 11)):
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_task_date(raw), "2026-05-11")
+        for raw in (None, "", "明天", "11/05/2026", "2026-05/11", "2026-13-01", "2026-05-11 25:00:00", b"2026-05-11", 20260511):
+            with self.subTest(raw=raw):
+                self.assertIsNone(normalize_task_date(raw))
+
+    def test_overdue_includes_tasks_due_today(self):
+        index = self._build_index()
+        self.assertEqual(sorted(index.overdue_ids(TODAY)), ["past", "today"])
+        self.assertEqual(len(index), 4, "无日期或无法解析的任务不进入索引")
+
+    def test_due_within_excludes_already_overdue_tasks(self):
+        index = self._build_index()
+        self.assertEqual(index.due_within_ids(1, TODAY), ["tomorrow"])
+        self.assertEqual(sorted(index.due_within_ids(7, TODAY)), ["next-week", "tomorrow"])
+        self.assertEqual(index.due_within_ids(0, TODAY), [])
+
+    def test_update_moves_task_between_buckets_and_drops_empty_dates(self):
+        index = self._build_index()
+        index.update("past", "2026-05-20")
+        self.assertEqual(index.overdue_ids(TODAY), ["today"])
+        index.remove("today")
+        index.remove("missing")
+        self.assertEqual(index.overdue_ids(TODAY), [])
+        self.assertNotIn(date(2026, 5, 10), index._buckets)
+        self.assertNotIn(date(2026, 5, 10), index._sorted_dates)
+
+
+class DatabaseManagerDueDateIndexTests(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(dir=WORKSPACE_TMP_ROOT, suffix=".db")
+        os.close(fd)
+        os.remove(self.db_path)
+        self.addCleanup(self._cleanup_db_file)
+
+    def _cleanup_db_file(self):
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    def _build_manager(self):
+        manager = DatabaseManager(
+            db_path=self.db_path,
+            remote_config={},
+            sync_interval=0,
+            flush_interval=0,
+        )
+        self.addCleanup(manager.close_connection)
+        return manager
+
+    def _save(self, manager, task_id, due_date, completed=False):
+        with patch.object(manager, "_get_task_field_names", return_value=["text", "due_date"]):
+            manager.save_task({
+                "id": task_id,
+                "text": task_id,
+                "due_date": due_date,
+                "completed": completed,
+                "completed_date": "2026-05-10" if completed else "",
+            })
+
+    def test_index_tracks_completion_deletion_and_restore(self):
+        manager = self._build_manager()
+        self._save(manager, "open", "2026-05-09")
+        self._save(manager, "done", "2026-05-09", completed=True)
+        self._save(manager, "gone", "2026-05-08")
+        manager.delete_task("gone")
+
+        self.assertEqual(manager.get_overdue_task_ids(TODAY), ["open"], "已完成和已删除任务不参与到期判断")
+
+        manager.restore_completed_task("done")
+        manager.restore_deleted_task("gone")
+        self.assertEqual(sorted(manager.get_overdue_task_ids(TODAY)), ["done", "gone", "open"])
+
+    def test_index_is_rebuilt_from_database_on_startup(self):
+        manager = self._build_manager()
+        self._save(manager, "soon", "2026-05-12")
+        manager.flush_cache_to_db()
+        manager.close_connection()
+
+        reopened = self._build_manager()
+        self.assertEqual(reopened.get_task_ids_due_within(3, TODAY), ["soon"])
+
+
+class NormalizedTaskDateColumnTests(DatabaseManagerDueDateIndexTests):
+    """due_date_iso / create_date_iso：写入时生成、旧库一次性回填、索引区间查询"""
+
+    def _query(self, sql, *params):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_flush_writes_normalized_columns_and_range_queries_use_indexes(self):
+        manager = self._build_manager()
+        self._save(manager, "past", "2026/05/01 18:00:00")
+        self._save(manager, "today", "2026-05-10")
+        self._save(manager, "soon", "2026-5-12")
+        self._save(manager, "later", "2026-06-01")
+        self._save(manager, "done", "2026-05-02", completed=True)
+        self._save(manager, "undated", "明天")
+        manager.flush_cache_to_db()
+
+        self.assertEqual(
+            dict(self._query("SELECT id, due_date_iso FROM tasks WHERE id IN ('past', 'soon', 'undated')")),
+            {"past": "2026-05-01", "soon": "2026-05-12", "undated": None},
+        )
+        self.assertEqual([task["id"] for task in manager.load_overdue_tasks(TODAY)], ["past", "today"])
+        self.assertEqual([task["id"] for task in manager.load_tasks_due_soon(7, TODAY)], ["soon"])
+        self.assertEqual(
+            [task["id"] for task in manager.load_tasks_due_between("2026-05-01", "2026-05-31", include_completed=True)],
+            ["past", "done", "today", "soon"],
+        )
+        with self.assertRaises(ValueError):
+            manager.load_tasks_due_between("下周", None)
+
+        plan = " ".join(row[-1] for row in self._query(
+            "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE due_date_iso IS NOT NULL AND due_date_iso <= ?", "2026-05-10"
+        ))
+        self.assertIn("idx_tasks_due_create_iso", plan)
+
+    def test_legacy_rows_are_backfilled_once_under_user_version(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE tasks (
+                id TEXT PRIMARY KEY, color TEXT, position_x INTEGER, position_y INTEGER,
+                completed BOOLEAN DEFAULT FALSE, completed_date TEXT, deleted BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP, updated_at TIMESTAMP, text TEXT, notes TEXT, due_date TEXT,
+                priority TEXT, urgency TEXT, importance TEXT, directory TEXT, create_date TEXT, sync_status TEXT
+            )
+        """)
+        conn.execute(
+            "INSERT INTO tasks (id, text, due_date, create_date) VALUES ('legacy', '旧任务', '2026/05/09 08:00:00', '2026/04/01')"
+        )
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        conn.close()
+
+        manager = self._build_manager()
+
+        self.assertEqual(self._query("PRAGMA user_version")[0][0], 2)
+        self.assertEqual(
+            self._query("SELECT due_date_iso, create_date_iso FROM tasks WHERE id = 'legacy'"),
+            [("2026-05-09", "2026-04-01")],
+        )
+        self.assertEqual([task["id"] for task in manager.load_overdue_tasks(TODAY)], ["legacy"])
+        self.assertEqual([task["id"] for task in manager.load_tasks_created_between("2026-04-01", "2026-04-30")], ["legacy"])
+        self.assertEqual(
+            [row["text"] for batch in manager.iter_export_task_rows(create_date_from=date(2026, 4, 2)) for row in batch],
+            [],
+        )
+
+    def test_derived_columns_are_not_uploaded(self):
+        manager = self._build_manager()
+        self._save(manager, "local", "2026-05-11")
+        manager.api_base_url = "http://sync.invalid"
+        posted = []
+
+        with patch.object(manager, "_make_api_request", side_effect=lambda method, endpoint, data: posted.append(data) or {}):
+            manager.sync_to_server()
+
+        self.assertEqual(posted[0]["due_date"], "2026-05-11")
+        self.assertNotIn("due_date_iso", posted[0])
+        self.assertNotIn("create_date_iso", posted[0])
+
+
+class OverdueRolloverTests(unittest.TestCase):
+    def test_rollover_flips_only_labels_due_since_last_check(self):
+        from core.quadrant_widget import QuadrantWidget
+
+        labels = [
+            SimpleNamespace(task_id="due-today", set_overdue_status=Mock()),
+            SimpleNamespace(task_id="later", set_overdue_status=Mock()),
+        ]
+        db_manager = Mock()
+        db_manager.get_task_ids_due_between.return_value = ["due-today"]
+        widget = SimpleNamespace(
+            tasks=labels,
+            db_manager=db_manager,
+            _overdue_checked_date=date(2026, 5, 9),
+            _schedule_overdue_rollover=Mock(),
+        )
+
+        with patch("core.quadrant_widget.date") as date_mock:
+            date_mock.today.return_value = TODAY
+            QuadrantWidget._on_overdue_rollover(widget)
+
+        db_manager.get_task_ids_due_between.assert_called_once_with(date(2026, 5, 9), TODAY)
+        labels[0].set_overdue_status.assert_called_once_with(True)
+        labels[1].set_overdue_status.assert_not_called()
+        self.assertEqual(widget._overdue_checked_date, TODAY)
+        widget._schedule_overdue_rollover.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
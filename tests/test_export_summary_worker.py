@@ -0,0 +1,210 @@
+"""导出概要：后台线程的数据读取、提示词构建、逐条回传与停止后部分导出"""
+
+import concurrent.futures
+import functools
+import json
+import os
+import re
+import tempfile
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from core.LLMService import LLMService
+from PyQt6.QtWidgets import QApplication
+
+from core.export_summary_dialog import ExportSummaryDialog, SummaryWorker
+from core.summary_cache import SummaryCache
+from core.summary_prompt import build_summary_plan
+from database.database_manager import DatabaseManager
+
+
+WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
+os.makedirs(WORKSPACE_TMP_ROOT, exist_ok=True)
+
+
+class FakeLLMService:
+    """按请求的 Schema 返回单任务或 summaries 数组响应，并记录每次批量调用"""
+
+    model = "test-model"
+    parse_json_response = staticmethod(LLMService.parse_json_response)
+
+    def __init__(self):
+        self.batches = []
+
+    def is_available(self):
+        return True
+
+    def submit_many(self, messages_list, schemas, on_result=None, **kwargs):
+        """逐个请求回传结果；回调中途取消 Future 时与真实服务一样不再回传后续请求"""
+        self.batches.append(messages_list)
+        future = concurrent.futures.Future()
+        results = []
+        for index, (messages, schema) in enumerate(zip(messages_list, schemas)):
+            if future.cancelled():
+                return future
+            task_ids = re.findall(r"- ID: (\S+)", messages[-1]["content"])
+            items = [{"task_id": task_id, "summary": f"{task_id} 的工作概要"} for task_id in task_ids]
+            payload = {"summaries": items} if "summaries" in schema["properties"] else items[0]
+            results.append(json.dumps(payload, ensure_ascii=False))
+            on_result(index, results[-1])
+        if future.set_running_or_notify_cancel():
+            future.set_result(results)
+        return future
+
+
+class SummaryWorkerDataTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory(dir=WORKSPACE_TMP_ROOT)
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_manager = DatabaseManager(
+            db_path=os.path.join(self.tmpdir.name, "tasks.db"),
+            remote_config={},
+            sync_interval=0,
+            flush_interval=0,
+        )
+        self.addCleanup(self.db_manager.close_connection)
+        conn = self.db_manager.get_connection()
+        conn.execute("INSERT INTO tasks (id, text, created_at) VALUES ('task-1', '整理周报', '2026-04-01')")
+        conn.executemany(
+            "INSERT INTO task_history (task_id, field_name, field_value, action, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [
+                ("task-1", "text", "整理周报", "create", "2026-04-01 09:00:00"),
+                ("task-1", "notes", "已发送给组长", "update", "2026-04-02 18:00:00"),
+            ],
+        )
+        conn.commit()
+
+    def test_history_is_loaded_on_read_connection_and_rendered_into_prompt(self):
+        worker = SummaryWorker("2026-04-01", "2026-04-30")
+        used_connections = []
+        load = self.db_manager.load_tasks_with_history_between
+
+        def tracking_load(*args):
+            used_connections.append(self.db_manager._get_read_connection())
+            return load(*args)
+
+        self.db_manager.load_tasks_with_history_between = tracking_load
+        tasks = worker._load_tasks_data(self.db_manager)
+
+        self.assertEqual(len(used_connections), 1)
+        self.assertIsNot(used_connections[0], self.db_manager.get_connection(), "应使用独立的只读连接")
+        self.assertEqual([task["id"] for task in tasks], ["task-1"])
+
+        user_content = worker._build_single_task_summary_prompt(tasks[0])[1]["content"]
+        self.assertIn("[2026-04-02 18:00:00] 更新 - notes: 已发送给组长", user_content)
+        self.assertIn("[2026-04-01 09:00:00] 创建 - text: 整理周报", user_content)
+
+    def _run_worker(self, llm_service, summary_cache):
+        worker = SummaryWorker("2026-04-01", "2026-04-30")
+        finished, progress = [], []
+        worker.finished.connect(lambda *args: finished.append(args))
+        worker.progress.connect(progress.append)
+        with patch("core.export_summary_dialog.get_db_manager", return_value=self.db_manager), \
+             patch("core.export_summary_dialog.get_llm_service", return_value=llm_service), \
+             patch("core.export_summary_dialog.get_summary_cache", return_value=summary_cache):
+            worker.run()
+        return worker, finished[0], progress
+
+    def test_summaries_are_generated_through_one_batch_call_then_served_from_cache(self):
+        llm_service = FakeLLMService()
+        summary_cache = SummaryCache(os.path.join(self.tmpdir.name, "summary_cache.db"))
+        self.addCleanup(summary_cache.close)
+
+        worker, (success, message, tasks), progress = self._run_worker(llm_service, summary_cache)
+
+        self.assertEqual(len(llm_service.batches), 1, "所有任务应在一次批量调用中提交")
+        self.assertTrue(success)
+        self.assertEqual(message, "概要生成成功（1/1）")
+        self.assertEqual(tasks[0]["summary"], "task-1 的工作概要")
+        self.assertIn("正在使用AI生成任务总结... (1/1)", progress)
+        self.assertEqual((worker.cache_hits, worker.cache_lookups), (0, 1))
+
+        worker, (success, message, tasks), _progress = self._run_worker(llm_service, summary_cache)
+
+        self.assertEqual(len(llm_service.batches), 1, "提示词未变时应直接命中缓存，不再调用LLM")
+        self.assertEqual(tasks[0]["summary"], "task-1 的工作概要")
+        self.assertEqual((worker.cache_hits, worker.cache_lookups), (1, 1))
+
+    def test_small_tasks_share_one_packed_request(self):
+        conn = self.db_manager.get_connection()
+        for task_id in ("task-2", "task-3"):
+            conn.execute("INSERT INTO tasks (id, text, created_at) VALUES (?, ?, '2026-04-01')", (task_id, task_id))
+            conn.execute(
+                "INSERT INTO task_history (task_id, field_name, field_value, action, timestamp) VALUES (?, 'text', ?, 'create', '2026-04-05 09:00:00')",
+                (task_id, task_id),
+            )
+        conn.commit()
+        llm_service = FakeLLMService()
+
+        worker, (success, message, tasks), _progress = self._run_worker(llm_service, None)
+
+        self.assertEqual(len(llm_service.batches[0]), 1, "三个小任务应打包进同一个请求")
+        self.assertEqual(message, "概要生成成功（3/3）")
+        self.assertEqual({task["id"]: task["summary"] for task in tasks}, {
+            "task-1": "task-1 的工作概要",
+            "task-2": "task-2 的工作概要",
+            "task-3": "task-3 的工作概要",
+        })
+        self.assertEqual((worker.prompt_stats.naive_requests, worker.prompt_stats.requests), (3, 1))
+        self.assertEqual(worker.cache_lookups, 0)
+
+    def test_each_summary_is_streamed_and_cancel_keeps_finished_rows(self):
+        conn = self.db_manager.get_connection()
+        for task_id in ("task-2", "task-3"):
+            conn.execute("INSERT INTO tasks (id, text, created_at) VALUES (?, ?, '2026-04-01')", (task_id, task_id))
+            conn.execute(
+                "INSERT INTO task_history (task_id, field_name, field_value, action, timestamp) VALUES (?, 'text', ?, 'create', '2026-04-05 09:00:00')",
+                (task_id, task_id),
+            )
+        conn.commit()
+        worker = SummaryWorker("2026-04-01", "2026-04-30")
+        loaded, streamed, finished = [], [], []
+        worker.tasks_loaded.connect(loaded.append)
+        worker.summary_ready.connect(lambda *args: streamed.append(args))
+        # 第一个任务完成后立即停止
+        worker.summary_ready.connect(lambda *_args: worker.cancel())
+        worker.finished.connect(lambda *args: finished.append(args))
+        single_task_plan = functools.partial(build_summary_plan, max_tasks_per_batch=1)
+        with patch("core.export_summary_dialog.get_db_manager", return_value=self.db_manager), \
+             patch("core.export_summary_dialog.get_llm_service", return_value=FakeLLMService()), \
+             patch("core.export_summary_dialog.get_summary_cache", return_value=None), \
+             patch("core.export_summary_dialog.build_summary_plan", single_task_plan):
+            worker.run()
+
+        self.assertEqual([task["summary"] for task in loaded[0]], ["生成中..."] * 3)
+        self.assertEqual(streamed, [(0, "task-1 的工作概要", True)], "取消后不应再回传后续请求")
+        success, message, tasks = finished[0]
+        self.assertTrue(success, "停止后已完成的部分仍可导出")
+        self.assertEqual(message, "已停止生成（完成 1/3）")
+        self.assertEqual(tasks[0]["summary"], "task-1 的工作概要")
+
+
+class ExportSummaryDialogStreamingTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_stopped_generation_exports_only_finished_rows(self):
+        dialog = ExportSummaryDialog()
+        self.addCleanup(dialog.deleteLater)
+        tasks = [{"id": f"task-{index}", "text": f"任务{index}", "summary": "生成中..."} for index in range(3)]
+
+        dialog._on_tasks_loaded([dict(task) for task in tasks])
+        dialog._on_summary_ready(1, "任务1 的工作概要", True)
+
+        self.assertEqual(dialog.summary_table.cell_text(1, 1), "任务1 的工作概要")
+        self.assertEqual(dialog.summary_table.cell_text(0, 1), "生成中...")
+        self.assertTrue(dialog.export_button.isEnabled(), "有已完成的行即可导出")
+
+        dialog.worker = SummaryWorker("2026-04-01", "2026-04-30")
+        dialog.worker.cancel()
+        dialog._on_finished(True, "已停止生成（完成 1/3）", tasks)
+
+        self.assertEqual([task["id"] for task in dialog._export_rows()], ["task-1"])
+        self.assertEqual(dialog.summary_table.cell_text(2, 1), "（已停止，未生成）")
+
+
+if __name__ == "__main__":
+    unittest.main()
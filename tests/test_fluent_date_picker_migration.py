@@ -122,7 +122,7 @@ class FluentDatePickerMigrationTests(unittest.TestCase):
     def test_core_dialogs_should_use_fluent_calendar_picker_helpers(self):
         for rel_path in (
             "core/add_task_dialog.py",
-            "core/scheduler.py",
+            "core/scheduled_task_dialog.py",
             "core/export_summary_dialog.py",
         ):
             source = self._read(rel_path)
@@ -1,14 +1,24 @@
-"""甘特图 Flask 服务：日期解析与 /tasks 路由映射规则"""
+"""甘特图 Flask 服务：日期解析、/tasks 路由映射规则、只读连接/ETag/gzip 读路径、时间窗口分页、SSE 变更流与本地提供的前端资源"""
 
+import gzip
+import json
 import os
+import re
+import shutil
 import sqlite3
+import subprocess
 import tempfile
+import threading
 import unittest
 from datetime import datetime, timedelta
+from pathlib import Path
 from unittest.mock import patch
 
+from core.metrics import get_metrics_registry
 from gantt import app as gantt_module
 from gantt.app import gantt_app, parse_date
+from gantt.assets import CDN_URLS, IMMUTABLE_CACHE_CONTROL, VENDOR_DIR, VENDOR_FILES, load_vendor_assets, vendor_assets
+from database.task_dates import normalize_task_date
 
 
 class ParseDateTests(unittest.TestCase):
@@ -23,11 +33,15 @@ class ParseDateTests(unittest.TestCase):
                 self.assertIsNone(parse_date(raw))
 
 
-class TasksRouteTests(unittest.TestCase):
+class _TasksDbTestCase(unittest.TestCase):
+    """临时数据库上的最小 tasks 表，DB_PATH 指向它"""
+
     def setUp(self):
         fd, self.db_path = tempfile.mkstemp(suffix=".db")
         os.close(fd)
         self.addCleanup(self._cleanup)
+        # 先关闭复用的只读连接，再删除数据库文件
+        self.addCleanup(gantt_module.close_read_connection)
         conn = sqlite3.connect(self.db_path)
         conn.execute(
             """
@@ -69,6 +83,8 @@ class TasksRouteTests(unittest.TestCase):
         conn.commit()
         conn.close()
 
+
+class TasksRouteTests(_TasksDbTestCase):
     def test_maps_task_row_to_frappe_gantt_shape(self):
         self._insert()
         payload = self.client.get("/tasks").get_json()
@@ -109,6 +125,362 @@ class TasksRouteTests(unittest.TestCase):
         self.assertEqual(payload[0]["name"], "fallback")
         self.assertEqual(payload[0]["color"], "#4ECDC4")
 
+    def test_completed_text_flags_are_filtered_in_sql(self):
+        self._insert(id="done-text", completed="true")
+        self._insert(id="kept", completed=None)
+        payload = self.client.get("/tasks").get_json()
+        self.assertEqual([t["id"] for t in payload], ["kept"])
+
+
+class TasksReadPathTests(_TasksDbTestCase):
+    """只读连接复用、ETag/304、序列化缓存与 gzip"""
+
+    def test_unchanged_data_returns_304_and_changes_invalidate_etag(self):
+        self._insert()
+        first = self.client.get("/tasks")
+        etag = first.headers["ETag"]
+        self.assertEqual(first.headers["Cache-Control"], "no-cache")
+
+        cached = self.client.get("/tasks", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+
+        self._insert(id="t2")
+        changed = self.client.get("/tasks", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+        self.assertEqual([t["id"] for t in changed.get_json()], ["t1", "t2"])
+
+    def test_payload_is_serialized_once_on_a_reused_read_only_connection(self):
+        self._insert()
+        queries = []
+        query = gantt_module._query_open_tasks
+
+        def tracking_query(conn):
+            queries.append(conn)
+            return query(conn)
+
+        with patch.object(gantt_module, "_query_open_tasks", tracking_query):
+            for _ in range(3):
+                self.assertEqual(self.client.get("/tasks").status_code, 200)
+
+        self.assertEqual(len(queries), 1, "数据未变化时应直接返回已序列化的结果")
+        with self.assertRaises(sqlite3.OperationalError):
+            queries[0].execute("DELETE FROM tasks")
+
+    def test_gzip_is_used_when_accepted_and_payload_is_large(self):
+        for index in range(20):
+            self._insert(id=f"t{index}", notes="备注" * 20)
+        plain = self.client.get("/tasks")
+        compressed = self.client.get("/tasks", headers={"Accept-Encoding": "gzip"})
+
+        self.assertIsNone(plain.headers.get("Content-Encoding"))
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed.headers["Vary"])
+        self.assertLess(len(compressed.data), len(plain.data))
+        self.assertEqual(gzip.decompress(compressed.data), plain.data)
+        self.assertNotEqual(compressed.headers["ETag"], plain.headers["ETag"], "不同编码的表示应有不同的 ETag")
+
+
+class TasksWindowTests(_TasksDbTestCase):
+    """/tasks?from=&to=&limit=&cursor=：按时间窗口与键集游标分页"""
+
+    def setUp(self):
+        super().setUp()
+        # 与桌面端 schema 版本 2 一致的规范化日期列和索引
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("ALTER TABLE tasks ADD COLUMN due_date_iso TEXT")
+        conn.execute("ALTER TABLE tasks ADD COLUMN create_date_iso TEXT")
+        conn.execute("CREATE INDEX idx_tasks_due_create_iso ON tasks(due_date_iso, create_date_iso)")
+        conn.execute("CREATE INDEX idx_tasks_create_date_iso ON tasks(create_date_iso)")
+        conn.commit()
+        conn.close()
+
+    def _insert(self, **kw):
+        super()._insert(**kw)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "UPDATE tasks SET due_date_iso = ?, create_date_iso = ? WHERE id = ?",
+            (normalize_task_date(kw.get("due_date", "2026-06-10")), normalize_task_date(kw.get("create_date", "2026-06-01")),
+             kw.get("id", "t1")),
+        )
+        conn.commit()
+        conn.close()
+
+    def _ids(self, url, **kw):
+        response = self.client.get(url, **kw)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [task["id"] for task in response.get_json()["tasks"]]
+
+    def test_only_tasks_overlapping_the_window_are_returned(self):
+        self._insert(id="before", create_date="2026-05-01", due_date="2026-05-31")
+        self._insert(id="spanning", create_date="2026-05-20", due_date="2026-07-20")
+        self._insert(id="inside", create_date="2026/06/05 09:00:00", due_date="2026-06-06")
+        self._insert(id="after", create_date="2026-07-01", due_date="2026-07-05")
+        # 无到期日：结束于开始日 + 3 天，05-30 开始的与窗口相交，05-27 开始的不相交
+        self._insert(id="undated-in", create_date="2026-05-30", due_date=None)
+        self._insert(id="undated-out", create_date="2026-05-27", due_date=None)
+
+        ids = self._ids("/tasks?from=2026-06-01&to=2026-06-30")
+
+        self.assertEqual(ids, ["undated-in", "inside", "spanning"])
+        self.assertEqual(self._ids("/tasks?to=2026-05-28"), ["undated-out", "before", "spanning"])
+
+    def test_tasks_without_create_date_start_today(self):
+        today = datetime.today().date()
+        self._insert(id="no-start", create_date=None, due_date=None)
+        window = f"from={today.isoformat()}&to={(today + timedelta(days=7)).isoformat()}"
+        self.assertEqual(self._ids(f"/tasks?{window}"), ["no-start"])
+        self.assertEqual(self._ids("/tasks?from=2020-01-01&to=2020-01-31"), [])
+
+    def test_cursor_pages_cover_every_task_once_in_order(self):
+        for index in range(7):
+            self._insert(id=f"t{index}", create_date="2026-06-01", due_date=f"2026-06-{10 + index % 3:02d}")
+        self._insert(id="undated", create_date="2026-06-02", due_date=None)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            url = "/tasks?from=2026-06-01&to=2026-06-30&limit=3" + (f"&cursor={cursor}" if cursor else "")
+            data = self.client.get(url).get_json()
+            self.assertLessEqual(len(data["tasks"]), 3)
+            seen.extend(task["id"] for task in data["tasks"])
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [task["id"] for task in self.client.get("/tasks").get_json()])
+        self.assertEqual(seen[0], "undated", "排序键取 due_date，为空时取 create_date")
+
+    def test_invalid_parameters_return_400(self):
+        for query in ("from=明天", "from=2026-07-01&to=2026-06-01", "limit=0", "limit=abc",
+                      "limit=100000", "cursor=%%%", "cursor=WzFd"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/tasks?{query}")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.get_json())
+
+    def test_window_etag_is_distinct_and_invalidated_by_changes(self):
+        self._insert(id="a")
+        first = self.client.get("/tasks?from=2026-06-01&to=2026-06-30")
+        other = self.client.get("/tasks?from=2026-06-01&to=2026-06-15")
+        self.assertNotEqual(first.headers["ETag"], other.headers["ETag"])
+        self.assertNotEqual(first.headers["ETag"], self.client.get("/tasks").headers["ETag"])
+
+        cached = self.client.get("/tasks?from=2026-06-01&to=2026-06-30", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+
+        self._insert(id="b")
+        changed = self.client.get("/tasks?from=2026-06-01&to=2026-06-30", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual([task["id"] for task in changed.get_json()["tasks"]], ["a", "b"])
+
+    def test_window_query_uses_date_index(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        self.addCleanup(conn.close)
+        captured = []
+        conn.set_trace_callback(captured.append)
+        gantt_module._query_task_window(conn, gantt_module._TaskWindow("2026-06-01", "2026-06-30", None, 10), "2026-10-19")
+        sql = next(statement for statement in captured if "LIMIT" in statement)
+
+        plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        self.assertRegex(plan, r"USING INDEX idx_tasks_(due|create)_")
+        self.assertNotIn("SCAN tasks", plan)
+
+    def test_legacy_table_without_iso_columns_is_filtered_after_mapping(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP INDEX idx_tasks_due_create_iso")
+        conn.execute("DROP INDEX idx_tasks_create_date_iso")
+        conn.execute("ALTER TABLE tasks DROP COLUMN due_date_iso")
+        conn.execute("ALTER TABLE tasks DROP COLUMN create_date_iso")
+        conn.commit()
+        conn.close()
+        super()._insert(id="old", create_date="2026/05/01 08:00:00", due_date="2026-05-02")
+        super()._insert(id="current", create_date="2026/06/03 08:00:00", due_date=None)
+
+        self.assertEqual(self._ids("/tasks?from=2026-06-01&to=2026-06-30"), ["current"])
+
+
+class TasksStreamTests(_TasksDbTestCase):
+    """/tasks/stream：共享轮询、增量事件与断线补发；轮询由测试手动触发"""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(gantt_module.close_change_feed)
+        patcher = patch.object(gantt_module._change_feed, "interval", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _open_stream(self, headers=None, url="/tasks/stream"):
+        response = self.client.get(url, headers=headers or {})
+        self.addCleanup(response.close)
+        chunks = response.iter_encoded()
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+        return response, chunks
+
+    @staticmethod
+    def _parse(chunk):
+        fields = dict(line.split(": ", 1) for line in chunk.decode("utf-8").strip().split("\n"))
+        return fields["id"], fields["event"], json.loads(fields["data"])
+
+    def _update(self, sql, *params):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    def test_many_streams_share_one_poll_and_receive_the_same_changes(self):
+        self._insert(id="a")
+        streams = [self._open_stream()[1] for _ in range(3)]
+        for chunks in streams:
+            _id, event, data = self._parse(next(chunks))
+            self.assertEqual((event, [task["id"] for task in data["tasks"]]), ("snapshot", ["a"]))
+
+        queries = []
+        query = gantt_module._query_open_tasks
+        self._insert(id="b", create_date="2026-05-01", due_date=None)
+        with patch.object(gantt_module, "_query_open_tasks", lambda conn: queries.append(conn) or query(conn)):
+            gantt_module._change_feed.poll()
+            self.assertIsNone(gantt_module._change_feed.poll(), "数据未变化时不应再广播")
+
+        self.assertEqual(len(queries), 1, "多个页面只触发一次数据库查询")
+        feed_threads = [thread for thread in threading.enumerate() if thread.name == "GanttChangeFeed"]
+        self.assertEqual(len(feed_threads), 1)
+        for chunks in streams:
+            _id, event, data = self._parse(next(chunks))
+            self.assertEqual(event, "changes")
+            self.assertEqual([task["id"] for task in data["upserts"]], ["b"])
+            self.assertEqual(data["upserts"][0]["end"], "2026-05-04")
+            self.assertEqual((data["deletes"], data["order"]), ([], ["b", "a"]))
+
+    def test_edits_are_upserts_and_completed_tasks_are_deletes(self):
+        self._insert(id="a")
+        self._insert(id="b", due_date="2026-06-20")
+        _response, chunks = self._open_stream()
+        next(chunks)
+
+        self._update("UPDATE tasks SET text = '改名' WHERE id = 'a'")
+        self._update("UPDATE tasks SET completed = 1 WHERE id = 'b'")
+        gantt_module._change_feed.poll()
+
+        _id, _event, data = self._parse(next(chunks))
+        self.assertEqual([(task["id"], task["name"]) for task in data["upserts"]], [("a", "改名")])
+        self.assertEqual(data["deletes"], ["b"])
+
+    def test_reconnect_replays_missed_changes_or_falls_back_to_snapshot(self):
+        self._insert(id="a")
+        response, chunks = self._open_stream()
+        last_id, _event, _data = self._parse(next(chunks))
+        response.close()
+
+        self._update("UPDATE tasks SET notes = '第一次' WHERE id = 'a'")
+        gantt_module._change_feed.poll()
+        self._update("UPDATE tasks SET notes = '第二次' WHERE id = 'a'")
+        gantt_module._change_feed.poll()
+
+        _response, chunks = self._open_stream(headers={"Last-Event-ID": last_id})
+        replayed = [self._parse(next(chunks)) for _ in range(2)]
+        self.assertEqual([event for _id, event, _data in replayed], ["changes", "changes"])
+        self.assertEqual(replayed[-1][2]["upserts"][0]["notes"], "第二次")
+
+        _response, chunks = self._open_stream(headers={"Last-Event-ID": "旧进程:1"})
+        _id, event, data = self._parse(next(chunks))
+        self.assertEqual((event, data["tasks"][0]["notes"]), ("snapshot", "第二次"))
+
+    def test_windowed_pages_receive_snapshots_without_task_list(self):
+        self._insert(id="a")
+        _response, chunks = self._open_stream(url="/tasks/stream?window=1")
+        _id, event, data = self._parse(next(chunks))
+        self.assertEqual(event, "snapshot")
+        self.assertNotIn("tasks", data)
+        self.assertIn("seq", data)
+
+        self._update("UPDATE tasks SET text = '改名' WHERE id = 'a'")
+        gantt_module._change_feed.poll()
+        _id, event, data = self._parse(next(chunks))
+        self.assertEqual((event, data["upserts"][0]["name"]), ("changes", "改名"))
+
+
+class VendorAssetTests(unittest.TestCase):
+    """frappe-gantt 使用随仓库提交的预构建文件：哈希文件名、预压缩与长缓存"""
+
+    def setUp(self):
+        self.client = gantt_app.test_client()
+
+    def _asset_urls(self):
+        html = self.client.get("/").get_data(as_text=True)
+        self.assertNotIn("cdn.jsdelivr.net", html, "首屏不应再依赖 CDN")
+        return re.findall(r'"(/vendor/frappe-gantt\.[0-9a-f]{12}\.(?:js|css))"', html)
+
+    def test_index_references_hashed_assets_served_with_immutable_cache(self):
+        urls = self._asset_urls()
+        self.assertEqual(len(urls), 2)
+
+        for url in urls:
+            with self.subTest(url=url):
+                plain = self.client.get(url)
+                compressed = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+                self.assertEqual(plain.status_code, 200)
+                self.assertEqual(plain.headers["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+                self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+                self.assertEqual(gzip.decompress(compressed.data), plain.data)
+                self.assertLess(len(compressed.data), len(plain.data))
+                revalidated = self.client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+                self.assertEqual(revalidated.status_code, 304)
+
+        self.assertEqual(self.client.get("/vendor/frappe-gantt.000000000000.js").status_code, 404)
+        self.assertEqual(self.client.get("/vendor/frappe-gantt.js").headers["Cache-Control"], "no-cache")
+        self.assertEqual(self.client.get("/").headers["Cache-Control"], "no-cache")
+
+    def test_assets_are_the_checked_in_vendor_files(self):
+        assets = vendor_assets()
+
+        for logical_name, (filename, _mimetype) in VENDOR_FILES.items():
+            with self.subTest(name=logical_name):
+                self.assertEqual(assets[logical_name].body, (VENDOR_DIR / filename).read_bytes(), "服务端不应改写预构建文件")
+                self.assertEqual(assets[logical_name].gzip_body, load_vendor_assets()[logical_name].gzip_body, "同内容同压缩结果")
+        stylesheet = assets["frappe-gantt.css"].body.decode("utf-8")
+        self.assertIn("--g-bar-color", stylesheet)
+        self.assertNotIn("&", stylesheet, "样式不应依赖较旧 WebEngine 不支持的 CSS 嵌套")
+
+    def test_missing_vendor_files_fall_back_to_cdn(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(FileNotFoundError):
+                load_vendor_assets(Path(tmpdir))
+
+            gantt_module._index_page.cache_clear()
+            self.addCleanup(gantt_module._index_page.cache_clear)
+            with patch.object(gantt_module, "vendor_assets", side_effect=FileNotFoundError("frappe-gantt.umd.js")), \
+                    self.assertLogs("gantt.app", level="ERROR"):
+                html = self.client.get("/").get_data(as_text=True)
+
+        self.assertIn(CDN_URLS["frappe-gantt.js"], html)
+
+    @unittest.skipUnless(shutil.which("node"), "需要 node 执行预构建脚本")
+    def test_vendored_bundle_exposes_gantt_api_used_by_page(self):
+        script = vendor_assets()["frappe-gantt.js"].body.decode("utf-8")
+        probe = "\nconst p = globalThis.Gantt.prototype; process.stdout.write(['setup_tasks', 'update_task', 'change_view_mode'].every((m) => typeof p[m] === 'function') ? 'ok' : 'missing');"
+
+        result = subprocess.run(["node", "-e", script + probe], capture_output=True, text=True, timeout=30)
+
+        self.assertEqual(result.stdout, "ok", result.stderr)
+
+
+class MetricsRouteTests(unittest.TestCase):
+    def test_metrics_are_served_in_prometheus_text_format(self):
+        get_metrics_registry().counter("taskmanager_test_gantt_requests_total", "测试计数").inc()
+
+        response = gantt_app.test_client().get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+        body = response.get_data(as_text=True)
+        self.assertIn("# TYPE taskmanager_test_gantt_requests_total counter", body)
+        self.assertRegex(body, r"\ntaskmanager_test_gantt_requests_total [1-9]")
+
 
 if __name__ == "__main__":
     unittest.main()
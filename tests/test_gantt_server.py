@@ -0,0 +1,170 @@
+"""托管的甘特图服务：临时端口、多线程处理、就绪信号与退出时干净关闭"""
+
+import http.client
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from unittest.mock import patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication, QEvent, QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from core.gantt_service import GanttService
+from gantt import app as gantt_module
+from gantt import server as server_module
+from gantt.server import GanttServer
+
+
+def _wait_for_signal(signal, predicate, timeout_ms=5000):
+    """在嵌套事件循环里等待 signal 送达，直到 predicate() 成立或超时；不手动轮询事件"""
+    if predicate():
+        return True
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+
+    def on_signal(*_args):
+        if predicate():
+            loop.quit()
+
+    signal.connect(on_signal)
+    timer.start(timeout_ms)
+    try:
+        loop.exec()
+    finally:
+        timer.stop()
+        signal.disconnect(on_signal)
+    return predicate()
+
+
+def _flush_deferred_deletes():
+    # 前面模块 deleteLater 的控件在这里销毁，不要留到本模块的事件循环里
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+
+class _GanttDbTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE tasks (id TEXT PRIMARY KEY, text TEXT, notes TEXT, create_date TEXT, "
+            "due_date TEXT, completed INTEGER, deleted INTEGER, color TEXT)"
+        )
+        conn.execute("INSERT INTO tasks VALUES ('t1', '写周报', '', '2026-05-01', '2026-05-03', 0, 0, '#FF6B6B')")
+        conn.commit()
+        conn.close()
+        # 服务会改写 DB_PATH；测试结束后还原，并在删除文件前关闭复用的只读连接
+        patcher = patch.object(gantt_module, "DB_PATH", gantt_module.DB_PATH)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(gantt_module.close_read_connection)
+        self.addCleanup(gantt_module.close_change_feed)
+        interval = patch.object(gantt_module._change_feed, "interval", 3600)
+        interval.start()
+        self.addCleanup(interval.stop)
+
+
+class GanttServerTests(_GanttDbTestCase):
+    def test_ephemeral_port_serves_requests_while_stream_is_open_and_shuts_down(self):
+        server = GanttServer(db_path=self.db_path)
+        self.addCleanup(server.shutdown)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        self.assertNotEqual(server.port, 5000)
+        self.assertGreater(server.port, 0)
+        stream = http.client.HTTPConnection(server.host, server.port, timeout=5)
+        stream.request("GET", "/tasks/stream")
+        stream_response = stream.getresponse()
+        self.assertEqual(stream_response.readline(), b"retry: 3000\n")
+
+        # 事件流占着一个处理线程时，其它请求仍能并发处理
+        with urllib.request.urlopen(f"{server.url}tasks", timeout=5) as response:
+            self.assertEqual([task["id"] for task in json.loads(response.read())], ["t1"])
+
+        started = time.monotonic()
+        server.shutdown()
+        thread.join(3)
+
+        self.assertFalse(thread.is_alive())
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertIn(b"event: snapshot", stream_response.read(), "关闭服务时事件流应正常结束而不是挂起")
+        stream.close()
+        with self.assertRaises(OSError):
+            urllib.request.urlopen(f"{server.url}tasks", timeout=1)
+
+    def test_shutdown_before_serving_releases_port(self):
+        server = GanttServer()
+        server.shutdown()
+        server.serve_forever()  # 已关闭时直接返回
+
+        rebound = GanttServer(port=server.port)
+        rebound.shutdown()
+
+
+class GanttServiceTests(_GanttDbTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        super().setUp()
+        _flush_deferred_deletes()
+
+    def tearDown(self):
+        _flush_deferred_deletes()
+        super().tearDown()
+
+    def test_readiness_is_signalled_to_gui_thread_and_stop_is_clean(self):
+        service = GanttService(db_path=self.db_path)
+        self.addCleanup(service.stop)
+        ready = []
+        service.ready.connect(lambda url: ready.append((url, threading.get_ident())))
+
+        service.start()
+        service.start()
+
+        self.assertTrue(_wait_for_signal(service.ready, lambda: ready))
+        url, thread_id = ready[0]
+        self.assertEqual(thread_id, threading.get_ident(), "就绪信号应回到 GUI 线程")
+        self.assertEqual(service.url, url)
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertIn("text/html", response.headers["Content-Type"])
+        self.assertEqual(len(ready), 1, "运行中重复 start 不应再启动一个服务")
+
+        service.stop()
+
+        self.assertFalse(service.is_running())
+        self.assertIsNone(service.url)
+        with self.assertRaises(OSError):
+            urllib.request.urlopen(url, timeout=1)
+
+        service.start()
+        self.assertTrue(_wait_for_signal(service.ready, lambda: len(ready) == 2), "停止后可再次启动")
+
+    def test_startup_failure_is_reported_through_signal(self):
+        service = GanttService(db_path=self.db_path)
+        self.addCleanup(service.stop)
+        failures = []
+        service.failed.connect(failures.append)
+
+        with patch.object(server_module, "GanttServer", side_effect=OSError("地址不可用")):
+            service.start()
+            self.assertTrue(_wait_for_signal(service.failed, lambda: failures))
+
+        self.assertEqual(failures, ["地址不可用"])
+        self.assertIsNone(service.url)
+
+
+if __name__ == "__main__":
+    unittest.main()
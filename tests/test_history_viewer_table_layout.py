@@ -1,5 +1,8 @@
+import contextlib
+import csv
 import os
 import sys
+import tempfile
 import types
 import unittest
 from pathlib import Path
@@ -30,6 +33,7 @@ from PyQt6.QtWidgets import QApplication, QLineEdit, QTableWidget, QVBoxLayout,
 from core.complete_table import CompleteTableDialog
 from core.history_viewer import HistoryViewer
 from ui.adaptive_table import AdaptiveTextTableWidget, compute_multiline_item_size_hint
+from ui.paged_table import PagedTableView
 
 
 class FakeCompletedTasksDbManager:
@@ -37,7 +41,6 @@ class FakeCompletedTasksDbManager:
         self.tasks = list(tasks)
         self.page_calls = []
         self.count_calls = []
-        self.id_calls = []
 
     def load_tasks(self, all_tasks=False):
         raise AssertionError("已完成任务弹窗不应再通过 load_tasks(all_tasks=True) 全量加载")
@@ -62,10 +65,6 @@ class FakeCompletedTasksDbManager:
         self.count_calls.append(search_query)
         return len(self._filtered_tasks(search_query))
 
-    def load_completed_task_ids(self, search_query=""):
-        self.id_calls.append(search_query)
-        return [task["id"] for task in self._filtered_tasks(search_query)]
-
 
 class FakeHistoryDbManager:
     def __init__(self, records):
@@ -74,46 +73,46 @@ class FakeHistoryDbManager:
         self.full_history_calls = []
 
     def count_task_history(self, task_id):
-        return len([record for record in self.records if record["task_id"] == task_id])
+        raise AssertionError("打开历史弹窗不应再统计历史总数")
 
-    def get_task_history_page(self, task_id, limit=100, offset=0):
-        self.page_calls.append({"task_id": task_id, "limit": limit, "offset": offset})
-        selected = [
-            record
-            for record in self.records
+    def _rows(self, task_id, ascending):
+        rows = [
+            {
+                "rowid": index + 1,
+                "field_name": record["field_name"],
+                "value": record["value"],
+                "action": record["action"],
+                "timestamp": record["timestamp"],
+            }
+            for index, record in enumerate(self.records)
             if record["task_id"] == task_id
-        ][offset:offset + limit]
-        grouped = {}
-        for record in selected:
-            grouped.setdefault(record["field_name"], []).append(
-                {
-                    "timestamp": record["timestamp"],
-                    "action": record["action"],
-                    "value": record["value"],
-                }
-            )
-        return grouped
-
-    def get_task_history(self, task_id):
+        ]
+        return sorted(rows, key=lambda row: (row["timestamp"], row["rowid"]), reverse=not ascending)
+
+    def get_task_history_rows(self, task_id, limit=100, after=None, ascending=False):
+        self.page_calls.append({"task_id": task_id, "limit": limit, "after": after})
+        rows = self._rows(task_id, ascending)
+        if after is not None:
+            if ascending:
+                rows = [row for row in rows if (row["timestamp"], row["rowid"]) > tuple(after)]
+            else:
+                rows = [row for row in rows if (row["timestamp"], row["rowid"]) < tuple(after)]
+        return rows[:limit]
+
+    def iter_task_history_rows(self, task_id, batch_size=500, ascending=True):
         self.full_history_calls.append(task_id)
-        grouped = {}
-        for record in self.records:
-            if record["task_id"] != task_id:
-                continue
-            grouped.setdefault(record["field_name"], []).append(
-                {
-                    "timestamp": record["timestamp"],
-                    "action": record["action"],
-                    "value": record["value"],
-                }
-            )
-        return grouped
+        return iter(self._rows(task_id, ascending))
+
+    def open_read_connection(self):
+        return None
+
+    def use_read_connection(self, conn):
+        return contextlib.nullcontext()
 
 
 class FakeCompletedTasksStaleCountDbManager:
     def __init__(self):
         self.page_calls = []
-        self.id_calls = []
 
     def count_completed_tasks(self, search_query=""):
         return 3
@@ -127,32 +126,6 @@ class FakeCompletedTasksStaleCountDbManager:
             ][:limit]
         return []
 
-    def load_completed_task_ids(self, search_query=""):
-        self.id_calls.append(search_query)
-        return ["task-1", "task-2"]
-
-
-class FakeHistoryStaleCountDbManager:
-    def __init__(self):
-        self.page_calls = []
-
-    def count_task_history(self, task_id):
-        return 3
-
-    def get_task_history_page(self, task_id, limit=100, offset=0):
-        self.page_calls.append({"task_id": task_id, "limit": limit, "offset": offset})
-        if offset == 0:
-            return {
-                "text": [
-                    {"timestamp": "2026-04-04T09:00:00", "action": "update", "value": "记录一"},
-                    {"timestamp": "2026-04-03T09:00:00", "action": "update", "value": "记录二"},
-                ][:limit]
-            }
-        return {}
-
-    def get_task_history(self, task_id):
-        return {}
-
 
 class HistoryViewerTableLayoutTests(unittest.TestCase):
     @classmethod
@@ -173,13 +146,13 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
             elapsed += interval_ms
         return predicate()
 
-    def test_history_viewer_should_build_table_through_adaptive_widget(self):
+    def test_history_viewer_should_build_table_through_paged_view(self):
         source = self._read("core/history_viewer.py")
 
         self.assertIn(
-            "AdaptiveTextTableWidget(",
+            "PagedTableView(",
             source,
-            "历史记录弹窗应通过 ui 层的通用自适应表格组件创建表格",
+            "历史记录弹窗应通过 ui 层的分页模型/视图表格创建表格",
         )
 
     def test_history_viewer_should_render_merged_history_rows_without_tuple_index_errors(self):
@@ -200,44 +173,29 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
         )
 
         table = layout.itemAt(0).widget()
-        self.assertIsInstance(table, AdaptiveTextTableWidget)
+        self.assertIsInstance(table, PagedTableView)
         self.assertEqual(table.rowCount(), 1)
-        self.assertEqual(table.item(0, 1).text(), "备注")
+        self.assertEqual(table.cell_text(0, 1), "备注")
 
     def test_scheduler_should_build_table_through_adaptive_widget(self):
-        source = self._read("core/scheduler.py")
+        source = self._read("core/scheduled_task_dialog.py")
         self.assertIn(
             "AdaptiveTextTableWidget(",
             source,
             "定时任务表格应切换为 ui 层的通用自适应表格组件",
         )
 
-    def test_complete_table_should_build_table_through_adaptive_widget(self):
+    def test_complete_table_should_build_table_through_paged_view(self):
         source = self._read("core/archive_table.py")
         self.assertIn(
-            "AdaptiveTextTableWidget(",
+            "PagedTableView(",
             source,
-            "通用归档事项表格应通过 ui 层的自适应表格组件创建",
-        )
-        self.assertIn(
-            "rows = [",
-            source,
-            "已完成任务表格应先整理二维数据再创建通用表格组件",
-        )
-        self.assertIn(
-            "rows=rows",
-            source,
-            "已完成任务表格应在创建通用表格组件时直接传入二维数据",
+            "通用归档事项表格应通过 ui 层的分页模型/视图表格创建",
         )
         self.assertNotIn(
-            "text_item = QTableWidgetItem(task.get('text', ''))",
+            "QCheckBox()",
             source,
-            "已完成任务表格不应再逐个为任务内容创建 QTableWidgetItem",
-        )
-        self.assertNotIn(
-            "notes_item = QTableWidgetItem(notes)",
-            source,
-            "已完成任务表格不应再逐个为备注创建 QTableWidgetItem",
+            "归档事项表格的勾选状态应由模型维护，不再逐行创建复选框控件",
         )
 
     def test_ui_package_should_export_adaptive_table_widget(self):
@@ -247,6 +205,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
             exports,
             "ui 包应导出通用自适应表格组件，方便 core 层复用",
         )
+        self.assertIn("PagedTableView", exports)
 
     def test_compute_multiline_item_size_hint_should_expand_for_manual_line_breaks(self):
         table = QTableWidget()
@@ -305,9 +264,11 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             first_table = dialog.table
 
             dialog._load_completed_tasks()
+            dialog.data_executor.wait_for_idle()
 
             self.assertIs(
                 dialog.table,
@@ -315,7 +276,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
                 "刷新已完成任务时应复用同一个表格实例，避免出现重复表头",
             )
             self.assertEqual(
-                len(dialog.panel.findChildren(AdaptiveTextTableWidget)),
+                len(dialog.panel.findChildren(PagedTableView)),
                 1,
                 "面板内应始终只有一张已完成任务表格",
             )
@@ -349,6 +310,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             search_input = dialog.findChild(QLineEdit, "completed_task_search_input")
 
             self.assertIsNotNone(search_input, "已完成任务页面上方应提供标题搜索框")
@@ -360,7 +322,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
                 "搜索防抖延迟结束后应刷新出匹配结果",
             )
             visible_titles = [
-                dialog.table.item(row, 1).text()
+                dialog.table.cell_text(row, 1)
                 for row in range(dialog.table.rowCount())
             ]
 
@@ -388,6 +350,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             search_input = dialog.findChild(QLineEdit, "completed_task_search_input")
 
             search_input.setText("季度")
@@ -413,7 +376,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
             QApplication.processEvents()
 
             visible_titles = [
-                dialog.table.item(row, 1).text()
+                dialog.table.cell_text(row, 1)
                 for row in range(dialog.table.rowCount())
             ]
             self.assertEqual(visible_titles, ["年度复盘"])
@@ -429,16 +392,19 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 2
             dialog._load_completed_tasks()
+            dialog.data_executor.wait_for_idle()
 
             self.assertEqual(dialog.table.rowCount(), 2)
             dialog.load_more_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             self.assertEqual(dialog.table.rowCount(), 3)
             self.assertEqual(
-                [dialog.table.item(row, 1).text() for row in range(dialog.table.rowCount())],
+                [dialog.table.cell_text(row, 1) for row in range(dialog.table.rowCount())],
                 ["任务一", "任务二", "任务三"],
             )
             self.assertFalse(dialog.load_more_button.isEnabled())
@@ -455,16 +421,20 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 2
             dialog._load_completed_tasks()
+            dialog.data_executor.wait_for_idle()
 
             self.assertEqual(dialog.table.rowCount(), 2)
             dialog.select_all_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
-            self.assertEqual(dialog.selected_tasks, {"task-1", "task-2", "task-3"})
-            self.assertTrue(dialog.table.cellWidget(0, 0).isChecked())
-            self.assertTrue(dialog.table.cellWidget(1, 0).isChecked())
+            self.assertTrue(dialog.selection.all_matching)
+            self.assertEqual(dialog.selection.count(), 3, "未加载的第三行也计入全选")
+            self.assertTrue(dialog.table.model().is_row_checked(0))
+            self.assertTrue(dialog.table.model().is_row_checked(1))
             self.assertEqual(dialog.select_all_button.text(), "取消全选")
 
     def test_complete_table_select_all_should_clear_when_live_ids_all_selected_despite_stale_count(self):
@@ -472,21 +442,25 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 2
             dialog._load_completed_tasks()
+            dialog.data_executor.wait_for_idle()
 
             dialog.select_all_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
-            self.assertEqual(dialog.selected_tasks, {"task-1", "task-2"})
+            self.assertTrue(dialog.selection.all_matching)
             self.assertEqual(dialog.select_all_button.text(), "取消全选")
 
             dialog.select_all_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             self.assertEqual(dialog.selected_tasks, set())
-            self.assertFalse(dialog.table.cellWidget(0, 0).isChecked())
-            self.assertFalse(dialog.table.cellWidget(1, 0).isChecked())
+            self.assertFalse(dialog.table.model().is_row_checked(0))
+            self.assertFalse(dialog.table.model().is_row_checked(1))
             self.assertFalse(dialog.restore_button.isEnabled())
             self.assertEqual(dialog.select_all_button.text(), "全选")
 
@@ -502,6 +476,7 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 1
 
             search_input = dialog.findChild(QLineEdit, "completed_task_search_input")
@@ -517,17 +492,21 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
             )
 
             dialog.select_all_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
-            self.assertEqual(dialog.selected_tasks, {"task-1", "task-3"})
-            self.assertEqual(fake_db.id_calls[-1], "季度 报告")
+            self.assertEqual(dialog.selection.filter_key, "季度 报告", "全选绑定当前搜索词")
+            self.assertEqual(dialog.selection.count(), 2)
+            with self.assertRaises(ValueError, msg="全选形态不应物化全部匹配 ID"):
+                dialog.selected_tasks
 
             dialog.load_more_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             self.assertEqual(dialog.table.rowCount(), 2)
-            self.assertEqual(dialog.table.item(1, 1).text(), "季度报告校对")
-            self.assertTrue(dialog.table.cellWidget(1, 0).isChecked())
+            self.assertEqual(dialog.table.cell_text(1, 1), "季度报告校对")
+            self.assertTrue(dialog.table.model().is_row_checked(1))
 
     def test_complete_table_should_disable_sorting_to_keep_checkboxes_aligned_with_rows(self):
         fake_db = FakeCompletedTasksDbManager(
@@ -539,24 +518,28 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
 
             self.assertFalse(
                 dialog.table.isSortingEnabled(),
                 "已完成任务表依赖数据库排序，禁用交互排序可避免复选框 task_id 与可见行错位",
             )
-            self.assertEqual(dialog.table.item(0, 1).text(), "任务一")
-            self.assertEqual(dialog.table.cellWidget(0, 0).property("task_id"), "task-1")
+            self.assertEqual(dialog.table.cell_text(0, 1), "任务一")
+            self.assertEqual(dialog.table.model().record_id(0), "task-1")
 
     def test_complete_table_should_disable_load_more_after_stale_count_returns_empty_page(self):
         fake_db = FakeCompletedTasksStaleCountDbManager()
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 2
             dialog._load_completed_tasks()
+            dialog.data_executor.wait_for_idle()
 
             self.assertTrue(dialog.load_more_button.isEnabled())
             dialog.load_more_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             self.assertFalse(dialog.load_more_button.isEnabled())
@@ -574,15 +557,18 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
 
         with patch("core.complete_table.get_db_manager", return_value=fake_db):
             dialog = CompleteTableDialog()
+            dialog.data_executor.wait_for_idle()
             dialog.page_size = 1
             dialog._load_completed_tasks()
+            dialog.data_executor.wait_for_idle()
             dialog.load_more_button.click()
+            dialog.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             search_input = dialog.findChild(QLineEdit, "completed_task_search_input")
             search_input.setText("年度")
             self.assertTrue(
-                self._wait_until(lambda: dialog.table.item(0, 1).text() == "年度复盘"),
+                self._wait_until(lambda: dialog.table.cell_text(0, 1) == "年度复盘"),
                 "搜索后应重置 offset 并只渲染匹配结果第一页",
             )
 
@@ -607,34 +593,53 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
             viewer = HistoryViewer({"id": "task-1", "text": "测试任务"})
             viewer.page_size = 10
             viewer.load_history_records(viewer.history_container_layout)
+            viewer.data_executor.wait_for_idle()
 
             self.assertEqual(viewer.history_table.rowCount(), 10)
-            self.assertEqual(viewer.history_table.item(0, 3).text(), "记录30")
+            self.assertEqual(viewer.history_table.cell_text(0, 3), "记录30")
 
             viewer.load_more_button.click()
+            viewer.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             self.assertEqual(viewer.history_table.rowCount(), 20)
-            self.assertEqual(viewer.history_table.item(19, 3).text(), "记录11")
-            self.assertEqual(fake_db.page_calls[-1]["offset"], 10)
+            self.assertEqual(viewer.history_table.cell_text(19, 3), "记录11")
+            self.assertEqual(
+                fake_db.page_calls[-1]["after"],
+                ("2026-04-21T09:00:00", 10),
+                "下一页应从上一页最后一行的 (timestamp, rowid) 继续",
+            )
 
-    def test_history_viewer_should_disable_load_more_after_stale_count_returns_empty_page(self):
-        fake_db = FakeHistoryStaleCountDbManager()
+    def test_history_viewer_should_disable_load_more_after_short_page(self):
+        records = [
+            {
+                "task_id": "task-1",
+                "field_name": "text",
+                "timestamp": f"2026-04-0{day}T09:00:00",
+                "action": "update",
+                "value": f"记录{day}",
+            }
+            for day in (1, 2, 3)
+        ]
+        fake_db = FakeHistoryDbManager(records)
 
         with patch("core.history_viewer.get_db_manager", return_value=fake_db):
             viewer = HistoryViewer({"id": "task-1", "text": "测试任务"})
             viewer.page_size = 2
             viewer.load_history_records(viewer.history_container_layout)
+            viewer.data_executor.wait_for_idle()
 
             self.assertTrue(viewer.load_more_button.isEnabled())
             viewer.load_more_button.click()
+            viewer.data_executor.wait_for_idle()
             QApplication.processEvents()
 
             self.assertFalse(viewer.load_more_button.isEnabled())
             self.assertEqual(viewer.load_more_button.text(), "已全部加载")
-            self.assertEqual(fake_db.page_calls[-1]["offset"], 2)
+            self.assertEqual(viewer.history_table.rowCount(), 3)
+            self.assertEqual(viewer.history_table.cell_text(2, 3), "记录1")
 
-    def test_history_viewer_export_should_still_read_full_history(self):
+    def test_history_viewer_export_should_stream_full_history_in_background(self):
         records = [
             {
                 "task_id": "task-1",
@@ -653,26 +658,29 @@ class HistoryViewerTableLayoutTests(unittest.TestCase):
         ]
         fake_db = FakeHistoryDbManager(records)
 
-        class FakeDataFrame:
-            exported_rows = None
-
-            def __init__(self, rows):
-                FakeDataFrame.exported_rows = rows
-
-            def to_excel(self, filename, index=False):
-                self.filename = filename
-
-        fake_pandas = type("FakePandas", (), {"DataFrame": FakeDataFrame})
-
-        with patch("core.history_viewer.get_db_manager", return_value=fake_db), \
-             patch.dict(sys.modules, {"pandas": fake_pandas}), \
-             patch("PyQt6.QtWidgets.QFileDialog.getSaveFileName", return_value=("history.xlsx", "Excel文件 (*.xlsx)")), \
-             patch("core.history_viewer.show_success"):
-            viewer = HistoryViewer({"id": "task-1", "text": "测试任务"})
-            viewer.export_history()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "history")
+            with patch("core.history_viewer.get_db_manager", return_value=fake_db), \
+                 patch("PyQt6.QtWidgets.QFileDialog.getSaveFileName", return_value=(filename, "CSV文件 (*.csv)")), \
+                 patch("core.history_viewer.show_success") as show_success:
+                viewer = HistoryViewer({"id": "task-1", "text": "测试任务"})
+                viewer.export_history()
+                worker = viewer._history_export_worker
+                self.assertIsNotNone(worker, "导出应在后台线程进行")
+                self.assertTrue(worker.wait(5000))
+                QApplication.processEvents()
+
+            with open(filename + ".csv", encoding="utf-8-sig", newline="") as f:
+                rows = list(csv.reader(f))
 
         self.assertEqual(fake_db.full_history_calls, ["task-1"])
-        self.assertEqual(len(FakeDataFrame.exported_rows), 2)
+        self.assertEqual(rows, [
+            ["时间", "字段", "操作", "值"],
+            ["2026-04-01T09:00:00", "备注", "更新", "分页外记录"],
+            ["2026-04-04T09:00:00", "任务内容", "更新", "分页内记录"],
+        ])
+        show_success.assert_called_once()
+        self.assertIsNone(viewer._history_export_worker)
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,185 @@
+"""LLMService 批量异步接口：常驻事件循环、并发上限、令牌桶限速、抖动重试、按完成顺序回传与可选的按序回传"""
+
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from core.LLMService import LLMService, _TokenBucket
+
+
+class StubCompletions:
+    """本地桩客户端：按消息内容决定延迟与失败次数，并记录并发峰值和所在事件循环"""
+
+    def __init__(self, delays=None, failures=None):
+        self.delays = delays or {}
+        self.failures = dict(failures or {})
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.loops = set()
+        self.calls = []
+
+    async def create(self, model, messages, response_format):
+        content = messages[-1]["content"]
+        self.calls.append(content)
+        self.loops.add(id(asyncio.get_running_loop()))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(content, 0.01))
+            if self.failures.get(content, 0) > 0:
+                self.failures[content] -= 1
+                raise ConnectionError("Connection error")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"回复:{content}"))])
+        finally:
+            self.in_flight -= 1
+
+
+def _build_service(completions, **llm_config):
+    with patch("core.LLMService.load_config", return_value={"LLM_CONFIG": llm_config}):
+        service = LLMService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service
+
+
+def _messages(*contents):
+    return [[{"role": "user", "content": content}] for content in contents]
+
+
+class LLMServiceBatchTests(unittest.TestCase):
+    def test_results_are_delivered_as_they_complete_with_bounded_concurrency(self):
+        completions = StubCompletions(delays={"a": 0.15, "b": 0.01, "c": 0.05, "d": 0.01})
+        service = _build_service(completions, max_concurrency=2, requests_per_second=0)
+        self.addCleanup(service.close)
+        delivered = []
+
+        results = service.generate_many(_messages("a", "b", "c", "d"), {}, on_result=lambda i, text: delivered.append((i, text)))
+
+        self.assertEqual(results, ["回复:a", "回复:b", "回复:c", "回复:d"])
+        self.assertEqual([index for index, _text in delivered], [1, 2, 3, 0], "慢的首个请求不应推迟已完成的后序结果")
+        self.assertEqual(dict(delivered)[0], "回复:a")
+        self.assertEqual(completions.max_in_flight, 2)
+
+    def test_ordered_delivery_is_opt_in(self):
+        completions = StubCompletions(delays={"a": 0.15, "b": 0.01, "c": 0.05, "d": 0.01})
+        service = _build_service(completions, max_concurrency=2, requests_per_second=0)
+        self.addCleanup(service.close)
+        delivered = []
+
+        service.generate_many(_messages("a", "b", "c", "d"), {}, on_result=lambda i, text: delivered.append(i), ordered=True)
+
+        self.assertEqual(delivered, [0, 1, 2, 3], "ordered=True 时先完成的后序结果等前面的结果回调后再回调")
+
+    def test_per_request_schemas_are_passed_through(self):
+        completions = StubCompletions()
+        schemas = []
+        create = completions.create
+
+        async def recording_create(model, messages, response_format):
+            schemas.append(response_format["json_schema"]["schema"])
+            return await create(model, messages, response_format)
+
+        completions.create = recording_create
+        service = _build_service(completions, requests_per_second=0, max_concurrency=1)
+        self.addCleanup(service.close)
+
+        service.generate_many(_messages("a", "b"), [{"title": "single"}, {"title": "batch"}])
+
+        self.assertEqual(schemas, [{"title": "single"}, {"title": "batch"}])
+
+    def test_all_calls_share_one_long_lived_event_loop(self):
+        completions = StubCompletions()
+        service = _build_service(completions, requests_per_second=0)
+        self.addCleanup(service.close)
+
+        threads = [
+            threading.Thread(target=service.generate_response_sync, args=(_messages(f"t{i}")[0], {}))
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        service.generate_many(_messages("x", "y"), {})
+
+        self.assertEqual(len(completions.calls), 5)
+        self.assertEqual(len(completions.loops), 1, "异步客户端只应在同一个事件循环上使用")
+
+    def test_retryable_errors_are_retried_with_jittered_backoff(self):
+        completions = StubCompletions(failures={"flaky": 1, "broken": 5})
+        service = _build_service(completions, requests_per_second=0, retry_base_delay=0.01)
+        self.addCleanup(service.close)
+
+        results = service.generate_many(_messages("flaky", "broken"), {})
+
+        self.assertEqual(results, ["回复:flaky", None])
+        self.assertEqual(completions.calls.count("broken"), 3, "默认最多重试 2 次")
+        delays = [service._retry_delay(2) for _ in range(50)]
+        self.assertTrue(all(0.01 <= delay <= 0.02 for delay in delays))
+        self.assertGreater(len(set(delays)), 1, "重试等待时间应带随机抖动")
+
+    def test_token_bucket_spaces_requests_after_burst(self):
+        async def acquire_all():
+            bucket = _TokenBucket(rate=50, capacity=2)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            stamps = []
+            for _ in range(5):
+                await bucket.acquire()
+                stamps.append(loop.time() - started)
+            return stamps
+
+        stamps = asyncio.run(acquire_all())
+
+        self.assertLess(stamps[1], 0.01, "桶内令牌允许突发")
+        self.assertGreaterEqual(stamps[4], 0.055, "突发之后按 rate 放行")
+
+    def test_batch_requests_are_rate_limited_by_shared_bucket(self):
+        service = _build_service(StubCompletions(delays={}), requests_per_second=20, burst=1)
+        self.addCleanup(service.close)
+
+        started = time.perf_counter()
+        service.generate_many(_messages("a", "b", "c", "d"), {}, max_concurrency=4)
+
+        self.assertGreaterEqual(time.perf_counter() - started, 0.14)
+
+    def test_cancelling_submitted_batch_stops_in_flight_requests(self):
+        completions = StubCompletions(delays={"slow-1": 5, "slow-2": 5})
+        service = _build_service(completions, requests_per_second=0, max_concurrency=1)
+        self.addCleanup(service.close)
+        delivered = []
+
+        future = service.submit_many(_messages("fast", "slow-1", "slow-2"), {}, on_result=lambda i, text: delivered.append(i))
+        deadline = time.perf_counter() + 2
+        while completions.calls != ["fast", "slow-1"] and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        started = time.perf_counter()
+        future.cancel()
+        while completions.in_flight and time.perf_counter() - started < 2:
+            time.sleep(0.01)
+
+        self.assertLess(time.perf_counter() - started, 0.5, "取消后正在进行的请求应立即中止")
+        self.assertEqual(completions.in_flight, 0)
+        self.assertEqual(delivered, [0], "已完成的结果保留，取消后不再回调")
+        time.sleep(0.05)
+        self.assertNotIn("slow-2", completions.calls, "排队中的请求不应再发出")
+
+    def test_results_finished_behind_a_slow_request_are_delivered_before_cancel(self):
+        completions = StubCompletions(delays={"slow": 5, "fast": 0.01})
+        service = _build_service(completions, requests_per_second=0, max_concurrency=2)
+        self.addCleanup(service.close)
+        delivered = []
+
+        future = service.submit_many(_messages("slow", "fast"), {}, on_result=lambda i, text: delivered.append(i))
+        deadline = time.perf_counter() + 2
+        while not delivered and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        future.cancel()
+
+        self.assertEqual(delivered, [1], "停止前已完成的结果不应被前面的慢请求扣住")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""锁竞争分析：启用开关（配置与环境变量）、按调用点记录等待/持有耗时、超阈值持有者带调用栈告警"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from core.lock_profiler import (
+    LOCK_PROFILE_ENV,
+    LOCK_PROFILE_THRESHOLD_ENV,
+    ProfiledLock,
+    create_lock,
+    lock_hold_threshold,
+)
+from core.metrics import MetricsRegistry, get_metrics_registry
+from database.database_manager import DatabaseManager
+
+
+def _clean_env():
+    env = dict(os.environ)
+    env.pop(LOCK_PROFILE_ENV, None)
+    env.pop(LOCK_PROFILE_THRESHOLD_ENV, None)
+    return patch.dict(os.environ, env, clear=True)
+
+
+class LockProfilingSettingsTests(unittest.TestCase):
+    def test_disabled_by_default_returns_plain_lock(self):
+        with _clean_env():
+            self.assertIsNone(lock_hold_threshold(None))
+            self.assertIs(type(create_lock("demo")), type(threading.Lock()))
+            self.assertEqual(lock_hold_threshold({"enabled": True}), 0.05)
+            self.assertIsInstance(create_lock("demo", {"enabled": True, "threshold_ms": 5}), ProfiledLock)
+
+    def test_environment_variable_overrides_config(self):
+        with _clean_env():
+            os.environ[LOCK_PROFILE_ENV] = "1"
+            os.environ[LOCK_PROFILE_THRESHOLD_ENV] = "20"
+            self.assertEqual(lock_hold_threshold(None), 0.02)
+            os.environ[LOCK_PROFILE_ENV] = "0"
+            self.assertIsNone(lock_hold_threshold({"enabled": True}))
+
+
+class ProfiledLockTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.lock = ProfiledLock("demo_lock", hold_threshold=0.02, registry=self.registry)
+
+    def _series(self, name):
+        return {series["labels"]["site"]: series for series in self.registry.snapshot()[name]["series"]}
+
+    def _hold_briefly(self):
+        with self.lock:
+            pass
+
+    def _hold_slowly(self, seconds):
+        with self.lock:
+            time.sleep(seconds)
+
+    def test_hold_time_is_recorded_per_call_site_and_slow_holder_logged_with_stack(self):
+        self._hold_briefly()
+        with self.assertLogs("core.lock_profiler", level="WARNING") as logs:
+            self._hold_slowly(0.03)
+
+        holds = self._series("taskmanager_lock_hold_seconds")
+        self.assertEqual(len(holds), 2, "两个调用点应分别成为一条序列")
+        slow_site = next(site for site in holds if site.startswith("_hold_slowly (test_lock_profiler.py:"))
+        self.assertGreaterEqual(holds[slow_site]["sum"], 0.03)
+        self.assertEqual(self._series("taskmanager_lock_slow_holds_total"), {slow_site: {"labels": {"lock": "demo_lock", "site": slow_site}, "value": 1}})
+        message = logs.output[0]
+        self.assertIn(f"被 {slow_site}", message)
+        self.assertIn("调用栈", message)
+        self.assertIn("test_hold_time_is_recorded_per_call_site_and_slow_holder_logged_with_stack", message)
+        self.assertFalse(self.lock.locked())
+
+    def test_waiter_records_wait_time_and_reports_current_holder(self):
+        holding = threading.Event()
+
+        def holder():
+            with self.lock:
+                holding.set()
+                time.sleep(0.05)
+
+        thread = threading.Thread(target=holder, name="flush-worker")
+        thread.start()
+        holding.wait(1)
+        with self.assertLogs("core.lock_profiler", level="WARNING") as logs:
+            self.assertTrue(self.lock.acquire())
+            self.lock.release()
+        thread.join()
+
+        waits = self._series("taskmanager_lock_wait_seconds")
+        waiter_site = next(site for site in waits if site.startswith("test_waiter_records_wait_time"))
+        self.assertGreater(waits[waiter_site]["sum"], 0.02)
+        self.assertTrue(any("持有者: holder (test_lock_profiler.py:" in line and "flush-worker" in line for line in logs.output))
+        self.assertTrue(self.lock.acquire(blocking=False))
+        self.assertFalse(self.lock.acquire(blocking=False), "非重入：持有期间非阻塞获取应失败")
+        self.lock.release()
+
+
+class DatabaseManagerLockProfilingTests(unittest.TestCase):
+    def test_cache_and_listener_locks_are_profiled_when_enabled(self):
+        get_metrics_registry().reset()
+        with tempfile.TemporaryDirectory() as tmpdir, _clean_env():
+            manager = DatabaseManager(
+                db_path=os.path.join(tmpdir, "tasks.db"),
+                flush_interval=0,
+                lock_profiling={"enabled": True, "threshold_ms": 1000},
+            )
+            try:
+                self.assertIsInstance(manager._cache_lock, ProfiledLock)
+                self.assertIsInstance(manager._listener_lock, ProfiledLock)
+                manager.save_task({"id": "t1", "text": "写报告", "position": {"x": 1, "y": 2}})
+                manager.add_task_sync_listener(lambda changes: None)
+            finally:
+                manager.close_connection()
+
+        series = get_metrics_registry().snapshot()["taskmanager_lock_hold_seconds"]["series"]
+        sites = {(item["labels"]["lock"], item["labels"]["site"].split(" ")[0]) for item in series}
+        self.assertIn(("_cache_lock", "save_task"), sites)
+        self.assertIn(("_listener_lock", "add_task_sync_listener"), sites)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""性能指标：注册表的快照与 Prometheus 输出、日志摘要，以及数据库/同步/定时任务热点路径的埋点"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import requests
+
+from core.metrics import MetricsLogReporter, MetricsRegistry, get_metrics_registry, start_metrics_log_reporter
+from database.database_manager import DatabaseManager, metric_endpoint
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_snapshot_reports_every_labelled_series(self):
+        counter = self.registry.counter("demo_total", "计数", ("table",))
+        counter.inc(3, table="tasks")
+        counter.inc(table="tasks")
+        self.registry.gauge("demo_entries", "条目数").set(7)
+        histogram = self.registry.histogram("demo_seconds", "耗时", buckets=(0.01, 0.1))
+        histogram.observe(0.005)
+        histogram.observe(0.05)
+        histogram.observe(3)
+
+        snapshot = self.registry.snapshot()
+
+        self.assertIs(self.registry.counter("demo_total", "计数", ("table",)), counter, "同名指标应复用同一对象")
+        self.assertEqual(snapshot["demo_total"]["series"], [{"labels": {"table": "tasks"}, "value": 4}])
+        self.assertEqual(snapshot["demo_entries"]["series"][0]["value"], 7)
+        series = snapshot["demo_seconds"]["series"][0]
+        self.assertEqual((series["count"], series["max"]), (3, 3))
+        self.assertAlmostEqual(series["sum"], 3.055)
+        self.assertEqual(series["buckets"], {"0.01": 1, "0.1": 2, "+Inf": 3})
+        with self.assertRaises(ValueError):
+            counter.inc(table="tasks", extra="x")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("demo_total", "计数", ("table",))
+
+    def test_prometheus_text_has_help_type_and_cumulative_buckets(self):
+        self.registry.counter("demo_requests_total", "请求数", ("endpoint",)).inc(endpoint='/api/"x"')
+        with self.registry.histogram("demo_seconds", "耗时", buckets=(1.0,)).time():
+            pass
+
+        text = self.registry.render_prometheus()
+
+        self.assertIn("# HELP demo_requests_total 请求数\n# TYPE demo_requests_total counter\n", text)
+        self.assertIn('demo_requests_total{endpoint="/api/\\"x\\""} 1\n', text)
+        self.assertIn('demo_seconds_bucket{le="1"} 1\ndemo_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("demo_seconds_count 1\n", text)
+
+    def test_log_summary_only_reports_changes_since_last_report(self):
+        histogram = self.registry.histogram("demo_seconds", "耗时")
+        histogram.observe(0.002)
+        reporter = MetricsLogReporter(60, registry=self.registry)
+
+        with self.assertLogs("core.metrics", level="INFO"):
+            first = reporter.report()
+        self.assertIn("demo_seconds: 1 次, 平均 2.00 ms", first)
+        self.assertEqual(reporter.report(), "", "没有新数据时不应输出摘要")
+
+        self.assertIsNone(start_metrics_log_reporter({}))
+        self.assertIsNone(start_metrics_log_reporter({"metrics": {"log_summary_interval": 0}}))
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+
+class DatabaseManagerMetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.registry = get_metrics_registry()
+        self.registry.reset()
+        self.manager = DatabaseManager(db_path=os.path.join(self.tmpdir.name, "tasks.db"), flush_interval=0)
+        self.addCleanup(self.manager.close_connection)
+
+    def _series(self, name):
+        return {
+            tuple(sorted(series["labels"].items())): series
+            for series in self.registry.snapshot()[name]["series"]
+        }
+
+    def _task(self, task_id, text):
+        return {"id": task_id, "text": text, "color": "#4ECDC4", "position": {"x": 1, "y": 2}}
+
+    def test_save_flush_and_queries_are_recorded(self):
+        self.manager.save_task(self._task("t1", "写报告"))
+        self.manager.save_tasks_changed([self._task("t1", "写报告"), self._task("t2", "开会")])
+        self.manager.flush_cache_to_db()
+        self.manager.count_task_history("t1")
+        self.manager.get_task_history_rows("t1")
+        self.manager.get_task_history_rows("t1")
+        self.manager.load_completed_tasks_page()
+
+        saved = self._series("taskmanager_db_saved_tasks_total")
+        self.assertEqual(saved[(("operation", "save_task"),)]["value"], 1)
+        self.assertEqual(saved[(("operation", "save_tasks_changed"),)]["value"], 1, "未变化的任务不计入")
+        rows = self._series("taskmanager_db_flush_rows_total")
+        self.assertEqual(rows[(("table", "tasks"),)]["value"], 2)
+        self.assertEqual(rows[(("table", "task_history"),)]["value"], 2)
+        self.assertEqual(self._series("taskmanager_db_flush_seconds")[()]["count"], 1)
+        self.assertEqual(self._series("taskmanager_db_flushes_total")[(("result", "ok"),)]["value"], 1)
+        self.assertEqual(self._series("taskmanager_db_cached_tasks")[()]["value"], 2)
+        queries = self._series("taskmanager_db_query_seconds")
+        for query in ("history_count", "history_rows", "completed_page"):
+            with self.subTest(query=query):
+                self.assertGreater(queries[(("query", query),)]["count"], 0)
+        cache = self._series("taskmanager_db_query_cache_requests_total")
+        self.assertEqual(cache[(("result", "hit"),)]["value"], 1)
+
+    def test_api_requests_are_labelled_by_normalized_endpoint_and_status(self):
+        self.manager.api_base_url = "http://sync.invalid"
+        responses = [FakeResponse(200, {"history": {}}), requests.exceptions.Timeout()]
+
+        def fake_request(**kwargs):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with patch("requests.request", side_effect=fake_request):
+            self.assertEqual(self.manager._make_api_request("GET", "/api/tasks/t1/history"), {"history": {}})
+            self.assertIsNone(self.manager._make_api_request("DELETE", "/api/scheduled_tasks/s1"))
+
+        self.assertEqual(metric_endpoint("/api/tasks/abc/history?x=1"), "/api/tasks/{id}/history")
+        requests_total = self._series("taskmanager_sync_requests_total")
+        self.assertEqual(
+            set(requests_total),
+            {
+                (("endpoint", "/api/tasks/{id}/history"), ("method", "GET"), ("status", "200")),
+                (("endpoint", "/api/scheduled_tasks/{id}"), ("method", "DELETE"), ("status", "timeout")),
+            },
+        )
+        self.assertEqual(sum(series["count"] for series in self._series("taskmanager_sync_request_seconds").values()), 2)
+
+    def test_scheduler_spawn_is_timed(self):
+        from core.scheduler import TaskScheduler
+
+        self.manager.create_scheduled_task({
+            "id": "s1",
+            "title": "周报",
+            "frequency": "daily",
+            "next_run_at": "2026-01-01T08:00:00",
+        })
+        with patch("core.scheduler.get_db_manager", return_value=self.manager):
+            spawned = TaskScheduler().check_and_spawn_scheduled_tasks(datetime(2026, 1, 1, 9, 0))
+
+        self.assertEqual(spawned, 1)
+        self.assertEqual(self._series("taskmanager_scheduler_spawn_seconds")[()]["count"], 1)
+        self.assertEqual(self._series("taskmanager_scheduler_spawned_tasks_total")[()]["value"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
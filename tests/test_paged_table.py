@@ -0,0 +1,177 @@
+"""分页模型/视图表格：按页追加、占位行与可见行惰性行高"""
+
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QModelIndex, Qt
+from PyQt6.QtWidgets import QApplication
+
+from ui.paged_table import PagedTableModel, PagedTableView
+
+
+def _build_model(records, page_size=10, total_count=None, **kwargs):
+    calls = []
+
+    def loader(offset, limit):
+        calls.append((offset, limit))
+        return records[offset:offset + limit]
+
+    model = PagedTableModel(
+        headers=["", "名称", "备注"],
+        row_formatter=lambda record: ["", record["name"], record["notes"]],
+        page_size=page_size,
+        id_getter=lambda record: record["id"],
+        **kwargs,
+    )
+    model.reset(page_loader=loader, total_count=total_count)
+    return model, calls
+
+
+def _records(count, notes=""):
+    return [{"id": f"task-{i}", "name": f"任务{i}", "notes": notes} for i in range(count)]
+
+
+class PagedTableModelTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_fetch_more_appends_rows_without_resetting_loaded_ones(self):
+        model, calls = _build_model(_records(25), total_count=25)
+        model.load_next_page()
+        resets, inserts = [], []
+        model.modelReset.connect(lambda: resets.append(True))
+        model.rowsInserted.connect(lambda _parent, first, last: inserts.append((first, last)))
+
+        self.assertTrue(model.canFetchMore(QModelIndex()))
+        model.fetchMore(QModelIndex())
+        model.fetchMore(QModelIndex())
+
+        self.assertEqual(resets, [], "追加下一页不应重置已加载的行")
+        self.assertEqual(inserts, [(10, 19), (20, 24)])
+        self.assertEqual(calls, [(0, 10), (10, 10), (20, 10)])
+        self.assertFalse(model.canFetchMore(QModelIndex()))
+        self.assertEqual(model.index(24, 1).data(), "任务24")
+
+    def test_empty_page_marks_stale_count_as_exhausted(self):
+        model, calls = _build_model(_records(3), page_size=3, total_count=5)
+        model.load_next_page()
+        model.load_next_page()
+
+        self.assertFalse(model.has_more())
+        self.assertEqual(model.total_count(), 3)
+        self.assertEqual(calls[-1], (3, 3))
+
+    def test_unknown_total_stops_after_short_page(self):
+        model, calls = _build_model(_records(15))
+        model.load_next_page()
+        model.load_next_page()
+        self.assertFalse(model.has_more())
+        self.assertEqual(len(calls), 2)
+
+    def test_placeholder_row_and_check_state(self):
+        model, _calls = _build_model([], checkable_column=0, empty_message="暂无数据", empty_message_column=1)
+        model.load_next_page()
+        self.assertEqual(model.rowCount(), 1)
+        self.assertEqual(model.index(0, 1).data(), "暂无数据")
+        self.assertFalse(model.flags(model.index(0, 0)) & Qt.ItemFlag.ItemIsUserCheckable)
+
+        model, _calls = _build_model(_records(2), checkable_column=0)
+        model.load_next_page()
+        model.setData(model.index(1, 0), Qt.CheckState.Checked, Qt.ItemDataRole.CheckStateRole)
+        self.assertEqual(model.selection().ids, {"task-1"})
+        self.assertEqual(model.index(1, 0).data(Qt.ItemDataRole.CheckStateRole), Qt.CheckState.Checked)
+
+    def test_select_all_matching_tracks_exclusions_for_unloaded_rows(self):
+        model, _calls = _build_model(_records(30), total_count=30, checkable_column=0)
+        model.load_next_page()
+        model.select_all_matching(30)
+        model.setData(model.index(3, 0), Qt.CheckState.Unchecked, Qt.ItemDataRole.CheckStateRole)
+
+        selection = model.selection()
+        self.assertTrue(selection.all_matching)
+        self.assertEqual(selection.ids, {"task-3"}, "全选形态只记录被取消的 ID")
+        self.assertEqual(selection.count(), 29)
+
+        model.load_next_page()
+        self.assertTrue(model.is_row_checked(15), "后加载的行自动处于勾选状态")
+        self.assertFalse(model.is_row_checked(3))
+
+    def test_all_matching_selection_is_bound_to_its_filter(self):
+        model, _calls = _build_model(_records(5), total_count=5, checkable_column=0)
+        model.set_filter_key("报告")
+        model.select_all_matching(5)
+        self.assertEqual(model.selection().filter_key, "报告")
+
+        model.set_filter_key("报告")
+        self.assertTrue(model.selection().all_matching, "筛选条件不变时保留全选")
+        model.set_filter_key("会议")
+        self.assertTrue(model.selection().is_empty(), "筛选条件变化后旧的全选不能再用于批量操作")
+
+        model.set_checked_ids({"task-1"})
+        model.set_filter_key("周报")
+        model.clear_matching_selection()
+        self.assertEqual(model.selection().ids, {"task-1"}, "显式勾选的 ID 不依赖筛选条件")
+
+    def test_loader_error_from_view_fetch_is_reported_not_raised(self):
+        model = PagedTableModel(headers=["名称"], row_formatter=lambda record: [record])
+        model.reset(page_loader=lambda offset, limit: 1 / 0, total_count=5)
+        errors = []
+        model.loadFailed.connect(errors.append)
+
+        model.fetchMore(QModelIndex())
+
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(model.canFetchMore(QModelIndex()))
+
+
+class PagedTableViewTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_row_heights_are_measured_only_for_visible_rows_and_cached(self):
+        model, _calls = _build_model(_records(200, notes="第一行\n第二行\n第三行"), page_size=200, total_count=200)
+        model.load_next_page()
+        view = PagedTableView(model, fixed_width_columns={2: 200}, multiline_columns={2})
+        self.addCleanup(view.deleteLater)
+        view.resize(500, 300)
+
+        measured = view.update_visible_row_heights()
+
+        self.assertGreater(measured, 0)
+        self.assertLess(measured, 20, "只应测量视口内可见的行")
+        self.assertGreater(view.rowHeight(0), view.verticalHeader().defaultSectionSize())
+        self.assertEqual(view.update_visible_row_heights(), 0, "已测量的行应直接复用缓存")
+
+        view.scrollToBottom()
+        self.assertGreater(view.update_visible_row_heights(), 0, "滚动到新区域后再补算该区域的行高")
+        self.assertLess(len(view._row_height_cache), 40)
+
+    def test_updated_record_refreshes_only_its_row_and_row_height(self):
+        records = _records(30, notes="单行")
+        model, _calls = _build_model(records, page_size=30, total_count=30)
+        model.load_next_page()
+        view = PagedTableView(model, fixed_width_columns={2: 200}, multiline_columns={2})
+        self.addCleanup(view.deleteLater)
+        view.resize(500, 300)
+        view.update_visible_row_heights()
+        single_line_height = view.rowHeight(1)
+        changes = []
+        model.dataChanged.connect(lambda top_left, bottom_right, _roles: changes.append(
+            (top_left.row(), bottom_right.row(), top_left.column(), bottom_right.column())
+        ))
+
+        records[1]["notes"] = "第一行\n第二行\n第三行"
+        model.update_record(1)
+
+        self.assertEqual(changes, [(1, 1, 0, 2)])
+        self.assertEqual(model.index(1, 2).data(), "第一行\n第二行\n第三行")
+        self.assertEqual(view.update_visible_row_heights(), 1, "只需重新测量被更新的行")
+        self.assertGreater(view.rowHeight(1), single_line_height)
+
+
+if __name__ == "__main__":
+    unittest.main()
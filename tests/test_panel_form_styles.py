@@ -61,7 +61,7 @@ class PanelFormStyleIntegrationTests(unittest.TestCase):
             'core/archive_table.py',
             'core/export_summary_dialog.py',
             'core/history_viewer.py',
-            'core/scheduler.py',
+            'core/scheduled_task_dialog.py',
             'core/settings_dialog.py',
             'core/task_label.py',
         ):
@@ -243,7 +243,7 @@ class LegacyUiContractTests(unittest.TestCase):
         'core/export_summary_dialog.py',
         'core/history_viewer.py',
         'core/quadrant_widget.py',
-        'core/scheduler.py',
+        'core/scheduled_task_dialog.py',
         'core/task_label.py',
         'core/complete_table.py',
     ]
@@ -262,7 +262,7 @@ class LegacyUiContractTests(unittest.TestCase):
         for rel_path in [
             'ui/ui.py',
             'core/add_task_dialog.py',
-            'core/scheduler.py',
+            'core/scheduled_task_dialog.py',
             'core/history_viewer.py',
             'core/export_summary_dialog.py',
             'core/complete_table.py',
@@ -12,12 +12,8 @@ os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 
 from PyQt6.QtWidgets import QApplication
 
-from core.scheduler import (
-    AddScheduleDialog,
-    ScheduledTaskDialog,
-    TaskScheduler,
-    to_naive_local,
-)
+from core.scheduled_task_dialog import AddScheduleDialog, ScheduledTaskDialog
+from core.scheduler import TaskScheduler, to_naive_local
 from config import config_manager
 from database.database_manager import DatabaseManager
 
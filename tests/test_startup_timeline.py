@@ -0,0 +1,83 @@
+"""启动时间线与延迟导入：阶段记录只生效一次、首次绘制时输出日志与指标，启动路径不加载对话框与 requests"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from benchmarks.startup_imports import DEFERRED_MODULES, PROJECT_ROOT, parse_importtime
+from core.metrics import get_metrics_registry
+from core.startup_timeline import StartupTimeline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _loaded_modules(statement, names):
+    """在新进程中执行 statement，返回 names 里已被加载的模块"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    probe = f"import json, sys; {statement}; print(json.dumps([n for n in {tuple(names)!r} if n in sys.modules]))"
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+class StartupTimelineTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.timeline = StartupTimeline(clock=self.clock)
+
+    def test_marks_are_offsets_from_origin_and_recorded_once(self):
+        self.clock.now = 100.25
+        self.assertAlmostEqual(self.timeline.mark("imports"), 0.25)
+        self.clock.now = 100.5
+        self.assertIsNone(self.timeline.mark("imports"), "同名阶段只记第一次")
+        self.timeline.mark("qapplication")
+
+        self.assertEqual(self.timeline.marks(), [("imports", 0.25), ("qapplication", 0.5)])
+        self.assertIn("qapplication                 500.0 ms  (+250.0 ms)", self.timeline.format())
+
+    def test_finish_logs_timeline_sets_gauge_and_stops_recording(self):
+        get_metrics_registry().reset()
+        self.clock.now = 100.1
+        self.timeline.mark("imports")
+        self.clock.now = 100.4
+
+        with self.assertLogs("core.startup_timeline", level="INFO") as logs:
+            self.assertAlmostEqual(self.timeline.finish(), 0.4)
+        self.assertIn("first_paint", logs.output[0])
+        self.assertIsNone(self.timeline.finish(), "只生效一次")
+        self.assertIsNone(self.timeline.mark("late"))
+
+        series = get_metrics_registry().snapshot()["taskmanager_startup_phase_seconds"]["series"]
+        values = {item["labels"]["phase"]: item["value"] for item in series}
+        self.assertAlmostEqual(values["imports"], 0.1)
+        self.assertAlmostEqual(values["first_paint"], 0.4)
+
+
+class DeferredImportTests(unittest.TestCase):
+    def test_scheduler_logic_does_not_load_qt(self):
+        loaded = _loaded_modules("import core.scheduler", ("PyQt6.QtWidgets", "qfluentwidgets", "requests"))
+        self.assertEqual(loaded, [])
+
+    def test_main_does_not_load_dialogs_or_requests(self):
+        self.assertEqual(_loaded_modules("import main", DEFERRED_MODULES), [])
+
+    def test_parse_importtime_reads_cumulative_column(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   core.metrics\n"
+            "import time:      2000 |       3500 | main\n"
+        )
+        self.assertEqual(parse_importtime(stderr), {"core.metrics": 0.12, "main": 3.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
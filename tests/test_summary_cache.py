@@ -0,0 +1,72 @@
+"""LLM 概要持久化缓存：内容寻址键、有效期与按最近使用淘汰"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from core.summary_cache import SummaryCache, summary_cache_key
+
+
+WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
+os.makedirs(WORKSPACE_TMP_ROOT, exist_ok=True)
+
+MESSAGES = [{"role": "user", "content": "总结任务"}]
+SCHEMA = {"type": "object", "properties": {"summary": {"type": "string"}}}
+
+
+class SummaryCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory(dir=WORKSPACE_TMP_ROOT)
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, "summary_cache.db")
+
+    def _open(self, **kwargs):
+        cache = SummaryCache(self.db_path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_key_depends_on_model_schema_and_messages_only(self):
+        key = summary_cache_key("model-a", SCHEMA, MESSAGES)
+
+        self.assertEqual(key, summary_cache_key("model-a", dict(reversed(list(SCHEMA.items()))), [dict(MESSAGES[0])]))
+        self.assertNotEqual(key, summary_cache_key("model-b", SCHEMA, MESSAGES))
+        self.assertNotEqual(key, summary_cache_key("model-a", SCHEMA, [{"role": "user", "content": "总结任务。"}]))
+
+    def test_entries_persist_across_instances_and_count_hits(self):
+        key = summary_cache_key("model-a", SCHEMA, MESSAGES)
+        cache = self._open()
+        self.assertTrue(cache.put(key, '{"summary": "完成"}', model="model-a"))
+        cache.close()
+
+        reopened = self._open()
+        self.assertEqual(reopened.get_many([key, "missing"]), {key: '{"summary": "完成"}'})
+        self.assertEqual((reopened.hits, reopened.misses), (1, 1))
+
+    def test_expired_entries_are_ignored_and_purged(self):
+        with patch("core.summary_cache.time.time", return_value=1000.0):
+            cache = self._open(ttl_seconds=60)
+            cache.put("old", "旧响应")
+        with patch("core.summary_cache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("old"))
+            self.assertEqual(cache.purge_expired(), 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entries_are_evicted_beyond_max_entries(self):
+        cache = self._open(max_entries=2)
+        with patch("core.summary_cache.time.time", return_value=1000.0):
+            cache.put("a", "A")
+        with patch("core.summary_cache.time.time", return_value=1001.0):
+            cache.put("b", "B")
+        with patch("core.summary_cache.time.time", return_value=1002.0):
+            cache.get("a")
+        with patch("core.summary_cache.time.time", return_value=1003.0):
+            cache.put("c", "C")
+
+        self.assertEqual(len(cache), 2)
+        with patch("core.summary_cache.time.time", return_value=1004.0):
+            self.assertEqual(sorted(cache.get_many(["a", "b", "c"])), ["a", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""导出概要提示词压缩：合并连续编辑、单任务 token 预算与小任务打包"""
+
+import unittest
+
+from core.summary_prompt import (
+    BATCH_SUMMARY_SCHEMA,
+    SINGLE_SUMMARY_SCHEMA,
+    build_summary_plan,
+    build_task_block,
+    compact_history,
+    estimate_tokens,
+    parse_batch_summaries,
+)
+
+
+def _record(field, value, timestamp, action="update"):
+    return {"field": field, "value": value, "action": action, "timestamp": timestamp}
+
+
+def _task(task_id, history):
+    return {"id": task_id, "text": f"任务{task_id}", "created_at": "2026-04-01", "history": history}
+
+
+class SummaryPromptTests(unittest.TestCase):
+    def test_estimate_tokens_counts_cjk_per_character(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("整理周报"), 4)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+
+    def test_consecutive_edits_of_same_field_collapse_to_final_value(self):
+        history = [
+            _record("text", "周报", "2026-04-01 09:00:00", action="create"),
+            _record("text", "整理周报", "2026-04-01 09:05:00"),
+            _record("notes", "草稿", "2026-04-02 10:00:00"),
+            _record("notes", "初稿", "2026-04-02 11:00:00"),
+            _record("notes", "终稿", "2026-04-02 12:00:00"),
+            _record("text", "整理并发送周报", "2026-04-03 09:00:00"),
+        ]
+
+        compacted = compact_history(history)
+
+        self.assertEqual(
+            [(record["field"], record["value"], record["action"]) for record in compacted],
+            [("text", "整理周报", "create"), ("notes", "终稿", "update"), ("text", "整理并发送周报", "update")],
+        )
+        self.assertEqual(compacted[1]["timestamp"], "2026-04-02 12:00:00")
+        self.assertEqual(len(history), 6, "不应修改输入的历史列表")
+
+    def test_token_budget_keeps_most_recent_changes(self):
+        history = [
+            _record("text" if index % 2 else "notes", f"第{index}次修改" + "内容" * 40, f"2026-04-{index + 1:02d} 09:00:00")
+            for index in range(20)
+        ]
+
+        block = build_task_block(_task("busy", history), token_budget=400)
+
+        self.assertLessEqual(estimate_tokens(block), 400)
+        self.assertIn("第19次修改", block, "最近的变更必须保留")
+        self.assertNotIn("第0次修改", block)
+        self.assertRegex(block, r"更早的 \d+ 条变更已省略")
+
+    def test_small_tasks_are_packed_and_large_tasks_sent_alone_in_order(self):
+        tasks = [_task(f"small-{index}", [_record("text", f"小任务{index}", "2026-04-01 09:00:00")]) for index in range(5)]
+        tasks.insert(2, _task("large", [
+            _record("notes" if index % 2 else "text", "很长的备注" * 30, f"2026-04-{index + 1:02d} 09:00:00")
+            for index in range(10)
+        ]))
+
+        plan = build_summary_plan(tasks, small_task_tokens=200, max_tasks_per_batch=3)
+
+        self.assertEqual([request.task_indices for request in plan.requests], [[0, 1, 3], [2], [4, 5]])
+        self.assertTrue(plan.requests[0].batched)
+        self.assertIs(plan.requests[0].schema, BATCH_SUMMARY_SCHEMA)
+        self.assertIs(plan.requests[1].schema, SINGLE_SUMMARY_SCHEMA)
+        self.assertIn("- ID: small-2", plan.requests[0].messages[1]["content"])
+        self.assertEqual((plan.stats.naive_requests, plan.stats.requests), (6, 3))
+        self.assertLess(plan.stats.tokens, plan.stats.naive_tokens)
+        self.assertEqual(plan.stats.describe(), f"请求 6→3，提示词约 {plan.stats.naive_tokens}→{plan.stats.tokens} tokens")
+
+    def test_batch_response_is_mapped_by_task_id(self):
+        self.assertEqual(
+            parse_batch_summaries({"summaries": [{"task_id": "a", "summary": "甲"}, {"summary": "缺少ID"}]}),
+            {"a": "甲"},
+        )
+        self.assertEqual(parse_batch_summaries([{"task_id": 7, "summary": "乙"}]), {"7": "乙"})
+        self.assertEqual(parse_batch_summaries(None), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+"""流式导出：全部任务与单任务历史按批读取、CSV/xlsx 写入、进度与取消"""
+
+import csv
+import inspect
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from core.task_exporter import (
+    HISTORY_EXPORT_HEADERS,
+    TASK_EXPORT_COLUMNS,
+    HistoryExportWorker,
+    TaskExportCancelled,
+    TaskExportWorker,
+    write_task_export,
+)
+from database.database_manager import DatabaseManager
+
+
+WORKSPACE_TMP_ROOT = os.path.join(os.getcwd(), ".tmp-tests")
+os.makedirs(WORKSPACE_TMP_ROOT, exist_ok=True)
+
+HEADERS = [header for header, _getter in TASK_EXPORT_COLUMNS]
+
+
+def _task(index, **overrides):
+    task = {
+        "text": f"任务{index}",
+        "due_date": "2026-05-10",
+        "priority": "高",
+        "notes": "",
+        "directory": "",
+        "created_at": f"2026-05-{index + 1:02d}",
+        "completed": False,
+        "completed_date": "",
+        "deleted": False,
+    }
+    task.update(overrides)
+    return task
+
+
+class WriteTaskExportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory(dir=WORKSPACE_TMP_ROOT)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_csv_export_writes_header_rows_and_reports_progress_per_batch(self):
+        filename = os.path.join(self.tmpdir.name, "tasks.csv")
+        batches = [[_task(0), _task(1, completed=True, completed_date="2026-05-09")], [_task(2, deleted=True)]]
+        progress = []
+
+        written = write_task_export(iter(batches), filename, total=3, progress=lambda *args: progress.append(args))
+
+        self.assertEqual(written, 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        self.assertFalse(os.path.exists(filename + ".part"), "完成后不应残留临时文件")
+        with open(filename, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], HEADERS)
+        self.assertEqual(rows[2][HEADERS.index("完成状态")], "已完成")
+        self.assertEqual(rows[3][HEADERS.index("删除状态")], "已删除")
+
+    def test_xlsx_export_uses_write_only_workbook(self):
+        import openpyxl
+
+        filename = os.path.join(self.tmpdir.name, "tasks.xlsx")
+        write_task_export(iter([[_task(0), _task(1)]]), filename, total=2)
+
+        workbook = openpyxl.load_workbook(filename, read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        workbook.close()
+        self.assertEqual(list(rows[0]), HEADERS)
+        self.assertEqual(rows[2][0], "任务1")
+
+    def test_cancel_removes_partial_file_and_keeps_existing_target(self):
+        filename = os.path.join(self.tmpdir.name, "tasks.csv")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write("旧文件")
+        consumed = []
+
+        def batches():
+            for index in range(10):
+                consumed.append(index)
+                yield [_task(index)]
+
+        with self.assertRaises(TaskExportCancelled):
+            write_task_export(batches(), filename, is_cancelled=lambda: len(consumed) >= 2)
+
+        self.assertEqual(consumed, [0, 1], "取消后不应继续读取后续批次")
+        self.assertFalse(os.path.exists(filename + ".part"))
+        with open(filename, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "旧文件")
+
+
+class TaskExportWorkerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory(dir=WORKSPACE_TMP_ROOT)
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_manager = DatabaseManager(
+            db_path=os.path.join(self.tmpdir.name, "tasks.db"),
+            remote_config={},
+            sync_interval=0,
+            flush_interval=0,
+        )
+        self.addCleanup(self.db_manager.close_connection)
+
+    def _save(self, count):
+        with patch.object(self.db_manager, "_get_task_field_names", return_value=["text"]):
+            for index in range(count):
+                self.db_manager.save_task({
+                    "id": f"task-{index}",
+                    "text": f"任务{index}",
+                    "created_at": f"2026-05-{index + 1:02d}",
+                })
+
+    def test_rows_are_read_from_database_in_batches(self):
+        self._save(5)
+        batches = list(self.db_manager.iter_export_task_rows(batch_size=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[0][0]["text"], "任务4", "按创建时间倒序导出")
+        self.assertEqual(self.db_manager.count_all_tasks(), 5)
+
+    def test_worker_exports_through_read_connection_and_reports_result(self):
+        self._save(3)
+        filename = os.path.join(self.tmpdir.name, "all.csv")
+        worker = TaskExportWorker(filename, db_manager=self.db_manager, batch_size=2)
+        progress, finished = [], []
+        worker.progress.connect(lambda *args: progress.append(args))
+        worker.finished.connect(lambda *args: finished.append(args))
+
+        worker.start()
+        self.assertTrue(worker.wait(5000))
+        QApplication.processEvents()
+
+        self.assertEqual(finished, [(True, filename, 3)])
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        with open(filename, encoding="utf-8-sig", newline="") as f:
+            self.assertEqual(len(list(csv.reader(f))), 4)
+
+    def test_worker_reports_empty_database(self):
+        worker = TaskExportWorker(os.path.join(self.tmpdir.name, "empty.csv"), db_manager=self.db_manager)
+        finished = []
+        worker.finished.connect(lambda *args: finished.append(args))
+
+        worker.start()
+        self.assertTrue(worker.wait(5000))
+        QApplication.processEvents()
+
+        self.assertEqual(finished, [(False, "没有任务可导出", 0)])
+
+    def test_quadrant_export_no_longer_imports_pandas(self):
+        from core.history_viewer import HistoryViewer
+        from core.quadrant_widget import QuadrantWidget
+
+        self.assertNotIn("pandas", inspect.getsource(QuadrantWidget.export_all_tasks))
+        self.assertNotIn("pandas", inspect.getsource(HistoryViewer.export_history))
+
+    def test_closing_main_window_cancels_and_waits_for_running_export(self):
+        from core.quadrant_widget import QuadrantWidget
+
+        self._save(1)
+        filename = os.path.join(self.tmpdir.name, "tasks.csv")
+        worker = TaskExportWorker(filename, db_manager=self.db_manager)
+        first_batch_written = threading.Event()
+
+        def batches(_batch_size):
+            yield [_task(0)]
+            first_batch_written.set()
+            # 模拟导出进行中：直到主窗口关闭时取消才继续
+            while not worker.is_cancelled():
+                time.sleep(0.01)
+            yield [_task(1)]
+
+        host = type("Host", (), {"_task_export_worker": worker})()
+        with patch.object(self.db_manager, "iter_export_task_rows", side_effect=batches):
+            worker.start()
+            self.assertTrue(first_batch_written.wait(5))
+            QuadrantWidget._stop_task_export_worker(host)
+
+        self.assertTrue(worker.isFinished(), "关闭主窗口前应等待导出线程结束")
+        self.assertFalse(os.path.exists(filename))
+        self.assertFalse(os.path.exists(filename + ".part"), "取消后不应残留 .part 文件")
+        source = inspect.getsource(QuadrantWidget.closeEvent)
+        self.assertLess(source.index("_stop_task_export_worker"), source.index("close_connection"))
+
+    def _run_history_export(self, filename, **kwargs):
+        worker = HistoryExportWorker("task-0", filename, db_manager=self.db_manager, field_names={"text": "任务内容"}, **kwargs)
+        finished = []
+        worker.finished.connect(lambda *args: finished.append(args))
+        return worker, finished
+
+    def test_history_worker_streams_full_history_in_ascending_order(self):
+        with patch.object(self.db_manager, "_get_task_field_names", return_value=["text"]):
+            for version in range(5):
+                self.db_manager.save_task({"id": "task-0", "text": f"版本{version}", "created_at": "2026-05-01"})
+        self.db_manager.flush_cache_to_db()
+        expected = len(self.db_manager.get_task_history_rows("task-0", limit=100))
+        filename = os.path.join(self.tmpdir.name, "history.csv")
+        worker, finished = self._run_history_export(filename, batch_size=2)
+
+        with patch.object(self.db_manager, "iter_task_history_rows", wraps=self.db_manager.iter_task_history_rows) as iter_rows:
+            worker.start()
+            self.assertTrue(worker.wait(5000))
+        QApplication.processEvents()
+
+        iter_rows.assert_called_once_with("task-0", batch_size=2, ascending=True)
+        self.assertEqual(finished, [(True, filename, expected)])
+        self.assertFalse(os.path.exists(filename + ".part"))
+        with open(filename, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], HISTORY_EXPORT_HEADERS)
+        self.assertEqual(len(rows) - 1, expected)
+        self.assertEqual([row[3] for row in rows[1:]][-1], "版本4", "按时间正序导出，最新的值在最后")
+        self.assertEqual({row[1] for row in rows[1:]}, {"任务内容"})
+
+    def test_cancelled_history_export_leaves_no_file(self):
+        with patch.object(self.db_manager, "_get_task_field_names", return_value=["text"]):
+            self.db_manager.save_task({"id": "task-0", "text": "任务", "created_at": "2026-05-01"})
+        filename = os.path.join(self.tmpdir.name, "history.csv")
+        worker, finished = self._run_history_export(filename)
+        worker.cancel()
+
+        worker.start()
+        self.assertTrue(worker.wait(5000))
+        QApplication.processEvents()
+
+        self.assertEqual(finished, [(False, "导出已取消", 0)])
+        self.assertFalse(os.path.exists(filename))
+        self.assertFalse(os.path.exists(filename + ".part"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,6 +16,10 @@ class TaskLabelShadowTests(unittest.TestCase):
     def setUpClass(cls):
         cls.app = QApplication.instance() or QApplication([])
 
+    def setUp(self):
+        # 最先注册、最后执行：本用例的 deleteLater 在本用例内完成，不留到下一个用例的 sendPostedEvents 中析构
+        self.addCleanup(QCoreApplication.sendPostedEvents, None, QEvent.Type.DeferredDelete)
+
     def test_task_label_should_apply_a_subtle_drop_shadow(self):
         host = QWidget()
         label = TaskLabel(
@@ -46,6 +50,30 @@ class TaskLabelShadowTests(unittest.TestCase):
         self.assertLessEqual(effect.color().alpha(), 80)
 
 
+    def test_status_changed_should_mark_label_dirty_until_saved(self):
+        host = QWidget()
+        label = TaskLabel(
+            task_id="dirty-test",
+            color="#7ED6DF",
+            parent=host,
+            field_definitions=[
+                {"name": "text", "label": "任务内容", "type": "text", "required": True},
+                {"name": "due_date", "label": "到期日期", "type": "date", "required": False},
+            ],
+            text="脏标记任务",
+            due_date="",
+        )
+        self.addCleanup(label.deleteLater)
+        self.addCleanup(host.deleteLater)
+
+        self.assertTrue(label.is_dirty(), "新建标签尚未保存，应视为脏")
+        label.mark_clean()
+        self.assertFalse(label.is_dirty())
+
+        label.statusChanged.emit(label)
+
+        self.assertTrue(label.is_dirty(), "任何触发 statusChanged 的修改都应重新标脏")
+
     def test_detail_notes_formatter_should_preserve_line_breaks(self):
         self.assertEqual(
             TaskLabel._format_detail_notes_html("第一行\n第二行"),
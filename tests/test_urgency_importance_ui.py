@@ -62,7 +62,7 @@ class UrgencyImportanceUiTests(unittest.TestCase):
         if "requests" not in sys.modules:
             sys.modules["requests"] = types.SimpleNamespace()
 
-        from core.scheduler import AddScheduleDialog
+        from core.scheduled_task_dialog import AddScheduleDialog
 
         dialog = AddScheduleDialog(
             task_fields=[
@@ -91,7 +91,7 @@ class UrgencyImportanceUiTests(unittest.TestCase):
         if "requests" not in sys.modules:
             sys.modules["requests"] = types.SimpleNamespace()
 
-        from core.scheduler import AddScheduleDialog
+        from core.scheduled_task_dialog import AddScheduleDialog
 
         dialog = AddScheduleDialog(
             task_fields=[
@@ -1,6 +1,7 @@
 """UI package exports for convenience imports."""
 
 from .adaptive_table import AdaptiveTextTableWidget, compute_multiline_item_size_hint
+from .paged_table import MatchSelection, PagedTableModel, PagedTableView
 from .scrollbar import FLUENT_SCROLL_AVAILABLE, FluentScrollArea, install_global_fluent_scrollbars
 from .ui import UIManager, MyColorDialog
 from .styles import StyleManager
@@ -9,6 +10,9 @@ __all__ = [
     "AdaptiveTextTableWidget",
     "FLUENT_SCROLL_AVAILABLE",
     "FluentScrollArea",
+    "MatchSelection",
+    "PagedTableModel",
+    "PagedTableView",
     "compute_multiline_item_size_hint",
     "install_global_fluent_scrollbars",
     "UIManager",
@@ -0,0 +1,517 @@
+"""按页追加数据的模型/视图表格
+
+PagedTableModel 只持有已加载的记录，通过 canFetchMore/fetchMore 按页向末尾追加，
+已有行不会因加载下一页而重建；PagedTableView 只为视口内可见的行计算多行文本高度，
+计算结果按行缓存，滚动到新区域时才补算。
+
+页面既可以同步读取（page_loader 直接返回记录），也可以异步请求（page_requester 只发起
+请求，结果到达后由调用方 finish_page()/fail_page() 回填），后者用于把查询放到后台线程。
+
+勾选状态由 MatchSelection 保存：要么是显式勾选的 ID 集合，要么是“当前筛选条件下的
+全部匹配项”减去排除集合，因此全选无需把所有匹配 ID 读入内存。全选时记录所依据的筛选
+条件（filter_key），模型的筛选条件变化后该全选随之清除，批量操作只能作用于用户确认过的匹配集。
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QHeaderView
+from qfluentwidgets import TableView
+
+from .adaptive_table import compute_multiline_item_size_hint
+
+logger = logging.getLogger(__name__)
+
+PageLoader = Callable[[int, int], List[Any]]
+PageRequester = Callable[[int, int], None]
+
+
+class MatchSelection:
+    """勾选状态：显式 ID 集合，或“filter_key 条件下的全部匹配项 - 排除 ID”"""
+
+    def __init__(self):
+        self.all_matching = False
+        self.ids = set()
+        self.matching_count = 0
+        self.filter_key: Any = None
+
+    def clear(self) -> None:
+        self.all_matching = False
+        self.ids = set()
+        self.matching_count = 0
+        self.filter_key = None
+
+    def select_all(self, matching_count: int, filter_key: Any = None) -> None:
+        self.all_matching = True
+        self.ids = set()
+        self.matching_count = max(0, int(matching_count))
+        self.filter_key = filter_key
+
+    def set_ids(self, task_ids: Iterable[str]) -> None:
+        self.all_matching = False
+        self.ids = {task_id for task_id in task_ids if task_id}
+        self.matching_count = 0
+        self.filter_key = None
+
+    def matches_filter(self, filter_key: Any) -> bool:
+        """显式 ID 不依赖筛选条件；全选只在记录的筛选条件下有效"""
+        return not self.all_matching or self.filter_key == filter_key
+
+    def set_selected(self, task_id: str, selected: bool) -> None:
+        # 全选形态下 ids 表示被取消勾选的项
+        if selected != self.all_matching:
+            self.ids.add(task_id)
+        else:
+            self.ids.discard(task_id)
+
+    def is_selected(self, task_id: Optional[str]) -> bool:
+        if not task_id:
+            return False
+        return (task_id not in self.ids) if self.all_matching else (task_id in self.ids)
+
+    def count(self) -> int:
+        if self.all_matching:
+            return max(0, self.matching_count - len(self.ids))
+        return len(self.ids)
+
+    def is_empty(self) -> bool:
+        return self.count() == 0
+
+
+class PagedTableModel(QAbstractTableModel):
+    """只读分页表格模型，可选一列复选框（按记录 ID 记录勾选状态）"""
+
+    pageLoaded = pyqtSignal(int)
+    loadFailed = pyqtSignal(str)
+    checkedChanged = pyqtSignal()
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        row_formatter: Callable[[Any], Sequence[Any]],
+        page_loader: Optional[PageLoader] = None,
+        page_size: int = 50,
+        total_count: Optional[int] = None,
+        id_getter: Optional[Callable[[Any], Optional[str]]] = None,
+        checkable_column: Optional[int] = None,
+        empty_message: str = "",
+        empty_message_column: int = 0,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._row_formatter = row_formatter
+        self._id_getter = id_getter
+        self._checkable_column = checkable_column
+        self._empty_message_column = empty_message_column
+        self._records: List[Any] = []
+        self._display_rows: List[List[str]] = []
+        self._selection = MatchSelection()
+        self._filter_key: Any = None
+        self._page_loader = page_loader
+        self.page_size = page_size
+        self._total_count = total_count
+        self._page_requester: Optional[PageRequester] = None
+        self._page_pending = False
+        self._exhausted = page_loader is None
+        self._empty_message = empty_message
+
+    # ---- 数据装载 ----
+
+    def reset(
+        self,
+        records: Optional[Iterable[Any]] = None,
+        page_loader: Optional[PageLoader] = None,
+        total_count: Optional[int] = None,
+        page_size: Optional[int] = None,
+        empty_message: Optional[str] = None,
+        page_requester: Optional[PageRequester] = None,
+    ) -> None:
+        """清空已加载数据并换上新的数据源；勾选状态保持不变，由调用方决定是否清除"""
+        self.beginResetModel()
+        self._records = []
+        self._display_rows = []
+        for record in records or []:
+            self._records.append(record)
+            self._display_rows.append(self._format_record(record))
+        self._page_loader = page_loader
+        self._page_requester = page_requester
+        self._page_pending = False
+        self._total_count = total_count
+        self._exhausted = page_loader is None and page_requester is None
+        if page_size is not None:
+            self.page_size = page_size
+        if empty_message is not None:
+            self._empty_message = empty_message
+        self.endResetModel()
+
+    def _format_record(self, record: Any) -> List[str]:
+        return ["" if value is None else str(value) for value in self._row_formatter(record)]
+
+    def append_records(self, records: Iterable[Any]) -> int:
+        """在末尾追加记录，只通知新增行；返回追加的行数"""
+        records = list(records)
+        if not records:
+            return 0
+        display_rows = [self._format_record(record) for record in records]
+        if not self._records:
+            # 从占位行切换到真实数据，行数变化不连续，直接整体重置
+            self.beginResetModel()
+            self._records.extend(records)
+            self._display_rows.extend(display_rows)
+            self.endResetModel()
+        else:
+            first = len(self._records)
+            self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+            self._records.extend(records)
+            self._display_rows.extend(display_rows)
+            self.endInsertRows()
+        return len(records)
+
+    def update_record(self, row: int, record: Any = None) -> None:
+        """替换一行记录（为空时按原记录重新格式化），只通知该行变化"""
+        if not 0 <= row < len(self._records):
+            return
+        if record is not None:
+            self._records[row] = record
+        self._display_rows[row] = self._format_record(self._records[row])
+        self.dataChanged.emit(
+            self.index(row, 0),
+            self.index(row, len(self._headers) - 1),
+            [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole],
+        )
+
+    def load_next_page(self) -> int:
+        """加载下一页并返回新增行数；加载失败时异常向调用方抛出。
+
+        异步数据源只发起请求并返回 0，页面到达后由 finish_page() 追加。
+        """
+        if not self.has_more() or self._page_pending:
+            return 0
+        if self._page_requester is not None:
+            self._page_pending = True
+            self._page_requester(len(self._records), self.page_size)
+            return 0
+        return self.finish_page(self._page_loader(len(self._records), self.page_size))
+
+    def finish_page(self, records: Optional[Iterable[Any]]) -> int:
+        """回填一页查询结果，返回新增行数"""
+        self._page_pending = False
+        page = list(records or [])
+        if not page:
+            # 计数已过期（数据在两次查询之间被还原或删除），以实际加载量为准
+            self._exhausted = True
+            self._total_count = len(self._records)
+            self.pageLoaded.emit(0)
+            return 0
+        appended = self.append_records(page)
+        if self._total_count is None and len(page) < self.page_size:
+            self._exhausted = True
+        self.pageLoaded.emit(appended)
+        return appended
+
+    def fail_page(self, message: str) -> None:
+        """异步页面加载失败：停止继续翻页并通过 loadFailed 通知"""
+        self._page_pending = False
+        self._exhausted = True
+        self.loadFailed.emit(message)
+
+    def has_more(self) -> bool:
+        if self._exhausted or (self._page_loader is None and self._page_requester is None):
+            return False
+        return self._total_count is None or len(self._records) < self._total_count
+
+    def is_page_pending(self) -> bool:
+        return self._page_pending
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid() or self._page_pending:
+            return False
+        return self.has_more()
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        """视图滚动到底部时由 Qt 调用；这里不能抛出异常，失败时通过 loadFailed 通知"""
+        if parent.isValid():
+            return
+        try:
+            self.load_next_page()
+        except Exception as e:
+            self._page_pending = False
+            self._exhausted = True
+            logger.error(f"加载下一页数据失败: {str(e)}")
+            self.loadFailed.emit(str(e))
+
+    def loaded_count(self) -> int:
+        return len(self._records)
+
+    def total_count(self) -> int:
+        if self._total_count is None:
+            return len(self._records)
+        return max(self._total_count, len(self._records))
+
+    def records(self) -> List[Any]:
+        """已加载的记录列表（只读，调用方不要修改）"""
+        return self._records
+
+    def record(self, row: int) -> Any:
+        if 0 <= row < len(self._records):
+            return self._records[row]
+        return None
+
+    def record_id(self, row: int) -> Optional[str]:
+        record = self.record(row)
+        if record is None or self._id_getter is None:
+            return None
+        return self._id_getter(record)
+
+    def showing_placeholder(self) -> bool:
+        return not self._records and bool(self._empty_message)
+
+    def empty_message_column(self) -> int:
+        return self._empty_message_column
+
+    # ---- 勾选 ----
+
+    def selection(self) -> MatchSelection:
+        return self._selection
+
+    def set_checked_ids(self, task_ids: Iterable[str]) -> None:
+        """切换为显式勾选给定 ID"""
+        self._selection.set_ids(task_ids)
+        self._emit_check_column_changed()
+        self.checkedChanged.emit()
+
+    def filter_key(self) -> Any:
+        return self._filter_key
+
+    def set_filter_key(self, filter_key: Any) -> None:
+        """记录已加载数据对应的筛选条件；按旧条件做的全选随之清除"""
+        self._filter_key = filter_key
+        if not self._selection.matches_filter(filter_key):
+            self.clear_selection()
+
+    def select_all_matching(self, matching_count: int) -> None:
+        """勾选当前筛选条件下的全部匹配项，O(1)，不需要读取全部 ID"""
+        self._selection.select_all(matching_count, self._filter_key)
+        self._emit_check_column_changed()
+        self.checkedChanged.emit()
+
+    def clear_matching_selection(self) -> None:
+        """筛选条件即将变化时作废全选；显式勾选的 ID 保留"""
+        if self._selection.all_matching:
+            self.clear_selection()
+
+    def clear_selection(self) -> None:
+        self._selection.clear()
+        self._emit_check_column_changed()
+        self.checkedChanged.emit()
+
+    def is_row_checked(self, row: int) -> bool:
+        return self._selection.is_selected(self.record_id(row))
+
+    def _emit_check_column_changed(self) -> None:
+        if self._checkable_column is None or not self._records:
+            return
+        column = self._checkable_column
+        self.dataChanged.emit(
+            self.index(0, column),
+            self.index(len(self._records) - 1, column),
+            [Qt.ItemDataRole.CheckStateRole],
+        )
+
+    # ---- QAbstractTableModel ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        if self.showing_placeholder():
+            return 1
+        return len(self._records)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+            and 0 <= section < len(self._headers)
+        ):
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if self.showing_placeholder():
+            if column != self._empty_message_column:
+                return None
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self._empty_message
+            if role == Qt.ItemDataRole.TextAlignmentRole:
+                return Qt.AlignmentFlag.AlignCenter
+            return None
+        if row >= len(self._display_rows):
+            return None
+        if role == Qt.ItemDataRole.CheckStateRole and column == self._checkable_column:
+            return Qt.CheckState.Checked if self.is_row_checked(row) else Qt.CheckState.Unchecked
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            if column == self._checkable_column:
+                return None
+            values = self._display_rows[row]
+            return values[column] if column < len(values) else ""
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if self.showing_placeholder():
+            return Qt.ItemFlag.ItemIsEnabled
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == self._checkable_column:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if (
+            not index.isValid()
+            or role != Qt.ItemDataRole.CheckStateRole
+            or index.column() != self._checkable_column
+        ):
+            return False
+        task_id = self.record_id(index.row())
+        if not task_id:
+            return False
+        checked = value in (Qt.CheckState.Checked, Qt.CheckState.Checked.value)
+        self._selection.set_selected(task_id, checked)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.checkedChanged.emit()
+        return True
+
+
+class PagedTableView(TableView):
+    """PagedTableModel 的视图：固定列宽、多行列按可见行惰性计算行高"""
+
+    def __init__(
+        self,
+        model: PagedTableModel,
+        fixed_width_columns: Optional[Dict[int, int]] = None,
+        multiline_columns=None,
+        stretch_columns=None,
+        parent=None,
+        min_height: int = 200,
+    ):
+        super().__init__(parent)
+        self._fixed_width_columns = dict(fixed_width_columns or {})
+        self._multiline_columns = set(multiline_columns or set())
+        self._stretch_columns = set(stretch_columns or set())
+        self._row_height_cache: Dict[int, int] = {}
+        self._row_height_timer = QTimer(self)
+        self._row_height_timer.setSingleShot(True)
+        self._row_height_timer.setInterval(0)
+        self._row_height_timer.timeout.connect(self.update_visible_row_heights)
+
+        self.setModel(model)
+        self.setBorderVisible(True)
+        self.setBorderRadius(8)
+        self.setWordWrap(True)
+        self.setTextElideMode(Qt.TextElideMode.ElideNone)
+        self.setSortingEnabled(False)
+        self.setMinimumHeight(min_height)
+
+        header = self.horizontalHeader()
+        header.setTextElideMode(Qt.TextElideMode.ElideNone)
+        header.setStretchLastSection(False)
+        # 按内容调整列宽时只采样可见附近的行，避免随已加载行数线性增长
+        header.setResizeContentsPrecision(100)
+        for column in range(model.columnCount()):
+            if column in self._fixed_width_columns:
+                header.setSectionResizeMode(column, QHeaderView.ResizeMode.Fixed)
+                self.setColumnWidth(column, self._fixed_width_columns[column])
+            elif column in self._stretch_columns:
+                header.setSectionResizeMode(column, QHeaderView.ResizeMode.Stretch)
+            else:
+                header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        header.sectionResized.connect(self._on_column_resized)
+
+        # 行高由本类按需设置，不使用 ResizeToContents（它会测量全部行）
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+
+        model.modelReset.connect(self._on_model_reset)
+        model.rowsInserted.connect(self._schedule_row_height_update)
+        model.dataChanged.connect(self._on_data_changed)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_row_height_update)
+        self._on_model_reset()
+
+    def rowCount(self) -> int:
+        return self.model().rowCount()
+
+    def cell_text(self, row: int, column: int) -> str:
+        value = self.model().index(row, column).data(Qt.ItemDataRole.DisplayRole)
+        return "" if value is None else str(value)
+
+    def _on_model_reset(self) -> None:
+        self._row_height_cache.clear()
+        self.clearSpans()
+        model = self.model()
+        if model.showing_placeholder():
+            column = model.empty_message_column()
+            span = model.columnCount() - column
+            if span > 1:
+                self.setSpan(0, column, 1, span)
+        self._schedule_row_height_update()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()) -> None:
+        # 行内容变化后按新文本重新测量这些行的行高
+        if roles and Qt.ItemDataRole.DisplayRole not in roles:
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self._row_height_cache.pop(row, None)
+        self._schedule_row_height_update()
+
+    def _on_column_resized(self, column, _old_size, _new_size) -> None:
+        if column in self._multiline_columns:
+            self._row_height_cache.clear()
+            self._schedule_row_height_update()
+
+    def _schedule_row_height_update(self, *_args) -> None:
+        self._row_height_timer.start()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_row_height_update()
+
+    def _measure_row_height(self, row: int, font_metrics) -> int:
+        height = self.verticalHeader().defaultSectionSize()
+        model = self.model()
+        for column in self._multiline_columns:
+            text = model.index(row, column).data(Qt.ItemDataRole.DisplayRole) or ""
+            width = self._fixed_width_columns.get(column, self.columnWidth(column))
+            height = max(height, compute_multiline_item_size_hint(font_metrics, str(text), width).height())
+        return height
+
+    def update_visible_row_heights(self) -> int:
+        """为视口内尚未测量的行计算并设置行高，返回本次新测量的行数"""
+        model = self.model()
+        row_count = model.rowCount()
+        if not row_count or not self._multiline_columns or model.showing_placeholder():
+            return 0
+        font_metrics = self.fontMetrics()
+        viewport_bottom = self.viewport().height()
+        row = max(self.rowAt(0), 0)
+        measured = 0
+        while row < row_count:
+            if row not in self._row_height_cache:
+                height = self._measure_row_height(row, font_metrics)
+                self._row_height_cache[row] = height
+                if self.rowHeight(row) != height:
+                    self.setRowHeight(row, height)
+                measured += 1
+            if self.rowViewportPosition(row) + self.rowHeight(row) >= viewport_bottom:
+                break
+            row += 1
+        return measured